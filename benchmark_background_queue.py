@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Background Queue Benchmark
+Measures BackgroundTaskQueue throughput against the in-memory SQS stand-in
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, Any
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from shared.async_processor import BackgroundTaskQueue, LocalQueue, QueueConfig  # noqa: E402
+
+QUEUE_URL = 'local://background'
+TASK_TYPES = ['file_processing', 'quiz_generation', 'analytics_calculation']
+
+
+def build_queue(job_ms: float, poison_rate: float, type_limit: int) -> BackgroundTaskQueue:
+    """Queue whose processors sleep for job_ms and fail at poison_rate"""
+    
+    async def synthetic(user_id: str, task_data: Dict[str, Any]) -> bool:
+        await asyncio.sleep(job_ms / 1000)
+        return not task_data.get('poison')
+    
+    queue = BackgroundTaskQueue(sqs_client=LocalQueue(), queue_url=QUEUE_URL)
+    queue.dedup_table = None  # In-process deduplication only
+    queue.task_processors = {task_type: synthetic for task_type in TASK_TYPES}
+    if type_limit:
+        queue.type_limits = {task_type: type_limit for task_type in TASK_TYPES}
+    return queue
+
+
+async def run(args) -> Dict[str, Any]:
+    queue = build_queue(args.job_ms, args.poison_rate, args.type_limit)
+    rng = random.Random(args.seed)
+    
+    for i in range(args.messages):
+        await queue.enqueue_task(
+            task_type=TASK_TYPES[i % len(TASK_TYPES)],
+            user_id=f"user-{i % 7}",
+            task_data={'index': i, 'poison': rng.random() < args.poison_rate}
+        )
+    
+    started = time.perf_counter()
+    processed = 0
+    batches = 0
+    while batches < args.max_batches:
+        count = await queue.process_queue_messages()
+        batches += 1
+        processed += count
+        if queue.sqs.stats['received'] >= args.messages:
+            break
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'messages': args.messages,
+        'processed': processed,
+        'failed': queue.stats['messages_failed'],
+        'left_on_queue': queue.sqs.pending_count(),
+        'batches': batches,
+        'seconds': round(elapsed, 3),
+        'messages_per_second': round(processed / elapsed, 1) if elapsed else 0.0,
+        'delete_calls': queue.sqs.stats['delete_calls'],
+        'receive_calls': queue.sqs.stats['receive_calls']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for BackgroundTaskQueue batch consumption")
+    parser.add_argument('--messages', type=int, default=200, help="Messages to enqueue")
+    parser.add_argument('--job-ms', type=float, default=50, help="Simulated processing time per message")
+    parser.add_argument('--poison-rate', type=float, default=0.02, help="Fraction of messages that fail")
+    parser.add_argument('--type-limit', type=int, default=0, help="Per-type concurrency (default: configured limits)")
+    parser.add_argument('--max-batches', type=int, default=1000, help="Stop after this many receives")
+    parser.add_argument('--seed', type=int, default=7, help="Random seed for poison messages")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+    
+    # Long polling is pointless against the in-memory queue
+    QueueConfig.WAIT_TIME_SECONDS = 0
+    
+    result = asyncio.run(run(args))
+    
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print(f"Processed {result['processed']}/{result['messages']} messages "
+          f"({result['failed']} failed, {result['left_on_queue']} left) in {result['seconds']}s")
+    print(f"Throughput: {result['messages_per_second']} msg/s over {result['batches']} batches")
+    print(f"SQS calls: {result['receive_calls']} receive, {result['delete_calls']} delete batch")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Chat Workflow Benchmark
+Per-node timeline of the chat pipeline run in sequence vs as a parallel DAG, with simulated service latencies
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from shared.workflow_graph import WorkflowGraph, CompiledWorkflow  # noqa: E402
+
+
+def simulated(name: str, latency_ms: float, writes: List[str]):
+    """Node that waits like a service call and records itself"""
+    
+    async def node(state: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(latency_ms / 1000)
+        for key in writes:
+            state[key] = name
+        state['tools_used'].append(name)
+        return state
+    return node
+
+
+def sequential_workflow(latency: Dict[str, float]) -> CompiledWorkflow:
+    """The previous layout: language -> intent (with key phrases/entities) -> retrieval -> answer -> synthesis"""
+    
+    workflow = WorkflowGraph("chat-sequential")
+    workflow.add_node("language_detection", simulated("language_detection", latency['comprehend'], ['language']))
+    workflow.add_node("intent_detection", simulated("intent_detection", latency['comprehend'], ['intent']))
+    workflow.add_node("rag_retrieval", simulated("rag_retrieval", latency['retrieval'], ['rag_context']))
+    workflow.add_node("question_answering", simulated("question_answering", latency['bedrock'], ['final_response']))
+    workflow.add_node("response_synthesis", simulated("response_synthesis", latency['comprehend'], ['sentiment']))
+    workflow.set_entry_point("language_detection")
+    workflow.add_edge("language_detection", "intent_detection")
+    workflow.add_edge("intent_detection", "rag_retrieval")
+    workflow.add_edge("rag_retrieval", "question_answering")
+    workflow.add_edge("question_answering", "response_synthesis")
+    workflow.add_edge("response_synthesis", "END")
+    return workflow.compile()
+
+
+def parallel_workflow(latency: Dict[str, float]) -> CompiledWorkflow:
+    """The chat handler's layout: keyword intent first, then Comprehend and retrieval fan out"""
+    
+    workflow = WorkflowGraph("chat-parallel")
+    workflow.add_node("intent_detection", simulated("intent_detection", 0, ['intent']),
+                      reads=["messages"], writes=["intent"])
+    # Language, key phrases and entities are one concurrent (and cached) Comprehend pass
+    workflow.add_node("message_analysis", simulated("message_analysis", latency['comprehend'], ['language', 'key_phrases']),
+                      reads=["messages"], writes=["language", "key_phrases"])
+    workflow.add_node("rag_retrieval", simulated("rag_retrieval", latency['retrieval'], ['rag_context']),
+                      reads=["messages"], writes=["rag_context"])
+    workflow.add_node("question_answering", simulated("question_answering", latency['bedrock'], ['final_response']),
+                      reads=["messages", "rag_context"], writes=["final_response"])
+    workflow.add_node("response_synthesis", simulated("response_synthesis", latency['comprehend'], ['sentiment']),
+                      reads=["language", "final_response"], writes=["sentiment"])
+    workflow.add_reducer("tools_used")
+    workflow.set_entry_point("intent_detection")
+    workflow.add_edge("intent_detection", "message_analysis")
+    workflow.add_edge("intent_detection", "rag_retrieval")
+    workflow.add_edge("rag_retrieval", "question_answering")
+    for node in ("message_analysis", "question_answering"):
+        workflow.add_edge(node, "response_synthesis")
+    workflow.add_edge("response_synthesis", "END")
+    return workflow.compile()
+
+
+async def timeline(workflow: CompiledWorkflow) -> Dict[str, Any]:
+    timings = {}
+    started = time.perf_counter()
+    await workflow.ainvoke({'messages': ['What is entropy?'], 'tools_used': []}, timings=timings)
+    return {'total_ms': round((time.perf_counter() - started) * 1000, 1), 'nodes': timings}
+
+
+def print_timeline(label: str, result: Dict[str, Any]) -> None:
+    print(f"{label}: {result['total_ms']} ms")
+    scale = max(end for _, end in result['nodes'].values()) or 1
+    for node, (start, end) in sorted(result['nodes'].items(), key=lambda item: item[1]):
+        bar = ' ' * int(start / scale * 40) + '#' * max(1, int((end - start) / scale * 40))
+        print(f"  {node:<20} {start:>7.1f} - {end:>7.1f} ms  {bar}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-node timing of the chat workflow, sequential vs parallel")
+    parser.add_argument('--comprehend-ms', type=float, default=60, help="Simulated Comprehend call latency")
+    parser.add_argument('--retrieval-ms', type=float, default=120, help="Simulated vector retrieval latency")
+    parser.add_argument('--bedrock-ms', type=float, default=400, help="Simulated Bedrock generation latency")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+    
+    latency = {'comprehend': args.comprehend_ms, 'retrieval': args.retrieval_ms, 'bedrock': args.bedrock_ms}
+    sequential = asyncio.run(timeline(sequential_workflow(latency)))
+    parallel = asyncio.run(timeline(parallel_workflow(latency)))
+    result = {
+        'latency_ms': latency,
+        'sequential': sequential,
+        'parallel': parallel,
+        'saved_ms': round(sequential['total_ms'] - parallel['total_ms'], 1)
+    }
+    
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print_timeline("Sequential", sequential)
+    print_timeline("Parallel DAG", parallel)
+    print(f"Saved: {result['saved_ms']} ms per request")
+
+
+if __name__ == '__main__':
+    main()
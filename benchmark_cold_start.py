@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark
+Measures import time and first-request latency for every Lambda handler in src/
+"""
+
+import os
+import sys
+import json
+import re
+import argparse
+import subprocess
+from typing import Dict, Any, List
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+
+# Optional libraries that should only load on the code paths that use them
+HEAVY_MODULES = ['langchain_core', 'langchain_aws', 'langgraph', 'pinecone', 'PyPDF2', 'pdfplumber', 'docx', 'supabase']
+
+DEFAULT_EVENT = {
+    'httpMethod': 'OPTIONS',
+    'path': '/',
+    'headers': {},
+    'queryStringParameters': None,
+    'body': None,
+    'requestContext': {}
+}
+
+# Runs in a fresh interpreter per handler so every measurement is a true cold start
+CHILD_SCRIPT = r'''
+import sys, json, time, asyncio, importlib
+module_name, event, src_dir, heavy_modules = sys.argv[1], json.loads(sys.argv[2]), sys.argv[3], json.loads(sys.argv[4])
+sys.path.insert(0, src_dir)
+
+start = time.perf_counter()
+import boto3
+import boto3.session
+boto3_ms = (time.perf_counter() - start) * 1000
+
+constructed = {'client': 0, 'resource': 0}
+def counting(kind, original):
+    def wrapper(self, *args, **kwargs):
+        constructed[kind] += 1
+        return original(self, *args, **kwargs)
+    return wrapper
+boto3.session.Session.client = counting('client', boto3.session.Session.client)
+boto3.session.Session.resource = counting('resource', boto3.session.Session.resource)
+
+result = {'module': module_name, 'boto3_import_ms': round(boto3_ms, 2)}
+start = time.perf_counter()
+try:
+    module = importlib.import_module(module_name)
+except Exception as e:
+    result['error'] = f"import failed: {type(e).__name__}: {e}"
+    print(json.dumps(result))
+    sys.exit(0)
+result['import_ms'] = round((time.perf_counter() - start) * 1000, 2)
+result['clients_at_import'] = constructed['client'] + constructed['resource']
+result['heavy_modules_at_import'] = [m for m in heavy_modules if m in sys.modules]
+
+start = time.perf_counter()
+try:
+    response = module.lambda_handler(event, None)
+    if asyncio.iscoroutine(response):
+        response = asyncio.run(response)
+    result['status_code'] = response.get('statusCode') if isinstance(response, dict) else None
+except Exception as e:
+    result['request_error'] = f"{type(e).__name__}: {e}"
+result['first_request_ms'] = round((time.perf_counter() - start) * 1000, 2)
+result['clients_after_request'] = constructed['client'] + constructed['resource']
+print(json.dumps(result))
+'''
+
+
+def discover_handlers(src_dir: str = SRC_DIR) -> List[str]:
+    """Module names of every file in src/ that defines lambda_handler"""
+    
+    modules = []
+    for root, dirs, files in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for filename in sorted(files):
+            if not filename.endswith('.py'):
+                continue
+            path = os.path.join(root, filename)
+            with open(path, encoding='utf-8', errors='ignore') as f:
+                source = f.read()
+            if re.search(r'^(async )?def lambda_handler\(', source, re.M):
+                relative = os.path.relpath(path, src_dir)[:-3]
+                modules.append(relative.replace(os.sep, '.'))
+    return modules
+
+
+def measure_handler(module_name: str, event: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Cold-start one handler in a subprocess"""
+    
+    env = dict(os.environ)
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    env.setdefault('AWS_MAX_ATTEMPTS', '1')
+    env.setdefault('AWS_METADATA_SERVICE_NUM_ATTEMPTS', '1')
+    
+    try:
+        completed = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, module_name, json.dumps(event), SRC_DIR, json.dumps(HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            env=env
+        )
+    except subprocess.TimeoutExpired:
+        return {'module': module_name, 'error': f"timed out after {timeout}s"}
+    
+    for line in reversed(completed.stdout.strip().splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    
+    return {'module': module_name, 'error': (completed.stderr.strip().splitlines() or ['no output'])[-1]}
+
+
+def check_budgets(results: List[Dict[str, Any]], args) -> List[str]:
+    """Budget violations (used by --enforce)"""
+    
+    violations = []
+    for result in results:
+        if 'import_ms' not in result:
+            continue
+        module = result['module']
+        if args.max_import_ms is not None and result['import_ms'] > args.max_import_ms:
+            violations.append(f"{module}: import {result['import_ms']}ms > {args.max_import_ms}ms")
+        if result['clients_at_import'] > args.max_import_clients:
+            violations.append(f"{module}: {result['clients_at_import']} AWS clients built at import")
+        if result['heavy_modules_at_import'] and not args.allow_heavy_imports:
+            violations.append(f"{module}: heavy modules loaded at import: {', '.join(result['heavy_modules_at_import'])}")
+    return violations
+
+
+def print_report(results: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> None:
+    """Print a results table (with deltas against a baseline run when given)"""
+    
+    print(f"{'handler':<45} {'import ms':>10} {'delta':>9} {'1st req ms':>11} {'clients':>8}  heavy imports")
+    print("-" * 110)
+    
+    for result in results:
+        module = result['module']
+        if 'import_ms' not in result:
+            print(f"{module:<45} {'-':>10} {'':>9} {'-':>11} {'-':>8}  {result['error']}")
+            continue
+        
+        previous = baseline.get(module, {}).get('import_ms')
+        delta = f"{result['import_ms'] - previous:+.1f}" if previous is not None else ''
+        print(
+            f"{module:<45} {result['import_ms']:>10.1f} {delta:>9} {result['first_request_ms']:>11.1f} "
+            f"{result['clients_at_import']:>8}  {', '.join(result['heavy_modules_at_import']) or '-'}"
+        )
+    
+    measured = [r for r in results if 'import_ms' in r]
+    if measured:
+        total = sum(r['import_ms'] for r in measured)
+        print("-" * 110)
+        print(f"{len(measured)} handlers, total import {total:.1f}ms, mean {total / len(measured):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the Lambda handlers in src/")
+    parser.add_argument('handlers', nargs='*', help="Module names (default: every handler in src/)")
+    parser.add_argument('--event', help="JSON file with the event for the first request")
+    parser.add_argument('--timeout', type=float, default=60, help="Per-handler timeout in seconds")
+    parser.add_argument('--output', help="Write results as JSON (use as a later --baseline)")
+    parser.add_argument('--baseline', help="Earlier --output file to compare import times against")
+    parser.add_argument('--enforce', action='store_true', help="Exit non-zero on budget violations")
+    parser.add_argument('--max-import-ms', type=float, help="Import time budget per handler")
+    parser.add_argument('--max-import-clients', type=int, default=0, help="AWS clients allowed at import")
+    parser.add_argument('--allow-heavy-imports', action='store_true', help="Do not flag heavy modules at import")
+    args = parser.parse_args()
+    
+    event = DEFAULT_EVENT
+    if args.event:
+        with open(args.event) as f:
+            event = json.load(f)
+    
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r['module']: r for r in json.load(f)}
+    
+    results = [measure_handler(module, event, args.timeout) for module in (args.handlers or discover_handlers())]
+    print_report(results, baseline)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    violations = check_budgets(results, args)
+    if violations:
+        print("\nCold-start budget violations:")
+        for violation in violations:
+            print(f"  ❌ {violation}")
+    
+    if args.enforce and violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+CPU Lane Benchmark
+Compares thread-pool and process-pool throughput for PDF text extraction
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from shared.cpu_lane import CPULane, CPULaneConfig  # noqa: E402
+
+WORDS = (
+    "energy entropy molecule reaction velocity algorithm protein equation derivative structure "
+    "temperature momentum element function organism software integral gravity bond cell"
+).split()
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Minimal valid PDF with one Helvetica text page per string"""
+    
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {len(pages)} >>".encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    }
+    
+    for page_id, text in zip(page_ids, pages):
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)][:60]
+        escaped = [line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines]
+        stream = "BT /F1 10 Tf 12 TL 40 760 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        ).encode()
+        objects[page_id + 1] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode()
+    
+    output = b"%PDF-1.4\n"
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(output)
+        output += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+    
+    xref = len(output)
+    size = max(objects) + 1
+    output += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offsets[n]:010d} 00000 n \n".encode() for n in range(1, size))
+    output += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return output
+
+
+def generate_pdfs(count: int, pages: int, seed: int) -> List[bytes]:
+    rng = random.Random(seed)
+    return [
+        make_pdf([" ".join(rng.choice(WORDS) for _ in range(800)) for _ in range(pages)])
+        for _ in range(count)
+    ]
+
+
+def load_pdfs(directory: str) -> List[bytes]:
+    pdfs = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith('.pdf'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                pdfs.append(f.read())
+    return pdfs
+
+
+async def run_threads(pdfs: List[bytes], workers: int, function) -> float:
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, partial(function, pdf, f"doc{i}.pdf")) for i, pdf in enumerate(pdfs)
+        ))
+        return time.perf_counter() - started
+
+
+async def run_processes(pdfs: List[bytes], lane: CPULane, function) -> float:
+    lane.warm()  # Measure steady state, not worker start-up
+    started = time.perf_counter()
+    await asyncio.gather(*(lane.run(function, pdf, f"doc{i}.pdf") for i, pdf in enumerate(pdfs)))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread vs process throughput for PDF text extraction")
+    parser.add_argument('--pdf-dir', help="Directory of PDFs to use instead of generated ones")
+    parser.add_argument('--documents', type=int, default=40, help="Generated PDFs")
+    parser.add_argument('--pages', type=int, default=10, help="Pages per generated PDF")
+    parser.add_argument('--workers', type=int, default=CPULaneConfig.MAX_WORKERS, help="Pool size for both lanes")
+    parser.add_argument('--seed', type=int, default=7, help="Random seed for generated text")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+    
+    if importlib.util.find_spec('PyPDF2') is None:
+        print("PyPDF2 is not installed - install with: pip install PyPDF2")
+        sys.exit(1)
+    
+    from file_processing.text_extractor import extract_pdf_text
+    
+    pdfs = load_pdfs(args.pdf_dir) if args.pdf_dir else generate_pdfs(args.documents, args.pages, args.seed)
+    lane = CPULane(max_workers=args.workers, preload_modules=['file_processing.text_extractor'])
+    
+    try:
+        thread_seconds = asyncio.run(run_threads(pdfs, args.workers, extract_pdf_text))
+        process_seconds = asyncio.run(run_processes(pdfs, lane, extract_pdf_text))
+        mode = lane.get_stats()['mode']
+    finally:
+        lane.shutdown()
+    
+    result: Dict[str, Any] = {
+        'documents': len(pdfs),
+        'workers': args.workers,
+        'process_lane_mode': mode,
+        'thread_seconds': round(thread_seconds, 3),
+        'process_seconds': round(process_seconds, 3),
+        'thread_docs_per_second': round(len(pdfs) / thread_seconds, 1),
+        'process_docs_per_second': round(len(pdfs) / process_seconds, 1),
+        'speedup': round(thread_seconds / process_seconds, 2)
+    }
+    
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print(f"{result['documents']} PDFs, {result['workers']} workers (CPU lane mode: {mode})")
+    print(f"Threads:   {result['thread_seconds']}s ({result['thread_docs_per_second']} docs/s)")
+    print(f"Processes: {result['process_seconds']}s ({result['process_docs_per_second']} docs/s)")
+    print(f"Speedup:   {result['speedup']}x")
+
+
+if __name__ == '__main__':
+    main()
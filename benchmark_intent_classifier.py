@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Intent Classifier Benchmark
+Accuracy on the labelled chat messages and per-message cost: nested keyword any() loops vs the compiled classifier
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, Any, List, Callable, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from shared.intent_classifier import build_chat_intent_classifier  # noqa: E402
+
+LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'intent_labels.jsonl')
+
+# The chat handlers' previous keyword tables
+LEGACY_INTENT_KEYWORDS = {
+    'summarize': [
+        'summary', 'summarize', 'key points', 'overview', 'main points',
+        'brief', 'outline', 'highlights', 'recap', 'digest', 'synopsis',
+        'sum up', 'give me the gist', 'what are the main', 'tell me about'
+    ],
+    'question': [
+        'what', 'how', 'why', 'when', 'where', 'who', 'which',
+        'explain', 'tell me', 'can you', 'help me understand',
+        'clarify', 'elaborate', 'describe'
+    ],
+    'translate': [
+        'translate', 'translation', 'convert to', 'in spanish',
+        'in french', 'in german', 'language', 'otro idioma'
+    ]
+}
+LEGACY_SUMMARY_TYPE_KEYWORDS = {
+    'brief': ['brief', 'short', 'quick', 'concise', 'simple'],
+    'detailed': ['detailed', 'comprehensive', 'thorough', 'complete', 'full'],
+    'comprehensive': ['comprehensive', 'extensive', 'in-depth', 'complete analysis']
+}
+
+
+def legacy_classify(message: str) -> Tuple[str, str]:
+    """The previous first-match-wins substring scan"""
+    
+    message = message.lower()
+    detected_intent = "general"
+    summary_type = "standard"
+    for intent, keywords in LEGACY_INTENT_KEYWORDS.items():
+        if any(keyword in message for keyword in keywords):
+            detected_intent = intent
+            break
+    if detected_intent == "summarize":
+        for s_type, keywords in LEGACY_SUMMARY_TYPE_KEYWORDS.items():
+            if any(keyword in message for keyword in keywords):
+                summary_type = s_type
+                break
+    return detected_intent, summary_type
+
+
+def load_labels() -> List[Dict[str, str]]:
+    with open(LABELS_PATH, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(classify: Callable[[str], Tuple[str, str]], labels: List[Dict[str, str]], rounds: int) -> Dict[str, Any]:
+    correct = sum(1 for row in labels if classify(row['message']) == (row['intent'], row['summary_type']))
+    
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for row in labels:
+            classify(row['message'])
+    elapsed = time.perf_counter() - started
+    
+    return {
+        'accuracy_percent': round(correct / len(labels) * 100, 1),
+        'correct': correct,
+        'us_per_message': round(elapsed / (rounds * len(labels)) * 1e6, 2)
+    }
+
+
+def run(rounds: int) -> Dict[str, Any]:
+    labels = load_labels()
+    
+    build_started = time.perf_counter()
+    classifier = build_chat_intent_classifier()
+    build_us = (time.perf_counter() - build_started) * 1e6
+    
+    def compiled_classify(message: str) -> Tuple[str, str]:
+        result = classifier.classify(message)
+        return result.intent, result.summary_type
+    
+    before = evaluate(legacy_classify, labels, rounds)
+    after = evaluate(compiled_classify, labels, rounds)
+    return {
+        'messages': len(labels),
+        'before': before,
+        'after': after,
+        'one_time_build_us': round(build_us, 1),
+        'speedup': round(before['us_per_message'] / after['us_per_message'], 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and cost of chat intent classification")
+    parser.add_argument('--rounds', type=int, default=500, help="Passes over the labelled messages when timing")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+    
+    result = run(args.rounds)
+    
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print(f"{result['messages']} labelled messages")
+    for label, key in (("Before (keyword any() loops)", 'before'), ("After (compiled classifier)", 'after')):
+        stats = result[key]
+        print(f"{label:<30} accuracy {stats['accuracy_percent']:>5}%  {stats['us_per_message']:>6} us/message")
+    print(f"One-time build cost: {result['one_time_build_us']} us")
+    print(f"Speedup: {result['speedup']}x")
+
+
+if __name__ == '__main__':
+    main()
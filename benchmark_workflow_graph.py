@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Workflow Graph Benchmark
+Measures per-request workflow overhead: rebuilding and interpreting the graph vs a compiled plan
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from shared.workflow_graph import WorkflowGraph  # noqa: E402
+
+NODES = [
+    'language_detection', 'intent_detection', 'document_processing', 'rag_retrieval',
+    'summarization', 'question_answering', 'translation', 'response_synthesis'
+]
+INTENTS = ['summarize', 'question', 'translate', 'general']
+
+
+async def noop_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    return state
+
+
+def route_based_on_intent(state: Dict[str, Any]) -> str:
+    return state['intent']
+
+
+def build_graph(graph: Any) -> Any:
+    """The chat handler's graph, with no-op nodes so only orchestration is timed"""
+    
+    for name in NODES:
+        graph.add_node(name, noop_node)
+    graph.set_entry_point("language_detection")
+    graph.add_edge("language_detection", "intent_detection")
+    graph.add_conditional_edges("intent_detection", route_based_on_intent, {
+        "summarize": "document_processing",
+        "question": "rag_retrieval",
+        "translate": "translation",
+        "general": "rag_retrieval"
+    })
+    graph.add_edge("document_processing", "summarization")
+    graph.add_edge("rag_retrieval", "question_answering")
+    graph.add_edge("translation", "response_synthesis")
+    graph.add_edge("summarization", "response_synthesis")
+    graph.add_edge("question_answering", "response_synthesis")
+    graph.add_edge("response_synthesis", "END")
+    return graph
+
+
+class LegacyWorkflow(WorkflowGraph):
+    """The previous per-request interpreter: edges resolved by dict lookups and branching on every step"""
+    
+    async def ainvoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        current_node = self.entry_point
+        while current_node and current_node != "END":
+            if current_node in self.nodes:
+                state = await self.nodes[current_node](state)
+            if current_node in self.conditional_edges:
+                condition_func = self.conditional_edges[current_node]['condition']
+                mapping = self.conditional_edges[current_node]['mapping']
+                next_node = mapping.get(condition_func(state), "END")
+            elif current_node in self.edges:
+                next_node = self.edges[current_node][0] if self.edges[current_node] else "END"
+            else:
+                next_node = "END"
+            current_node = next_node
+        return state
+
+
+async def measure(requests: int, invoke: Callable) -> float:
+    """Microseconds per request"""
+    
+    started = time.perf_counter()
+    for i in range(requests):
+        await invoke({'intent': INTENTS[i % len(INTENTS)]})
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def run(requests: int) -> Dict[str, Any]:
+    async def before(state):
+        return await build_graph(LegacyWorkflow()).ainvoke(state)
+    
+    compiled = build_graph(WorkflowGraph("chat")).compile()
+    
+    build_started = time.perf_counter()
+    for _ in range(1000):
+        build_graph(WorkflowGraph("chat")).compile()
+    compile_us = (time.perf_counter() - build_started) / 1000 * 1e6
+    
+    await measure(min(requests, 1000), before)  # Warm up
+    before_us = await measure(requests, before)
+    after_us = await measure(requests, compiled.ainvoke)
+    
+    return {
+        'requests': requests,
+        'before_us_per_request': round(before_us, 2),
+        'after_us_per_request': round(after_us, 2),
+        'one_time_compile_us': round(compile_us, 2),
+        'speedup': round(before_us / after_us, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request overhead of the chat workflow orchestration")
+    parser.add_argument('--requests', type=int, default=20000, help="Workflow invocations per variant")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+    
+    result = asyncio.run(run(args.requests))
+    
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    
+    print(f"{result['requests']} requests through the chat graph (no-op nodes)")
+    print(f"Before (build + interpret per request): {result['before_us_per_request']} us/request")
+    print(f"After (compiled once, reused):          {result['after_us_per_request']} us/request")
+    print(f"One-time compile cost:                  {result['one_time_compile_us']} us")
+    print(f"Speedup: {result['speedup']}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,12 @@ from typing import Dict, List, Any, Optional
 from decimal import Decimal
 import uuid
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client, get_resource
+except ImportError:
+    get_client, get_resource = boto3.client, boto3.resource
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -22,9 +28,9 @@ class LearningAnalyticsHandler:
         """Initialize analytics handler with AWS services"""
         
         # AWS clients
-        self.dynamodb = boto3.resource('dynamodb')
-        self.comprehend = boto3.client('comprehend')
-        self.bedrock_runtime = boto3.client('bedrock-runtime')
+        self.dynamodb = get_resource('dynamodb')
+        self.comprehend = get_client('comprehend')
+        self.bedrock_runtime = get_client('bedrock-runtime')
         
         # DynamoDB tables
         self.analytics_table = self.dynamodb.Table('lms-user-analytics')
@@ -14,15 +14,21 @@ import uuid
 from datetime import datetime
 import base64
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client, get_resource
+except ImportError:
+    get_client, get_resource = boto3.client, boto3.resource
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 class BedrockAgentProxy:
     def __init__(self):
-        self.bedrock_runtime = boto3.client('bedrock-agent-runtime')
-        self.s3_client = boto3.client('s3')
-        self.dynamodb = boto3.resource('dynamodb')
+        self.bedrock_runtime = get_client('bedrock-agent-runtime')
+        self.s3_client = get_client('s3')
+        self.dynamodb = get_resource('dynamodb')
         
         # Agent configuration
         self.agent_id = os.environ.get('BEDROCK_AGENT_ID', 'ZTBBVSC6Y1')
@@ -6,6 +6,12 @@ import hmac
 import base64
 from botocore.exceptions import ClientError
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client
+except ImportError:
+    get_client = boto3.client
+
 def lambda_handler(event, context):
     """
     Authentication handler for user registration, login, and token validation
@@ -49,7 +55,7 @@ def handle_auth_actions(event):
     if not user_pool_id or not client_id:
         return error_response(500, 'Missing Cognito configuration')
     
-    cognito = boto3.client('cognito-idp')
+    cognito = get_client('cognito-idp')
     
     try:
         if action == 'register':
@@ -83,7 +89,7 @@ def handle_token_validation(event):
         token = auth_header.replace('Bearer ', '')
         
         # Validate token with Cognito
-        cognito = boto3.client('cognito-idp')
+        cognito = get_client('cognito-idp')
         
         try:
             response = cognito.get_user(AccessToken=token)
@@ -4,7 +4,6 @@ Handles AI chat with RAG integration using Bedrock Agents
 """
 
 import json
-import boto3
 import os
 import uuid
 import asyncio
@@ -22,6 +21,7 @@ from shared.agent_utils import agent_invoker
 from shared.bedrock_agent_service import BedrockAgentError, BedrockAgentService, AgentContext
 from file_processing.vector_storage import vector_storage, format_rag_context
 from shared.pinecone_utils import pinecone_utils
+from shared.connection_pool import get_resource
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -246,7 +246,7 @@ def create_conversation(user_id: str, subject_id: str = None) -> str:
         title = "General Chat"
     
     # Store conversation in DynamoDB
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = get_resource('dynamodb')
     conversations_table = dynamodb.Table('lms-chat-conversations')
     
     conversation_data = {
@@ -268,7 +268,7 @@ def create_conversation(user_id: str, subject_id: str = None) -> str:
 def store_chat_message(conversation_id: str, user_id: str, user_message: str, ai_response: str, citations: list = None, rag_context: list = None):
     """Store chat messages in DynamoDB with Bedrock Agent and RAG metadata"""
     
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = get_resource('dynamodb')
     messages_table = dynamodb.Table('lms-chat-messages')
     conversations_table = dynamodb.Table('lms-chat-conversations')
     
@@ -325,7 +325,7 @@ def get_conversation_history(conversation_id: str, limit: int = 10) -> list:
     """Get recent conversation history for context"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         messages_table = dynamodb.Table('lms-chat-messages')
         
         response = messages_table.query(
@@ -354,7 +354,7 @@ def get_conversation_messages(conversation_id: str, limit: int = 20) -> list:
     """Get conversation messages for API response"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         messages_table = dynamodb.Table('lms-chat-messages')
         
         response = messages_table.query(
@@ -387,7 +387,7 @@ def get_user_conversations(user_id: str, limit: int = 20) -> list:
     """Get all conversations for a user"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         conversations_table = dynamodb.Table('lms-chat-conversations')
         
         response = conversations_table.query(
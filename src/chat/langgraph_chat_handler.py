@@ -4,18 +4,19 @@ Enhanced chat handler using LangGraph for workflow orchestration
 """
 
 import json
-import boto3
 import os
+import time
 import uuid
 import asyncio
 import logging
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict, Any, List, TypedDict
+from typing import Dict, Any, List, TypedDict, AsyncIterator
 from decimal import Decimal
 
 # Simplified imports for Lambda deployment
 # Note: LangGraph functionality implemented with basic Python classes
-from typing import Dict, Any, List, TypedDict, Callable
+from typing import Dict, Any, List, TypedDict, Callable, Optional
 from dataclasses import dataclass
 
 # Import shared services
@@ -27,18 +28,29 @@ from shared.agent_utils import agent_invoker
 from shared.bedrock_agent_service import BedrockAgentError, BedrockAgentService, AgentContext
 from file_processing.vector_storage import vector_storage, format_rag_context
 from shared.pinecone_utils import pinecone_utils
+from shared.semantic_cache import semantic_response_cache
+from shared.cache_warming import cache_warmer, WarmingConfig
+from shared.message_analysis import message_analysis
+from shared.intent_classifier import intent_classifier
+from shared.lazy import LazyProxy, lazy_client, lazy_resource
+from shared.async_aws import async_aws
+from shared.workflow_graph import WorkflowGraph, CompiledWorkflow, Deadline
+from shared.workflow_metrics import WorkflowMetrics
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # AWS clients
-comprehend = boto3.client('comprehend')
-textract = boto3.client('textract')
-translate = boto3.client('translate')
-bedrock_runtime = boto3.client('bedrock-runtime')
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
+comprehend = lazy_client('comprehend')
+textract = lazy_client('textract')
+translate = lazy_client('translate')
+bedrock_runtime = lazy_client('bedrock-runtime')
+s3_client = lazy_client('s3')
+dynamodb = lazy_resource('dynamodb')
+
+# Time kept back from the Lambda deadline for storing the conversation and responding
+DEADLINE_RESERVE_MS = int(os.getenv('CHAT_DEADLINE_RESERVE_MS', 1500))
 
 
 @dataclass
@@ -65,68 +77,34 @@ class AgentState(TypedDict):
     final_response: str
     citations: List[str]
     processing_metadata: dict
+    deadline: Optional[Deadline]
+    truncated_stages: List[str]
+
 
-class SimpleWorkflow:
-    """Simplified workflow orchestration without LangGraph dependency"""
+class TokenStream:
+    """Model text for one streaming request, pushed as Bedrock generates it"""
     
     def __init__(self):
-        self.nodes = {}
-        self.edges = {}
-        self.conditional_edges = {}
-        self.entry_point = None
-    
-    def add_node(self, name: str, func: Callable):
-        """Add a processing node"""
-        self.nodes[name] = func
-    
-    def add_edge(self, from_node: str, to_node: str):
-        """Add a direct edge between nodes"""
-        if from_node not in self.edges:
-            self.edges[from_node] = []
-        self.edges[from_node].append(to_node)
-    
-    def add_conditional_edges(self, from_node: str, condition_func: Callable, mapping: dict):
-        """Add conditional edges"""
-        self.conditional_edges[from_node] = {
-            'condition': condition_func,
-            'mapping': mapping
-        }
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
     
-    def set_entry_point(self, node_name: str):
-        """Set the entry point for the workflow"""
-        self.entry_point = node_name
+    def push(self, text: str) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunks += 1
+        self.queue.put_nowait(text)
     
-    async def ainvoke(self, initial_state: AgentState) -> AgentState:
-        """Execute the workflow"""
-        state = initial_state
-        current_node = self.entry_point
-        
-        while current_node and current_node != "END":
-            # Execute current node
-            if current_node in self.nodes:
-                state = await self.nodes[current_node](state)
-            
-            # Determine next node
-            next_node = None
-            
-            # Check conditional edges first
-            if current_node in self.conditional_edges:
-                condition_func = self.conditional_edges[current_node]['condition']
-                mapping = self.conditional_edges[current_node]['mapping']
-                condition_result = condition_func(state)
-                next_node = mapping.get(condition_result, "END")
-            
-            # Check direct edges
-            elif current_node in self.edges:
-                next_node = self.edges[current_node][0] if self.edges[current_node] else "END"
-            
-            else:
-                next_node = "END"
-            
-            current_node = next_node
-        
-        return state
+    @property
+    def time_to_first_token_ms(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return round((self.first_token_at - self.started) * 1000, 1)
+
 
+# Set while a request streams; invoke_bedrock_model then streams into it
+_token_stream: ContextVar[Optional[TokenStream]] = ContextVar('token_stream', default=None)
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -142,7 +120,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if http_method == 'GET' and 'history' in path:
             return handle_conversation_history(event)
         elif http_method == 'POST':
-            return handle_langgraph_chat(event)
+            return handle_langgraph_chat(event, Deadline.from_lambda_context(context, DEADLINE_RESERVE_MS))
         else:
             return {
                 'statusCode': 405,
@@ -159,7 +137,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
 
 
-def handle_langgraph_chat(event: Dict[str, Any]) -> Dict[str, Any]:
+def handle_langgraph_chat(event: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """Handle POST /api/chat with LangGraph workflow"""
     
     try:
@@ -179,8 +157,23 @@ def handle_langgraph_chat(event: Dict[str, Any]) -> Dict[str, Any]:
                 'body': json.dumps({'error': 'Message is required'})
             }
         
+        # Header names are case-insensitive (API Gateway HTTP APIs and HTTP/2 clients send them lowercase)
+        headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+        if body.get('stream') or 'application/x-ndjson' in (headers.get('accept') or ''):
+            # API Gateway buffers the body; hosts with chunked responses iterate stream_langgraph_chat_http directly
+            async def collect() -> str:
+                return b''.join([
+                    line async for line in stream_langgraph_chat_http(user_id, message, conversation_id, subject_id, deadline)
+                ]).decode('utf-8')
+            
+            return {
+                'statusCode': 200,
+                'headers': {**get_cors_headers(), 'Content-Type': 'application/x-ndjson'},
+                'body': asyncio.run(collect())
+            }
+        
         # Process with LangGraph workflow
-        response = asyncio.run(process_with_langgraph_workflow(user_id, message, conversation_id, subject_id))
+        response = asyncio.run(process_with_langgraph_workflow(user_id, message, conversation_id, subject_id, deadline))
         
         return {
             'statusCode': 200,
@@ -197,8 +190,70 @@ def handle_langgraph_chat(event: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
-async def process_with_langgraph_workflow(user_id: str, message: str, conversation_id: str = None, subject_id: str = None) -> Dict[str, Any]:
-    """Process chat message using LangGraph workflow orchestration"""
+async def stream_langgraph_chat_http(user_id: str, message: str, conversation_id: str = None, subject_id: str = None,
+                                     deadline: Optional[Deadline] = None) -> AsyncIterator[bytes]:
+    """Chat frames as newline-delimited JSON, for chunked HTTP responses"""
+    
+    async for frame in stream_langgraph_workflow(user_id, message, conversation_id, subject_id, deadline):
+        yield (json.dumps(frame, default=decimal_to_int) + "\n").encode('utf-8')
+
+
+async def stream_langgraph_workflow(user_id: str, message: str, conversation_id: str = None, subject_id: str = None,
+                                    deadline: Optional[Deadline] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Process a chat message, yielding model text as it is generated
+    
+    Yields partial_response frames ({'type', 'content'}) while Bedrock
+    generates, with text that arrived while the consumer was busy sent as
+    one frame, then a final_response frame with the full response (as from
+    process_with_langgraph_workflow, stored the same way).
+    """
+    
+    stream = TokenStream()
+    context_token = _token_stream.set(stream)
+    try:
+        workflow = asyncio.ensure_future(process_with_langgraph_workflow(user_id, message, conversation_id, subject_id, deadline))
+    finally:
+        _token_stream.reset(context_token)
+    
+    try:
+        while True:
+            next_text = asyncio.ensure_future(stream.queue.get())
+            await asyncio.wait({next_text, workflow}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_text.done():
+                next_text.cancel()
+                break
+            
+            parts = [next_text.result()]
+            while not stream.queue.empty():
+                parts.append(stream.queue.get_nowait())
+            yield {'type': 'partial_response', 'content': ''.join(parts)}
+        
+        parts = []
+        while not stream.queue.empty():
+            parts.append(stream.queue.get_nowait())
+        if parts:
+            yield {'type': 'partial_response', 'content': ''.join(parts)}
+        
+        yield {'type': 'final_response', **workflow.result()}
+    finally:
+        if not workflow.done():
+            workflow.cancel()  # Consumer went away
+
+
+async def process_with_langgraph_workflow(user_id: str, message: str, conversation_id: str = None, subject_id: str = None,
+                                          deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    Process chat message using LangGraph workflow orchestration
+    
+    With a deadline, optional stages that no longer fit are shed and
+    Bedrock generation is cut short, so a best-effort answer is returned
+    in time; both are recorded in processing_metadata['deadline'].
+    What each node cost (ms, AWS calls, Bedrock tokens) is recorded in
+    processing_metadata['node_metrics'].
+    """
+    
+    started = time.perf_counter()
     
     try:
         # Create or get conversation
@@ -222,12 +277,35 @@ async def process_with_langgraph_workflow(user_id: str, message: str, conversati
             tools_used=[],
             final_response="",
             citations=[],
-            processing_metadata={}
+            processing_metadata={},
+            deadline=deadline,
+            truncated_stages=[]
         )
         
-        # Create and execute LangGraph workflow
-        workflow = create_langgraph_workflow()
-        result = await workflow.ainvoke(initial_state)
+        # Execute the workflow (compiled once per container)
+        node_timings = {}
+        shed_stages = []
+        metrics = WorkflowMetrics(chat_workflow.name)
+        result = await chat_workflow.ainvoke(
+            initial_state, timings=node_timings, deadline=deadline, shed=shed_stages, metrics=metrics
+        )
+        result['processing_metadata']['node_timings_ms'] = node_timings
+        result['processing_metadata']['node_metrics'] = metrics.summary()
+        if deadline:
+            result['processing_metadata']['deadline'] = {
+                'budget_ms': deadline.budget_ms,
+                'remaining_ms': round(deadline.remaining_ms(), 1),
+                'shed_stages': shed_stages,
+                'truncated_stages': result['truncated_stages']
+            }
+        
+        # Time to first token only exists when streaming
+        stream = _token_stream.get()
+        latency = {
+            'total_latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            'time_to_first_token_ms': stream.time_to_first_token_ms if stream else None
+        }
+        result['processing_metadata']['latency'] = latency
         
         # Store conversation with enhanced metadata
         store_langgraph_conversation(
@@ -251,6 +329,8 @@ async def process_with_langgraph_workflow(user_id: str, message: str, conversati
             'sentiment_analysis': result['sentiment'],
             'summary_type': result['summary_type'],
             'processing_metadata': result['processing_metadata'],
+            **latency,
+            'shed_stages': shed_stages + result['truncated_stages'],
             'langgraph_workflow': True,
             'workflow_version': "1.0"
         }
@@ -274,27 +354,49 @@ async def process_with_langgraph_workflow(user_id: str, message: str, conversati
         }
 
 
-def create_langgraph_workflow() -> SimpleWorkflow:
-    """Create simplified workflow with intelligent document summarization"""
+def create_langgraph_workflow() -> CompiledWorkflow:
+    """Build and compile the workflow with intelligent document summarization"""
     
     # Create workflow graph
-    workflow = SimpleWorkflow()
+    workflow = WorkflowGraph("chat")
     
-    # Add processing nodes
-    workflow.add_node("language_detection", language_detection_node)
-    workflow.add_node("intent_detection", intent_detection_node)
-    workflow.add_node("document_processing", document_processing_node)
-    workflow.add_node("rag_retrieval", rag_retrieval_node)
-    workflow.add_node("summarization", summarization_node)
-    workflow.add_node("question_answering", question_answering_node)
-    workflow.add_node("translation", translation_node)
-    workflow.add_node("response_synthesis", response_synthesis_node)
+    # Nodes declare the state they read and write; independent nodes run concurrently.
+    # Optional nodes are shed when their expected time no longer fits the request's deadline.
+    workflow.add_node("intent_detection", intent_detection_node,
+                      reads=["messages"], writes=["intent", "summary_type"], expected_ms=1)
+    workflow.add_node("message_analysis", message_analysis_node,
+                      reads=["messages"], writes=["language", "key_phrases", "entities"],
+                      optional=True, expected_ms=300)
+    workflow.add_node("sentiment_analysis", sentiment_analysis_node,
+                      reads=["messages", "language"], writes=["sentiment"],
+                      optional=True, expected_ms=250)
+    workflow.add_node("document_processing", document_processing_node,
+                      reads=["user_id", "subject_id"], writes=["documents"], expected_ms=500)
+    workflow.add_node("rag_retrieval", rag_retrieval_node,
+                      reads=["messages", "user_id", "subject_id"], writes=["rag_context", "citations"], expected_ms=800)
+    # Generation is cut short at the deadline (truncated_stages), not shed
+    workflow.add_node("summarization", summarization_node,
+                      reads=["summary_type", "documents", "rag_context", "deadline"], writes=["final_response"],
+                      expected_ms=8000)
+    workflow.add_node("question_answering", question_answering_node,
+                      reads=["messages", "rag_context", "subject_id", "deadline"], writes=["final_response"],
+                      expected_ms=8000)
+    workflow.add_node("translation", translation_node,
+                      reads=["messages", "language"], writes=["final_response"], expected_ms=500)
+    workflow.add_node("response_synthesis", response_synthesis_node,
+                      reads=["language", "final_response", "citations", "sentiment"],
+                      writes=["final_response"], expected_ms=5)
     
-    # Define workflow edges
-    workflow.set_entry_point("language_detection")
+    # Every node adds to these
+    workflow.add_reducer("tools_used")
+    workflow.add_reducer("processing_metadata")
+    workflow.add_reducer("truncated_stages")
     
-    # Language detection -> Intent detection
-    workflow.add_edge("language_detection", "intent_detection")
+    # Intent detection is keyword-only, so it goes first and fans out:
+    # Comprehend analysis runs alongside the intent's retrieval branch
+    workflow.set_entry_point("intent_detection")
+    workflow.add_edge("intent_detection", "message_analysis")
+    workflow.add_edge("message_analysis", "sentiment_analysis")
     
     # Conditional routing based on intent
     workflow.add_conditional_edges(
@@ -303,7 +405,7 @@ def create_langgraph_workflow() -> SimpleWorkflow:
         {
             "summarize": "document_processing",
             "question": "rag_retrieval", 
-            "translate": "translation",
+            "translate": "translation",  # Also waits for message analysis (reads language)
             "general": "rag_retrieval"
         }
     )
@@ -314,122 +416,75 @@ def create_langgraph_workflow() -> SimpleWorkflow:
     # RAG retrieval -> Question answering
     workflow.add_edge("rag_retrieval", "question_answering")
     
-    # Translation -> Response synthesis
+    # All branches join at response synthesis
+    workflow.add_edge("sentiment_analysis", "response_synthesis")
     workflow.add_edge("translation", "response_synthesis")
-    
-    # All paths lead to response synthesis
     workflow.add_edge("summarization", "response_synthesis")
     workflow.add_edge("question_answering", "response_synthesis")
     
     # Response synthesis -> END
     workflow.add_edge("response_synthesis", "END")
     
-    return workflow
+    return workflow.compile()
 
 
-async def language_detection_node(state: AgentState) -> AgentState:
-    """Detect language using Amazon Comprehend"""
+# Compiled chat workflow, shared by every request in the container
+chat_workflow = LazyProxy(create_langgraph_workflow)
+
+
+async def message_analysis_node(state: AgentState) -> AgentState:
+    """Detect language, key phrases and entities (cached; Comprehend calls run concurrently)"""
     
     try:
-        user_message = state["messages"][-1].content
-        
-        # Use Comprehend for language detection
-        response = comprehend.detect_dominant_language(Text=user_message)
+        analysis = await message_analysis.analyze(state["messages"][-1].content)
+        
+        state["language"] = analysis["language"]
+        state["key_phrases"] = analysis["key_phrases"]
+        state["entities"] = analysis["entities"]
+        state["processing_metadata"]["message_analysis"] = {
+            "detected_language": analysis["language"],
+            "confidence": analysis["language_confidence"],
+            "all_languages": analysis["languages"],
+            "key_phrases_count": len(analysis["key_phrases"]),
+            "entities_count": len(analysis["entities"]),
+            "source": analysis["source"],
+            "comprehend_calls": analysis["comprehend_calls"],
+            "comprehend_calls_avoided": analysis["comprehend_calls_avoided"]
+        }
         
-        if response['Languages']:
-            detected_language = response['Languages'][0]['LanguageCode']
-            confidence = response['Languages'][0]['Score']
-            
-            state["language"] = detected_language
-            state["processing_metadata"]["language_detection"] = {
-                "detected_language": detected_language,
-                "confidence": confidence,
-                "all_languages": response['Languages']
-            }
-            
-            logger.info(f"Detected language: {detected_language} (confidence: {confidence:.2f})")
-        else:
-            state["language"] = "en"  # Default to English
+        logger.info(
+            f"Detected language: {analysis['language']} (confidence: {analysis['language_confidence']:.2f}, "
+            f"{analysis['source']}, {analysis['comprehend_calls_avoided']} Comprehend calls avoided)"
+        )
             
-        state["tools_used"].append("language_detection")
+        state["tools_used"].append("message_analysis")
         
     except Exception as e:
-        logger.error(f"Error in language detection: {str(e)}")
+        logger.error(f"Error in message analysis: {str(e)}")
         state["language"] = "en"  # Default fallback
-        
+        state["key_phrases"] = []
+        state["entities"] = []
+    
     return state
 
 
 async def intent_detection_node(state: AgentState) -> AgentState:
-    """Detect user intent using Amazon Comprehend and keyword analysis"""
+    """Detect user intent using keyword analysis"""
     
     try:
         user_message = state["messages"][-1].content.lower()
         
-        # Use Comprehend for key phrase extraction
-        key_phrases_response = comprehend.detect_key_phrases(
-            Text=state["messages"][-1].content,
-            LanguageCode=state["language"]
-        )
-        
-        # Extract entities for better intent understanding
-        entities_response = comprehend.detect_entities(
-            Text=state["messages"][-1].content,
-            LanguageCode=state["language"]
-        )
-        
-        # Store Comprehend results
-        state["key_phrases"] = key_phrases_response.get('KeyPhrases', [])
-        state["entities"] = entities_response.get('Entities', [])
-        
-        # Intent classification based on keywords and phrases
-        intent_keywords = {
-            'summarize': [
-                'summary', 'summarize', 'key points', 'overview', 'main points',
-                'brief', 'outline', 'highlights', 'recap', 'digest', 'synopsis',
-                'sum up', 'give me the gist', 'what are the main', 'tell me about'
-            ],
-            'question': [
-                'what', 'how', 'why', 'when', 'where', 'who', 'which',
-                'explain', 'tell me', 'can you', 'help me understand',
-                'clarify', 'elaborate', 'describe'
-            ],
-            'translate': [
-                'translate', 'translation', 'convert to', 'in spanish',
-                'in french', 'in german', 'language', 'otro idioma'
-            ]
-        }
-        
-        # Determine summary type if summarization intent
-        summary_type_keywords = {
-            'brief': ['brief', 'short', 'quick', 'concise', 'simple'],
-            'detailed': ['detailed', 'comprehensive', 'thorough', 'complete', 'full'],
-            'comprehensive': ['comprehensive', 'extensive', 'in-depth', 'complete analysis']
-        }
-        
-        detected_intent = "general"  # default
-        summary_type = "standard"
-        
-        # Check for summarization intent
-        for intent, keywords in intent_keywords.items():
-            if any(keyword in user_message for keyword in keywords):
-                detected_intent = intent
-                break
-        
-        # Determine summary type if summarizing
-        if detected_intent == "summarize":
-            for s_type, keywords in summary_type_keywords.items():
-                if any(keyword in user_message for keyword in keywords):
-                    summary_type = s_type
-                    break
+        # Every intent and summary-type phrase found in one scan, scored by weight
+        classification = intent_classifier.classify(user_message)
+        detected_intent = classification.intent
+        summary_type = classification.summary_type
         
         state["intent"] = detected_intent
         state["summary_type"] = summary_type
         state["processing_metadata"]["intent_detection"] = {
             "detected_intent": detected_intent,
             "summary_type": summary_type,
-            "key_phrases_count": len(state["key_phrases"]),
-            "entities_count": len(state["entities"])
+            "intent_scores": classification.scores
         }
         
         state["tools_used"].append("intent_detection")
@@ -459,29 +514,33 @@ async def document_processing_node(state: AgentState) -> AgentState:
             state["documents"] = []
             return state
         
-        processed_docs = []
-        
-        for doc in documents[:3]:  # Process up to 3 most recent documents
+        async def process_document(doc: dict) -> Optional[dict]:
             try:
                 # Get document content from S3
                 s3_key = doc.get('s3_key', '')
                 if not s3_key:
-                    continue
+                    return None
                 
                 # Enhanced document analysis using Textract (if needed) and Comprehend
                 doc_analysis = await analyze_document_with_aws_services(s3_key, doc)
                 
-                processed_docs.append({
+                return {
                     'file_id': doc.get('file_id', ''),
                     'filename': doc.get('filename', ''),
                     'content_preview': doc.get('content_preview', ''),
                     'analysis': doc_analysis,
                     's3_key': s3_key
-                })
+                }
                 
             except Exception as e:
                 logger.error(f"Error processing document {doc.get('filename', 'unknown')}: {str(e)}")
-                continue
+                return None
+        
+        # Process up to 3 most recent documents concurrently
+        processed_docs = [
+            processed for processed in await asyncio.gather(*(process_document(doc) for doc in documents[:3]))
+            if processed
+        ]
         
         state["documents"] = processed_docs
         state["processing_metadata"]["document_processing"] = {
@@ -564,8 +623,18 @@ async def summarization_node(state: AgentState) -> AgentState:
                 'type': 'rag_chunk'
             })
         
-        # Generate summary using Bedrock
-        summary = await generate_intelligent_summary(content_to_summarize, summary_type)
+        # Generate summary using Bedrock, cut short at the deadline
+        try:
+            summary = await asyncio.wait_for(
+                generate_intelligent_summary(content_to_summarize, summary_type), timeout=time_left_seconds(state)
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Summarization cut short by the request deadline")
+            summary = best_effort_answer(
+                "I ran out of time to write the full summary. The key passages are:",
+                [(item['source'], item['content']) for item in content_to_summarize]
+            )
+            state["truncated_stages"].append("summarization")
         
         state["final_response"] = summary
         state["processing_metadata"]["summarization"] = {
@@ -596,8 +665,19 @@ async def question_answering_node(state: AgentState) -> AgentState:
             state["final_response"] = "I don't have enough context from your documents to answer this question. Please upload relevant documents first."
             return state
         
-        # Generate answer using Bedrock with RAG context
-        answer = await generate_contextual_answer(query, rag_context)
+        # Generate answer using Bedrock with RAG context, cut short at the deadline
+        try:
+            answer = await asyncio.wait_for(
+                generate_contextual_answer(query, rag_context, state.get("subject_id") or None),
+                timeout=time_left_seconds(state)
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Question answering cut short by the request deadline")
+            answer = best_effort_answer(
+                "I ran out of time to write a full answer. The most relevant passages from your documents are:",
+                [(context.get('source', 'Unknown'), context.get('text', '')) for context in rag_context]
+            )
+            state["truncated_stages"].append("question_answering")
         
         state["final_response"] = answer
         state["processing_metadata"]["question_answering"] = {
@@ -629,12 +709,7 @@ async def translation_node(state: AgentState) -> AgentState:
         
         if source_language != 'en':
             # Translate to English first
-            translation_response = translate.translate_text(
-                Text=user_message,
-                SourceLanguageCode=source_language,
-                TargetLanguageCode='en'
-            )
-            translated_text = translation_response['TranslatedText']
+            translated_text = await async_aws.translate_text(user_message, source_language, 'en', client=translate)
             
             state["final_response"] = f"Translation to English: {translated_text}"
         elif target_language and target_language != 'en':
@@ -642,12 +717,7 @@ async def translation_node(state: AgentState) -> AgentState:
             # For demo, translate a sample response
             sample_response = "Hello! I can help you with your learning materials and answer questions about your documents."
             
-            translation_response = translate.translate_text(
-                Text=sample_response,
-                SourceLanguageCode='en',
-                TargetLanguageCode=target_language
-            )
-            translated_response = translation_response['TranslatedText']
+            translated_response = await async_aws.translate_text(sample_response, 'en', target_language, client=translate)
             
             state["final_response"] = f"Translation to {target_language}: {translated_response}"
         else:
@@ -668,23 +738,34 @@ async def translation_node(state: AgentState) -> AgentState:
     return state
 
 
+async def sentiment_analysis_node(state: AgentState) -> AgentState:
+    """Analyse the sentiment of the user's message with Amazon Comprehend"""
+    
+    try:
+        user_message = state["messages"][-1].content
+        
+        if user_message:
+            sentiment_response = await async_aws.detect(
+                'sentiment', user_message, state["language"], client=comprehend
+            )
+            state["sentiment"] = {
+                "sentiment": sentiment_response.get('Sentiment', 'NEUTRAL'),
+                "confidence": sentiment_response.get('SentimentScore', {})
+            }
+            state["tools_used"].append("sentiment_analysis")
+    
+    except Exception as e:
+        logger.error(f"Error in sentiment analysis: {str(e)}")
+    
+    return state
+
+
 async def response_synthesis_node(state: AgentState) -> AgentState:
     """Synthesize final response with context awareness"""
     
     try:
         # If final_response is already set by previous nodes, enhance it
         if state["final_response"]:
-            # Add sentiment analysis
-            if state["messages"][-1].content:
-                sentiment_response = comprehend.detect_sentiment(
-                    Text=state["messages"][-1].content,
-                    LanguageCode=state["language"]
-                )
-                state["sentiment"] = {
-                    "sentiment": sentiment_response.get('Sentiment', 'NEUTRAL'),
-                    "confidence": sentiment_response.get('SentimentScore', {})
-                }
-            
             # Enhance response with citations if available
             if state["citations"]:
                 citations_text = "\n\n**Sources:**\n" + "\n".join([f"• {citation}" for citation in state["citations"]])
@@ -716,45 +797,51 @@ def route_based_on_intent(state: AgentState) -> str:
     
     intent = state["intent"]
     
-    if intent == "summarize":
-        return "document_processing"
-    elif intent == "question":
-        return "rag_retrieval"
-    elif intent == "translate":
-        return "translation"
-    else:
-        return "rag_retrieval"  # default to RAG for general queries
+    # Keys of the intent_detection route mapping
+    if intent in ("summarize", "question", "translate"):
+        return intent
+    return "general"  # RAG for general queries
 
 
 # Helper functions
 
+def time_left_seconds(state: AgentState) -> Optional[float]:
+    """Seconds left before the request's deadline (None without one)"""
+    
+    deadline = state.get("deadline")
+    return None if deadline is None else deadline.remaining_ms() / 1000
+
+
+def best_effort_answer(heading: str, passages: List[tuple], limit: int = 3, max_chars: int = 500) -> str:
+    """Answer built from the top (source, text) passages when generation ran out of time"""
+    
+    excerpts = [f"[{source}] {text[:max_chars]}" for source, text in passages if text][:limit]
+    return "\n\n".join([heading] + excerpts)
+
+
 async def get_user_documents_for_processing(user_id: str, subject_id: str = None, limit: int = 5) -> List[dict]:
     """Get user's documents for processing"""
     
     try:
-        files_table = dynamodb.Table('lms-user-files')
-        
-        if subject_id:
-            # Query by subject if provided
-            response = files_table.query(
-                IndexName='user-subject-index',
-                KeyConditionExpression='user_id = :user_id AND subject_id = :subject_id',
-                ExpressionAttributeValues={
-                    ':user_id': user_id,
-                    ':subject_id': subject_id
-                },
-                ScanIndexForward=False,
-                Limit=limit
-            )
-        else:
-            # Query all user documents
-            response = files_table.query(
-                IndexName='user-id-index',
-                KeyConditionExpression='user_id = :user_id',
-                ExpressionAttributeValues={':user_id': user_id},
-                ScanIndexForward=False,
-                Limit=limit
-            )
+        # Read through the cache entries login warming fills
+        if not subject_id:
+            return (await async_aws.run(cache_warmer.file_list, user_id))[:limit]
+        if limit <= WarmingConfig.SUBJECT_DOCUMENTS:
+            context = await async_aws.run(cache_warmer.subject_context, user_id, subject_id)
+            return context['documents'][:limit]
+        
+        # More of the subject than is cached
+        response = await async_aws.query(
+            'lms-user-files',
+            IndexName='user-subject-index',
+            KeyConditionExpression='user_id = :user_id AND subject_id = :subject_id',
+            ExpressionAttributeValues={
+                ':user_id': user_id,
+                ':subject_id': subject_id
+            },
+            ScanIndexForward=False,
+            Limit=limit
+        )
         
         return response.get('Items', [])
         
@@ -779,22 +866,11 @@ async def analyze_document_with_aws_services(s3_key: str, doc_metadata: dict) ->
         if content:
             # Use Comprehend for text analysis
             try:
-                # Entity detection
-                entities_response = comprehend.detect_entities(
-                    Text=content,
-                    LanguageCode='en'
-                )
-                
-                # Key phrases
-                phrases_response = comprehend.detect_key_phrases(
-                    Text=content,
-                    LanguageCode='en'
-                )
-                
-                # Sentiment
-                sentiment_response = comprehend.detect_sentiment(
-                    Text=content,
-                    LanguageCode='en'
+                # Entities, key phrases and sentiment are detected concurrently
+                entities_response, phrases_response, sentiment_response = await asyncio.gather(
+                    async_aws.detect('entities', content, 'en', client=comprehend),
+                    async_aws.detect('key_phrases', content, 'en', client=comprehend),
+                    async_aws.detect('sentiment', content, 'en', client=comprehend)
                 )
                 
                 analysis['comprehend_analysis'] = {
@@ -825,7 +901,8 @@ async def retrieve_rag_context_enhanced(user_id: str, query: str, subject_id: st
     
     try:
         # Query similar vectors from Pinecone
-        similar_documents = vector_storage.query_similar_vectors(
+        similar_documents = await async_aws.run(
+            vector_storage.query_similar_vectors,
             query_text=query,
             user_id=user_id,
             top_k=top_k,
@@ -945,7 +1022,7 @@ Provide a clear, well-organized summary that captures the essential information.
         return f"I encountered an error while generating the {summary_type} summary. Please try again."
 
 
-async def generate_contextual_answer(query: str, rag_context: List[dict]) -> str:
+async def generate_contextual_answer(query: str, rag_context: List[dict], subject_id: str = None) -> str:
     """Generate contextual answer using RAG context and Bedrock LLM"""
     
     try:
@@ -976,7 +1053,9 @@ Context:
 Please provide a detailed answer based on the context provided. If the context doesn't contain enough information to fully answer the question, please indicate what information is available and what might be missing."""
         
         # Use Bedrock to generate answer
-        answer = await invoke_bedrock_model(prompt)
+        answer = await invoke_bedrock_model(
+            prompt, query=query, context_docs=rag_context, subject_id=subject_id
+        )
         
         return answer
         
@@ -1025,6 +1104,7 @@ def create_conversation(user_id: str, subject_id: str = None) -> str:
     }
     
     conversations_table.put_item(Item=conversation_data)
+    cache_warmer.invalidate_conversation(user_id)
     
     return conversation_id
 
@@ -1063,7 +1143,8 @@ def store_langgraph_conversation(conversation_id: str, user_id: str, user_messag
         'context_used': {
             'langgraph_workflow': True,
             'workflow_version': '1.0',
-            'processing_metadata': metadata,
+            # DynamoDB takes Decimal, not float (confidences, node timings)
+            'processing_metadata': json.loads(json.dumps(metadata, default=str), parse_float=Decimal),
             'citations_count': len(citations)
         }
     }
@@ -1079,6 +1160,7 @@ def store_langgraph_conversation(conversation_id: str, user_id: str, user_messag
             ':inc': 2
         }
     )
+    cache_warmer.invalidate_conversation(user_id, conversation_id)
 
 
 def store_simple_conversation(conversation_id: str, user_id: str, user_message: str, ai_response: str):
@@ -1110,6 +1192,7 @@ def store_simple_conversation(conversation_id: str, user_id: str, user_message:
         'citations': [],
         'context_used': {'fallback': True}
     })
+    cache_warmer.invalidate_conversation(user_id, conversation_id)
 
 
 def handle_conversation_history(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -1122,7 +1205,7 @@ def handle_conversation_history(event: Dict[str, Any]) -> Dict[str, Any]:
         limit = int(query_params.get('limit', '20'))
         
         if conversation_id:
-            messages = get_conversation_messages(conversation_id, limit)
+            messages = get_conversation_messages(conversation_id, limit, user_id)
             return {
                 'statusCode': 200,
                 'headers': get_cors_headers(),
@@ -1152,26 +1235,30 @@ def handle_conversation_history(event: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
-def get_conversation_messages(conversation_id: str, limit: int = 20) -> list:
-    """Get conversation messages"""
+def get_conversation_messages(conversation_id: str, limit: int = 20, user_id: str = None) -> list:
+    """Get conversation messages (through the user's cache when the cached window covers limit)"""
     
     try:
-        messages_table = dynamodb.Table('lms-chat-messages')
+        if user_id and limit <= WarmingConfig.RECENT_MESSAGES:
+            items = cache_warmer.conversation_messages(user_id, conversation_id)[-limit:]
+        else:
+            messages_table = dynamodb.Table('lms-chat-messages')
         
-        response = messages_table.query(
-            KeyConditionExpression='conversation_id = :conv_id',
-            ExpressionAttributeValues={':conv_id': conversation_id},
-            ScanIndexForward=False,
-            Limit=limit
-        )
+            response = messages_table.query(
+                KeyConditionExpression='conversation_id = :conv_id',
+                ExpressionAttributeValues={':conv_id': conversation_id},
+                ScanIndexForward=False,
+                Limit=limit
+            )
+            items = list(reversed(response['Items']))
         
         messages = []
-        for item in reversed(response['Items']):
+        for item in items:
             messages.append({
                 'message_id': item['message_id'],
                 'message_type': item['message_type'],
                 'content': item['content'],
-                'timestamp': int(item['timestamp']) if isinstance(item['timestamp'], Decimal) else item['timestamp'],
+                'timestamp': int(item['timestamp']) if isinstance(item['timestamp'], (Decimal, float)) else item['timestamp'],
                 'citations': item.get('citations', []),
                 'context_used': item.get('context_used', {})
             })
@@ -1184,27 +1271,31 @@ def get_conversation_messages(conversation_id: str, limit: int = 20) -> list:
 
 
 def get_user_conversations(user_id: str, limit: int = 20) -> list:
-    """Get user conversations"""
+    """Get user conversations (through the cache when the cached window covers limit)"""
     
     try:
-        conversations_table = dynamodb.Table('lms-chat-conversations')
+        if limit <= WarmingConfig.RECENT_CONVERSATIONS:
+            items = cache_warmer.recent_conversations(user_id)[:limit]
+        else:
+            conversations_table = dynamodb.Table('lms-chat-conversations')
         
-        response = conversations_table.query(
-            IndexName='user-id-index',
-            KeyConditionExpression='user_id = :user_id',
-            ExpressionAttributeValues={':user_id': user_id},
-            ScanIndexForward=False,
-            Limit=limit
-        )
+            response = conversations_table.query(
+                IndexName='user-id-index',
+                KeyConditionExpression='user_id = :user_id',
+                ExpressionAttributeValues={':user_id': user_id},
+                ScanIndexForward=False,
+                Limit=limit
+            )
+            items = response['Items']
         
         conversations = []
-        for item in response['Items']:
+        for item in items:
             conversations.append({
                 'conversation_id': item['conversation_id'],
                 'title': item['title'],
                 'conversation_type': item['conversation_type'],
                 'subject_id': item.get('subject_id'),
-                'message_count': int(item.get('message_count', 0)) if isinstance(item.get('message_count', 0), Decimal) else item.get('message_count', 0),
+                'message_count': int(item.get('message_count', 0)),
                 'created_at': item['created_at'],
                 'updated_at': item['updated_at'],
                 'workflow_version': item.get('workflow_version', '1.0')
@@ -1224,42 +1315,103 @@ def decimal_to_int(obj):
     raise TypeError
 
 
-async def invoke_bedrock_model(prompt: str, model_id: str = "anthropic.claude-3-sonnet-20240229-v1:0") -> str:
-    """Invoke Bedrock model directly using boto3"""
+async def invoke_bedrock_model(
+    prompt: str,
+    model_id: str = "anthropic.claude-3-sonnet-20240229-v1:0",
+    query: str = None,
+    context_docs: List[dict] = None,
+    subject_id: str = None
+) -> str:
+    """
+    Invoke Bedrock model directly using boto3
+    
+    When a query is given, answers are served from the semantic response
+    cache for equivalent questions over the same retrieved documents.
+    During a streaming request the text is also pushed to the request's
+    TokenStream as it is generated (cached answers in one piece).
+    """
+    
+    stream = _token_stream.get()
+    chunks_before = stream.chunks if stream else 0
+    
+    def invoke():
+        if stream:
+            return _stream_bedrock_raw(prompt, model_id, stream)
+        return _invoke_bedrock_raw(prompt, model_id)
     
     try:
-        # Prepare the request body for Claude
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4000,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        }
-        
-        # Invoke the model
-        response = bedrock_runtime.invoke_model(
-            modelId=model_id,
-            body=json.dumps(body)
-        )
+        if query is None:
+            text = await invoke()
+        else:
+            text, status = await semantic_response_cache.get_or_invoke(
+                query,
+                context_docs,
+                invoke=invoke,
+                embed=_embed_for_semantic_cache,
+                subject_id=subject_id,
+                model_id=model_id
+            )
+            logger.info(f"Semantic cache {status} for subject {subject_id or 'global'}")
         
-        # Parse the response
-        response_body = json.loads(response['body'].read())
+        if stream and text and stream.chunks == chunks_before:
+            stream.push(text)
         
-        # Extract the generated text
-        if 'content' in response_body and response_body['content']:
-            return response_body['content'][0]['text']
-        else:
-            return "I apologize, but I couldn't generate a proper response. Please try again."
+        return text or "I apologize, but I couldn't generate a proper response. Please try again."
             
     except Exception as e:
         logger.error(f"Error invoking Bedrock model: {str(e)}")
         return f"I encountered an error while processing your request: {str(e)}"
 
 
+def _claude_request_body(prompt: str) -> Dict[str, Any]:
+    """Request body for Claude"""
+    
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 4000,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    }
+
+
+async def _invoke_bedrock_raw(prompt: str, model_id: str) -> str:
+    """Invoke the model and return its text (None if empty); errors propagate"""
+    
+    # Invoke the model
+    response_body = await async_aws.invoke_model(model_id, _claude_request_body(prompt), client=bedrock_runtime)
+    
+    # Extract the generated text
+    if 'content' in response_body and response_body['content']:
+        return response_body['content'][0]['text']
+    return None
+
+
+async def _stream_bedrock_raw(prompt: str, model_id: str, stream: TokenStream) -> str:
+    """Invoke the model with response streaming, pushing text deltas; returns the full text (None if empty)"""
+    
+    parts = []
+    async for event in async_aws.invoke_model_stream(model_id, _claude_request_body(prompt), client=bedrock_runtime):
+        if event.get('type') == 'content_block_delta':
+            text = event.get('delta', {}).get('text', '')
+            if text:
+                parts.append(text)
+                stream.push(text)
+    
+    return ''.join(parts) or None
+
+
+async def _embed_for_semantic_cache(text: str) -> List[float]:
+    """Titan embedding for semantic cache lookups (None disables caching)"""
+    
+    if not vector_storage.is_available():
+        return None
+    return await async_aws.run(vector_storage.generate_embedding, text)
+
+
 def get_cors_headers() -> Dict[str, str]:
     """Get CORS headers"""
     return {
@@ -4,7 +4,6 @@ Core functionality without complex dependencies
 """
 
 import json
-import boto3
 import os
 import uuid
 import logging
@@ -16,13 +15,21 @@ from decimal import Decimal
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Shared utilities
+import sys
+sys.path.append('/opt/python')  # Lambda layer path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.lazy import lazy_client, lazy_resource
+from shared.intent_classifier import intent_classifier
+
 # AWS clients
-comprehend = boto3.client('comprehend')
-textract = boto3.client('textract')
-translate = boto3.client('translate')
-bedrock_runtime = boto3.client('bedrock-runtime')
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
+comprehend = lazy_client('comprehend')
+textract = lazy_client('textract')
+translate = lazy_client('translate')
+bedrock_runtime = lazy_client('bedrock-runtime')
+s3_client = lazy_client('s3')
+dynamodb = lazy_resource('dynamodb')
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -246,46 +253,10 @@ def intent_detection_step(state: Dict[str, Any]) -> Dict[str, Any]:
             state['key_phrases'] = []
             state['entities'] = []
         
-        # Intent classification based on keywords
-        intent_keywords = {
-            'summarize': [
-                'summary', 'summarize', 'key points', 'overview', 'main points',
-                'brief', 'outline', 'highlights', 'recap', 'digest', 'synopsis',
-                'sum up', 'give me the gist', 'what are the main', 'tell me about'
-            ],
-            'question': [
-                'what', 'how', 'why', 'when', 'where', 'who', 'which',
-                'explain', 'tell me', 'can you', 'help me understand',
-                'clarify', 'elaborate', 'describe'
-            ],
-            'translate': [
-                'translate', 'translation', 'convert to', 'in spanish',
-                'in french', 'in german', 'language', 'otro idioma'
-            ]
-        }
-        
-        # Determine summary type if summarization intent
-        summary_type_keywords = {
-            'brief': ['brief', 'short', 'quick', 'concise', 'simple'],
-            'detailed': ['detailed', 'comprehensive', 'thorough', 'complete', 'full'],
-            'comprehensive': ['comprehensive', 'extensive', 'in-depth', 'complete analysis']
-        }
-        
-        detected_intent = "general"  # default
-        summary_type = "standard"
-        
-        # Check for summarization intent
-        for intent, keywords in intent_keywords.items():
-            if any(keyword in message for keyword in keywords):
-                detected_intent = intent
-                break
-        
-        # Determine summary type if summarizing
-        if detected_intent == "summarize":
-            for s_type, keywords in summary_type_keywords.items():
-                if any(keyword in message for keyword in keywords):
-                    summary_type = s_type
-                    break
+        # Every intent and summary-type phrase found in one scan, scored by weight
+        classification = intent_classifier.classify(message)
+        detected_intent = classification.intent
+        summary_type = classification.summary_type
         
         state['intent'] = detected_intent
         state['summary_type'] = summary_type
@@ -12,6 +12,12 @@ from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client
+except ImportError:
+    get_client = boto3.client
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,9 +26,9 @@ class BedrockKnowledgeBaseManager:
     
     def __init__(self):
         """Initialize Bedrock Knowledge Base manager"""
-        self.bedrock_agent = boto3.client('bedrock-agent')
-        self.bedrock_agent_runtime = boto3.client('bedrock-agent-runtime')
-        self.s3_client = boto3.client('s3')
+        self.bedrock_agent = get_client('bedrock-agent')
+        self.bedrock_agent_runtime = get_client('bedrock-agent-runtime')
+        self.s3_client = get_client('s3')
         
         # Configuration
         self.knowledge_base_id = os.getenv('BEDROCK_KNOWLEDGE_BASE_ID')
@@ -9,17 +9,26 @@ import os
 import uuid
 import io
 import base64
+import importlib.util
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 import logging
 
-# Text extraction libraries
+# Shared AWS client registry (not packaged with every Lambda)
 try:
-    import PyPDF2
-    from docx import Document
-    PDF_AVAILABLE = True
+    from shared.connection_pool import get_client, get_resource
 except ImportError:
-    PDF_AVAILABLE = False
+    get_client, get_resource = boto3.client, boto3.resource
+
+# File lists are read through the performance cache where the shared package is deployed
+try:
+    from shared.cache_warming import cache_warmer
+except ImportError:
+    cache_warmer = None
+
+# Text extraction libraries (imported by text_extractor on first use)
+PDF_AVAILABLE = all(importlib.util.find_spec(module) is not None for module in ('PyPDF2', 'docx'))
+if not PDF_AVAILABLE:
     print("Warning: PDF/DOCX processing not available. Install with: pip install PyPDF2 python-docx")
 
 # Configure logging
@@ -125,7 +134,7 @@ def handle_file_upload(body: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         s3_key = f"raw-files/user_{user_id}/{file_id}_{filename}"
         
         # Generate presigned URL for upload
-        s3_client = boto3.client('s3')
+        s3_client = get_client('s3')
         bucket_name = os.getenv('DOCUMENTS_BUCKET', f'lms-documents-{os.getenv("AWS_ACCOUNT_ID", "default")}-{os.getenv("AWS_REGION", "us-east-1")}')
         
         presigned_url = s3_client.generate_presigned_url(
@@ -139,7 +148,7 @@ def handle_file_upload(body: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         )
         
         # Store file metadata in DynamoDB
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         files_table = dynamodb.Table('lms-user-files')
         
         file_metadata = {
@@ -158,6 +167,7 @@ def handle_file_upload(body: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         }
         
         files_table.put_item(Item=file_metadata)
+        invalidate_file_list(user_id, subject_id)
         
         logger.info(f"Generated upload URL for file {file_id}: {filename}")
         
@@ -194,7 +204,7 @@ def handle_file_processing(body: Dict[str, Any], user_id: str) -> Dict[str, Any]
             }
         
         # Get file metadata
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         files_table = dynamodb.Table('lms-user-files')
         
         response = files_table.get_item(Key={'file_id': file_id})
@@ -217,6 +227,7 @@ def handle_file_processing(body: Dict[str, Any], user_id: str) -> Dict[str, Any]
         
         # Update status to processing
         update_file_status(files_table, file_id, 'processing_status', 'processing')
+        invalidate_file_list(user_id, file_metadata.get('subject_id'))
         
         # Process the file for RAG
         processing_result = process_file_for_rag(file_metadata)
@@ -230,6 +241,7 @@ def handle_file_processing(body: Dict[str, Any], user_id: str) -> Dict[str, Any]
                 'vectors_stored': processing_result['vectors_stored'],
                 'content_preview': processing_result['content_preview'][:500]
             })
+            invalidate_file_list(user_id, file_metadata.get('subject_id'))
             
             return {
                 'statusCode': 200,
@@ -247,6 +259,7 @@ def handle_file_processing(body: Dict[str, Any], user_id: str) -> Dict[str, Any]
             update_file_status(files_table, file_id, 'processing_status', 'failed', {
                 'error_message': processing_result['error']
             })
+            invalidate_file_list(user_id, file_metadata.get('subject_id'))
             
             return {
                 'statusCode': 500,
@@ -271,18 +284,22 @@ def handle_get_files(user_id: str) -> Dict[str, Any]:
     """Get user's files"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
-        files_table = dynamodb.Table('lms-user-files')
+        if cache_warmer is not None:
+            # Same entry login warming fills
+            files = cache_warmer.file_list(user_id)
+        else:
+            dynamodb = get_resource('dynamodb')
+            files_table = dynamodb.Table('lms-user-files')
         
-        # Query user's files
-        response = files_table.query(
-            IndexName='user-id-index',
-            KeyConditionExpression='user_id = :user_id',
-            ExpressionAttributeValues={':user_id': user_id},
-            ScanIndexForward=False  # Most recent first
-        )
+            # Query user's files
+            response = files_table.query(
+                IndexName='user-id-index',
+                KeyConditionExpression='user_id = :user_id',
+                ExpressionAttributeValues={':user_id': user_id},
+                ScanIndexForward=False  # Most recent first
+            )
         
-        files = response.get('Items', [])
+            files = response.get('Items', [])
         
         # Format response
         formatted_files = []
@@ -331,7 +348,7 @@ def handle_get_status(file_id: str, user_id: str) -> Dict[str, Any]:
                 'body': json.dumps({'error': 'file_id is required'})
             }
         
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         files_table = dynamodb.Table('lms-user-files')
         
         response = files_table.get_item(Key={'file_id': file_id})
@@ -476,7 +493,7 @@ def extract_text_from_s3_file(s3_key: str, filename: str) -> Tuple[Optional[str]
     try:
         from .text_extractor import text_extractor
         
-        s3_client = boto3.client('s3')
+        s3_client = get_client('s3')
         bucket_name = os.getenv('DOCUMENTS_BUCKET', f'lms-documents-{os.getenv("AWS_ACCOUNT_ID", "default")}-{os.getenv("AWS_REGION", "us-east-1")}')
         
         # Download file from S3
@@ -575,7 +592,7 @@ def store_chunks_in_s3(s3_key: str, chunks: List[Dict[str, Any]], file_metadata:
     """Store processed chunks in S3 with enhanced metadata"""
     
     try:
-        s3_client = boto3.client('s3')
+        s3_client = get_client('s3')
         bucket_name = os.getenv('DOCUMENTS_BUCKET', f'lms-documents-{os.getenv("AWS_ACCOUNT_ID", "default")}-{os.getenv("AWS_REGION", "us-east-1")}')
         
         chunks_data = {
@@ -703,6 +720,13 @@ def update_file_status(files_table, file_id: str, status_field: str, status_valu
         return False
 
 
+def invalidate_file_list(user_id: str, subject_id: str = None) -> None:
+    """Drop the user's cached file list (and subject documents) after a file record changes"""
+    
+    if cache_warmer is not None:
+        cache_warmer.invalidate_files(user_id, subject_id)
+
+
 def get_cors_headers() -> Dict[str, str]:
     """Get CORS headers"""
     return {
@@ -13,16 +13,22 @@ import uuid
 from datetime import datetime, timedelta
 import mimetypes
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client
+except ImportError:
+    get_client = boto3.client
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 class FileUploadHandler:
     def __init__(self):
-        self.s3_client = boto3.client('s3')
-        self.textract_client = boto3.client('textract')
-        self.comprehend_client = boto3.client('comprehend')
-        self.bedrock_runtime = boto3.client('bedrock-runtime')
+        self.s3_client = get_client('s3')
+        self.textract_client = get_client('textract')
+        self.comprehend_client = get_client('comprehend')
+        self.bedrock_runtime = get_client('bedrock-runtime')
         
         self.bucket_name = os.environ.get('DOCUMENTS_BUCKET', 'lms-documents-dev')
         self.allowed_extensions = {'.pdf', '.docx', '.doc', '.txt', '.png', '.jpg', '.jpeg'}
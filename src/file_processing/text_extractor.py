@@ -5,6 +5,7 @@ Supports PDF, DOCX, TXT files, and images using AWS Textract for enhanced extrac
 
 import io
 import logging
+import importlib.util
 import boto3
 import json
 import time
@@ -12,18 +13,75 @@ from typing import Optional, Dict, Any, List
 import mimetypes
 import base64
 
-# Text extraction libraries
+# Shared AWS client registry (not packaged with every Lambda)
 try:
-    import PyPDF2
-    from docx import Document
-    TEXT_EXTRACTION_AVAILABLE = True
+    from shared.connection_pool import get_client
 except ImportError:
-    TEXT_EXTRACTION_AVAILABLE = False
+    get_client = boto3.client
+
+# Text extraction libraries (imported on first use; only check they are installed here)
+TEXT_EXTRACTION_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None for module in ('PyPDF2', 'docx')
+)
+if not TEXT_EXTRACTION_AVAILABLE:
     print("Warning: Text extraction libraries not available. Install with: pip install PyPDF2 python-docx")
 
 logger = logging.getLogger(__name__)
 
 
+def extract_pdf_text(file_content: bytes, filename: str) -> Dict[str, Any]:
+    """
+    Extract text from a PDF with PyPDF2
+    
+    Module-level (and free of AWS clients) so it can run in the CPU lane's
+    worker processes.
+    """
+    
+    try:
+        import PyPDF2
+        
+        pdf_file = io.BytesIO(file_content)
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        
+        # Check if PDF is encrypted
+        if pdf_reader.is_encrypted:
+            return {
+                'success': False,
+                'error': 'PDF is encrypted and cannot be processed',
+                'text': ''
+            }
+        
+        # Extract text from all pages
+        text_content = []
+        page_count = len(pdf_reader.pages)
+        
+        for page_num, page in enumerate(pdf_reader.pages):
+            try:
+                page_text = page.extract_text()
+                if page_text.strip():  # Only add non-empty pages
+                    text_content.append(f"--- Page {page_num + 1} ---\n{page_text}")
+            except Exception as e:
+                logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
+                continue
+        
+        full_text = '\n\n'.join(text_content)
+        
+        return {
+            'success': True,
+            'text': full_text,
+            'page_count': page_count,
+            'pages_processed': len(text_content),
+            'extraction_method': 'PyPDF2'
+        }
+    
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f'Failed to extract text from PDF: {str(e)}',
+            'text': ''
+        }
+
+
 class TextExtractor:
     """Advanced text extraction utility with AWS Textract integration"""
     
@@ -54,8 +112,8 @@ class TextExtractor:
         }
         
         # Initialize AWS clients
-        self.textract_client = boto3.client('textract')
-        self.comprehend_client = boto3.client('comprehend')
+        self.textract_client = get_client('textract')
+        self.comprehend_client = get_client('comprehend')
         
         # Textract configuration
         self.use_textract = True  # Can be disabled for fallback
@@ -180,47 +238,7 @@ class TextExtractor:
     def _extract_from_pdf_pypdf2(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """Extract text from PDF file using PyPDF2 (fallback method)"""
         
-        try:
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            # Check if PDF is encrypted
-            if pdf_reader.is_encrypted:
-                return {
-                    'success': False,
-                    'error': 'PDF is encrypted and cannot be processed',
-                    'text': ''
-                }
-            
-            # Extract text from all pages
-            text_content = []
-            page_count = len(pdf_reader.pages)
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text.strip():  # Only add non-empty pages
-                        text_content.append(f"--- Page {page_num + 1} ---\n{page_text}")
-                except Exception as e:
-                    logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
-                    continue
-            
-            full_text = '\n\n'.join(text_content)
-            
-            return {
-                'success': True,
-                'text': full_text,
-                'page_count': page_count,
-                'pages_processed': len(text_content),
-                'extraction_method': 'PyPDF2'
-            }
-            
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f'Failed to extract text from PDF: {str(e)}',
-                'text': ''
-            }
+        return extract_pdf_text(file_content, filename)
     
     def _extract_from_image_textract(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """Extract text from image using AWS Textract"""
@@ -488,6 +506,8 @@ class TextExtractor:
         """Extract text from DOCX file"""
         
         try:
+            from docx import Document
+            
             docx_file = io.BytesIO(file_content)
             doc = Document(docx_file)
             
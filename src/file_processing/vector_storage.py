@@ -6,22 +6,27 @@ Handles Pinecone integration and embedding generation
 import os
 import json
 import logging
+import importlib.util
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import boto3
 
-# Pinecone integration
+# Pinecone integration (imported on first use; only check it is installed here)
+PINECONE_AVAILABLE = importlib.util.find_spec('pinecone') is not None
+if not PINECONE_AVAILABLE:
+    print("Warning: Pinecone not available. Install with: pip install pinecone")
+
+# Shared embedding cache (not packaged with every Lambda)
+try:
+    from shared.embedding_cache import embedding_cache
+except ImportError:
+    embedding_cache = None
+
+# Shared AWS client registry (not packaged with every Lambda)
 try:
-    from pinecone import Pinecone
-    PINECONE_AVAILABLE = True
+    from shared.connection_pool import get_client
 except ImportError:
-    try:
-        # Fallback for older pinecone-client package
-        import pinecone
-        PINECONE_AVAILABLE = True
-    except ImportError:
-        PINECONE_AVAILABLE = False
-        print("Warning: Pinecone not available. Install with: pip install pinecone")
+    get_client = boto3.client
 
 logger = logging.getLogger(__name__)
 
@@ -34,13 +39,35 @@ class VectorStorage:
         self.index_name = index_name
         self.pc = None
         self.index = None
+        self._connected = False
+        self._bedrock_runtime = None
         
-        # Initialize Bedrock for embeddings
-        self.bedrock_runtime = boto3.client('bedrock-runtime')
         self.embedding_model = os.getenv('BEDROCK_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1')
+        self.embedding_cache = embedding_cache
+        
+    @property
+    def bedrock_runtime(self):
+        """Bedrock runtime client for embeddings (created on first use)"""
+        
+        if self._bedrock_runtime is None:
+            self._bedrock_runtime = get_client('bedrock-runtime')
+        return self._bedrock_runtime
+    
+    @bedrock_runtime.setter
+    def bedrock_runtime(self, client):
+        self._bedrock_runtime = client
+    
+    def _connect(self) -> None:
+        """Connect to Pinecone on first use instead of at import time"""
+        
+        if self._connected or self.index is not None:
+            return
+        self._connected = True
         
         if PINECONE_AVAILABLE and self.api_key:
             try:
+                from pinecone import Pinecone
+                
                 self.pc = Pinecone(api_key=self.api_key)
                 if self.pc.has_index(self.index_name):
                     self.index = self.pc.Index(self.index_name)
@@ -52,11 +79,13 @@ class VectorStorage:
     
     def is_available(self) -> bool:
         """Check if vector storage is available and configured"""
+        self._connect()
         return PINECONE_AVAILABLE and self.index is not None
     
     def create_index_if_not_exists(self, dimension: int = 1536, metric: str = "cosine") -> bool:
         """Create Pinecone index if it doesn't exist"""
         
+        self._connect()
         if not PINECONE_AVAILABLE or not self.pc:
             logger.error("Pinecone not available for index creation")
             return False
@@ -84,15 +113,35 @@ class VectorStorage:
             return False
     
     def generate_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding using Bedrock Titan"""
+        """Generate embedding using Bedrock Titan (served from the embedding cache when seen before)"""
+        
+        text = self._truncate_for_embedding(text)
+        
+        if self.embedding_cache:
+            return self.embedding_cache.get_or_embed(self.embedding_model, text, self._invoke_embedding_model)
+        return self._invoke_embedding_model(text)
+    
+    def generate_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Generate embeddings for many texts with one cache lookup; only unseen text reaches Bedrock"""
+        
+        texts = [self._truncate_for_embedding(text) for text in texts]
+        
+        if self.embedding_cache:
+            return self.embedding_cache.embed_many(self.embedding_model, texts, self._invoke_embedding_model)
+        return [self._invoke_embedding_model(text) for text in texts]
+    
+    def _truncate_for_embedding(self, text: str) -> str:
+        # Truncate text if too long (Titan has input limits)
+        max_input_length = 8000  # Conservative limit for Titan
+        if len(text) > max_input_length:
+            logger.warning(f"Text truncated to {max_input_length} characters for embedding")
+            return text[:max_input_length]
+        return text
+    
+    def _invoke_embedding_model(self, text: str) -> Optional[List[float]]:
+        """Call Bedrock Titan for one embedding"""
         
         try:
-            # Truncate text if too long (Titan has input limits)
-            max_input_length = 8000  # Conservative limit for Titan
-            if len(text) > max_input_length:
-                text = text[:max_input_length]
-                logger.warning(f"Text truncated to {max_input_length} characters for embedding")
-            
             response = self.bedrock_runtime.invoke_model(
                 modelId=self.embedding_model,
                 body=json.dumps({
@@ -154,16 +203,16 @@ class VectorStorage:
         try:
             vectors_to_upsert = []
             
-            for chunk in text_chunks:
+            # Generate embeddings (re-uploaded or shared text comes from the cache)
+            if use_mock_embeddings:
+                embeddings = [self.generate_embedding_mock(chunk['text']) for chunk in text_chunks]
+            else:
+                embeddings = self.generate_embeddings([chunk['text'] for chunk in text_chunks])
+            
+            for chunk, embedding in zip(text_chunks, embeddings):
                 chunk_text = chunk['text']
                 chunk_index = chunk['index']
                 
-                # Generate embedding
-                if use_mock_embeddings:
-                    embedding = self.generate_embedding_mock(chunk_text)
-                else:
-                    embedding = self.generate_embedding(chunk_text)
-                
                 if not embedding:
                     logger.error(f"Failed to generate embedding for chunk {chunk_index}")
                     continue
@@ -340,7 +389,8 @@ class VectorStorage:
             return {
                 'status': 'unavailable',
                 'total_vectors': 0,
-                'dimension': 1536
+                'dimension': 1536,
+                'embedding_cache': self.embedding_cache.get_stats() if self.embedding_cache else None
             }
         
         try:
@@ -349,7 +399,8 @@ class VectorStorage:
                 'status': 'available',
                 'total_vectors': stats.get('total_vector_count', 0),
                 'dimension': stats.get('dimension', 1536),
-                'index_fullness': stats.get('index_fullness', 0.0)
+                'index_fullness': stats.get('index_fullness', 0.0),
+                'embedding_cache': self.embedding_cache.get_stats() if self.embedding_cache else None
             }
             
         except Exception as e:
@@ -12,12 +12,7 @@ from typing import Dict, Any, List, Optional, Union
 from pathlib import Path
 import tempfile
 
-# PDF processing libraries
-import PyPDF2
-import pdfplumber
-
-# DOCX processing library
-from docx import Document
+# PDF and DOCX libraries are imported inside the extractors that use them
 
 # Text processing
 import unicodedata
@@ -168,6 +163,8 @@ class AdvancedTextExtractor:
                 'extraction_method': 'pdfplumber'
             }
             
+            import pdfplumber
+            
             with pdfplumber.open(file_path) as pdf:
                 metadata['pages'] = len(pdf.pages)
                 
@@ -213,6 +210,8 @@ class AdvancedTextExtractor:
                 'extraction_method': 'pypdf2'
             }
             
+            import PyPDF2
+            
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 metadata['pages'] = len(pdf_reader.pages)
@@ -275,6 +274,8 @@ class AdvancedTextExtractor:
                 'extraction_method': 'python-docx'
             }
             
+            from docx import Document
+            
             doc = Document(file_path)
             
             # Extract headers
@@ -6,6 +6,12 @@ from datetime import datetime
 from botocore.exceptions import ClientError
 import base64
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client, get_resource
+except ImportError:
+    get_client, get_resource = boto3.client, boto3.resource
+
 def lambda_handler(event, context):
     """
     File upload handler for student notes and documents
@@ -161,7 +167,7 @@ def validate_token(event):
         token = auth_header.replace('Bearer ', '')
         
         # Validate with Cognito
-        cognito = boto3.client('cognito-idp')
+        cognito = get_client('cognito-idp')
         response = cognito.get_user(AccessToken=token)
         
         return {
@@ -179,7 +185,7 @@ def upload_to_s3(content, s3_key):
         if not s3_bucket:
             return False
         
-        s3 = boto3.client('s3')
+        s3 = get_client('s3')
         s3.put_object(
             Bucket=s3_bucket,
             Key=s3_key,
@@ -201,7 +207,7 @@ def store_file_metadata(metadata):
         if not table_name:
             return False
         
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         table = dynamodb.Table(table_name)
         
         # Store with composite key: PK = USER#{userId}, SK = FILE#{fileId}
@@ -235,7 +241,7 @@ def get_user_files(user_id):
         if not table_name:
             return []
         
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         table = dynamodb.Table(table_name)
         
         # Query files for user
@@ -274,7 +280,7 @@ def delete_user_file(user_id, file_id):
         if not table_name or not s3_bucket:
             return False
         
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         table = dynamodb.Table(table_name)
         
         # Get file metadata first
@@ -292,7 +298,7 @@ def delete_user_file(user_id, file_id):
         
         # Delete from S3
         if s3_key:
-            s3 = boto3.client('s3')
+            s3 = get_client('s3')
             s3.delete_object(Bucket=s3_bucket, Key=s3_key)
         
         # Delete from DynamoDB
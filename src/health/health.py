@@ -3,7 +3,6 @@ Health check Lambda function with enhanced error handling and validation
 """
 
 import json
-import boto3
 import os
 import sys
 from datetime import datetime
@@ -15,6 +14,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from shared.exceptions import lambda_error_handler, get_cors_headers
 from shared.validation import HealthResponse, create_success_response
 from shared.logging_config import get_logger, log_lambda_start, log_lambda_end, log_api_call
+from shared.connection_pool import get_client, get_resource
 import time
 
 logger = get_logger(__name__)
@@ -41,7 +41,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # Test DynamoDB connectivity
     try:
         start_service_time = time.time()
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb', profile='fast_fail')
         table = dynamodb.Table('lms-user-files')
         table.load()
         
@@ -61,7 +61,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # Test S3 connectivity
     try:
         start_service_time = time.time()
-        s3 = boto3.client('s3')
+        s3 = get_client('s3', profile='fast_fail')
         bucket_name = os.getenv('DOCUMENTS_BUCKET', 'lms-documents-145023137830-1760886549')
         s3.head_bucket(Bucket=bucket_name)
         
@@ -81,7 +81,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # Test Bedrock connectivity
     try:
         start_service_time = time.time()
-        bedrock = boto3.client('bedrock-runtime')
+        bedrock = get_client('bedrock-runtime', profile='fast_fail')
         # Test with a simple model list call
         bedrock.list_foundation_models()
         
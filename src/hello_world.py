@@ -3,6 +3,12 @@ import os
 import boto3
 from datetime import datetime
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client, get_resource
+except ImportError:
+    get_client, get_resource = boto3.client, boto3.resource
+
 def lambda_handler(event, context):
     """
     Simple Hello World Lambda function to test AWS infrastructure connectivity
@@ -18,7 +24,7 @@ def lambda_handler(event, context):
     
     try:
         # Test DynamoDB connectivity
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         table = dynamodb.Table(dynamodb_table)
         table.table_status  # This will raise an exception if table doesn't exist
         services_status['dynamodb'] = 'connected'
@@ -27,7 +33,7 @@ def lambda_handler(event, context):
     
     try:
         # Test S3 connectivity
-        s3 = boto3.client('s3')
+        s3 = get_client('s3')
         s3.head_bucket(Bucket=s3_bucket)
         services_status['s3'] = 'connected'
     except Exception as e:
@@ -35,7 +41,7 @@ def lambda_handler(event, context):
     
     try:
         # Test Cognito connectivity
-        cognito = boto3.client('cognito-idp')
+        cognito = get_client('cognito-idp')
         cognito.describe_user_pool(UserPoolId=user_pool_id)
         services_status['cognito'] = 'connected'
     except Exception as e:
@@ -43,7 +49,7 @@ def lambda_handler(event, context):
     
     try:
         # Test Bedrock connectivity
-        bedrock = boto3.client('bedrock')
+        bedrock = get_client('bedrock')
         bedrock.list_foundation_models()
         services_status['bedrock'] = 'connected'
     except Exception as e:
@@ -4,13 +4,21 @@ Extends Bedrock Agent with advanced quiz generation and translation capabilities
 """
 
 import json
-import boto3
 import os
 import uuid
+import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+# Import shared services
+import sys
+sys.path.append('/opt/python')  # Lambda layer path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.connection_pool import get_client, get_resource
+from shared.async_aws import async_aws
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -20,10 +28,10 @@ class EnhancedQuizGenerator:
     
     def __init__(self):
         """Initialize AWS services"""
-        self.bedrock_runtime = boto3.client('bedrock-runtime')
-        self.comprehend = boto3.client('comprehend')
-        self.translate = boto3.client('translate')
-        self.dynamodb = boto3.resource('dynamodb')
+        self.bedrock_runtime = get_client('bedrock-runtime')
+        self.comprehend = get_client('comprehend')
+        self.translate = get_client('translate')
+        self.dynamodb = get_resource('dynamodb')
         
         # DynamoDB tables
         self.quizzes_table = self.dynamodb.Table('lms-quizzes')
@@ -95,7 +103,7 @@ class EnhancedQuizGenerator:
         """Detect language using Amazon Comprehend"""
         
         try:
-            response = self.comprehend.detect_dominant_language(Text=text)
+            response = await async_aws.detect('dominant_language', text, client=self.comprehend)
             
             if response['Languages']:
                 detected_lang = response['Languages'][0]['LanguageCode']
@@ -116,13 +124,7 @@ class EnhancedQuizGenerator:
         """Translate text using Amazon Translate"""
         
         try:
-            response = self.translate.translate_text(
-                Text=text,
-                SourceLanguageCode=source_lang,
-                TargetLanguageCode=target_lang
-            )
-            
-            translated_text = response['TranslatedText']
+            translated_text = await async_aws.translate_text(text, source_lang, target_lang, client=self.translate)
             logger.info(f"Translated text from {source_lang} to {target_lang}")
             
             return translated_text
@@ -148,13 +150,15 @@ class EnhancedQuizGenerator:
                 for doc in rag_context[:3]
             ])
         
+        context_section = f"Context from uploaded documents:\n{context_text}\n" if context_text else ""
+        
         # Create quiz generation prompt
         prompt = f"""Generate an educational quiz about "{topic}" with the following specifications:
 
 Difficulty Level: {difficulty}
 Number of Questions: {question_count}
 
-{f"Context from uploaded documents:\n{context_text}\n" if context_text else ""}
+{context_section}
 
 Requirements:
 1. Create {question_count} multiple-choice questions
@@ -189,9 +193,9 @@ Generate the quiz now:"""
 
         try:
             # Invoke Bedrock Nova model
-            response = self.bedrock_runtime.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
+            response_body = await async_aws.invoke_model(
+                self.model_id,
+                {
                     "messages": [
                         {
                             "role": "user",
@@ -200,11 +204,11 @@ Generate the quiz now:"""
                     ],
                     "max_tokens": 2000,
                     "temperature": 0.7
-                })
+                },
+                client=self.bedrock_runtime
             )
             
             # Parse response
-            response_body = json.loads(response['body'].read())
             content = response_body['output']['message']['content'][0]['text']
             
             # Extract JSON from response
@@ -319,31 +323,26 @@ Generate the quiz now:"""
                 quiz_data["quiz_title"], source_lang, target_lang
             )
             
-            # Translate questions
-            translated_questions = []
-            for question in quiz_data.get("questions", []):
+            # Translate questions (every text in the quiz is translated concurrently)
+            async def translate_question(question: Dict) -> Dict:
                 translated_question = question.copy()
+                options = list(question.get("options", {}).items())
+                fields = [name for name in ("question", "explanation") if name in question]
                 
-                # Translate question text
-                translated_question["question"] = await self._translate_text(
-                    question["question"], source_lang, target_lang
+                translations = await asyncio.gather(
+                    *(self._translate_text(question[name], source_lang, target_lang) for name in fields),
+                    *(self._translate_text(option_text, source_lang, target_lang) for _, option_text in options)
                 )
                 
-                # Translate options
-                translated_options = {}
-                for key, option_text in question.get("options", {}).items():
-                    translated_options[key] = await self._translate_text(
-                        option_text, source_lang, target_lang
-                    )
-                translated_question["options"] = translated_options
-                
-                # Translate explanation
-                if "explanation" in question:
-                    translated_question["explanation"] = await self._translate_text(
-                        question["explanation"], source_lang, target_lang
-                    )
+                translated_question.update(zip(fields, translations))
+                translated_question["options"] = {
+                    key: translated for (key, _), translated in zip(options, translations[len(fields):])
+                }
+                return translated_question
                 
-                translated_questions.append(translated_question)
+            translated_questions = list(await asyncio.gather(
+                *(translate_question(question) for question in quiz_data.get("questions", []))
+            ))
             
             translated_quiz["questions"] = translated_questions
             translated_quiz["translated_from"] = source_lang
@@ -392,7 +391,7 @@ Generate the quiz now:"""
                 }
             }
             
-            self.quizzes_table.put_item(Item=quiz_item)
+            await async_aws.put_item(self.quizzes_table, quiz_item)
             logger.info(f"Stored quiz {quiz_id} for user {user_id}")
             
             return quiz_id
@@ -412,13 +411,11 @@ Generate the quiz now:"""
         
         try:
             # Get quiz data
-            quiz_response = self.quizzes_table.get_item(Key={'quiz_id': quiz_id})
+            quiz_data = await async_aws.get_item(self.quizzes_table, {'quiz_id': quiz_id})
             
-            if 'Item' not in quiz_response:
+            if not quiz_data:
                 raise ValueError(f"Quiz not found: {quiz_id}")
             
-            quiz_data = quiz_response['Item']
-            
             # Verify user owns this quiz
             if quiz_data['user_id'] != user_id and quiz_data['user_id'] != 'anonymous':
                 raise ValueError("Unauthorized access to quiz")
@@ -433,12 +430,10 @@ Generate the quiz now:"""
                 user_id, quiz_id, answers, scoring_result, time_taken
             )
             
-            # Update quiz metadata
-            await self._update_quiz_stats(quiz_id, scoring_result['score'])
-            
-            # Update learning analytics
-            await self._update_learning_analytics(
-                user_id, quiz_data, scoring_result
+            # Update quiz metadata and learning analytics (independent writes)
+            await asyncio.gather(
+                self._update_quiz_stats(quiz_id, scoring_result['score']),
+                self._update_learning_analytics(user_id, quiz_data, scoring_result)
             )
             
             return {
@@ -475,6 +470,11 @@ Generate the quiz now:"""
         detailed_results = []
         concept_performance = {}
         
+        # Extract concepts from every question concurrently for analytics
+        question_concepts = await asyncio.gather(
+            *(self._extract_concepts(question.get('question', '')) for question in questions)
+        )
+        
         for i, question in enumerate(questions):
             question_num = str(i + 1)
             user_answer = answers.get(question_num, '').upper()
@@ -484,9 +484,8 @@ Generate the quiz now:"""
             if is_correct:
                 correct_answers += 1
             
-            # Extract concepts from question for analytics
             question_text = question.get('question', '')
-            concepts = await self._extract_concepts(question_text)
+            concepts = question_concepts[i]
             
             for concept in concepts:
                 if concept not in concept_performance:
@@ -530,10 +529,7 @@ Generate the quiz now:"""
         """Extract key concepts from question text using Comprehend"""
         
         try:
-            response = self.comprehend.detect_key_phrases(
-                Text=question_text,
-                LanguageCode='en'
-            )
+            response = await async_aws.detect('key_phrases', question_text, 'en', client=self.comprehend)
             
             concepts = []
             for phrase in response['KeyPhrases']:
@@ -614,7 +610,7 @@ Generate the quiz now:"""
             'enhanced_analytics': True
         }
         
-        self.submissions_table.put_item(Item=submission_data)
+        await async_aws.put_item(self.submissions_table, submission_data)
         return submission_id
     
     async def _update_quiz_stats(self, quiz_id: str, score: float) -> None:
@@ -622,8 +618,7 @@ Generate the quiz now:"""
         
         try:
             # Get current quiz data
-            response = self.quizzes_table.get_item(Key={'quiz_id': quiz_id})
-            quiz_data = response.get('Item', {})
+            quiz_data = await async_aws.get_item(self.quizzes_table, {'quiz_id': quiz_id}) or {}
             
             current_attempts = quiz_data.get('attempts', 0) + 1
             best_score = quiz_data.get('best_score')
@@ -632,8 +627,9 @@ Generate the quiz now:"""
                 best_score = score
             
             # Update quiz metadata
-            self.quizzes_table.update_item(
-                Key={'quiz_id': quiz_id},
+            await async_aws.update_item(
+                self.quizzes_table,
+                {'quiz_id': quiz_id},
                 UpdateExpression='SET attempts = :attempts, best_score = :best_score, last_attempt = :last_attempt',
                 ExpressionAttributeValues={
                     ':attempts': current_attempts,
@@ -658,8 +654,7 @@ Generate the quiz now:"""
             
             # Get existing analytics
             try:
-                response = self.analytics_table.get_item(Key={'analytics_id': analytics_id})
-                analytics = response.get('Item', {})
+                analytics = await async_aws.get_item(self.analytics_table, {'analytics_id': analytics_id}) or {}
             except:
                 analytics = {}
             
@@ -690,7 +685,7 @@ Generate the quiz now:"""
                 'enhanced_analytics': True
             }
             
-            self.analytics_table.put_item(Item=updated_analytics)
+            await async_aws.put_item(self.analytics_table, updated_analytics)
             
         except Exception as e:
             logger.error(f"Error updating learning analytics: {str(e)}")
@@ -716,9 +711,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Route based on API path
         if api_path == '/generate-quiz':
-            return await handle_quiz_generation(quiz_generator, body)
+            return asyncio.run(handle_quiz_generation(quiz_generator, body))
         elif api_path == '/submit-quiz':
-            return await handle_quiz_submission(quiz_generator, body)
+            return asyncio.run(handle_quiz_submission(quiz_generator, body))
         else:
             return create_bedrock_response(400, {"error": "Invalid API path"})
         
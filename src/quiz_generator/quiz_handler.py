@@ -4,7 +4,6 @@ Handles AI quiz generation using Bedrock Agents
 """
 
 import json
-import boto3
 import os
 import uuid
 import asyncio
@@ -19,6 +18,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.agent_utils import agent_invoker
 from shared.bedrock_agent_service import BedrockAgentError
+from shared.connection_pool import get_resource
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -147,7 +147,7 @@ def store_generated_quiz(user_id: str, quiz_data: Dict[str, Any], subject_id: st
     
     quiz_id = str(uuid.uuid4())
     
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = get_resource('dynamodb')
     quizzes_table = dynamodb.Table('lms-quizzes')
     
     quiz_item = {
@@ -214,7 +214,7 @@ def score_quiz_submission(user_id: str, quiz_id: str, answers: Dict[str, str]) -
     """Score quiz submission and store results"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         quizzes_table = dynamodb.Table('lms-quizzes')
         submissions_table = dynamodb.Table('lms-quiz-submissions')
         
@@ -5,6 +5,7 @@ Provides high-level utilities for invoking LangGraph + Bedrock Agents with prope
 
 import json
 import uuid
+import hashlib
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -16,12 +17,34 @@ from .bedrock_agent_service import (
     AgentResponse,
     BedrockAgentError
 )
-from .langgraph_agent_service import LangGraphAgentService
+from .semantic_cache import semantic_response_cache
+from .lazy import LazyProxy
 from .config import config
 
 logger = logging.getLogger(__name__)
 
 
+def personalization_scope(user_profile: Optional[Dict[str, Any]]) -> str:
+    """
+    Digest of the profile fields the agent prompt is personalized with
+    
+    Students whose prompts carry the same mastery levels and difficulty
+    preference may share cached answers; anyone else may not.
+    
+    Args:
+        user_profile: User learning profile
+    
+    Returns:
+        Short hex digest ("none" without a profile)
+    """
+    
+    if not user_profile:
+        return "none"
+    
+    personalized = [user_profile.get('mastery_levels', {}), user_profile.get('difficulty_preference', 'intermediate')]
+    return hashlib.sha256(json.dumps(personalized, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
 class AgentInvoker:
     """
     High-level utility class for invoking LangGraph + Bedrock Agents with context management
@@ -30,10 +53,19 @@ class AgentInvoker:
     def __init__(self):
         """Initialize Agent Invoker with LangGraph and Bedrock services"""
         self.bedrock_service = BedrockAgentService()
-        self.langgraph_service = LangGraphAgentService()
+        self._langgraph_service = None
         self.use_langgraph = True  # Primary workflow system
         logger.info("AgentInvoker initialized with LangGraph + Bedrock integration")
     
+    @property
+    def langgraph_service(self):
+        """LangGraph service, imported and built on first use (pulls in langchain)"""
+        
+        if self._langgraph_service is None:
+            from .langgraph_agent_service import LangGraphAgentService
+            self._langgraph_service = LangGraphAgentService()
+        return self._langgraph_service
+    
     async def chat_with_context(
         self,
         user_id: str,
@@ -105,15 +137,15 @@ class AgentInvoker:
                 else:
                     # LangGraph failed, try Bedrock fallback
                     logger.warning("LangGraph failed, attempting Bedrock fallback")
-                    return await self._bedrock_fallback(user_id, message, session_id, subject_id, rag_context, user_profile)
+                    return await self._bedrock_fallback(user_id, message, session_id, subject_id, rag_context, user_profile, conversation_id)
             
             else:
                 # Direct Bedrock usage
-                return await self._bedrock_fallback(user_id, message, session_id, subject_id, rag_context, user_profile)
+                return await self._bedrock_fallback(user_id, message, session_id, subject_id, rag_context, user_profile, conversation_id)
             
         except Exception as e:
             logger.error(f"Error in chat_with_context: {str(e)}")
-            return await self._bedrock_fallback(user_id, message, session_id, subject_id, rag_context, user_profile)
+            return await self._bedrock_fallback(user_id, message, session_id, subject_id, rag_context, user_profile, conversation_id)
     
     async def _bedrock_fallback(
         self,
@@ -122,9 +154,17 @@ class AgentInvoker:
         session_id: str,
         subject_id: Optional[str] = None,
         rag_context: Optional[List[Dict[str, Any]]] = None,
-        user_profile: Optional[Dict[str, Any]] = None
+        user_profile: Optional[Dict[str, Any]] = None,
+        conversation_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Fallback to Bedrock agent service"""
+        """
+        Fallback to Bedrock agent service
+        
+        Answers are shared through the semantic cache only between prompts
+        built the same way: the scope includes the personalization digest,
+        and continued conversations (the agent keeps per-session memory)
+        are never cached.
+        """
         
         try:
             logger.info("Using Bedrock agent fallback")
@@ -138,14 +178,51 @@ class AgentInvoker:
                 subject_context=subject_id
             )
             
-            # Invoke chat agent
-            response = await self.bedrock_service.invoke_agent(
-                agent_type=AgentType.CHAT,
-                message=message,
-                context=context,
-                enable_trace=config.DEBUG
-            )
+            fresh = {}
+            
+            async def invoke_chat_agent():
+                # Invoke chat agent; only successful answers are cacheable
+                fresh['response'] = await self.bedrock_service.invoke_agent(
+                    agent_type=AgentType.CHAT,
+                    message=message,
+                    context=context,
+                    enable_trace=config.DEBUG
+                )
+                if not fresh['response'].success:
+                    return None
+                return {'content': fresh['response'].content, 'citations': fresh['response'].citations}
+            
+            if rag_context and not conversation_id:
+                cached, cache_status = await semantic_response_cache.get_or_invoke(
+                    message,
+                    rag_context,
+                    invoke=invoke_chat_agent,
+                    embed=self.bedrock_service.generate_embedding,
+                    subject_id=subject_id,
+                    model_id=f"{AgentType.CHAT.value}:{personalization_scope(user_profile)}",
+                    text_of=lambda answer: answer['content']
+                )
+            else:
+                cached, cache_status = await invoke_chat_agent(), 'bypass'
+            
+            if cache_status == 'hit' and 'response' not in fresh:
+                return {
+                    'success': True,
+                    'response': cached['content'],
+                    'session_id': session_id,
+                    'citations': cached['citations'],
+                    'metadata': {
+                        'agent_type': 'bedrock_chat',
+                        'workflow_type': 'bedrock_fallback',
+                        'timestamp': datetime.utcnow().isoformat(),
+                        'user_id': user_id,
+                        'subject_id': subject_id,
+                        'rag_documents_used': len(rag_context),
+                        'semantic_cache': cache_status
+                    }
+                }
             
+            response = fresh['response']
             return {
                 'success': response.success,
                 'response': response.content,
@@ -158,6 +235,7 @@ class AgentInvoker:
                     'user_id': user_id,
                     'subject_id': subject_id,
                     'rag_documents_used': len(rag_context) if rag_context else 0,
+                    'semantic_cache': cache_status,
                     **response.metadata
                 }
             }
@@ -584,5 +662,5 @@ class AgentInvoker:
             }
 
 
-# Global agent invoker instance
-agent_invoker = AgentInvoker()
\ No newline at end of file
+# Global agent invoker instance (built on first use)
+agent_invoker = LazyProxy(AgentInvoker)
\ No newline at end of file
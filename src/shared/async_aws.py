@@ -0,0 +1,299 @@
+"""
+Async AWS I/O for LMS API
+Awaitable wrappers for the DynamoDB, S3, Bedrock, Comprehend and Translate calls made from async code
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional, Callable, Union, AsyncIterator
+import logging
+
+from .connection_pool import aws_clients
+from .lazy import LazyProxy
+from .workflow_metrics import record_stream_chunk
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAWSConfig:
+    """Async AWS I/O configuration settings"""
+    
+    # Blocking boto3 calls in flight at once (kept below the client connection pool size)
+    MAX_WORKERS = int(os.getenv('AWS_IO_WORKERS', 16))
+    
+    BATCH_GET_SIZE = 100     # DynamoDB BatchGetItem limit
+    BATCH_MAX_RETRIES = 3    # Rounds spent re-requesting unprocessed keys
+
+
+class AsyncAWS:
+    """
+    Async facade over the shared AWS clients
+    
+    boto3 is blocking, so each call runs on a bounded I/O thread pool and the
+    event loop stays free; concurrent awaits (e.g. asyncio.gather) overlap.
+    Clients come from the process-wide registry unless one is passed in, and
+    DynamoDB tables may be given by name or as Table objects.
+    """
+    
+    def __init__(self, max_workers: int = AsyncAWSConfig.MAX_WORKERS, registry=aws_clients):
+        self.max_workers = max_workers
+        self.registry = registry
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="aws-io"
+                    )
+        return self._executor
+    
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run any blocking callable on the AWS I/O pool, in the caller's context (so workflow metrics follow it)"""
+        
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), partial(context.run, fn, *args, **kwargs)
+        )
+    
+    async def call(self, service_name: str, operation: str, client=None, **params) -> Dict[str, Any]:
+        """
+        Call any client operation off the event loop
+        
+        Args:
+            service_name: AWS service name (used when no client is given)
+            operation: Client method name, e.g. 'send_message'
+            client: Client to use instead of the shared registry client
+            **params: Operation parameters
+        
+        Returns:
+            Operation response
+        """
+        
+        def invoke():
+            return getattr(client or self.registry.client(service_name), operation)(**params)
+        
+        return await self.run(invoke)
+    
+    def _table(self, table: Union[str, Any]):
+        # Resolved inside the worker so each thread uses its own resource
+        return self.registry.table(table) if isinstance(table, str) else table
+    
+    # DynamoDB
+    
+    async def get_item(self, table: Union[str, Any], key: Dict[str, Any], **kwargs) -> Optional[Dict[str, Any]]:
+        """Get one item (None when it does not exist)"""
+        
+        response = await self.run(lambda: self._table(table).get_item(Key=key, **kwargs))
+        return response.get('Item')
+    
+    async def put_item(self, table: Union[str, Any], item: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Put one item"""
+        
+        return await self.run(lambda: self._table(table).put_item(Item=item, **kwargs))
+    
+    async def update_item(self, table: Union[str, Any], key: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Update one item"""
+        
+        return await self.run(lambda: self._table(table).update_item(Key=key, **kwargs))
+    
+    async def delete_item(self, table: Union[str, Any], key: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Delete one item"""
+        
+        return await self.run(lambda: self._table(table).delete_item(Key=key, **kwargs))
+    
+    async def query(self, table: Union[str, Any], **kwargs) -> Dict[str, Any]:
+        """Run a query (one page)"""
+        
+        return await self.run(lambda: self._table(table).query(**kwargs))
+    
+    async def batch_get(self, table_name: str, keys: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Get many items, in chunks of 100, re-requesting unprocessed keys
+        
+        Args:
+            table_name: DynamoDB table name
+            keys: Primary keys to fetch
+        
+        Returns:
+            Items found (in no particular order)
+        """
+        
+        def fetch(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            dynamodb = self.registry.resource('dynamodb')
+            request = {table_name: {'Keys': chunk}}
+            items = []
+            
+            for attempt in range(AsyncAWSConfig.BATCH_MAX_RETRIES + 1):
+                response = dynamodb.batch_get_item(RequestItems=request)
+                items.extend(response.get('Responses', {}).get(table_name, []))
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                if attempt < AsyncAWSConfig.BATCH_MAX_RETRIES:
+                    time.sleep(0.05 * (2 ** attempt))
+            else:
+                logger.warning(f"BatchGetItem left unprocessed keys in {table_name}")
+            
+            return items
+        
+        chunks = [
+            keys[start:start + AsyncAWSConfig.BATCH_GET_SIZE]
+            for start in range(0, len(keys), AsyncAWSConfig.BATCH_GET_SIZE)
+        ]
+        results = await asyncio.gather(*(self.run(fetch, chunk) for chunk in chunks))
+        return [item for items in results for item in items]
+    
+    async def batch_write(self, table_name: str, items: List[Dict[str, Any]]) -> None:
+        """Put many items (boto3's batch writer handles chunking and retries)"""
+        
+        def write():
+            with self.registry.table(table_name).batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+        
+        await self.run(write)
+    
+    # S3
+    
+    async def get_object(self, bucket: str, key: str, client=None) -> bytes:
+        """Download an object's body"""
+        
+        def download():
+            response = (client or self.registry.client('s3')).get_object(Bucket=bucket, Key=key)
+            return response['Body'].read()
+        
+        return await self.run(download)
+    
+    async def put_object(self, bucket: str, key: str, body: Union[bytes, str], client=None, **kwargs) -> Dict[str, Any]:
+        """Upload an object"""
+        
+        return await self.call('s3', 'put_object', client=client, Bucket=bucket, Key=key, Body=body, **kwargs)
+    
+    # Bedrock
+    
+    async def invoke_model(self, model_id: str, body: Dict[str, Any], client=None, **kwargs) -> Dict[str, Any]:
+        """
+        Invoke a Bedrock model and parse its JSON response
+        
+        Args:
+            model_id: Bedrock model ID
+            body: Request body (serialized to JSON)
+            client: bedrock-runtime client to use instead of the shared one
+        
+        Returns:
+            Parsed response body
+        """
+        
+        def invoke():
+            response = (client or self.registry.client('bedrock-runtime')).invoke_model(
+                modelId=model_id, body=json.dumps(body), **kwargs
+            )
+            return json.loads(response['body'].read())
+        
+        return await self.run(invoke)
+    
+    async def invoke_model_stream(self, model_id: str, body: Dict[str, Any], client=None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Invoke a Bedrock model with response streaming, yielding parsed chunks as they arrive
+        
+        The event stream is read on the I/O pool (one thread for the length
+        of the generation) and each chunk is handed to the event loop as
+        soon as it is decoded. Stream errors are raised from the iterator;
+        leaving the loop early stops reading.
+        
+        Args:
+            model_id: Bedrock model ID
+            body: Request body (serialized to JSON)
+            client: bedrock-runtime client to use instead of the shared one
+        
+        Yields:
+            Parsed chunk payloads (e.g. Anthropic content_block_delta events)
+        """
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        stopped = threading.Event()
+        
+        def hand_over(item: Any) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                stopped.set()  # Event loop closed
+        
+        def pump() -> None:
+            try:
+                response = (client or self.registry.client('bedrock-runtime')).invoke_model_with_response_stream(
+                    modelId=model_id, body=json.dumps(body), **kwargs
+                )
+                stream = response['body']
+                try:
+                    for event in stream:
+                        if stopped.is_set():
+                            break
+                        if 'chunk' in event:
+                            hand_over(json.loads(event['chunk']['bytes']))
+                finally:
+                    if hasattr(stream, 'close'):
+                        stream.close()
+            except Exception as e:
+                hand_over(e)
+            else:
+                hand_over(finished)
+        
+        loop.run_in_executor(self._get_executor(), contextvars.copy_context().run, pump)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                record_stream_chunk(item)
+                yield item
+        finally:
+            stopped.set()
+    
+    # Comprehend / Translate
+    
+    async def detect(self, analysis: str, text: str, language_code: Optional[str] = None, client=None) -> Dict[str, Any]:
+        """
+        Run a Comprehend detect_* operation
+        
+        Args:
+            analysis: 'dominant_language', 'sentiment', 'key_phrases', 'entities', ...
+            text: Text to analyze
+            language_code: Required by everything except dominant_language
+            client: Comprehend client to use instead of the shared one
+        
+        Returns:
+            Comprehend response
+        """
+        
+        params = {'Text': text}
+        if language_code:
+            params['LanguageCode'] = language_code
+        return await self.call('comprehend', f"detect_{analysis}", client=client, **params)
+    
+    async def translate_text(self, text: str, source_language: str, target_language: str, client=None, **kwargs) -> str:
+        """Translate text and return the translation"""
+        
+        response = await self.call(
+            'translate', 'translate_text', client=client,
+            Text=text, SourceLanguageCode=source_language, TargetLanguageCode=target_language, **kwargs
+        )
+        return response['TranslatedText']
+
+
+# Global async AWS I/O instance
+async_aws = LazyProxy(AsyncAWS)
@@ -4,20 +4,67 @@ Handles long-running operations with proper async/await patterns and background
 """
 
 import asyncio
-import boto3
+import contextvars
 import json
 import os
 import time
 import uuid
+import hashlib
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Callable, Union
+from typing import Dict, Any, List, Optional, Callable, Union, Tuple
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from decimal import Decimal
+from functools import partial
 import logging
 
+from botocore.exceptions import ClientError
+
+from .lazy import LazyProxy
+from .connection_pool import get_client, get_resource
+from .async_aws import async_aws
+from .task_scheduler import FairTaskScheduler, SchedulerConfig, TaskQueueFullError
+from .cache_codec import CodecConfig, S3BlobStore
+from .cpu_lane import cpu_lane, task_path
+
 logger = logging.getLogger(__name__)
 
 
+class TaskStoreConfig:
+    """Async task persistence settings"""
+    
+    # At most one progress write per task per interval reaches DynamoDB
+    PROGRESS_WRITE_INTERVAL = float(os.getenv('TASK_PROGRESS_WRITE_INTERVAL', 2.0))
+    
+    # Results larger than this (serialized) are stored out-of-line with a reference on the row
+    INLINE_RESULT_LIMIT = int(os.getenv('TASK_INLINE_RESULT_BYTES', 16 * 1024))
+    RESULT_BUCKET = os.getenv('TASK_RESULT_BUCKET', CodecConfig.SPILL_BUCKET)
+    RESULT_KEY_PREFIX = os.getenv('TASK_RESULT_PREFIX', 'async-task-results')
+    
+    # Without a bucket, results up to this size stay on the row (DynamoDB items are capped at 400 KB)
+    MAX_INLINE_RESULT = CodecConfig.SPILL_THRESHOLD
+    
+    TTL_DAYS = 7
+    
+    # Idempotent submission: equivalent tasks share a task while pending/running and this long after finishing
+    DEDUP_WINDOW_SECONDS = int(os.getenv('TASK_DEDUP_WINDOW_SECONDS', 300))
+    DEDUP_HOLD_SECONDS = int(os.getenv('TASK_DEDUP_HOLD_SECONDS', 3600))  # Claim lifetime if a task never finishes
+    IDEMPOTENCY_KEY_PREFIX = 'idempotency#'
+    IDEMPOTENCY_LOCAL_MAX = int(os.getenv('TASK_IDEMPOTENCY_LOCAL_MAX', 10000))  # Claims remembered in process
+    
+    # Attributes read by status pollers (never the result payload)
+    STATUS_ATTRIBUTES = [
+        'task_id', 'task_type', 'user_id', 'status', 'created_at', 'started_at',
+        'completed_at', 'progress', 'error', 'metadata', 'result_ref'
+    ]
+
+
+# (manager, task ID) of the task running in the current context (see report_progress)
+_current_task: contextvars.ContextVar = contextvars.ContextVar('async_task', default=None)
+
+
 @dataclass
 class AsyncTask:
     """Represents an async task"""
@@ -32,18 +79,231 @@ class AsyncTask:
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    result_ref: Optional[str] = None  # Out-of-line result location
+
+
+def _task_from_item(item: Dict[str, Any]) -> AsyncTask:
+    """Build an AsyncTask from a tasks table item"""
+    
+    return AsyncTask(
+        task_id=item['task_id'],
+        task_type=item['task_type'],
+        user_id=item['user_id'],
+        status=item['status'],
+        created_at=datetime.fromisoformat(item['created_at']),
+        started_at=datetime.fromisoformat(item['started_at']) if item.get('started_at') else None,
+        completed_at=datetime.fromisoformat(item['completed_at']) if item.get('completed_at') else None,
+        progress=float(item.get('progress', 0.0)),
+        result=item.get('result'),
+        error=item.get('error'),
+        metadata=item.get('metadata'),
+        result_ref=item.get('result_ref')
+    )
+
+
+def _message_task_type(message: Dict[str, Any]) -> str:
+    """Task type of a queue message (attribute first, then body)"""
+    
+    attribute = (message.get('MessageAttributes') or {}).get('task_type') or {}
+    if attribute.get('StringValue'):
+        return attribute['StringValue']
+    try:
+        return json.loads(message.get('Body') or '{}').get('task_type') or 'unknown'
+    except (ValueError, AttributeError):
+        return 'unknown'
+
+
+def _message_claim(message: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(idempotency key, task ID) a queue message was enqueued under, if any"""
+    
+    try:
+        body = json.loads(message.get('Body') or '{}')
+    except (TypeError, ValueError):
+        return None
+    
+    if isinstance(body, dict) and body.get('idempotency_key') and body.get('task_id'):
+        return body['idempotency_key'], body['task_id']
+    return None
+
+
+def _receive_count(message: Dict[str, Any]) -> int:
+    """How many times a queue message has been received (0 if SQS did not say)"""
+    
+    try:
+        return int((message.get('Attributes') or {}).get('ApproximateReceiveCount', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _queue_url_from_arn(arn: str) -> Optional[str]:
+    """SQS queue URL for a queue ARN (arn:aws:sqs:region:account:name)"""
+    
+    parts = arn.split(':')
+    if len(parts) != 6 or parts[2] != 'sqs':
+        return None
+    return f"https://sqs.{parts[3]}.amazonaws.com/{parts[4]}/{parts[5]}"
+
+
+def derive_idempotency_key(task_type: str, user_id: str, *args, **kwargs) -> str:
+    """
+    Default idempotency key: task type, user and a hash of the arguments
+    
+    Arguments without a stable JSON form fall back to repr(), so objects
+    that repr with an address never deduplicate.
+    """
+    
+    payload = json.dumps([task_type, user_id, args, kwargs], sort_keys=True, default=repr)
+    return f"{task_type}:{user_id}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]}"
+
+
+class IdempotencyStore:
+    """
+    Claims idempotency keys so equivalent submissions share one task
+    
+    A claim is a marker row in the tasks table ("idempotency#<key>", no
+    user_id so it stays out of the user indexes) written with a
+    conditional put, which makes it hold across containers. Claims are
+    also remembered in process to skip the round trip, in an LRU bounded
+    by max_local whose expired entries are dropped when read.
+    """
+    
+    def __init__(self, max_local: int = TaskStoreConfig.IDEMPOTENCY_LOCAL_MAX):
+        self.max_local = max_local
+        self._local: OrderedDict = OrderedDict()  # key -> (claim, expires_at)
+        self.stats = {'claims': 0, 'duplicates': 0}
+    
+    def _marker_key(self, key: str) -> Dict[str, str]:
+        return {'task_id': f"{TaskStoreConfig.IDEMPOTENCY_KEY_PREFIX}{key}"}
+    
+    def _get_local(self, key: str, now: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Unexpired in-process claim for a key (expired ones are evicted)"""
+        
+        local = self._local.get(key)
+        if local is None:
+            return None
+        if local[1] <= now:
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return local
+    
+    def _remember(self, key: str, claim: Dict[str, Any], expires_at: float) -> None:
+        """Keep a claim in process, evicting the least recently used past max_local"""
+        
+        self._local[key] = (claim, expires_at)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+    
+    async def claim(self, table, key: str, owner_id: str, hold_seconds: int = TaskStoreConfig.DEDUP_HOLD_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key for owner_id
+        
+        Args:
+            table: Tasks table (name or Table); None for in-process only
+            key: Idempotency key
+            owner_id: ID of the task/message doing the work
+            hold_seconds: How long the claim lasts unless settled or released
+        
+        Returns:
+            None if claimed, otherwise the existing claim ({'owner_id': ..., ...})
+        """
+        
+        now = time.time()
+        local = self._get_local(key, now)
+        if local and local[0]['owner_id'] != owner_id:
+            self.stats['duplicates'] += 1
+            return local[0]
+        
+        if table is not None:
+            try:
+                await async_aws.put_item(
+                    table,
+                    {
+                        **self._marker_key(key),
+                        'owner_id': owner_id,
+                        'expires_at': int(now + hold_seconds),
+                        'ttl': int(now + hold_seconds) + 86400
+                    },
+                    ConditionExpression='attribute_not_exists(task_id) OR expires_at < :now',
+                    ExpressionAttributeValues={':now': int(now)}
+                )
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                    logger.warning(f"Idempotency claim failed for {key}, proceeding without it: {e}")
+                else:
+                    existing = await async_aws.get_item(table, self._marker_key(key), ConsistentRead=True)
+                    if existing and existing.get('owner_id') != owner_id:
+                        claim = {name: value for name, value in existing.items() if name != 'task_id'}
+                        self._remember(key, claim, float(existing.get('expires_at', now)))
+                        self.stats['duplicates'] += 1
+                        return claim
+            except Exception as e:
+                logger.warning(f"Idempotency claim failed for {key}, proceeding without it: {e}")
+        
+        self._remember(key, {'owner_id': owner_id}, now + hold_seconds)
+        self.stats['claims'] += 1
+        return None
+    
+    async def settle(self, table, key: str, owner_id: str, hold_seconds: int, **attributes) -> None:
+        """Keep a claim for hold_seconds from now (e.g. the dedup window after success), adding attributes"""
+        
+        expires_at = time.time() + hold_seconds
+        local = self._get_local(key, time.time())
+        if local and local[0]['owner_id'] == owner_id:
+            self._remember(key, {**local[0], **attributes}, expires_at)
+        
+        if table is None:
+            return
+        
+        fields = {'expires_at': int(expires_at), 'ttl': int(expires_at) + 86400, **attributes}
+        try:
+            await async_aws.update_item(
+                table,
+                self._marker_key(key),
+                UpdateExpression='SET ' + ', '.join(f'#{name} = :{name}' for name in fields),
+                ConditionExpression='owner_id = :owner_id',
+                ExpressionAttributeNames={f'#{name}': name for name in fields},
+                ExpressionAttributeValues={**{f':{name}': value for name, value in fields.items()}, ':owner_id': owner_id}
+            )
+        except Exception as e:
+            logger.warning(f"Error settling idempotency key {key}: {e}")
+    
+    async def release(self, table, key: str, owner_id: str) -> None:
+        """Drop a claim so the work can be submitted again (e.g. after a failure)"""
+        
+        local = self._local.get(key)
+        if local and local[0]['owner_id'] == owner_id:
+            del self._local[key]
+        
+        if table is None:
+            return
+        
+        try:
+            await async_aws.delete_item(
+                table,
+                self._marker_key(key),
+                ConditionExpression='owner_id = :owner_id',
+                ExpressionAttributeValues={':owner_id': owner_id}
+            )
+        except Exception as e:
+            logger.warning(f"Error releasing idempotency key {key}: {e}")
 
 
 class AsyncTaskManager:
     """
     Manages async tasks with progress tracking and result storage
+    
+    The task row is written in full once, at submission; later state
+    changes are update_item deltas. Progress writes are coalesced per task
+    and large results are stored out-of-line.
     """
     
     def __init__(self):
         """Initialize async task manager"""
         
         # DynamoDB for task tracking
-        self.dynamodb = boto3.resource('dynamodb')
+        self.dynamodb = get_resource('dynamodb')
         self.tasks_table_name = os.getenv('ASYNC_TASKS_TABLE', 'lms-async-tasks')
         
         try:
@@ -56,35 +316,93 @@ class AsyncTaskManager:
         self._active_tasks = {}
         self._task_results = {}
         
-        # Thread pool for CPU-intensive tasks
-        self.thread_pool = ThreadPoolExecutor(max_workers=10)
+        # Coalesced progress writes: task_id -> last write time / scheduled flush
+        self._progress_written_at: Dict[str, float] = {}
+        self._progress_persisted: Dict[str, float] = {}
+        self._progress_flushes: Dict[str, asyncio.TimerHandle] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._result_store = None
+        
+        self.persistence_stats = {
+            'item_puts': 0,
+            'item_updates': 0,
+            'progress_updates': 0,
+            'progress_writes': 0,
+            'results_offloaded': 0,
+            'results_too_large': 0
+        }
+        
+        # Thread pool for CPU-intensive tasks (one thread per task the scheduler may run)
+        self.thread_pool = ThreadPoolExecutor(max_workers=SchedulerConfig.MAX_CONCURRENT)
+        
+        # CPU-bound task functions the process lane cannot import (already logged)
+        self._lane_fallbacks = set()
+        
+        # Admission: per-type limits, interactive before batch, fair across users
+        self.scheduler = FairTaskScheduler(max_concurrent=SchedulerConfig.MAX_CONCURRENT)
+        
+        # Deduplication of equivalent submissions (marker rows in the tasks table)
+        self.idempotency = IdempotencyStore()
         
         # SQS for background task queue (optional)
-        self.sqs = boto3.client('sqs')
+        self.sqs = get_client('sqs')
         self.queue_url = os.getenv('BACKGROUND_QUEUE_URL')
     
+    @property
+    def result_store(self):
+        """
+        Blob store for large results (S3 when a result bucket is configured, otherwise None)
+        
+        Other containers read results back by reference, so there is no
+        local-directory fallback; without a bucket results stay inline.
+        """
+        
+        if self._result_store is None and TaskStoreConfig.RESULT_BUCKET:
+            self._result_store = S3BlobStore(TaskStoreConfig.RESULT_BUCKET, TaskStoreConfig.RESULT_KEY_PREFIX)
+        return self._result_store
+    
     async def submit_task(
         self,
         task_type: str,
         user_id: str,
         task_function: Callable,
         *args,
+        idempotency_key: Optional[str] = None,
         **kwargs
     ) -> str:
         """
         Submit an async task for processing
         
+        Equivalent submissions (same idempotency key) while a task is
+        pending or running, or within the dedup window after it completed,
+        return the existing task ID instead of starting new work.
+        
         Args:
             task_type: Type of task (e.g., 'file_processing', 'quiz_generation')
             user_id: User ID
-            task_function: Function to execute
+            task_function: Function to execute (may call report_progress)
             *args, **kwargs: Arguments for the task function
+            idempotency_key: Deduplication key (defaults to type, user and an argument hash)
             
         Returns:
             Task ID for tracking
+        
+        Raises:
+            TaskQueueFullError: The task's priority class has too many queued tasks
         """
         
+        # Reject overflow before anything is persisted
+        priority = self.scheduler.check_capacity(task_type)
+        
         task_id = str(uuid.uuid4())
+        
+        # Equivalent work already pending, running or recently completed
+        idempotency_key = idempotency_key or derive_idempotency_key(task_type, user_id, *args, **kwargs)
+        existing = await self.idempotency.claim(self.tasks_table, idempotency_key, task_id)
+        if existing:
+            logger.info(f"Duplicate {task_type} submission for user {user_id}; returning task {existing['owner_id']}")
+            return existing['owner_id']
+        
         task = AsyncTask(
             task_id=task_id,
             task_type=task_type,
@@ -93,22 +411,51 @@ class AsyncTaskManager:
             created_at=datetime.utcnow(),
             metadata={
                 'args_count': len(args),
-                'kwargs_keys': list(kwargs.keys())
+                'kwargs_keys': list(kwargs.keys()),
+                'priority': priority,
+                'idempotency_key': idempotency_key
             }
         )
         
         # Store task in DynamoDB
-        await self._store_task(task)
+        await self._create_task_record(task)
         
         # Store in memory for immediate access
         self._active_tasks[task_id] = task
         
-        # Execute task asynchronously
-        asyncio.create_task(self._execute_task(task, task_function, *args, **kwargs))
+        # Queue for execution; it starts once its class, type and user share allow
+        try:
+            self.scheduler.submit(
+                task_type,
+                user_id,
+                lambda: self._execute_task(task, task_function, *args, **kwargs),
+                priority=priority
+            )
+        except TaskQueueFullError as e:
+            # The queue filled while the pending record was being written
+            task.status = 'failed'
+            task.completed_at = datetime.utcnow()
+            task.error = str(e)
+            await self._update_task(task_id, status='failed', completed_at=task.completed_at.isoformat(), error=task.error)
+            await self.idempotency.release(self.tasks_table, idempotency_key, task_id)
+            raise
         
-        logger.info(f"Submitted async task: {task_id} ({task_type}) for user: {user_id}")
+        logger.info(f"Submitted async task: {task_id} ({task_type}, {priority}) for user: {user_id}")
         return task_id
     
+    def _fits_cpu_lane(self, task_function: Callable) -> bool:
+        """Whether a function can run in the process lane (bound methods, lambdas and closures cannot)"""
+        
+        try:
+            task_path(task_function)
+            return True
+        except ValueError as e:
+            name = getattr(task_function, '__qualname__', repr(task_function))
+            if name not in self._lane_fallbacks:
+                self._lane_fallbacks.add(name)
+                logger.warning(f"{e}; running {name} on the thread pool")
+            return False
+    
     async def _execute_task(
         self,
         task: AsyncTask,
@@ -118,24 +465,27 @@ class AsyncTaskManager:
     ) -> None:
         """Execute async task with error handling and progress tracking"""
         
+        self._loop = asyncio.get_running_loop()
+        context_token = _current_task.set((self, task.task_id))
+        
         try:
             # Update task status to running
             task.status = 'running'
             task.started_at = datetime.utcnow()
-            await self._store_task(task)
+            await self._update_task(task.task_id, status='running', started_at=task.started_at.isoformat())
             
             # Execute task function
             if asyncio.iscoroutinefunction(task_function):
                 # Async function
                 result = await task_function(*args, **kwargs)
+            elif cpu_lane.is_cpu_bound(task.task_type) and self._fits_cpu_lane(task_function):
+                # CPU-bound - run in a worker process, outside the GIL (report_progress is not available there)
+                result = await cpu_lane.run(task_function, *args, **kwargs)
             else:
-                # Sync function - run in thread pool
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(
+                # Sync function - run in thread pool (with this task's context for report_progress)
+                result = await self._loop.run_in_executor(
                     self.thread_pool,
-                    task_function,
-                    *args,
-                    **kwargs
+                    partial(contextvars.copy_context().run, task_function, *args, **kwargs)
                 )
             
             # Task completed successfully
@@ -156,16 +506,105 @@ class AsyncTaskManager:
             task.error = str(e)
             
             logger.error(f"Async task failed: {task.task_id} - {str(e)}")
+            
+            # Let the scheduler count the failure
+            raise
+        
+        except asyncio.CancelledError:
+            # The loop is going away (e.g. asyncio.run returned); record a terminal state before it does
+            task.status = 'cancelled'
+            task.completed_at = datetime.utcnow()
+            task.error = 'Task cancelled before completion'
+            
+            logger.warning(f"Async task cancelled: {task.task_id}")
+            raise
         
         finally:
-            # Update task in storage
-            await self._store_task(task)
+            _current_task.reset(context_token)
+            self._cancel_progress_flush(task.task_id)
             
-            # Update in-memory tracking
-            self._active_tasks[task.task_id] = task
+            try:
+                # Record the terminal state in one delta
+                await self._store_outcome(task)
+            finally:
+                # Completed work is shared for the dedup window; failed or cancelled work may be resubmitted
+                idempotency_key = (task.metadata or {}).get('idempotency_key')
+                if idempotency_key and task.status == 'completed':
+                    await self.idempotency.settle(
+                        self.tasks_table, idempotency_key, task.task_id, TaskStoreConfig.DEDUP_WINDOW_SECONDS
+                    )
+                elif idempotency_key:
+                    await self.idempotency.release(self.tasks_table, idempotency_key, task.task_id)
+            
+                # Update in-memory tracking
+                self._active_tasks[task.task_id] = task
+    
+    def update_progress(self, task_id: str, progress: float) -> None:
+        """
+        Record task progress (0-100); safe to call from task threads
+        
+        The in-memory value updates immediately; DynamoDB sees at most one
+        progress write per task per PROGRESS_WRITE_INTERVAL.
+        """
+        
+        task = self._active_tasks.get(task_id)
+        if not task or task.status != 'running':
+            return
+        
+        task.progress = max(0.0, min(100.0, float(progress)))
+        self.persistence_stats['progress_updates'] += 1
+        
+        if self._loop is None or self._loop.is_closed():
+            return
+        
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        
+        if on_loop:
+            self._schedule_progress_flush(task_id)
+        else:
+            self._loop.call_soon_threadsafe(self._schedule_progress_flush, task_id)
+    
+    def _schedule_progress_flush(self, task_id: str) -> None:
+        if task_id in self._progress_flushes:
+            return  # A flush is already due and will carry the latest value
+        
+        due = self._progress_written_at.get(task_id, 0.0) + TaskStoreConfig.PROGRESS_WRITE_INTERVAL
+        delay = max(0.0, due - time.monotonic())
+        self._progress_flushes[task_id] = self._loop.call_later(
+            delay, lambda: self._loop.create_task(self._flush_progress(task_id))
+        )
+    
+    def _cancel_progress_flush(self, task_id: str) -> None:
+        handle = self._progress_flushes.pop(task_id, None)
+        if handle:
+            handle.cancel()
+        self._progress_written_at.pop(task_id, None)
+        self._progress_persisted.pop(task_id, None)
+    
+    async def _flush_progress(self, task_id: str) -> None:
+        self._progress_flushes.pop(task_id, None)
+        
+        task = self._active_tasks.get(task_id)
+        if not task or task.status != 'running' or self._progress_persisted.get(task_id) == task.progress:
+            return
+        
+        progress = task.progress
+        self._progress_written_at[task_id] = time.monotonic()
+        
+        # Never let a late progress write land on a finished task
+        if await self._update_task(
+            task_id,
+            condition=('#status = :running', {':running': 'running'}),
+            progress=progress
+        ):
+            self._progress_persisted[task_id] = progress
+            self.persistence_stats['progress_writes'] += 1
     
     async def get_task_status(self, task_id: str) -> Optional[AsyncTask]:
-        """Get task status and progress"""
+        """Get task status and progress (results are fetched by get_task_result)"""
         
         # Check in-memory first
         if task_id in self._active_tasks:
@@ -174,22 +613,14 @@ class AsyncTaskManager:
         # Check DynamoDB
         if self.tasks_table:
             try:
-                response = self.tasks_table.get_item(Key={'task_id': task_id})
-                if 'Item' in response:
-                    item = response['Item']
-                    return AsyncTask(
-                        task_id=item['task_id'],
-                        task_type=item['task_type'],
-                        user_id=item['user_id'],
-                        status=item['status'],
-                        created_at=datetime.fromisoformat(item['created_at']),
-                        started_at=datetime.fromisoformat(item['started_at']) if item.get('started_at') else None,
-                        completed_at=datetime.fromisoformat(item['completed_at']) if item.get('completed_at') else None,
-                        progress=float(item.get('progress', 0.0)),
-                        result=item.get('result'),
-                        error=item.get('error'),
-                        metadata=item.get('metadata')
-                    )
+                item = await async_aws.get_item(
+                    self.tasks_table,
+                    {'task_id': task_id},
+                    ProjectionExpression=', '.join(f'#{name}' for name in TaskStoreConfig.STATUS_ATTRIBUTES),
+                    ExpressionAttributeNames={f'#{name}': name for name in TaskStoreConfig.STATUS_ATTRIBUTES}
+                )
+                if item:
+                    return _task_from_item(item)
             except Exception as e:
                 logger.error(f"Error getting task status: {e}")
         
@@ -204,12 +635,29 @@ class AsyncTaskManager:
         
         # Get task status
         task = await self.get_task_status(task_id)
-        if task and task.status == 'completed' and task.result:
-            # Cache result in memory
-            self._task_results[task_id] = task.result
-            return task.result
+        if not task or task.status != 'completed' or not self.tasks_table:
+            return None
         
-        return None
+        try:
+            if task.result_ref:
+                data = await async_aws.run(self.result_store.get, task.result_ref)
+                result = json.loads(data)
+            else:
+                item = await async_aws.get_item(
+                    self.tasks_table,
+                    {'task_id': task_id},
+                    ProjectionExpression='#result',
+                    ExpressionAttributeNames={'#result': 'result'}
+                )
+                result = (item or {}).get('result')
+        except Exception as e:
+            logger.error(f"Error getting task result: {e}")
+            return None
+        
+        if result:
+            # Cache result in memory
+            self._task_results[task_id] = result
+        return result
     
     async def list_user_tasks(
         self,
@@ -231,7 +679,8 @@ class AsyncTaskManager:
         if self.tasks_table:
             try:
                 if status_filter:
-                    response = self.tasks_table.query(
+                    response = await async_aws.query(
+                        self.tasks_table,
                         IndexName='user-status-index',
                         KeyConditionExpression='user_id = :user_id AND #status = :status',
                         ExpressionAttributeNames={'#status': 'status'},
@@ -243,7 +692,8 @@ class AsyncTaskManager:
                         ScanIndexForward=False
                     )
                 else:
-                    response = self.tasks_table.query(
+                    response = await async_aws.query(
+                        self.tasks_table,
                         IndexName='user-id-index',
                         KeyConditionExpression='user_id = :user_id',
                         ExpressionAttributeValues={':user_id': user_id},
@@ -252,22 +702,9 @@ class AsyncTaskManager:
                     )
                 
                 for item in response.get('Items', []):
-                    task_id = item['task_id']
                     # Avoid duplicates from in-memory
-                    if task_id not in self._active_tasks:
-                        tasks.append(AsyncTask(
-                            task_id=task_id,
-                            task_type=item['task_type'],
-                            user_id=item['user_id'],
-                            status=item['status'],
-                            created_at=datetime.fromisoformat(item['created_at']),
-                            started_at=datetime.fromisoformat(item['started_at']) if item.get('started_at') else None,
-                            completed_at=datetime.fromisoformat(item['completed_at']) if item.get('completed_at') else None,
-                            progress=float(item.get('progress', 0.0)),
-                            result=item.get('result'),
-                            error=item.get('error'),
-                            metadata=item.get('metadata')
-                        ))
+                    if item['task_id'] not in self._active_tasks:
+                        tasks.append(_task_from_item(item))
                         
             except Exception as e:
                 logger.error(f"Error listing user tasks: {e}")
@@ -276,8 +713,8 @@ class AsyncTaskManager:
         tasks.sort(key=lambda x: x.created_at, reverse=True)
         return tasks[:limit]
     
-    async def _store_task(self, task: AsyncTask) -> None:
-        """Store task in DynamoDB"""
+    async def _create_task_record(self, task: AsyncTask) -> None:
+        """Write the initial task row (the only full-item write)"""
         
         if not self.tasks_table:
             return
@@ -289,26 +726,103 @@ class AsyncTaskManager:
                 'user_id': task.user_id,
                 'status': task.status,
                 'created_at': task.created_at.isoformat(),
-                'progress': task.progress,
-                'ttl': int((datetime.utcnow() + timedelta(days=7)).timestamp())  # 7 day TTL
+                'progress': Decimal(str(task.progress)),
+                'ttl': int((datetime.utcnow() + timedelta(days=TaskStoreConfig.TTL_DAYS)).timestamp())
             }
             
-            if task.started_at:
-                item['started_at'] = task.started_at.isoformat()
-            if task.completed_at:
-                item['completed_at'] = task.completed_at.isoformat()
-            if task.result:
-                item['result'] = task.result
-            if task.error:
-                item['error'] = task.error
             if task.metadata:
                 item['metadata'] = task.metadata
             
-            self.tasks_table.put_item(Item=item)
+            await async_aws.put_item(self.tasks_table, item)
+            self.persistence_stats['item_puts'] += 1
             
         except Exception as e:
             logger.error(f"Error storing task: {e}")
     
+    async def _update_task(self, task_id: str, condition: Optional[tuple] = None, **fields) -> bool:
+        """
+        Apply a SET delta to a task row
+        
+        Args:
+            task_id: Task ID
+            condition: Optional (ConditionExpression, extra values) guard
+            **fields: Attributes to set (floats are stored as Decimal)
+        
+        Returns:
+            True if the write was applied
+        """
+        
+        if not self.tasks_table:
+            return False
+        
+        names = {f'#{name}': name for name in fields}
+        values = {
+            f':{name}': Decimal(str(value)) if isinstance(value, float) else value
+            for name, value in fields.items()
+        }
+        params = {
+            'UpdateExpression': 'SET ' + ', '.join(f'#{name} = :{name}' for name in fields),
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': values
+        }
+        
+        if condition:
+            expression, condition_values = condition
+            params['ConditionExpression'] = expression
+            names['#status'] = 'status'
+            values.update(condition_values)
+        
+        try:
+            await async_aws.update_item(self.tasks_table, {'task_id': task_id}, **params)
+            self.persistence_stats['item_updates'] += 1
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                logger.error(f"Error updating task {task_id}: {e}")
+        except Exception as e:
+            logger.error(f"Error updating task {task_id}: {e}")
+        return False
+    
+    async def _store_outcome(self, task: AsyncTask) -> None:
+        """Write a finished task's status, progress and result (inline or by reference)"""
+        
+        fields = {
+            'status': task.status,
+            'completed_at': (task.completed_at or datetime.utcnow()).isoformat(),
+            'progress': task.progress
+        }
+        
+        if task.error:
+            fields['error'] = task.error
+        
+        if task.result is not None and self.tasks_table:
+            try:
+                payload = json.dumps(task.result, default=str)
+                result_store = self.result_store
+                
+                if len(payload) > TaskStoreConfig.INLINE_RESULT_LIMIT and result_store is not None:
+                    task.result_ref = await async_aws.run(
+                        result_store.put, f"{task.task_id}.json", payload.encode('utf-8')
+                    )
+                    fields['result_ref'] = task.result_ref
+                    fields['result_size'] = len(payload)
+                    self.persistence_stats['results_offloaded'] += 1
+                elif len(payload) > TaskStoreConfig.MAX_INLINE_RESULT:
+                    logger.error(
+                        f"Result of task {task.task_id} is {len(payload)} bytes and no TASK_RESULT_BUCKET is configured; not stored"
+                    )
+                    fields['error'] = 'Result too large to store'
+                    fields['result_size'] = len(payload)
+                    self.persistence_stats['results_too_large'] += 1
+                else:
+                    # DynamoDB needs Decimal instead of float
+                    fields['result'] = json.loads(payload, parse_float=Decimal)
+            
+            except Exception as e:
+                logger.error(f"Error storing result for task {task.task_id}: {e}")
+        
+        await self._update_task(task.task_id, **fields)
+    
     async def cleanup_completed_tasks(self, older_than_hours: int = 24) -> int:
         """Clean up completed tasks older than specified hours"""
         
@@ -331,6 +845,127 @@ class AsyncTaskManager:
         
         logger.info(f"Cleaned up {cleaned_count} completed async tasks")
         return cleaned_count
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and run time per priority class"""
+        
+        return self.scheduler.get_stats()
+    
+    def get_persistence_stats(self) -> Dict[str, Any]:
+        """Get task table write counts"""
+        
+        stats = dict(self.persistence_stats)
+        stats['progress_writes_saved'] = stats['progress_updates'] - stats['progress_writes']
+        stats['idempotency_claims'] = self.idempotency.stats['claims']
+        stats['duplicate_submissions'] = self.idempotency.stats['duplicates']
+        return stats
+
+
+class QueueConfig:
+    """Background queue consumption settings"""
+    
+    MAX_BATCH = 10  # SQS receive and DeleteMessageBatch limit
+    
+    # Visibility is extended by this much, every half of it, while a message is being processed
+    VISIBILITY_TIMEOUT = int(os.getenv('BACKGROUND_VISIBILITY_TIMEOUT', 60))
+    
+    WAIT_TIME_SECONDS = 5  # Long polling
+
+    # The queue's redrive maxReceiveCount: a message failing on this receive moves to the DLQ
+    MAX_RECEIVE_COUNT = int(os.getenv('BACKGROUND_MAX_RECEIVE_COUNT', 3))
+    
+    # enqueue_task result for a duplicate whose first enqueue has not been sent yet
+    DUPLICATE_PENDING = 'duplicate-pending'
+
+
+class LocalQueue:
+    """
+    In-memory stand-in for the SQS client (development and benchmarks)
+    
+    Implements the calls BackgroundTaskQueue makes, with visibility
+    timeouts and receipt handles, against a single in-process queue.
+    """
+    
+    def __init__(self, visibility_timeout: int = QueueConfig.VISIBILITY_TIMEOUT):
+        self.visibility_timeout = visibility_timeout
+        self._messages: Dict[str, Dict[str, Any]] = {}
+        self._receipts: Dict[str, str] = {}  # receipt handle -> message ID
+        self._lock = threading.Lock()
+        self.stats = {
+            'sent': 0,
+            'received': 0,
+            'deleted': 0,
+            'receive_calls': 0,
+            'delete_calls': 0,
+            'visibility_changes': 0
+        }
+    
+    def send_message(self, QueueUrl: str, MessageBody: str, DelaySeconds: int = 0, MessageAttributes=None, **kwargs):
+        message_id = str(uuid.uuid4())
+        with self._lock:
+            self._messages[message_id] = {
+                'MessageId': message_id,
+                'Body': MessageBody,
+                'MessageAttributes': MessageAttributes or {},
+                'visible_at': time.monotonic() + DelaySeconds,
+                'receive_count': 0
+            }
+            self.stats['sent'] += 1
+        return {'MessageId': message_id}
+    
+    def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int = 1, VisibilityTimeout: int = None, **kwargs):
+        now = time.monotonic()
+        received = []
+        with self._lock:
+            self.stats['receive_calls'] += 1
+            for message in self._messages.values():
+                if len(received) >= MaxNumberOfMessages:
+                    break
+                if message['visible_at'] > now:
+                    continue
+                
+                message['visible_at'] = now + (VisibilityTimeout or self.visibility_timeout)
+                message['receive_count'] += 1
+                receipt_handle = f"{message['MessageId']}:{message['receive_count']}"
+                self._receipts[receipt_handle] = message['MessageId']
+                received.append({
+                    'MessageId': message['MessageId'],
+                    'ReceiptHandle': receipt_handle,
+                    'Body': message['Body'],
+                    'MessageAttributes': message['MessageAttributes'],
+                    'Attributes': {'ApproximateReceiveCount': str(message['receive_count'])}
+                })
+            self.stats['received'] += len(received)
+        return {'Messages': received} if received else {}
+    
+    def delete_message_batch(self, QueueUrl: str, Entries: List[Dict[str, str]], **kwargs):
+        successful = []
+        with self._lock:
+            self.stats['delete_calls'] += 1
+            for entry in Entries:
+                message_id = self._receipts.pop(entry['ReceiptHandle'], None)
+                if message_id and self._messages.pop(message_id, None):
+                    self.stats['deleted'] += 1
+                successful.append({'Id': entry['Id']})
+        return {'Successful': successful, 'Failed': []}
+    
+    def delete_message(self, QueueUrl: str, ReceiptHandle: str, **kwargs):
+        self.delete_message_batch(QueueUrl, [{'Id': '0', 'ReceiptHandle': ReceiptHandle}])
+        return {}
+    
+    def change_message_visibility(self, QueueUrl: str, ReceiptHandle: str, VisibilityTimeout: int, **kwargs):
+        with self._lock:
+            message = self._messages.get(self._receipts.get(ReceiptHandle))
+            if message:
+                message['visible_at'] = time.monotonic() + VisibilityTimeout
+            self.stats['visibility_changes'] += 1
+        return {}
+    
+    def pending_count(self) -> int:
+        """Messages not yet deleted"""
+        
+        with self._lock:
+            return len(self._messages)
 
 
 class BackgroundTaskQueue:
@@ -339,13 +974,26 @@ class BackgroundTaskQueue:
     Uses SQS for reliable task queuing
     """
     
-    def __init__(self):
-        """Initialize background task queue"""
+    def __init__(self, sqs_client=None, queue_url: Optional[str] = None):
+        """
+        Initialize background task queue
         
-        self.sqs = boto3.client('sqs')
-        self.queue_url = os.getenv('BACKGROUND_QUEUE_URL')
+        Args:
+            sqs_client: SQS client (defaults to the shared client; LocalQueue for local runs)
+            queue_url: Queue URL (defaults to BACKGROUND_QUEUE_URL)
+        """
+        
+        self.sqs = sqs_client or get_client('sqs')
+        self.queue_url = queue_url or os.getenv('BACKGROUND_QUEUE_URL')
         self.dlq_url = os.getenv('BACKGROUND_DLQ_URL')
         
+        # Duplicate enqueues are claimed against the async tasks table (None: in-process only)
+        self.dedup_table = os.getenv('ASYNC_TASKS_TABLE', 'lms-async-tasks')
+        self.idempotency = IdempotencyStore()
+        
+        # Messages processed at once per task type within a batch
+        self.type_limits = dict(SchedulerConfig.TYPE_LIMITS)
+        
         # Task processors
         self.task_processors = {
             'file_processing': self._process_file_task,
@@ -354,42 +1002,72 @@ class BackgroundTaskQueue:
             'analytics_calculation': self._process_analytics_task,
             'cache_warming': self._process_cache_warming_task
         }
+        
+        self.stats = {
+            'messages_processed': 0,
+            'messages_failed': 0,
+            'delete_batches': 0,
+            'delete_failures': 0,
+            'visibility_extensions': 0,
+            'duplicate_enqueues': 0
+        }
     
     async def enqueue_task(
         self,
         task_type: str,
         user_id: str,
         task_data: Dict[str, Any],
-        delay_seconds: int = 0
+        delay_seconds: int = 0,
+        idempotency_key: Optional[str] = None
     ) -> str:
         """
         Enqueue a background task
         
+        An equivalent task that is still queued, or was processed within the
+        dedup window, is not enqueued again; its message ID is returned, or
+        QueueConfig.DUPLICATE_PENDING while the first enqueue is in flight.
+        
         Args:
             task_type: Type of background task
             user_id: User ID
             task_data: Task-specific data
             delay_seconds: Delay before processing
+            idempotency_key: Deduplication key (defaults to type, user and a task_data hash)
             
         Returns:
-            Message ID
+            Message ID (QueueConfig.DUPLICATE_PENDING for an in-flight duplicate, "" on failure)
         """
         
         if not self.queue_url:
             logger.warning("Background queue not configured")
             return ""
         
+        task_id = str(uuid.uuid4())
+        idempotency_key = idempotency_key or derive_idempotency_key(task_type, user_id, task_data)
+        existing = await self.idempotency.claim(self.dedup_table, idempotency_key, task_id)
+        if existing:
+            self.stats['duplicate_enqueues'] += 1
+            logger.info(f"Duplicate {task_type} enqueue for user {user_id}; already queued")
+            return existing.get('message_id') or QueueConfig.DUPLICATE_PENDING
+        
         message_body = {
-            'task_id': str(uuid.uuid4()),
+            'task_id': task_id,
             'task_type': task_type,
             'user_id': user_id,
             'task_data': task_data,
+            'idempotency_key': idempotency_key,
             'created_at': datetime.utcnow().isoformat(),
             'retry_count': 0
         }
         
+        message_options = {}
+        if self.queue_url.endswith('.fifo'):
+            # FIFO queues also drop duplicates server-side for five minutes
+            message_options = {'MessageDeduplicationId': idempotency_key[:128], 'MessageGroupId': user_id}
+        
         try:
-            response = self.sqs.send_message(
+            response = await async_aws.call(
+                'sqs', 'send_message', client=self.sqs,
                 QueueUrl=self.queue_url,
                 MessageBody=json.dumps(message_body),
                 DelaySeconds=delay_seconds,
@@ -402,20 +1080,25 @@ class BackgroundTaskQueue:
                         'StringValue': user_id,
                         'DataType': 'String'
                     }
-                }
+                },
+                **message_options
             )
             
             message_id = response['MessageId']
+            await self.idempotency.settle(
+                self.dedup_table, idempotency_key, task_id, TaskStoreConfig.DEDUP_HOLD_SECONDS, message_id=message_id
+            )
             logger.info(f"Enqueued background task: {message_id} ({task_type}) for user: {user_id}")
             return message_id
             
         except Exception as e:
             logger.error(f"Error enqueuing background task: {e}")
+            await self.idempotency.release(self.dedup_table, idempotency_key, task_id)
             return ""
     
-    async def process_queue_messages(self, max_messages: int = 10) -> int:
+    async def process_queue_messages(self, max_messages: int = QueueConfig.MAX_BATCH) -> int:
         """
-        Process messages from the background queue
+        Receive a batch from the background queue, process it and acknowledge successes
         
         Args:
             max_messages: Maximum messages to process
@@ -427,46 +1110,167 @@ class BackgroundTaskQueue:
         if not self.queue_url:
             return 0
         
-        processed_count = 0
-        
         try:
             # Receive messages from queue
-            response = self.sqs.receive_message(
+            response = await async_aws.call(
+                'sqs', 'receive_message', client=self.sqs,
                 QueueUrl=self.queue_url,
-                MaxNumberOfMessages=min(max_messages, 10),
-                WaitTimeSeconds=5,  # Long polling
-                MessageAttributeNames=['All']
+                MaxNumberOfMessages=min(max_messages, QueueConfig.MAX_BATCH),
+                WaitTimeSeconds=QueueConfig.WAIT_TIME_SECONDS,
+                VisibilityTimeout=QueueConfig.VISIBILITY_TIMEOUT,
+                MessageAttributeNames=['All'],
+                AttributeNames=['ApproximateReceiveCount']
             )
+        except Exception as e:
+            logger.error(f"Error receiving queue messages: {e}")
+            return 0
             
-            messages = response.get('Messages', [])
+        messages = response.get('Messages', [])
+        if not messages:
+            return 0
             
-            # Process messages concurrently
-            tasks = []
-            for message in messages:
-                task = asyncio.create_task(self._process_message(message))
-                tasks.append(task)
+        succeeded, _ = await self.process_batch(messages, self.queue_url)
             
-            if tasks:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Failed messages are left to reappear after their visibility timeout (and reach the DLQ eventually)
+        await self._delete_messages(succeeded)
+        return len(succeeded)
                 
-                for i, result in enumerate(results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Error processing message: {result}")
-                    elif result:
-                        processed_count += 1
-                        # Delete successfully processed message
-                        try:
-                            self.sqs.delete_message(
-                                QueueUrl=self.queue_url,
-                                ReceiptHandle=messages[i]['ReceiptHandle']
-                            )
-                        except Exception as e:
-                            logger.error(f"Error deleting message: {e}")
+    async def handle_sqs_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process an SQS-triggered Lambda batch
             
-        except Exception as e:
-            logger.error(f"Error processing queue messages: {e}")
+        Lambda deletes the records that are not reported as failures, so a
+        poison message is retried on its own instead of with the whole
+        batch (requires ReportBatchItemFailures on the event source mapping).
+        
+        Args:
+            event: Lambda SQS event
         
-        return processed_count
+        Returns:
+            Partial batch response: {'batchItemFailures': [{'itemIdentifier': messageId}]}
+        """
+        
+        records = event.get('Records', [])
+        messages = [
+            {
+                'MessageId': record['messageId'],
+                'ReceiptHandle': record.get('receiptHandle'),
+                'Body': record.get('body', ''),
+                'MessageAttributes': {
+                    name: {'StringValue': value.get('stringValue'), 'DataType': value.get('dataType')}
+                    for name, value in (record.get('messageAttributes') or {}).items()
+                },
+                'Attributes': record.get('attributes') or {}
+            }
+            for record in records
+        ]
+        
+        queue_url = self.queue_url or (_queue_url_from_arn(records[0].get('eventSourceARN', '')) if records else None)
+        _, failed = await self.process_batch(messages, queue_url)
+        
+        return {'batchItemFailures': [{'itemIdentifier': message['MessageId']} for message in failed]}
+    
+    async def process_batch(
+        self,
+        messages: List[Dict[str, Any]],
+        queue_url: Optional[str] = None
+    ) -> tuple:
+        """
+        Process received messages concurrently, capped per task type
+        
+        Args:
+            messages: SQS messages (MessageId, ReceiptHandle, Body, MessageAttributes)
+            queue_url: Queue to extend visibility on while messages are in progress
+        
+        Returns:
+            Tuple of (succeeded messages, failed messages)
+        """
+        
+        # Created per batch: semaphores belong to the running event loop
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+        
+        async def process(message: Dict[str, Any]) -> bool:
+            task_type = _message_task_type(message)
+            if task_type not in semaphores:
+                semaphores[task_type] = asyncio.Semaphore(
+                    self.type_limits.get(task_type, SchedulerConfig.DEFAULT_TYPE_LIMIT)
+                )
+            
+            heartbeat = None
+            if queue_url and message.get('ReceiptHandle'):
+                heartbeat = asyncio.create_task(self._extend_visibility(queue_url, message['ReceiptHandle']))
+            
+            try:
+                async with semaphores[task_type]:
+                    return await self._process_message(message)
+            finally:
+                if heartbeat:
+                    heartbeat.cancel()
+        
+        results = await asyncio.gather(*(process(message) for message in messages), return_exceptions=True)
+        
+        succeeded, failed = [], []
+        for message, result in zip(messages, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing message {message.get('MessageId')}: {result}")
+            (succeeded if result is True else failed).append(message)
+        
+        self.stats['messages_processed'] += len(succeeded)
+        self.stats['messages_failed'] += len(failed)
+        
+        # Processed work stays deduplicated for the window; failed messages keep their claim while they
+        # retry, except on their last receive (they go to the DLQ, and new enqueues must not wait on them)
+        for message in succeeded:
+            claim = _message_claim(message)
+            if claim:
+                await self.idempotency.settle(self.dedup_table, *claim, TaskStoreConfig.DEDUP_WINDOW_SECONDS)
+        
+        for message in failed:
+            claim = _message_claim(message)
+            if claim and _receive_count(message) >= QueueConfig.MAX_RECEIVE_COUNT:
+                await self.idempotency.release(self.dedup_table, *claim)
+        
+        return succeeded, failed
+    
+    async def _extend_visibility(self, queue_url: str, receipt_handle: str) -> None:
+        """Keep a long-running message invisible until it is finished"""
+        
+        while True:
+            await asyncio.sleep(QueueConfig.VISIBILITY_TIMEOUT / 2)
+            try:
+                await async_aws.call(
+                    'sqs', 'change_message_visibility', client=self.sqs,
+                    QueueUrl=queue_url,
+                    ReceiptHandle=receipt_handle,
+                    VisibilityTimeout=QueueConfig.VISIBILITY_TIMEOUT
+                )
+                self.stats['visibility_extensions'] += 1
+            except Exception as e:
+                logger.warning(f"Error extending message visibility: {e}")
+    
+    async def _delete_messages(self, messages: List[Dict[str, Any]]) -> None:
+        """Acknowledge messages with DeleteMessageBatch (10 per call)"""
+        
+        for start in range(0, len(messages), QueueConfig.MAX_BATCH):
+            chunk = messages[start:start + QueueConfig.MAX_BATCH]
+            try:
+                response = await async_aws.call(
+                    'sqs', 'delete_message_batch', client=self.sqs,
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {'Id': str(index), 'ReceiptHandle': message['ReceiptHandle']}
+                        for index, message in enumerate(chunk)
+                    ]
+                )
+                self.stats['delete_batches'] += 1
+                
+                for failure in response.get('Failed', []):
+                    self.stats['delete_failures'] += 1
+                    logger.error(f"Error deleting message: {failure.get('Code')} - {failure.get('Message')}")
+            
+            except Exception as e:
+                self.stats['delete_failures'] += len(chunk)
+                logger.error(f"Error deleting messages: {e}")
     
     async def _process_message(self, message: Dict[str, Any]) -> bool:
         """Process a single queue message"""
@@ -606,14 +1410,21 @@ class BackgroundTaskQueue:
         """Process cache warming task"""
         
         try:
-            cache_types = task_data.get('cache_types', ['user_files', 'chat_history'])
+            cache_types = task_data.get('cache_types')
             
             # Import cache service
             from .performance_cache import warm_cache_for_user
             
-            result = warm_cache_for_user(user_id)
+            # Warming blocks on cache and table I/O; keep it off the event loop
+            result = await async_aws.run(
+                warm_cache_for_user,
+                user_id,
+                prefixes=cache_types,
+                time_budget_seconds=task_data.get('time_budget_seconds')
+            )
             
-            return result.get('warmed_entries', 0) > 0
+            # Nothing to warm (no read history yet) is not a failure
+            return not result.get('errors')
             
         except Exception as e:
             logger.error(f"Error processing cache warming task: {e}")
@@ -621,8 +1432,22 @@ class BackgroundTaskQueue:
 
 
 # Global instances
-async_task_manager = AsyncTaskManager()
-background_task_queue = BackgroundTaskQueue()
+async_task_manager = LazyProxy(AsyncTaskManager)
+background_task_queue = LazyProxy(BackgroundTaskQueue)
+
+
+def report_progress(progress: float) -> None:
+    """
+    Report progress (0-100) for the async task running in the current context
+    
+    Works from async task functions and from sync ones running in the task
+    thread pool; outside a task it does nothing.
+    """
+    
+    current = _current_task.get()
+    if current:
+        manager, task_id = current
+        manager.update_progress(task_id, progress)
 
 
 # Decorator for async processing
@@ -700,6 +1525,8 @@ def background_task(task_type: str, delay_seconds: int = 0):
                 delay_seconds=delay_seconds
             )
             
+            if message_id == QueueConfig.DUPLICATE_PENDING:
+                return {'message_id': None, 'status': 'duplicate_pending'}
             return {'message_id': message_id, 'status': 'queued'}
         
         return wrapper
@@ -5,15 +5,18 @@ Provides unified interface for multiple specialized Bedrock Agents with retry lo
 
 import json
 import time
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional, Union
 from enum import Enum
 from dataclasses import dataclass
-import boto3
 from botocore.exceptions import ClientError, BotoCoreError
-from botocore.config import Config
 
 from .config import config
+from .connection_pool import get_client
+from .async_aws import async_aws
+from .embedding_cache import embedding_cache
+from .lazy import LazyProxy
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -67,28 +70,18 @@ class BedrockAgentService:
     def __init__(self):
         """Initialize Bedrock Agent service"""
         
-        # Configure boto3 client with retry settings
-        boto_config = Config(
-            region_name=config.AWS_DEFAULT_REGION,
-            retries={
-                'max_attempts': config.BEDROCK_MAX_RETRIES,
-                'mode': 'adaptive'
-            },
-            read_timeout=config.BEDROCK_TIMEOUT_SECONDS,
-            connect_timeout=10
-        )
-        
+        # Shared clients with the Bedrock retry/timeout profile
         try:
-            self.bedrock_agent_client = boto3.client(
+            self.bedrock_agent_client = get_client(
                 'bedrock-agent-runtime',
-                **config.get_aws_config(),
-                config=boto_config
+                region_name=config.AWS_DEFAULT_REGION,
+                profile='bedrock'
             )
             
-            self.bedrock_runtime_client = boto3.client(
+            self.bedrock_runtime_client = get_client(
                 'bedrock-runtime',
-                **config.get_aws_config(),
-                config=boto_config
+                region_name=config.AWS_DEFAULT_REGION,
+                profile='bedrock'
             )
             
         except Exception as e:
@@ -179,10 +172,14 @@ class BedrockAgentService:
             try:
                 logger.info(f"Invoking {agent_type.value} agent (attempt {attempt + 1})")
                 
-                response = self.bedrock_agent_client.invoke_agent(**invocation_params)
-                
-                # Process the response
-                return self._process_agent_response(response, agent_type, invocation_params['sessionId'])
+                # The event stream is consumed in the worker too, since reading it blocks
+                return await async_aws.run(
+                    lambda: self._process_agent_response(
+                        self.bedrock_agent_client.invoke_agent(**invocation_params),
+                        agent_type,
+                        invocation_params['sessionId']
+                    )
+                )
                 
             except ClientError as e:
                 error_code = e.response.get('Error', {}).get('Code', 'Unknown')
@@ -212,7 +209,7 @@ class BedrockAgentService:
             if attempt < config.BEDROCK_MAX_RETRIES:
                 wait_time = config.BEDROCK_RETRY_DELAY * (2 ** attempt)
                 logger.info(f"Waiting {wait_time} seconds before retry...")
-                time.sleep(wait_time)
+                await asyncio.sleep(wait_time)
         
         # All retries exhausted
         error_message = f"Failed to invoke {agent_type.value} agent after {config.BEDROCK_MAX_RETRIES + 1} attempts"
@@ -364,6 +361,8 @@ class BedrockAgentService:
         """
         Generate text embedding using Bedrock Titan model
         
+        Text embedded before (by any caller) is served from the embedding cache.
+        
         Args:
             text: Text to embed
             
@@ -371,15 +370,19 @@ class BedrockAgentService:
             List of embedding values
         """
         
+        return await embedding_cache.aget_or_embed(
+            config.BEDROCK_EMBEDDING_MODEL_ID, text, self._invoke_embedding_model
+        )
+    
+    async def _invoke_embedding_model(self, text: str) -> List[float]:
+        """Call Bedrock Titan for one embedding"""
+        
         try:
-            response = self.bedrock_runtime_client.invoke_model(
-                modelId=config.BEDROCK_EMBEDDING_MODEL_ID,
-                body=json.dumps({
-                    "inputText": text
-                })
+            response_body = await async_aws.invoke_model(
+                config.BEDROCK_EMBEDDING_MODEL_ID,
+                {"inputText": text},
+                client=self.bedrock_runtime_client
             )
-            
-            response_body = json.loads(response['body'].read())
             return response_body.get('embedding', [])
             
         except Exception as e:
@@ -424,4 +427,4 @@ class BedrockAgentService:
 
 
 # Global service instance
-bedrock_agent_service = BedrockAgentService()
\ No newline at end of file
+bedrock_agent_service = LazyProxy(BedrockAgentService)
\ No newline at end of file
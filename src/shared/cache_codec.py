@@ -0,0 +1,310 @@
+"""
+Cache Value Codec for LMS API
+Compact binary encoding, per-entry compression and large-value offload for the performance cache
+"""
+
+import json
+import os
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Any, Tuple
+import logging
+
+from .connection_pool import get_client
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class CodecConfig:
+    """Codec configuration settings"""
+    
+    # Stored records start with MAGIC + format tag + compression tag.
+    # Anything without the magic byte is a legacy JSON string.
+    MAGIC = b"\xc1"
+    FORMAT_JSON = b"j"
+    FORMAT_MSGPACK = b"m"
+    FORMAT_POINTER = b"p"
+    COMPRESSION_NONE = b"n"
+    COMPRESSION_ZLIB = b"z"
+    COMPRESSION_ZSTD = b"s"
+    
+    # Compression
+    COMPRESSION = os.getenv('CACHE_COMPRESSION', 'auto')  # auto, zstd, zlib, none
+    COMPRESSION_THRESHOLD = int(os.getenv('CACHE_COMPRESSION_THRESHOLD', 1024))
+    ZLIB_LEVEL = 6
+    ZSTD_LEVEL = 3
+    
+    # Large-value offload
+    SPILL_THRESHOLD = 400 * 1024 - 1024  # Leave room for the other item attributes
+    MAX_SPILL_SIZE = int(os.getenv('CACHE_MAX_SPILL_BYTES', 50 * 1024 * 1024))
+    SPILL_BUCKET = os.getenv('CACHE_SPILL_BUCKET')
+    SPILL_KEY_PREFIX = os.getenv('CACHE_SPILL_PREFIX', 'performance-cache')
+    SPILL_DIR = os.getenv('CACHE_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'lms-cache-spill'))
+
+
+@dataclass
+class EncodedValue:
+    """Encoded cache record ready for Redis/DynamoDB"""
+    data: bytes
+    raw_size: int
+    codec: str
+
+
+class S3BlobStore:
+    """Stores spilled cache values as S3 objects (expire them with a bucket lifecycle rule)"""
+    
+    def __init__(self, bucket: str, key_prefix: str = CodecConfig.SPILL_KEY_PREFIX):
+        self.bucket = bucket
+        self.key_prefix = key_prefix
+        self.s3_client = get_client('s3')
+    
+    def put(self, name: str, data: bytes) -> str:
+        key = f"{self.key_prefix}/{name}"
+        self.s3_client.put_object(Bucket=self.bucket, Key=key, Body=data)
+        return f"s3://{self.bucket}/{key}"
+    
+    def get(self, pointer: str) -> bytes:
+        bucket, key = pointer[len("s3://"):].split("/", 1)
+        return self.s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+
+
+class LocalBlobStore:
+    """
+    Local-directory stand-in for S3 (tests and benchmarks)
+    
+    Only used when passed explicitly: its file:// pointers are meaningless
+    to other containers and its files are never cleaned up.
+    """
+    
+    def __init__(self, directory: str = CodecConfig.SPILL_DIR):
+        self.directory = directory
+    
+    def put(self, name: str, data: bytes) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return f"file://{path}"
+    
+    def get(self, pointer: str) -> bytes:
+        with open(pointer[len("file://"):], 'rb') as f:
+            return f.read()
+
+
+def _default_serializer(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj)} is not serializable")
+
+
+class CacheCodec:
+    """
+    Encodes cache values into tagged binary records
+    
+    Values are packed with msgpack when installed (compact JSON otherwise),
+    compressed with zstd or zlib above a size threshold when that actually
+    shrinks them, and written to a blob store when still too large for
+    DynamoDB so that only a pointer is cached. Without a blob store (no
+    CACHE_SPILL_BUCKET and none passed in) oversized values are rejected.
+    """
+    
+    def __init__(
+        self,
+        compression: str = CodecConfig.COMPRESSION,
+        compression_threshold: int = CodecConfig.COMPRESSION_THRESHOLD,
+        spill_threshold: int = CodecConfig.SPILL_THRESHOLD,
+        blob_store=None
+    ):
+        self.compression_threshold = compression_threshold
+        self.spill_threshold = spill_threshold
+        self._blob_store = blob_store
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._stats_lock = threading.Lock()
+        
+        if compression == 'auto':
+            compression = 'zstd' if zstandard else 'zlib'
+        if compression == 'zstd' and not zstandard:
+            logger.warning("zstandard not available - install with: pip install zstandard")
+            compression = 'zlib'
+        self.compression = compression
+        
+        self._zstd_compressor = zstandard.ZstdCompressor(level=CodecConfig.ZSTD_LEVEL) if compression == 'zstd' else None
+    
+    @property
+    def blob_store(self):
+        """Blob store for oversized values (S3 when CACHE_SPILL_BUCKET is set, else None)"""
+        
+        if self._blob_store is None and CodecConfig.SPILL_BUCKET:
+            self._blob_store = S3BlobStore(CodecConfig.SPILL_BUCKET)
+        return self._blob_store
+    
+    def encode(self, prefix: str, cache_key: str, value: Any) -> EncodedValue:
+        """
+        Encode a value for storage
+        
+        Args:
+            prefix: Cache key prefix (for per-prefix stats)
+            cache_key: Full cache key (names spilled blobs)
+            value: Value to encode
+        
+        Returns:
+            Encoded record
+        
+        Raises:
+            ValueError: If the value is too large to store (over the spill
+                threshold with no blob store, or over the spill size limit)
+        """
+        
+        start_time = time.perf_counter()
+        
+        if msgpack:
+            fmt = CodecConfig.FORMAT_MSGPACK
+            payload = msgpack.packb(value, default=_default_serializer, use_bin_type=True)
+        else:
+            fmt = CodecConfig.FORMAT_JSON
+            payload = json.dumps(value, default=_default_serializer, separators=(',', ':')).encode('utf-8')
+        raw_size = len(payload)
+        
+        compression = CodecConfig.COMPRESSION_NONE
+        if raw_size >= self.compression_threshold and self.compression != 'none':
+            compressed = self._compress(payload)
+            if len(compressed) < raw_size:
+                payload = compressed
+                compression = (
+                    CodecConfig.COMPRESSION_ZSTD if self._zstd_compressor else CodecConfig.COMPRESSION_ZLIB
+                )
+        
+        data = CodecConfig.MAGIC + fmt + compression + payload
+        stored_size = len(data)
+        offloaded = 0
+        
+        if stored_size > self.spill_threshold:
+            blob_store = self.blob_store
+            if blob_store is None or len(data) > CodecConfig.MAX_SPILL_SIZE:
+                raise ValueError(f"Cache value too large: {len(data)} bytes")
+            
+            name = hashlib.sha256(cache_key.encode()).hexdigest()
+            pointer = blob_store.put(name, data)
+            data = CodecConfig.MAGIC + CodecConfig.FORMAT_POINTER + CodecConfig.COMPRESSION_NONE + pointer.encode('utf-8')
+            offloaded = stored_size
+        
+        codec = (fmt + compression).decode('ascii')
+        self._record(
+            prefix,
+            encoded=1,
+            raw_bytes=raw_size,
+            stored_bytes=stored_size,
+            compressed=int(compression != CodecConfig.COMPRESSION_NONE),
+            spilled=int(offloaded > 0),
+            offloaded_bytes=offloaded,
+            encode_ms=(time.perf_counter() - start_time) * 1000
+        )
+        
+        return EncodedValue(data=data, raw_size=raw_size, codec=codec)
+    
+    def decode(self, prefix: str, data: Any) -> Tuple[Any, int]:
+        """
+        Decode a stored record
+        
+        Args:
+            prefix: Cache key prefix (for per-prefix stats)
+            data: Stored record (bytes, DynamoDB Binary, or legacy JSON string)
+        
+        Returns:
+            Tuple of (value, raw payload size)
+        """
+        
+        start_time = time.perf_counter()
+        
+        if hasattr(data, 'value') and isinstance(data.value, bytes):
+            data = data.value  # boto3 Binary
+        
+        if isinstance(data, str) or not data.startswith(CodecConfig.MAGIC):
+            text = data if isinstance(data, str) else data.decode('utf-8')
+            try:
+                value = json.loads(text)
+            except json.JSONDecodeError:
+                value = text
+            self._record(prefix, decoded=1, decode_ms=(time.perf_counter() - start_time) * 1000)
+            return value, len(text)
+        
+        fmt, compression, payload = data[1:2], data[2:3], data[3:]
+        
+        if fmt == CodecConfig.FORMAT_POINTER:
+            if self.blob_store is None:
+                raise ValueError("Spilled cache entry but no blob store is configured")
+            data = self.blob_store.get(payload.decode('utf-8'))
+            fmt, compression, payload = data[1:2], data[2:3], data[3:]
+        
+        if compression == CodecConfig.COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression == CodecConfig.COMPRESSION_ZSTD:
+            if not zstandard:
+                raise ValueError("zstd-compressed cache entry but zstandard is not installed")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        
+        if fmt == CodecConfig.FORMAT_MSGPACK:
+            if not msgpack:
+                raise ValueError("msgpack-encoded cache entry but msgpack is not installed")
+            value = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        else:
+            value = json.loads(payload.decode('utf-8'))
+        
+        self._record(prefix, decoded=1, decode_ms=(time.perf_counter() - start_time) * 1000)
+        return value, len(payload)
+    
+    def _compress(self, payload: bytes) -> bytes:
+        """Compress with the configured algorithm"""
+        
+        if self._zstd_compressor:
+            return self._zstd_compressor.compress(payload)
+        return zlib.compress(payload, CodecConfig.ZLIB_LEVEL)
+    
+    def _record(self, prefix: str, **counters) -> None:
+        """Accumulate per-prefix counters"""
+        
+        with self._stats_lock:
+            stats = self._stats.setdefault(prefix, {
+                'encoded': 0,
+                'decoded': 0,
+                'raw_bytes': 0,
+                'stored_bytes': 0,
+                'compressed': 0,
+                'spilled': 0,
+                'offloaded_bytes': 0,
+                'encode_ms': 0.0,
+                'decode_ms': 0.0
+            })
+            for name, amount in counters.items():
+                stats[name] += amount
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-prefix codec statistics"""
+        
+        with self._stats_lock:
+            return {
+                prefix: {
+                    **stats,
+                    'bytes_saved': stats['raw_bytes'] - stats['stored_bytes'],
+                    'avg_encode_ms': stats['encode_ms'] / stats['encoded'] if stats['encoded'] else 0.0,
+                    'avg_decode_ms': stats['decode_ms'] / stats['decoded'] if stats['decoded'] else 0.0
+                }
+                for prefix, stats in self._stats.items()
+            }
@@ -0,0 +1,320 @@
+"""
+Predictive Cache Warming for LMS API
+Prefetches the data a user is likely to read on login or session start
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import logging
+
+from .performance_cache import performance_cache, CacheConfig
+from .connection_pool import get_resource
+from .lazy import LazyProxy
+
+logger = logging.getLogger(__name__)
+
+
+class WarmingConfig:
+    """Cache warming configuration settings"""
+    
+    TIME_BUDGET_SECONDS = float(os.getenv('CACHE_WARM_BUDGET_SECONDS', 3))
+    MAX_WORKERS = 5
+    
+    # What to prefetch (readers asking for more than this go to DynamoDB)
+    RECENT_CONVERSATIONS = 20
+    RECENT_MESSAGES = 20
+    SUBJECT_DOCUMENTS = 10
+    
+    # A prefix is warmed only once the user has read it this often recently
+    MIN_READS = int(os.getenv('CACHE_WARM_MIN_READS', 2))
+    HISTORY_WINDOW_SECONDS = 14 * 86400  # 14 days
+    
+    # Cache keys (handlers read through the same keys via the CacheWarmer readers)
+    FILE_LIST_KEY = "file_list"
+    RECENT_CONVERSATIONS_KEY = "recent_conversations"
+    MESSAGES_KEY = "messages"           # messages:<conversation_id>
+    SUBJECT_KEY = "subject"             # subject:<subject_id>
+    
+    # Tables
+    FILES_TABLE = os.getenv('FILES_TABLE', 'lms-user-files')
+    CONVERSATIONS_TABLE = os.getenv('CONVERSATIONS_TABLE', 'lms-chat-conversations')
+    MESSAGES_TABLE = os.getenv('MESSAGES_TABLE', 'lms-chat-messages')
+
+
+@dataclass
+class WarmTarget:
+    """One prefetchable data set"""
+    name: str
+    prefix: str
+    ttl_seconds: int
+    loader: Callable[[str], List[Tuple[str, Any]]]  # user_id -> [(key, value)]
+
+
+class CacheWarmer:
+    """
+    Warms the performance cache for a user
+    
+    Targets run in parallel on a small thread pool. Only prefixes the user
+    has a recent read history for are warmed, and whatever has not finished
+    when the time budget runs out is reported as timed out.
+    
+    Handlers read the same data sets through the reader methods, which is
+    what builds that history and what consumes the warmed entries; the
+    write paths call the invalidate methods.
+    """
+    
+    def __init__(self, cache=performance_cache):
+        self.cache = cache
+        self.dynamodb = get_resource('dynamodb')
+        self.targets = [
+            WarmTarget('file_list', CacheConfig.USER_FILES, CacheConfig.MEDIUM_TTL, self.load_file_list),
+            WarmTarget('recent_conversations', CacheConfig.CHAT_HISTORY, CacheConfig.DEFAULT_TTL,
+                       self.load_recent_conversations),
+            WarmTarget('active_messages', CacheConfig.CHAT_HISTORY, CacheConfig.DEFAULT_TTL,
+                       self.load_active_messages),
+            WarmTarget('subject_context', CacheConfig.SUBJECT_CONTEXT, CacheConfig.MEDIUM_TTL,
+                       self.load_subject_context)
+        ]
+    
+    def learned_prefixes(self, user_id: str) -> List[str]:
+        """Prefixes the user has read at least MIN_READS times within the history window"""
+        
+        history = self.cache.get_read_history(user_id)
+        cutoff = time.time() - WarmingConfig.HISTORY_WINDOW_SECONDS
+        
+        return [
+            prefix for prefix, entry in history.items()
+            if entry.get('reads', 0) >= WarmingConfig.MIN_READS and entry.get('last_read', 0) >= cutoff
+        ]
+    
+    def warm(
+        self,
+        user_id: str,
+        prefixes: Optional[List[str]] = None,
+        time_budget_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Warm the cache for a user
+        
+        Args:
+            user_id: User ID
+            prefixes: Restrict warming to these prefixes (still subject to read history)
+            time_budget_seconds: Wall-clock budget for the whole warm-up
+        
+        Returns:
+            Warming results with per-prefix entry counts and warm time
+        """
+        
+        start_time = time.time()
+        budget = time_budget_seconds if time_budget_seconds is not None else WarmingConfig.TIME_BUDGET_SECONDS
+        
+        results = {
+            'user_id': user_id,
+            'warmed_entries': 0,
+            'prefixes': {},
+            'skipped_prefixes': [],
+            'timed_out': [],
+            'errors': []
+        }
+        
+        try:
+            learned = set(self.learned_prefixes(user_id))
+        except Exception as e:
+            logger.error(f"Cache warming history error for user {user_id}: {e}")
+            results['errors'].append(str(e))
+            learned = set()
+        
+        candidates = {t.prefix for t in self.targets}
+        if prefixes is not None:
+            candidates &= set(prefixes)
+        
+        results['skipped_prefixes'] = sorted(candidates - learned)
+        targets = [t for t in self.targets if t.prefix in candidates & learned]
+        
+        if targets:
+            executor = ThreadPoolExecutor(max_workers=min(WarmingConfig.MAX_WORKERS, len(targets)))
+            futures = {executor.submit(self._warm_target, target, user_id): target for target in targets}
+            
+            remaining = max(0.0, budget - (time.time() - start_time))
+            done, not_done = wait(futures, timeout=remaining)
+            # Stragglers finish in the background; their results are not waited for
+            executor.shutdown(wait=False)
+            
+            for future in done:
+                target = futures[future]
+                try:
+                    entries, warm_ms = future.result()
+                except Exception as e:
+                    logger.warning(f"Cache warming failed for {target.name} (user {user_id}): {e}")
+                    results['errors'].append(f"{target.name}: {e}")
+                    continue
+                
+                prefix_stats = results['prefixes'].setdefault(target.prefix, {'entries': 0, 'warm_ms': 0.0})
+                prefix_stats['entries'] += entries
+                prefix_stats['warm_ms'] = max(prefix_stats['warm_ms'], round(warm_ms, 2))
+                results['warmed_entries'] += entries
+            
+            results['timed_out'] = sorted(futures[future].name for future in not_done)
+        
+        results['elapsed_ms'] = round((time.time() - start_time) * 1000, 2)
+        logger.info(
+            f"Cache warming for user {user_id}: {results['warmed_entries']} entries "
+            f"in {results['elapsed_ms']}ms, timed out: {results['timed_out']}"
+        )
+        
+        return results
+    
+    def _warm_target(self, target: WarmTarget, user_id: str) -> Tuple[int, float]:
+        """Fetch one target and store its entries"""
+        
+        start_time = time.time()
+        entries = target.loader(user_id)
+        
+        stored = 0
+        for key, value in entries:
+            if value is not None and self.cache.set(target.prefix, key, value, target.ttl_seconds, user_id):
+                stored += 1
+        
+        warm_ms = (time.time() - start_time) * 1000
+        for key, value in entries:
+            if value is not None:
+                self.cache.record_warmed(target.prefix, key, user_id, warm_ms / max(len(entries), 1))
+        
+        return stored, warm_ms
+    
+    # Readers: the handlers' view of each data set, read through the keys warming fills
+    
+    def file_list(self, user_id: str) -> List[Dict[str, Any]]:
+        """User's files"""
+        
+        return self._read('file_list', WarmingConfig.FILE_LIST_KEY, user_id, lambda: self.fetch_file_list(user_id))
+    
+    def recent_conversations(self, user_id: str) -> List[Dict[str, Any]]:
+        """User's RECENT_CONVERSATIONS most recent conversations, newest first"""
+        
+        return self._read(
+            'recent_conversations', WarmingConfig.RECENT_CONVERSATIONS_KEY, user_id,
+            lambda: self.fetch_conversations(user_id, WarmingConfig.RECENT_CONVERSATIONS)
+        )
+    
+    def conversation_messages(self, user_id: str, conversation_id: str) -> List[Dict[str, Any]]:
+        """Last RECENT_MESSAGES messages of a conversation, oldest first"""
+        
+        return self._read(
+            'active_messages', f"{WarmingConfig.MESSAGES_KEY}:{conversation_id}", user_id,
+            lambda: self.fetch_messages(conversation_id)
+        )
+    
+    def subject_context(self, user_id: str, subject_id: str) -> Dict[str, Any]:
+        """User's SUBJECT_DOCUMENTS most recent documents in a subject"""
+        
+        return self._read(
+            'subject_context', f"{WarmingConfig.SUBJECT_KEY}:{subject_id}", user_id,
+            lambda: self.fetch_subject_context(user_id, subject_id)
+        )
+    
+    def invalidate_files(self, user_id: str, subject_id: Optional[str] = None) -> None:
+        """Drop the cached file list (and subject documents) after a file is added or changes state"""
+        
+        self.cache.delete(CacheConfig.USER_FILES, WarmingConfig.FILE_LIST_KEY, user_id)
+        if subject_id:
+            self.cache.delete(CacheConfig.SUBJECT_CONTEXT, f"{WarmingConfig.SUBJECT_KEY}:{subject_id}", user_id)
+    
+    def invalidate_conversation(self, user_id: str, conversation_id: Optional[str] = None) -> None:
+        """Drop the cached conversation list (and a conversation's messages) after a write"""
+        
+        self.cache.delete(CacheConfig.CHAT_HISTORY, WarmingConfig.RECENT_CONVERSATIONS_KEY, user_id)
+        if conversation_id:
+            self.cache.delete(CacheConfig.CHAT_HISTORY, f"{WarmingConfig.MESSAGES_KEY}:{conversation_id}", user_id)
+    
+    def _read(self, target_name: str, key: str, user_id: str, fetch: Callable[[], Any]) -> Any:
+        """Read one entry of a target through the cache, fetching it on a miss"""
+        
+        target = next(target for target in self.targets if target.name == target_name)
+        return self.cache.get_or_compute(target.prefix, key, fetch, target.ttl_seconds, user_id)
+    
+    # Loaders: each returns [(cache key, value)] for one target
+    
+    def load_file_list(self, user_id: str) -> List[Tuple[str, Any]]:
+        """User's files"""
+        
+        return [(WarmingConfig.FILE_LIST_KEY, self.fetch_file_list(user_id))]
+    
+    def load_recent_conversations(self, user_id: str) -> List[Tuple[str, Any]]:
+        """User's most recent conversations"""
+        
+        return [(WarmingConfig.RECENT_CONVERSATIONS_KEY, self.fetch_conversations(user_id, WarmingConfig.RECENT_CONVERSATIONS))]
+    
+    def load_active_messages(self, user_id: str) -> List[Tuple[str, Any]]:
+        """Last N messages of the user's active (most recent) conversation"""
+        
+        conversations = self.fetch_conversations(user_id, 1)
+        if not conversations:
+            return []
+        
+        conversation_id = conversations[0]['conversation_id']
+        return [(f"{WarmingConfig.MESSAGES_KEY}:{conversation_id}", self.fetch_messages(conversation_id))]
+    
+    def load_subject_context(self, user_id: str) -> List[Tuple[str, Any]]:
+        """Documents of the subject the user was last working in"""
+        
+        conversations = self.fetch_conversations(user_id, 1)
+        subject_id = conversations[0].get('subject_id') if conversations else None
+        if not subject_id:
+            return []
+        
+        return [(f"{WarmingConfig.SUBJECT_KEY}:{subject_id}", self.fetch_subject_context(user_id, subject_id))]
+    
+    # Fetchers: one DynamoDB query each, shared by the loaders and the readers
+    
+    def fetch_file_list(self, user_id: str) -> List[Dict[str, Any]]:
+        response = self.dynamodb.Table(WarmingConfig.FILES_TABLE).query(
+            IndexName='user-id-index',
+            KeyConditionExpression='user_id = :user_id',
+            ExpressionAttributeValues={':user_id': user_id},
+            ScanIndexForward=False
+        )
+        return response.get('Items', [])
+    
+    def fetch_conversations(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Most recent conversations first"""
+        
+        response = self.dynamodb.Table(WarmingConfig.CONVERSATIONS_TABLE).query(
+            IndexName='user-id-index',
+            KeyConditionExpression='user_id = :user_id',
+            ExpressionAttributeValues={':user_id': user_id},
+            ScanIndexForward=False,
+            Limit=limit
+        )
+        return response.get('Items', [])
+
+    def fetch_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Last RECENT_MESSAGES messages, oldest first"""
+        
+        response = self.dynamodb.Table(WarmingConfig.MESSAGES_TABLE).query(
+            KeyConditionExpression='conversation_id = :conv_id',
+            ExpressionAttributeValues={':conv_id': conversation_id},
+            ScanIndexForward=False,
+            Limit=WarmingConfig.RECENT_MESSAGES
+        )
+        return list(reversed(response.get('Items', [])))
+    
+    def fetch_subject_context(self, user_id: str, subject_id: str) -> Dict[str, Any]:
+        response = self.dynamodb.Table(WarmingConfig.FILES_TABLE).query(
+            IndexName='user-subject-index',
+            KeyConditionExpression='user_id = :user_id AND subject_id = :subject_id',
+            ExpressionAttributeValues={':user_id': user_id, ':subject_id': subject_id},
+            ScanIndexForward=False,
+            Limit=WarmingConfig.SUBJECT_DOCUMENTS
+        )
+        return {
+            'subject_id': subject_id,
+            'documents': response.get('Items', [])
+        }
+
+
+# Global warmer instance
+cache_warmer = LazyProxy(CacheWarmer)
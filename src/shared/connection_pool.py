@@ -9,14 +9,20 @@ import os
 import time
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
 from botocore.config import Config
 from botocore.exceptions import ClientError, BotoCoreError
 from functools import wraps
 import logging
 
+from .lazy import LazyProxy
+from .workflow_metrics import record_aws_call, record_response_headers
+
 logger = logging.getLogger(__name__)
 
+# boto3's default session is not thread safe while it builds clients
+_BOTO3_LOCK = threading.Lock()
+
 
 class ConnectionPoolConfig:
     """Configuration for connection pooling"""
@@ -31,41 +37,105 @@ class ConnectionPoolConfig:
     CONNECTION_TTL = 300  # 5 minutes
     MAX_IDLE_TIME = 60    # 1 minute
     
+    # Client config profiles (overrides applied on top of the settings above)
+    PROFILES = {
+        'default': {},
+        'long_running': {  # Model generation, document analysis
+            'read_timeout': int(os.getenv('AWS_LONG_READ_TIMEOUT', 120))
+        },
+        'bedrock': {  # Matches the BedrockAgentService settings
+            'read_timeout': int(os.getenv('BEDROCK_TIMEOUT_SECONDS', 30)),
+            'retries': {'max_attempts': int(os.getenv('BEDROCK_MAX_RETRIES', 3)), 'mode': 'adaptive'}
+        },
+        'fast_fail': {  # Health probes
+            'connect_timeout': 2,
+            'read_timeout': 5,
+            'retries': {'max_attempts': 1, 'mode': 'standard'}
+        }
+    }
+    
+    # Profile used when the caller does not name one
+    SERVICE_PROFILES = {
+        'bedrock-runtime': 'long_running',
+        'bedrock-agent-runtime': 'long_running',
+        'textract': 'long_running'
+    }
+    
     # Query optimization settings
     BATCH_SIZE = 25
     MAX_BATCH_ITEMS = 100
     PARALLEL_REQUESTS = 10
 
 
+def default_region() -> str:
+    """Region for clients created without an explicit one"""
+    return os.getenv('AWS_REGION') or os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
+
+
 class OptimizedAWSClient:
     """
     Optimized AWS client with connection pooling and retry logic
+    
+    Clients are shared across threads (boto3 clients are thread safe);
+    resources are not thread safe, so each thread gets its own.
     """
     
-    def __init__(self, service_name: str, region_name: str = None):
+    def __init__(
+        self,
+        service_name: str,
+        region_name: str = None,
+        profile: str = 'default',
+        endpoint_url: Optional[str] = None
+    ):
         """Initialize optimized AWS client"""
         
+        if profile not in ConnectionPoolConfig.PROFILES:
+            raise ValueError(f"Unknown AWS client profile: {profile}")
+        
         self.service_name = service_name
-        self.region_name = region_name or os.getenv('AWS_REGION', 'us-east-1')
+        self.region_name = region_name or default_region()
+        self.profile = profile
+        self.endpoint_url = endpoint_url
         
         # Connection pool configuration
-        self.config = Config(
-            region_name=self.region_name,
-            retries={
+        settings = {
+            'region_name': self.region_name,
+            'retries': {
                 'max_attempts': ConnectionPoolConfig.RETRIES,
                 'mode': 'adaptive'
             },
-            max_pool_connections=ConnectionPoolConfig.MAX_POOL_CONNECTIONS,
-            connect_timeout=ConnectionPoolConfig.CONNECT_TIMEOUT,
-            read_timeout=ConnectionPoolConfig.READ_TIMEOUT
-        )
+            'max_pool_connections': ConnectionPoolConfig.MAX_POOL_CONNECTIONS,
+            'connect_timeout': ConnectionPoolConfig.CONNECT_TIMEOUT,
+            'read_timeout': ConnectionPoolConfig.READ_TIMEOUT
+        }
+        settings.update(ConnectionPoolConfig.PROFILES[profile])
+        self.config = Config(**settings)
         
         # Client cache with TTL
         self._clients = {}
         self._client_created_at = {}
         self._lock = threading.Lock()
+        self._local = threading.local()
+        
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'clients_created': 0,
+            'client_reuses': 0,
+            'resources_created': 0,
+            'resource_reuses': 0,
+            'calls': 0,
+            'in_flight': 0,
+            'peak_in_flight': 0,
+            'saturated_calls': 0
+        }
         
-        logger.info(f"Initialized optimized AWS client for {service_name}")
+        logger.info(f"Initialized optimized AWS client for {service_name} ({self.profile})")
+    
+    def _create_kwargs(self) -> Dict[str, Any]:
+        kwargs = {'config': self.config}
+        if self.endpoint_url:
+            kwargs['endpoint_url'] = self.endpoint_url
+        return kwargs
     
     def get_client(self):
         """Get or create optimized AWS client with connection reuse"""
@@ -82,6 +152,7 @@ class OptimizedAWSClient:
                 
                 # Reuse client if within TTL
                 if age < ConnectionPoolConfig.CONNECTION_TTL:
+                    self._count('client_reuses')
                     return self._clients[self.service_name]
                 else:
                     # Client expired, remove from cache
@@ -90,9 +161,12 @@ class OptimizedAWSClient:
             
             # Create new client
             try:
-                client = boto3.client(self.service_name, config=self.config)
+                with _BOTO3_LOCK:
+                    client = boto3.client(self.service_name, **self._create_kwargs())
+                self._instrument(client)
                 self._clients[self.service_name] = client
                 self._client_created_at[self.service_name] = current_time
+                self._count('clients_created')
                 
                 logger.debug(f"Created new AWS client for {self.service_name}")
                 return client
@@ -101,6 +175,80 @@ class OptimizedAWSClient:
                 logger.error(f"Error creating AWS client for {self.service_name}: {e}")
                 raise
     
+    def get_resource(self):
+        """Get or create this thread's AWS resource"""
+        
+        current_time = time.time()
+        resource = getattr(self._local, 'resource', None)
+        
+        if resource is not None and current_time - self._local.created_at < ConnectionPoolConfig.CONNECTION_TTL:
+            self._count('resource_reuses')
+            return resource
+        
+        try:
+            with _BOTO3_LOCK:
+                resource = boto3.resource(self.service_name, **self._create_kwargs())
+            self._instrument(resource.meta.client)
+        except Exception as e:
+            logger.error(f"Error creating AWS resource for {self.service_name}: {e}")
+            raise
+        
+        self._local.resource = resource
+        self._local.created_at = current_time
+        self._count('resources_created')
+        
+        logger.debug(f"Created new AWS resource for {self.service_name}")
+        return resource
+    
+    def _instrument(self, client) -> None:
+        """Track in-flight calls to measure connection pool saturation, and charge calls to workflow nodes"""
+        
+        # Registered first so calls answered by an earlier handler (e.g. a stub) still count
+        client.meta.events.register_first('before-call.*.*', self._on_call_start)
+        client.meta.events.register('after-call.*.*', self._on_call_end)
+        client.meta.events.register('after-call-error.*.*', self._on_call_end)
+    
+    def _on_call_start(self, model=None, context=None, **kwargs):
+        if model is not None:
+            record_aws_call(self.service_name, model.name)
+        with self._stats_lock:
+            self.stats['calls'] += 1
+            self.stats['in_flight'] += 1
+            in_flight = self.stats['in_flight']
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], in_flight)
+            if in_flight > self.config.max_pool_connections:
+                self.stats['saturated_calls'] += 1
+        if context is not None:
+            context['pool_in_flight'] = True
+    
+    def _on_call_end(self, context=None, parsed=None, **kwargs):
+        if context is not None and context.pop('pool_in_flight', False):
+            with self._stats_lock:
+                self.stats['in_flight'] -= 1
+        if parsed and self.service_name == 'bedrock-runtime':
+            record_response_headers(parsed.get('ResponseMetadata', {}).get('HTTPHeaders', {}))
+    
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Creation, reuse and saturation statistics for this client"""
+        
+        with self._stats_lock:
+            stats = dict(self.stats)
+        
+        max_connections = self.config.max_pool_connections
+        stats.update({
+            'service': self.service_name,
+            'region': self.region_name,
+            'profile': self.profile,
+            'endpoint_url': self.endpoint_url,
+            'max_pool_connections': max_connections,
+            'pool_saturation_percent': stats['peak_in_flight'] / max_connections * 100
+        })
+        return stats
+    
     def cleanup_expired_clients(self):
         """Clean up expired clients from cache"""
         
@@ -122,6 +270,96 @@ class OptimizedAWSClient:
             logger.debug(f"Cleaned up {len(expired_services)} expired AWS clients")
 
 
+class AWSClientRegistry:
+    """
+    Process-wide registry of shared AWS clients
+    
+    Hands out one OptimizedAWSClient per (service, region, profile, endpoint)
+    so every module reuses the same clients and connection pools instead of
+    paying client construction and TLS setup per call.
+    """
+    
+    def __init__(self):
+        """Initialize AWS client registry"""
+        
+        self._pools: Dict[Tuple[str, str, str, Optional[str]], OptimizedAWSClient] = {}
+        self._lock = threading.Lock()
+    
+    def pool(
+        self,
+        service_name: str,
+        region_name: Optional[str] = None,
+        profile: Optional[str] = None,
+        endpoint_url: Optional[str] = None
+    ) -> OptimizedAWSClient:
+        """
+        Get the shared client pool for a service
+        
+        Args:
+            service_name: AWS service name
+            region_name: Region (defaults to the Lambda region)
+            profile: ConnectionPoolConfig.PROFILES name (defaults per service)
+            endpoint_url: Custom endpoint (e.g. API Gateway management)
+        
+        Returns:
+            Shared OptimizedAWSClient
+        """
+        
+        key = (
+            service_name,
+            region_name or default_region(),
+            profile or ConnectionPoolConfig.SERVICE_PROFILES.get(service_name, 'default'),
+            endpoint_url
+        )
+        
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = OptimizedAWSClient(*key)
+                    self._pools[key] = pool
+        return pool
+    
+    def client(self, service_name: str, **kwargs):
+        """Shared AWS client (see pool for arguments)"""
+        return self.pool(service_name, **kwargs).get_client()
+    
+    def resource(self, service_name: str, **kwargs):
+        """This thread's AWS resource (see pool for arguments)"""
+        return self.pool(service_name, **kwargs).get_resource()
+    
+    def table(self, table_name: str, **kwargs):
+        """DynamoDB table on this thread's shared resource"""
+        return self.resource('dynamodb', **kwargs).Table(table_name)
+    
+    def cleanup_expired_clients(self):
+        """Clean up expired clients in every pool"""
+        
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.cleanup_expired_clients()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Registry-wide creation, reuse and saturation statistics"""
+        
+        with self._lock:
+            pools = list(self._pools.values())
+        
+        clients = [pool.get_stats() for pool in pools]
+        totals = {
+            name: sum(c[name] for c in clients)
+            for name in ('clients_created', 'client_reuses', 'resources_created', 'resource_reuses', 'calls', 'saturated_calls')
+        }
+        created = totals['clients_created'] + totals['resources_created']
+        reused = totals['client_reuses'] + totals['resource_reuses']
+        totals['reuse_rate_percent'] = reused / (created + reused) * 100 if created + reused else 0.0
+        totals['max_pool_saturation_percent'] = max((c['pool_saturation_percent'] for c in clients), default=0.0)
+        
+        return {'pools': len(clients), 'totals': totals, 'clients': clients}
+
+
 class DynamoDBConnectionPool:
     """
     Optimized DynamoDB connection pool with query optimization
@@ -130,8 +368,8 @@ class DynamoDBConnectionPool:
     def __init__(self):
         """Initialize DynamoDB connection pool"""
         
-        self.aws_client = OptimizedAWSClient('dynamodb')
-        self.resource_client = OptimizedAWSClient('dynamodb')
+        self.aws_client = aws_clients.pool('dynamodb')
+        self.resource_client = self.aws_client
         
         # Query optimization settings
         self.batch_size = ConnectionPoolConfig.BATCH_SIZE
@@ -153,8 +391,7 @@ class DynamoDBConnectionPool:
     
     def get_resource(self):
         """Get DynamoDB resource"""
-        client = self.resource_client.get_client()
-        return boto3.resource('dynamodb', region_name=client.meta.region_name)
+        return self.resource_client.get_resource()
     
     def get_table(self, table_name: str):
         """Get DynamoDB table with connection reuse"""
@@ -177,12 +414,15 @@ class DynamoDBConnectionPool:
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get connection pool statistics"""
         
+        client_stats = self.aws_client.get_stats()
+        
         return {
             'queries_executed': self.stats['queries_executed'],
             'batch_operations': self.stats['batch_operations'],
             'cache_hits': self.stats['cache_hits'],
-            'connection_reuses': self.stats['connection_reuses'],
-            'active_connections': len(self.aws_client._clients)
+            'connection_reuses': client_stats['client_reuses'] + client_stats['resource_reuses'],
+            'active_connections': len(self.aws_client._clients),
+            'pool_saturation_percent': client_stats['pool_saturation_percent']
         }
 
 
@@ -194,7 +434,7 @@ class S3ConnectionPool:
     def __init__(self):
         """Initialize S3 connection pool"""
         
-        self.aws_client = OptimizedAWSClient('s3')
+        self.aws_client = aws_clients.pool('s3')
         
         logger.info("S3 connection pool initialized")
     
@@ -211,8 +451,8 @@ class BedrockConnectionPool:
     def __init__(self):
         """Initialize Bedrock connection pool"""
         
-        self.runtime_client = OptimizedAWSClient('bedrock-runtime')
-        self.agent_client = OptimizedAWSClient('bedrock-agent-runtime')
+        self.runtime_client = aws_clients.pool('bedrock-runtime')
+        self.agent_client = aws_clients.pool('bedrock-agent-runtime')
         
         logger.info("Bedrock connection pool initialized")
     
@@ -225,16 +465,21 @@ class BedrockConnectionPool:
         return self.agent_client.get_client()
 
 
-# Global connection pool instances
-dynamodb_pool = DynamoDBConnectionPool()
-s3_pool = S3ConnectionPool()
-bedrock_pool = BedrockConnectionPool()
+# Global AWS client registry and connection pool instances
+aws_clients = AWSClientRegistry()
+dynamodb_pool = LazyProxy(DynamoDBConnectionPool)
+s3_pool = LazyProxy(S3ConnectionPool)
+bedrock_pool = LazyProxy(BedrockConnectionPool)
+
+
+def get_client(service_name: str, **kwargs):
+    """Shared AWS client from the process-wide registry"""
+    return aws_clients.client(service_name, **kwargs)
 
 
-# Global connection pool instances
-dynamodb_pool = DynamoDBConnectionPool()
-s3_pool = S3ConnectionPool()
-bedrock_pool = BedrockConnectionPool()
+def get_resource(service_name: str, **kwargs):
+    """Thread-local AWS resource from the process-wide registry"""
+    return aws_clients.resource(service_name, **kwargs)
 
 
 def get_optimized_dynamodb_table(table_name: str):
@@ -261,10 +506,7 @@ def cleanup_connection_pools():
     """Clean up all connection pools"""
     
     try:
-        dynamodb_pool.aws_client.cleanup_expired_clients()
-        s3_pool.aws_client.cleanup_expired_clients()
-        bedrock_pool.runtime_client.cleanup_expired_clients()
-        bedrock_pool.agent_client.cleanup_expired_clients()
+        aws_clients.cleanup_expired_clients()
         
         logger.info("Connection pools cleaned up successfully")
         
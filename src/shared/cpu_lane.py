@@ -0,0 +1,230 @@
+"""
+CPU Execution Lane for LMS API
+Process pool for CPU-bound task functions (text extraction, chunking, scoring) that the GIL would serialize
+"""
+
+import os
+import sys
+import time
+import asyncio
+import inspect
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Any, List, Optional, Callable, Union
+import logging
+
+from .lazy import LazyProxy
+
+logger = logging.getLogger(__name__)
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class CPULaneConfig:
+    """CPU lane configuration settings"""
+    
+    MAX_WORKERS = int(os.getenv('CPU_LANE_WORKERS', 0)) or _available_cpus()
+    
+    # forkserver avoids forking a parent that already runs I/O threads
+    START_METHOD = os.getenv(
+        'CPU_LANE_START_METHOD',
+        'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    )
+    
+    # Imported once per worker so tasks reuse them
+    PRELOAD_MODULES = ['PyPDF2', 'docx', 're', 'json', 'unicodedata']
+    
+    # Task types AsyncTaskManager runs in the process pool
+    CPU_TASK_TYPES = {
+        'text_extraction',
+        'text_chunking',
+        'concept_extraction',
+        'scoring'
+    } | {t.strip() for t in os.getenv('CPU_TASK_TYPES', '').split(',') if t.strip()}
+
+
+# Worker-process state: resolved task functions by import path
+_worker_functions: Dict[str, Callable] = {}
+
+
+def _warm_worker(modules) -> None:
+    """Process pool initializer: import libraries once per worker"""
+    
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass  # Optional library not installed in this package
+
+
+def _run_cpu_task(path: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    """Worker entry point: resolve 'module:qualname' (cached) and call it"""
+    
+    function = _worker_functions.get(path)
+    if function is None:
+        module_name, qualname = path.split(':', 1)
+        function = importlib.import_module(module_name)
+        for attribute in qualname.split('.'):
+            function = getattr(function, attribute)
+        _worker_functions[path] = function
+    return function(*args, **kwargs)
+
+
+def task_path(function: Union[str, Callable]) -> str:
+    """
+    Import path of a CPU lane task function
+    
+    Tasks cross the process boundary by name, so they must be module-level
+    functions (or 'module:qualname' strings) with picklable arguments and
+    results.
+    
+    Raises:
+        ValueError: The function cannot be imported by name in a worker
+    """
+    
+    if isinstance(function, str):
+        if ':' not in function:
+            raise ValueError(f"CPU task path must be 'module:qualname', got {function!r}")
+        return function
+    
+    qualname = getattr(function, '__qualname__', '')
+    module = getattr(function, '__module__', None)
+    if inspect.ismethod(function) or not module or not qualname or '<' in qualname:
+        raise ValueError(f"CPU lane tasks must be module-level functions, got {function!r}")
+    if module == '__main__':
+        # Workers do not run the parent's __main__; import the script by file name
+        module = os.path.splitext(os.path.basename(sys.modules['__main__'].__file__))[0]
+    return f"{module}:{qualname}"
+
+
+class CPULane:
+    """
+    Runs CPU-bound functions in warm worker processes
+    
+    The pool is created on first use and sized to the available vCPUs.
+    Where processes cannot be started (Lambda has no /dev/shm for
+    multiprocessing primitives) the lane falls back to a thread pool so
+    callers keep working, just without parallel CPU.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = CPULaneConfig.MAX_WORKERS,
+        start_method: str = CPULaneConfig.START_METHOD,
+        preload_modules: Optional[List[str]] = None
+    ):
+        self.max_workers = max_workers
+        self.start_method = start_method
+        self.preload_modules = CPULaneConfig.PRELOAD_MODULES + list(preload_modules or [])
+        self.cpu_task_types = set(CPULaneConfig.CPU_TASK_TYPES)
+        self._executor = None
+        self._mode = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'tasks': 0,
+            'process_tasks': 0,
+            'thread_tasks': 0,
+            'pool_restarts': 0,
+            'busy_seconds': 0.0
+        }
+    
+    def is_cpu_bound(self, task_type: str) -> bool:
+        """Whether a task type runs in the CPU lane"""
+        
+        return task_type in self.cpu_task_types
+    
+    def mark_cpu_bound(self, task_type: str) -> None:
+        """Route a task type through the CPU lane"""
+        
+        self.cpu_task_types.add(task_type)
+    
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    try:
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context(self.start_method),
+                            initializer=_warm_worker,
+                            initargs=(self.preload_modules,)
+                        )
+                        self._mode = 'process'
+                    except (OSError, NotImplementedError, ValueError) as e:
+                        logger.warning(f"Process pool unavailable ({e}); CPU lane is using threads")
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu-lane")
+                        self._mode = 'thread'
+        return self._executor
+    
+    async def run(self, function: Union[str, Callable], *args, **kwargs) -> Any:
+        """
+        Run a CPU-bound function in the lane
+        
+        Args:
+            function: Module-level function or 'module:qualname'
+            *args, **kwargs: Picklable arguments
+        
+        Returns:
+            The function's (picklable) result
+        """
+        
+        path = task_path(function)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        
+        try:
+            result = await loop.run_in_executor(self._get_executor(), partial(_run_cpu_task, path, args, kwargs))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool and retry once
+            logger.warning(f"CPU lane pool broke running {path}; restarting")
+            self._reset()
+            self.stats['pool_restarts'] += 1
+            result = await loop.run_in_executor(self._get_executor(), partial(_run_cpu_task, path, args, kwargs))
+        
+        self.stats['tasks'] += 1
+        self.stats[f"{self._mode}_tasks"] += 1
+        self.stats['busy_seconds'] += time.perf_counter() - started
+        return result
+    
+    def warm(self) -> str:
+        """Start every worker now (imports included) instead of on first tasks; returns the lane mode"""
+        
+        executor = self._get_executor()
+        if self._mode == 'process':
+            for future in [executor.submit(_warm_worker, []) for _ in range(self.max_workers)]:
+                future.result()
+        return self._mode
+    
+    def _reset(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._mode = None
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        
+        self._reset()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get CPU lane statistics"""
+        
+        stats = dict(self.stats)
+        stats['mode'] = self._mode or 'idle'
+        stats['max_workers'] = self.max_workers
+        stats['cpu_task_types'] = sorted(self.cpu_task_types)
+        return stats
+
+
+# Global CPU lane instance
+cpu_lane = LazyProxy(CPULane)
@@ -3,7 +3,6 @@ DynamoDB utility functions for LMS system
 Provides common database operations and helpers
 """
 
-import boto3
 import json
 import uuid
 from datetime import datetime, timedelta
@@ -11,6 +10,9 @@ from decimal import Decimal
 from typing import Dict, List, Any, Optional
 from boto3.dynamodb.conditions import Key, Attr
 
+from .lazy import LazyProxy
+from .connection_pool import get_resource
+
 
 class DecimalEncoder(json.JSONEncoder):
     """JSON encoder for DynamoDB Decimal types"""
@@ -24,7 +26,7 @@ class DynamoDBUtils:
     """Utility class for DynamoDB operations"""
     
     def __init__(self):
-        self.dynamodb = boto3.resource('dynamodb')
+        self.dynamodb = get_resource('dynamodb')
         self.tables = {
             'user_files': self.dynamodb.Table('lms-user-files'),
             'chat_conversations': self.dynamodb.Table('lms-chat-conversations'),
@@ -242,4 +244,4 @@ def create_analytics_record(user_id: str, subject_id: str,
 
 
 # Global instance for easy import
-db_utils = DynamoDBUtils()
\ No newline at end of file
+db_utils = LazyProxy(DynamoDBUtils)
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+Embedding Cache for LMS API
+Content-addressed cache of text embeddings so identical text is embedded once
+"""
+
+import os
+import re
+import base64
+import struct
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import logging
+
+from .performance_cache import performance_cache, CacheConfig
+from .lazy import LazyProxy
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCacheConfig:
+    """Embedding cache configuration settings"""
+    
+    TTL = int(os.getenv('EMBEDDING_CACHE_TTL', 7 * 86400))  # Embeddings never go stale; bound storage only
+    PRECISION = os.getenv('EMBEDDING_CACHE_PRECISION', 'float32')  # float32 or float16
+    
+    # Stored vectors are "<struct code>:<base64 little-endian floats>"
+    STRUCT_CODES = {'float32': 'f', 'float16': 'e'}
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share an embedding"""
+    
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def pack_vector(vector: List[float], precision: str = EmbeddingCacheConfig.PRECISION) -> str:
+    """Pack a float vector into a compact string"""
+    
+    code = EmbeddingCacheConfig.STRUCT_CODES[precision]
+    return f"{code}:" + base64.b64encode(struct.pack(f"<{len(vector)}{code}", *vector)).decode('ascii')
+
+
+def unpack_vector(packed: str) -> List[float]:
+    """Inverse of pack_vector"""
+    
+    code, encoded = packed.split(':', 1)
+    data = base64.b64decode(encoded)
+    return list(struct.unpack(f"<{len(data) // struct.calcsize(code)}{code}", data))
+
+
+class EmbeddingCache:
+    """
+    Caches embeddings by (model id, sha256 of normalized text)
+    
+    Packed vectors are stored under the EMBEDDINGS prefix, so they live in
+    the performance cache's memory tier and in Redis/DynamoDB like any other
+    entry, about a quarter of the size of a JSON float list.
+    """
+    
+    def __init__(self, cache=performance_cache, precision: str = EmbeddingCacheConfig.PRECISION):
+        if precision not in EmbeddingCacheConfig.STRUCT_CODES:
+            raise ValueError(f"Unsupported embedding precision: {precision}")
+        
+        self.cache = cache
+        self.precision = precision
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'embedded': 0,
+            'stored_bytes': 0
+        }
+    
+    def key(self, model_id: str, text: str) -> str:
+        """Cache key for a model/text pair"""
+        
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"{model_id}:{digest}"
+    
+    def get_many(self, model_id: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for many texts in one round trip per tier
+        
+        Args:
+            model_id: Embedding model ID
+            texts: Texts to look up
+        
+        Returns:
+            Embeddings in the same order as texts (None for misses)
+        """
+        
+        if not texts:
+            return []
+        
+        packed = self.cache.get_many(CacheConfig.EMBEDDINGS, [self.key(model_id, text) for text in texts])
+        vectors = [self._decode(value) for value in packed]
+        self._count(lookups=len(texts), hits=sum(1 for v in vectors if v is not None))
+        return vectors
+    
+    def set_many(self, model_id: str, embeddings: Dict[str, List[float]]) -> int:
+        """Store embeddings keyed by their text; returns the number stored"""
+        
+        values = {
+            self.key(model_id, text): pack_vector(vector, self.precision)
+            for text, vector in embeddings.items() if vector
+        }
+        if not values:
+            return 0
+        
+        self._count(stored_bytes=sum(len(v) for v in values.values()))
+        return self.cache.set_many(CacheConfig.EMBEDDINGS, values, EmbeddingCacheConfig.TTL)
+    
+    def get_or_embed(
+        self,
+        model_id: str,
+        text: str,
+        embed: Callable[[str], Optional[List[float]]]
+    ) -> Optional[List[float]]:
+        """
+        Return the cached embedding for text, embedding and storing it on a miss
+        
+        Args:
+            model_id: Embedding model ID
+            text: Text to embed
+            embed: Produces an embedding (None/empty results are not cached)
+        
+        Returns:
+            Embedding, or whatever embed returned on failure
+        """
+        
+        cache_key = self.key(model_id, text)
+        vector = self._decode(self.cache.get(CacheConfig.EMBEDDINGS, cache_key))
+        self._count(lookups=1, hits=int(vector is not None))
+        if vector is not None:
+            return vector
+        
+        vector = embed(text)
+        if vector:
+            self._store(cache_key, vector)
+        return vector
+    
+    async def aget_or_embed(
+        self,
+        model_id: str,
+        text: str,
+        embed: Callable[[str], Awaitable[Optional[List[float]]]]
+    ) -> Optional[List[float]]:
+        """Async variant of get_or_embed; cache I/O runs off-loop"""
+        
+        cache_key = self.key(model_id, text)
+        vector = self._decode(await self.cache.aget(CacheConfig.EMBEDDINGS, cache_key))
+        self._count(lookups=1, hits=int(vector is not None))
+        if vector is not None:
+            return vector
+        
+        vector = await embed(text)
+        if vector:
+            packed = pack_vector(vector, self.precision)
+            self._count(embedded=1, stored_bytes=len(packed))
+            await self.cache.aset(CacheConfig.EMBEDDINGS, cache_key, packed, EmbeddingCacheConfig.TTL)
+        return vector
+    
+    def embed_many(
+        self,
+        model_id: str,
+        texts: List[str],
+        embed: Callable[[str], Optional[List[float]]]
+    ) -> List[Optional[List[float]]]:
+        """
+        Embeddings for many texts: one batched lookup, embed only the misses
+        
+        Duplicate texts within the batch are embedded once.
+        """
+        
+        vectors = self.get_many(model_id, texts)
+        
+        fresh: Dict[str, Optional[List[float]]] = {}
+        for i, text in enumerate(texts):
+            if vectors[i] is None:
+                if text not in fresh:
+                    fresh[text] = embed(text)
+                    if fresh[text]:
+                        self._count(embedded=1)
+                vectors[i] = fresh[text]
+        
+        if fresh:
+            self.set_many(model_id, fresh)
+        return vectors
+    
+    def _store(self, cache_key: str, vector: List[float]) -> None:
+        packed = pack_vector(vector, self.precision)
+        self._count(embedded=1, stored_bytes=len(packed))
+        self.cache.set(CacheConfig.EMBEDDINGS, cache_key, packed, EmbeddingCacheConfig.TTL)
+    
+    def _decode(self, packed: Optional[str]) -> Optional[List[float]]:
+        if not packed:
+            return None
+        try:
+            return unpack_vector(packed)
+        except (ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Discarding unreadable cached embedding: {e}")
+            return None
+    
+    def _count(self, **counters) -> None:
+        counters['misses'] = counters.get('lookups', 0) - counters.get('hits', 0)
+        with self._stats_lock:
+            for name, amount in counters.items():
+                self.stats[name] += amount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get embedding cache statistics"""
+        
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['hit_rate_percent'] = stats['hits'] / stats['lookups'] * 100 if stats['lookups'] else 0.0
+        stats['precision'] = self.precision
+        return stats
+
+
+# Global embedding cache instance
+embedding_cache = LazyProxy(EmbeddingCache)
@@ -0,0 +1,145 @@
+"""
+Intent Classifier for Chat Messages
+Finds every weighted intent and summary-type phrase in one regex pass and scores them
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple
+import logging
+
+from .lazy import LazyProxy
+
+logger = logging.getLogger(__name__)
+
+
+# Phrase weights: explicit requests outweigh question words and loose hints.
+# Phrases match at a word start and may run on ("summarize" matches "summarized").
+CHAT_INTENT_PATTERNS: Dict[str, Dict[str, float]] = {
+    'summarize': {
+        'summary': 2.0, 'summarize': 2.0, 'summarise': 2.0, 'sum up': 2.0, 'synopsis': 2.0,
+        'recap': 2.0, 'give me the gist': 2.0, 'key points': 1.5, 'main points': 1.5,
+        'overview': 1.5, 'what are the main': 1.5, 'highlights': 1.0, 'outline': 1.0,
+        'digest': 1.0, 'tell me about': 1.0, 'brief': 0.5
+    },
+    'question': {
+        'what': 0.5, 'how': 0.5, 'why': 0.5, 'when': 0.5, 'where': 0.5, 'who': 0.5, 'which': 0.5,
+        'explain': 1.0, 'clarify': 1.0, 'elaborate': 1.0, 'describe': 1.0,
+        'help me understand': 1.5, 'tell me': 0.5, 'can you': 0.25
+    },
+    'translate': {
+        'translate': 2.5, 'translation': 2.0, 'otro idioma': 2.0, 'in spanish': 1.5,
+        'in french': 1.5, 'in german': 1.5, 'into spanish': 1.5, 'into french': 1.5,
+        'into german': 1.5, 'convert to': 1.0, 'language': 0.5
+    }
+}
+
+SUMMARY_TYPE_PATTERNS: Dict[str, Dict[str, float]] = {
+    'brief': {'brief': 1.0, 'short': 1.0, 'quick': 1.0, 'concise': 1.0, 'simple': 1.0},
+    'detailed': {'detailed': 1.0, 'thorough': 1.0, 'complete': 1.0, 'full': 1.0, 'comprehensive': 0.5},
+    'comprehensive': {'comprehensive': 1.0, 'extensive': 1.0, 'in-depth': 1.0, 'complete analysis': 1.5}
+}
+
+
+@dataclass
+class IntentResult:
+    """Classification of one message"""
+    intent: str
+    summary_type: str
+    scores: Dict[str, float] = field(default_factory=dict)
+    matches: List[str] = field(default_factory=list)
+
+
+def _trie_pattern(phrases: List[str]) -> str:
+    """Regex alternation of phrases factored by common prefix; greedy, so the longest phrase wins"""
+    
+    trie: Dict[str, Any] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+    
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+    
+    return build(trie)
+
+
+class IntentClassifier:
+    """
+    Weighted multi-pattern intent classifier
+    
+    Every phrase of every intent and summary type is compiled into one
+    prefix-factored regex, so a single scan finds all of them (the longest
+    at each word start). Scores are the summed weights per label; ties go
+    to the label declared first.
+    """
+    
+    def __init__(
+        self,
+        intent_patterns: Dict[str, Dict[str, float]],
+        summary_type_patterns: Dict[str, Dict[str, float]],
+        default_intent: str = "general",
+        default_summary_type: str = "standard",
+        summary_intent: str = "summarize"
+    ):
+        self.intents = list(intent_patterns)
+        self.summary_types = list(summary_type_patterns)
+        self.default_intent = default_intent
+        self.default_summary_type = default_summary_type
+        self.summary_intent = summary_intent
+        
+        # Scores are one list: intents, then summary types; phrase -> [(score index, weight)]
+        self._labels: Dict[str, List[Tuple[int, float]]] = {}
+        for offset, patterns in ((0, intent_patterns), (len(self.intents), summary_type_patterns)):
+            for index, phrases in enumerate(patterns.values()):
+                for phrase, weight in phrases.items():
+                    self._labels.setdefault(phrase.lower(), []).append((offset + index, weight))
+        
+        self._pattern = re.compile(rf"\b({_trie_pattern(list(self._labels))})")
+        self._zeros = [0.0] * (len(self.intents) + len(self.summary_types))
+        self._intent_range = range(len(self.intents))
+        self._summary_type_range = range(len(self.intents), len(self._zeros))
+    
+    def classify(self, text: str) -> IntentResult:
+        """
+        Classify a message
+        
+        Args:
+            text: Message text (any case)
+        
+        Returns:
+            IntentResult; summary_type is only scored for the summary intent
+        """
+        
+        matches = self._pattern.findall(text.lower())
+        scores = self._zeros[:]
+        for phrase in matches:
+            for index, weight in self._labels[phrase]:
+                scores[index] += weight
+        
+        # max() keeps the first of equal scores, so ties go to the earlier label
+        best = max(self._intent_range, key=scores.__getitem__)
+        intent = self.intents[best] if scores[best] > 0 else self.default_intent
+        summary_type = self.default_summary_type
+        if intent == self.summary_intent:
+            best = max(self._summary_type_range, key=scores.__getitem__)
+            if scores[best] > 0:
+                summary_type = self.summary_types[best - len(self.intents)]
+        
+        return IntentResult(intent, summary_type, dict(zip(self.intents, scores)), matches)
+
+
+def build_chat_intent_classifier() -> IntentClassifier:
+    """Classifier for the chat handlers' intents and summary types"""
+    
+    return IntentClassifier(CHAT_INTENT_PATTERNS, SUMMARY_TYPE_PATTERNS)
+
+
+# Global chat intent classifier, compiled once per container
+intent_classifier = LazyProxy(build_chat_intent_classifier)
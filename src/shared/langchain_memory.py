@@ -8,14 +8,15 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-import boto3
 from botocore.exceptions import ClientError
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_core.chat_history import BaseChatMessageHistory
 
 from .config import config
+from .connection_pool import get_resource
 from .dynamodb_utils import db_utils
+from .lazy import LazyProxy
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -50,7 +51,7 @@ class DynamoDBChatMessageHistory(BaseChatMessageHistory):
         self.ttl_seconds = ttl_seconds
         
         # Initialize DynamoDB client
-        self.dynamodb = boto3.resource('dynamodb', **config.get_aws_config())
+        self.dynamodb = get_resource('dynamodb', region_name=config.AWS_DEFAULT_REGION)
         self.table = self.dynamodb.Table(table_name)
         
         # Cache for messages
@@ -284,7 +285,7 @@ class LangChainMemoryManager:
         
         try:
             # Query DynamoDB for all sessions for this user
-            dynamodb = boto3.resource('dynamodb', **config.get_aws_config())
+            dynamodb = get_resource('dynamodb', region_name=config.AWS_DEFAULT_REGION)
             table = dynamodb.Table("lms-chat-memory")
             
             # Use GSI to query by user_id
@@ -315,4 +316,4 @@ class LangChainMemoryManager:
 
 
 # Global memory manager instance
-memory_manager = LangChainMemoryManager()
\ No newline at end of file
+memory_manager = LazyProxy(LangChainMemoryManager)
\ No newline at end of file
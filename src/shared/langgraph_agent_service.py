@@ -22,13 +22,18 @@ from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
 # AWS services
-import boto3
 from botocore.exceptions import ClientError
 
 # Local imports
 from .config import config
+from .connection_pool import get_client
+from .async_aws import async_aws
 from .bedrock_agent_service import BedrockAgentService, AgentType, AgentContext
 from .dynamodb_utils import db_utils
+from .lazy import LazyProxy
+from .message_analysis import message_analysis
+from .workflow_graph import validate_graph
+from .workflow_metrics import WorkflowMetrics, instrument_node, record_message_usage
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -70,9 +75,9 @@ class LangGraphAgentService:
         """Initialize LangGraph agent service"""
         
         # Initialize AWS clients
-        self.textract = boto3.client('textract', **config.get_aws_config())
-        self.comprehend = boto3.client('comprehend', **config.get_aws_config())
-        self.translate = boto3.client('translate', **config.get_aws_config())
+        self.textract = get_client('textract', region_name=config.AWS_DEFAULT_REGION)
+        self.comprehend = get_client('comprehend', region_name=config.AWS_DEFAULT_REGION)
+        self.translate = get_client('translate', region_name=config.AWS_DEFAULT_REGION)
         
         # Initialize LangChain LLM
         aws_config = config.get_aws_config()
@@ -106,33 +111,29 @@ class LangGraphAgentService:
         logger.info("LangGraphAgentService initialized successfully")
     
     def _create_workflow(self) -> StateGraph:
-        """Create LangGraph workflow with conditional routing"""
-        
-        # Create workflow graph
-        workflow = StateGraph(AgentState)
+        """
+        Create LangGraph workflow with conditional routing
         
-        # Add processing nodes
-        workflow.add_node("language_detection", self._detect_language_node)
-        workflow.add_node("intent_detection", self._detect_intent_node)
-        workflow.add_node("document_processing", self._process_documents_node)
-        workflow.add_node("rag_retrieval", self._rag_retrieval_node)
-        workflow.add_node("summarization", self._summarization_node)
-        workflow.add_node("quiz_generation", self._quiz_generation_node)
-        workflow.add_node("translation", self._translation_node)
-        workflow.add_node("analysis", self._analysis_node)
-        workflow.add_node("response_synthesis", self._response_synthesis_node)
-        
-        # Set entry point
-        workflow.set_entry_point("language_detection")
+        Called once per service instance (one per container); the graph is
+        validated here and compiled in __init__, never per request. Nodes are
+        instrumented so each run records their latency, AWS calls and tokens.
+        """
         
-        # Define workflow edges
-        workflow.add_edge("language_detection", "intent_detection")
+        nodes = {
+            "language_detection": self._detect_language_node,
+            "intent_detection": self._detect_intent_node,
+            "document_processing": self._process_documents_node,
+            "rag_retrieval": self._rag_retrieval_node,
+            "summarization": self._summarization_node,
+            "quiz_generation": self._quiz_generation_node,
+            "translation": self._translation_node,
+            "analysis": self._analysis_node,
+            "response_synthesis": self._response_synthesis_node
+        }
         
         # Conditional routing based on intent
-        workflow.add_conditional_edges(
-            "intent_detection",
-            self._route_based_on_intent,
-            {
+        routes = {
+            "intent_detection": {
                 "summarize": "document_processing",
                 "question": "rag_retrieval",
                 "quiz": "quiz_generation",
@@ -140,18 +141,40 @@ class LangGraphAgentService:
                 "analyze": "analysis",
                 "general": "rag_retrieval"  # Default to RAG for general questions
             }
-        )
+        }
+        
+        # Processing nodes lead to response synthesis, which ends the workflow
+        edges = {
+            "language_detection": ["intent_detection"],
+            "document_processing": ["summarization"],
+            "summarization": ["response_synthesis"],
+            "rag_retrieval": ["response_synthesis"],
+            "quiz_generation": ["response_synthesis"],
+            "translation": ["response_synthesis"],
+            "analysis": ["response_synthesis"],
+            "response_synthesis": [END]
+        }
+        
+        # Reject unreachable nodes, dangling edges and cycles before building
+        validate_graph("language_detection", list(nodes), edges, routes, end=END)
         
-        # Connect processing nodes to response synthesis
-        workflow.add_edge("document_processing", "summarization")
-        workflow.add_edge("summarization", "response_synthesis")
-        workflow.add_edge("rag_retrieval", "response_synthesis")
-        workflow.add_edge("quiz_generation", "response_synthesis")
-        workflow.add_edge("translation", "response_synthesis")
-        workflow.add_edge("analysis", "response_synthesis")
+        # Create workflow graph
+        workflow = StateGraph(AgentState)
+        
+        for name, node in nodes.items():
+            workflow.add_node(name, instrument_node(name, node))
+        
+        workflow.set_entry_point("language_detection")
         
-        # End workflow
-        workflow.add_edge("response_synthesis", END)
+        for source, targets in edges.items():
+            for target in targets:
+                workflow.add_edge(source, target)
+        
+        workflow.add_conditional_edges(
+            "intent_detection",
+            self._route_based_on_intent,
+            routes["intent_detection"]
+        )
         
         return workflow
     
@@ -198,7 +221,13 @@ class LangGraphAgentService:
             
             # Execute workflow
             config_dict = {"configurable": {"thread_id": session_id}}
-            result = await self.agent_executor.ainvoke(initial_state, config=config_dict)
+            metrics = WorkflowMetrics("langgraph_agent")
+            try:
+                with metrics.activate():
+                    result = await self.agent_executor.ainvoke(initial_state, config=config_dict)
+            finally:
+                metrics.emit()
+            result["metadata"]["node_metrics"] = metrics.summary()
             
             # Store conversation in DynamoDB
             await self._store_conversation(user_id, session_id, message, result)
@@ -253,17 +282,14 @@ class LangGraphAgentService:
         try:
             user_message = state["messages"][-1].content
             
-            # Use Comprehend to detect language
-            response = self.comprehend.detect_dominant_language(Text=user_message)
+            # One cached pass also extracts the key phrases intent detection uses
+            analysis = await message_analysis.analyze(user_message)
             
-            if response['Languages']:
-                detected_language = response['Languages'][0]['LanguageCode']
-                state["language"] = detected_language
-                state["tools_used"].append("comprehend_language_detection")
+            state["language"] = analysis["language"]
+            state["metadata"]["message_analysis"] = analysis
+            state["tools_used"].append("comprehend_language_detection")
                 
-                logger.info(f"Detected language: {detected_language}")
-            else:
-                state["language"] = "en"  # Default to English
+            logger.info(f"Detected language: {analysis['language']} ({analysis['source']})")
             
         except Exception as e:
             logger.warning(f"Language detection failed: {str(e)}")
@@ -275,15 +301,13 @@ class LangGraphAgentService:
         """Detect user intent using Amazon Comprehend and keyword analysis"""
         
         try:
-            user_message = state["messages"][-1].content.lower()
+            user_message = state["messages"][-1].content
             
-            # Use Comprehend for key phrase extraction
-            response = self.comprehend.detect_key_phrases(
-                Text=user_message,
-                LanguageCode=state["language"]
-            )
+            # Key phrases come from the language node's analysis
+            analysis = state["metadata"].get("message_analysis") or await message_analysis.analyze(user_message)
             
-            key_phrases = [phrase['Text'].lower() for phrase in response['KeyPhrases']]
+            user_message = user_message.lower()
+            key_phrases = [phrase['Text'].lower() for phrase in analysis['key_phrases']]
             
             # Intent classification based on key phrases and keywords
             intent_keywords = {
@@ -431,6 +455,7 @@ class LangGraphAgentService:
                        HumanMessage(content=summary_prompt)]
             
             response = await self.llm.ainvoke(messages)
+            record_message_usage(response)
             
             state["final_response"] = response.content
             state["tools_used"].append("bedrock_summarization")
@@ -467,6 +492,7 @@ class LangGraphAgentService:
                        HumanMessage(content=quiz_prompt)]
             
             response = await self.llm.ainvoke(messages)
+            record_message_usage(response)
             
             state["final_response"] = response.content
             state["tools_used"].append("bedrock_quiz_generation")
@@ -496,14 +522,10 @@ class LangGraphAgentService:
             
             # Translate if needed
             if source_language != target_language:
-                response = self.translate.translate_text(
-                    Text=user_message,
-                    SourceLanguageCode=source_language,
-                    TargetLanguageCode=target_language
+                translated_text = await async_aws.translate_text(
+                    user_message, source_language, target_language, client=self.translate
                 )
                 
-                translated_text = response['TranslatedText']
-                
                 state["final_response"] = f"Translation from {source_language} to {target_language}:\n\n{translated_text}"
                 state["tools_used"].append("amazon_translate")
                 
@@ -542,6 +564,7 @@ class LangGraphAgentService:
                        HumanMessage(content=analysis_prompt)]
             
             response = await self.llm.ainvoke(messages)
+            record_message_usage(response)
             
             state["final_response"] = response.content
             state["tools_used"].append("learning_analytics")
@@ -590,6 +613,7 @@ class LangGraphAgentService:
                            HumanMessage(content=synthesis_prompt)]
                 
                 response_obj = await self.llm.ainvoke(messages)
+                record_message_usage(response_obj)
                 response = response_obj.content
             
             # Add citations if available
@@ -600,13 +624,15 @@ class LangGraphAgentService:
             state["tools_used"].append("response_synthesis")
             
             # Add metadata
+            analysis = state["metadata"].get("message_analysis", {})
             state["metadata"] = {
                 "workflow_completed": True,
                 "intent_detected": state["intent"],
                 "language_detected": state["language"],
                 "tools_used_count": len(state["tools_used"]),
                 "rag_documents_used": len(state["rag_context"]),
-                "citations_count": len(state["citations"])
+                "citations_count": len(state["citations"]),
+                "comprehend_calls_avoided": analysis.get("comprehend_calls_avoided", 0)
             }
             
             logger.info("Synthesized final response")
@@ -686,4 +712,4 @@ class LangGraphAgentService:
 
 
 # Global service instance
-langgraph_agent_service = LangGraphAgentService()
\ No newline at end of file
+langgraph_agent_service = LazyProxy(LangGraphAgentService)
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Lazy Construction Utilities
+Defers building service singletons and AWS clients until first use to keep Lambda cold starts short
+"""
+
+import threading
+from typing import Any, Callable
+
+
+class LazyProxy:
+    """
+    Stand-in for an object that is built on first attribute access
+    
+    Module-level singletons are declared as ``name = LazyProxy(Factory)`` so
+    that importing a module costs nothing; the factory runs (once, thread
+    safely) the first time the singleton is actually used.
+    """
+    
+    __slots__ = ('_factory', '_instance', '_lock')
+    
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+    
+    def _resolve(self) -> Any:
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            with object.__getattribute__(self, '_lock'):
+                instance = object.__getattribute__(self, '_instance')
+                if instance is None:
+                    instance = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+    
+    def __delattr__(self, name: str) -> None:
+        delattr(self._resolve(), name)
+    
+    def __repr__(self) -> str:
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            return f"<LazyProxy (not constructed) {object.__getattribute__(self, '_factory')!r}>"
+        return repr(instance)
+
+
+def is_constructed(proxy: Any) -> bool:
+    """Whether a lazy singleton has been built yet (always True for plain objects)"""
+    
+    if isinstance(proxy, LazyProxy):
+        return object.__getattribute__(proxy, '_instance') is not None
+    return True
+
+
+def lazy_client(service_name: str, **kwargs) -> LazyProxy:
+    """Shared registry client resolved on first use"""
+    
+    def build():
+        from .connection_pool import aws_clients
+        return aws_clients.client(service_name, **kwargs)
+    
+    return LazyProxy(build)
+
+
+class _ThreadLocalResource:
+    """Forwards attribute access to the calling thread's registry resource"""
+    
+    __slots__ = ('_pool',)
+    
+    def __init__(self, pool: Any):
+        self._pool = pool
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool.get_resource(), name)
+
+
+def lazy_resource(service_name: str, **kwargs) -> LazyProxy:
+    """Registry resource resolved on first use (one per thread, as boto3 resources are not thread safe)"""
+    
+    def build():
+        from .connection_pool import aws_clients
+        return _ThreadLocalResource(aws_clients.pool(service_name, **kwargs))
+
+    return LazyProxy(build)
@@ -0,0 +1,239 @@
+"""
+Message Analysis Service for Chat
+Language, key phrases and entities for a chat message in one cached, concurrent Comprehend pass
+"""
+
+import os
+import re
+import hashlib
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from .performance_cache import performance_cache, CacheConfig
+from .async_aws import async_aws
+from .lazy import LazyProxy
+
+logger = logging.getLogger(__name__)
+
+
+class MessageAnalysisConfig:
+    """Message analysis configuration settings"""
+    
+    TTL = CacheConfig.LONG_TTL
+    DEFAULT_LANGUAGE = "en"
+    
+    # Short messages skip Comprehend when the local detector is this confident
+    LOCAL_MAX_CHARS = int(os.getenv('MESSAGE_ANALYSIS_LOCAL_MAX_CHARS', 120))
+    LOCAL_MIN_CONFIDENCE = float(os.getenv('MESSAGE_ANALYSIS_LOCAL_CONFIDENCE', 0.9))
+    
+    # Calls a turn made before: dominant language, key phrases, entities
+    BASELINE_CALLS = 3
+    
+    # Languages Comprehend extracts key phrases and entities for
+    ANALYSIS_LANGUAGES = {'en', 'es', 'fr', 'de', 'it', 'pt', 'ar', 'hi', 'ja', 'ko', 'zh', 'zh-TW'}
+
+
+# (first, last code point, language, confidence when the script is all there is)
+_SCRIPTS = [
+    (0x3040, 0x30FF, 'ja', 0.99),  # Hiragana, Katakana
+    (0x1100, 0x11FF, 'ko', 0.99),  # Hangul Jamo
+    (0xAC00, 0xD7AF, 'ko', 0.99),  # Hangul syllables
+    (0x0E00, 0x0E7F, 'th', 0.99),
+    (0x0370, 0x03FF, 'el', 0.99),
+    (0x10A0, 0x10FF, 'ka', 0.99),
+    (0x0530, 0x058F, 'hy', 0.99),
+    (0x0590, 0x05FF, 'he', 0.97),  # Shared with Yiddish
+    (0x4E00, 0x9FFF, 'zh', 0.85),  # Han without kana; could still be Japanese
+    (0x0600, 0x06FF, 'ar', 0.8),   # Shared with Persian and Urdu
+    (0x0900, 0x097F, 'hi', 0.8),   # Shared with Marathi and Nepali
+    (0x0400, 0x04FF, 'ru', 0.75),  # Shared with Ukrainian, Bulgarian, Serbian...
+]
+
+# Frequent English words; plain-ASCII messages made of these are English
+_ENGLISH_WORDS = frozenset("""
+a about an and are as at be but by can could did do does for from give have how i in is it me my
+not of on or please should that the this to was what when where which who why will with would you your
+""".split())
+
+
+def normalize_message(text: str) -> str:
+    """Collapse whitespace and case so trivially different messages share an analysis"""
+    
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+def detect_script_language(text: str) -> Tuple[Optional[str], float]:
+    """
+    Guess a message's language from its script and common English words
+    
+    Args:
+        text: Message text
+    
+    Returns:
+        (language code, confidence), or (None, 0.0) without a guess
+    """
+    
+    counts: Dict[str, int] = {}
+    latin = other = 0
+    for char in text:
+        if not char.isalpha():
+            continue
+        code = ord(char)
+        if code < 0x0250:
+            latin += 1
+            continue
+        for first, last, language, _ in _SCRIPTS:
+            if first <= code <= last:
+                counts[language] = counts.get(language, 0) + 1
+                break
+        else:
+            other += 1
+    
+    letters = latin + other + sum(counts.values())
+    if not letters:
+        return None, 0.0
+    
+    if counts:
+        if counts.get('ja') and counts.get('zh'):
+            counts['ja'] += counts.pop('zh')  # Kanji alongside kana
+        language = max(counts, key=counts.get)
+        base = next(confidence for _, _, code, confidence in _SCRIPTS if code == language)
+        return language, round(base * counts[language] / letters, 2)
+    
+    # Latin script: only plain-ASCII English is recognised locally
+    if other or not text.isascii():
+        return None, 0.0
+    words = re.findall(r"[a-z']+", text.lower())
+    if not words:
+        return None, 0.0
+    share = sum(1 for word in words if word in _ENGLISH_WORDS) / len(words)
+    return 'en', round(min(0.99, 0.5 + share), 2)
+
+
+class MessageAnalysisService:
+    """
+    Language, key phrases and entities for chat messages
+    
+    Results are cached by a hash of the normalized message. On a miss the
+    three Comprehend calls run concurrently, with phrases and entities
+    requested in the locally guessed language and re-requested only if
+    Comprehend detects another one. Short messages whose language the local
+    detector is confident about skip Comprehend altogether.
+    """
+    
+    def __init__(self, cache=performance_cache, comprehend=None):
+        self.cache = cache
+        self.comprehend = comprehend
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'turns': 0,
+            'local': 0,
+            'cache_hits': 0,
+            'comprehend_calls': 0,
+            'calls_avoided': 0
+        }
+    
+    def key(self, text: str) -> str:
+        """Cache key for a message"""
+        
+        return hashlib.sha256(normalize_message(text).encode('utf-8')).hexdigest()
+    
+    async def analyze(self, text: str) -> Dict[str, Any]:
+        """
+        Analyse a chat message
+        
+        Args:
+            text: Message text
+        
+        Returns:
+            Dict with language, language_confidence, languages, key_phrases,
+            entities, source ('local', 'cache' or 'comprehend'),
+            comprehend_calls and comprehend_calls_avoided
+        """
+        
+        guess, confidence = detect_script_language(text)
+        if len(text) <= MessageAnalysisConfig.LOCAL_MAX_CHARS and confidence >= MessageAnalysisConfig.LOCAL_MIN_CONFIDENCE:
+            self._count(local=1)
+            return self._result({
+                'language': guess,
+                'language_confidence': confidence,
+                'languages': [{'LanguageCode': guess, 'Score': confidence}],
+                'key_phrases': [],
+                'entities': []
+            }, 'local', 0)
+        
+        cache_key = self.key(text)
+        cached = await self.cache.aget(CacheConfig.MESSAGE_ANALYSIS, cache_key)
+        if cached is not None:
+            self._count(cache_hits=1)
+            return self._result(cached, 'cache', 0)
+        
+        calls = []
+        
+        async def compute():
+            return await self._analyze_with_comprehend(text, guess, calls)
+        
+        # Concurrent requests for the same message share one pass
+        analysis = await self.cache.aload_coalesced(
+            CacheConfig.MESSAGE_ANALYSIS, cache_key, compute, MessageAnalysisConfig.TTL
+        )
+        return self._result(analysis, 'comprehend' if calls else 'cache', sum(calls))
+    
+    async def _analyze_with_comprehend(self, text: str, guess: Optional[str], calls: List[int]) -> Dict[str, Any]:
+        language = guess if guess in MessageAnalysisConfig.ANALYSIS_LANGUAGES else MessageAnalysisConfig.DEFAULT_LANGUAGE
+        
+        language_response, (key_phrases, entities) = await asyncio.gather(
+            async_aws.detect('dominant_language', text, client=self.comprehend),
+            self._phrases_and_entities(text, language)
+        )
+        calls.append(3)
+        
+        languages = language_response.get('Languages', [])
+        detected = languages[0]['LanguageCode'] if languages else MessageAnalysisConfig.DEFAULT_LANGUAGE
+        if detected != language:
+            if detected in MessageAnalysisConfig.ANALYSIS_LANGUAGES:
+                key_phrases, entities = await self._phrases_and_entities(text, detected)
+                calls.append(2)
+            else:
+                key_phrases, entities = [], []
+        
+        return {
+            'language': detected,
+            'language_confidence': languages[0]['Score'] if languages else 0.0,
+            'languages': languages,
+            'key_phrases': key_phrases,
+            'entities': entities
+        }
+    
+    async def _phrases_and_entities(self, text: str, language: str) -> Tuple[List[dict], List[dict]]:
+        key_phrases_response, entities_response = await asyncio.gather(
+            async_aws.detect('key_phrases', text, language, client=self.comprehend),
+            async_aws.detect('entities', text, language, client=self.comprehend)
+        )
+        return key_phrases_response.get('KeyPhrases', []), entities_response.get('Entities', [])
+    
+    def _result(self, analysis: Dict[str, Any], source: str, calls: int) -> Dict[str, Any]:
+        avoided = max(0, MessageAnalysisConfig.BASELINE_CALLS - calls)
+        self._count(turns=1, comprehend_calls=calls, calls_avoided=avoided)
+        return {**analysis, 'source': source, 'comprehend_calls': calls, 'comprehend_calls_avoided': avoided}
+    
+    def _count(self, **counters) -> None:
+        with self._stats_lock:
+            for name, amount in counters.items():
+                self.stats[name] += amount
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get message analysis statistics"""
+        
+        with self._stats_lock:
+            stats = dict(self.stats)
+        turns = stats['turns']
+        stats['comprehend_calls_per_turn'] = stats['comprehend_calls'] / turns if turns else 0.0
+        stats['calls_avoided_per_turn'] = stats['calls_avoided'] / turns if turns else 0.0
+        return stats
+
+
+# Global message analysis service instance
+message_analysis = LazyProxy(MessageAnalysisService)
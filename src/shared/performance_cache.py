@@ -4,15 +4,26 @@ Provides Redis-compatible caching with DynamoDB fallback for Lambda environments
 """
 
 import json
-import boto3
 import os
 import time
+import uuid
+import asyncio
 import hashlib
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Union, List
+from typing import Dict, Any, Optional, Union, List, Callable, Awaitable
 from decimal import Decimal
+from functools import wraps
+from botocore.exceptions import ClientError
 import logging
 
+from .cache_codec import CacheCodec, EncodedValue
+from .connection_pool import get_resource
+from .lazy import LazyProxy
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,10 +46,324 @@ class CacheConfig:
     VECTOR_SEARCH = "vector_search"
     TRANSLATION = "translation"
     DOCUMENT_PROCESSING = "doc_processing"
+    SUBJECT_CONTEXT = "subject_context"
+    EMBEDDINGS = "embeddings"
+    MESSAGE_ANALYSIS = "message_analysis"
     
     # Cache size limits
-    MAX_VALUE_SIZE = 400 * 1024  # 400KB (DynamoDB limit)
+    MAX_VALUE_SIZE = 400 * 1024  # 400KB (DynamoDB limit; larger values spill to the blob store)
     MAX_CACHE_ENTRIES = 10000
+    MAX_MEMORY_BYTES = int(os.getenv('CACHE_MAX_MEMORY_BYTES', 64 * 1024 * 1024))  # 64MB
+    MEMORY_ENTRY_OVERHEAD = 120  # Approximate per-entry bookkeeping bytes
+    
+    # Stampede protection (single-flight)
+    SINGLE_FLIGHT_WAIT_TIMEOUT = 30   # Max seconds a follower waits on the leader
+    DISTRIBUTED_LOCK_TTL = 30         # Lock row lifetime; bounds a crashed leader
+    DISTRIBUTED_LOCK_POLL = 0.2       # Seconds between cache re-checks while locked out
+    LOCK_KEY_PREFIX = "lock"
+    UPDATE_LOCK_STRIPES = 64          # In-process locks serializing read-modify-write updates
+    
+    # Bulk operation limits (DynamoDB API maximums)
+    BATCH_GET_SIZE = 100
+    BATCH_WRITE_SIZE = 25
+    BATCH_MAX_RETRIES = 5
+    BATCH_RETRY_DELAY = 0.05  # Base delay for unprocessed-key backoff
+    
+    # Namespace generations (versioned invalidation). A container re-reads the
+    # shared counters at most once per refresh interval, so an invalidation made
+    # by another container can take up to that long to be seen there (bumps made
+    # locally apply at once). Shorter intervals cost a remote read per key build.
+    GENERATION_KEY_PREFIX = "gen"
+    GENERATION_REFRESH_SECONDS = float(os.getenv('CACHE_GENERATION_REFRESH', 30))
+    
+    # Stale-while-revalidate
+    SWR_MARKER = "__swr__"
+    REFRESH_WORKERS = 4
+    
+    # Async API: blocking Redis/DynamoDB calls run on this many threads
+    IO_WORKERS = int(os.getenv('CACHE_IO_WORKERS', 8))
+    
+    # Read history (drives predictive cache warming)
+    READ_HISTORY_PREFIX = "read_history"
+    READ_HISTORY_TTL = 30 * 86400       # 30 days
+    READ_HISTORY_FLUSH_EVERY = 20       # Local reads per user before merging into the shared history
+    MAX_TRACKED_USERS = 10000
+    MAX_WARMED_KEYS = 10000
+
+
+class MemoryCacheTier:
+    """
+    Bounded in-memory cache tier with combined LRU and TTL eviction
+    
+    Entries live in an OrderedDict kept in recency order, so get, set and
+    eviction are all O(1). Expired entries are dropped when touched or when
+    they reach the LRU end; purge_expired() sweeps the whole tier on demand.
+    Limits apply both to entry count and to resident bytes.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = CacheConfig.MAX_CACHE_ENTRIES,
+        max_bytes: int = CacheConfig.MAX_MEMORY_BYTES
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        
+        # cache_key -> (value, expires_at, size_bytes)
+        self._entries = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.RLock()
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'rejected': 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, cache_key: str) -> bool:
+        return self.peek(cache_key) is not None
+    
+    @property
+    def resident_bytes(self) -> int:
+        return self._resident_bytes
+    
+    def get(self, cache_key: str) -> Optional[Any]:
+        """Return a live value and mark it most recently used"""
+        
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            
+            value, expires_at, _ = entry
+            if time.time() > expires_at:
+                self._remove(cache_key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(cache_key)
+            self.stats['hits'] += 1
+            return value
+    
+    def peek(self, cache_key: str) -> Optional[Any]:
+        """Return a live value without touching recency or statistics"""
+        
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or time.time() > entry[1]:
+                return None
+            return entry[0]
+    
+    def set(self, cache_key: str, value: Any, expires_at: float, size_bytes: int) -> bool:
+        """
+        Store a value, evicting least recently used entries to stay in bounds
+        
+        Args:
+            cache_key: Fully qualified cache key
+            value: Deserialized value to keep in memory
+            expires_at: Absolute expiry timestamp (epoch seconds)
+            size_bytes: Serialized size of the value
+        
+        Returns:
+            False if the value alone exceeds the byte budget
+        """
+        
+        size_bytes = size_bytes + len(cache_key) + CacheConfig.MEMORY_ENTRY_OVERHEAD
+        
+        with self._lock:
+            self._remove(cache_key)
+            
+            if size_bytes > self.max_bytes:
+                self.stats['rejected'] += 1
+                return False
+            
+            self._entries[cache_key] = (value, expires_at, size_bytes)
+            self._resident_bytes += size_bytes
+            
+            while (len(self._entries) > self.max_entries or
+                   self._resident_bytes > self.max_bytes):
+                oldest_key, (_, oldest_expiry, _) = next(iter(self._entries.items()))
+                self._remove(oldest_key)
+                if time.time() > oldest_expiry:
+                    self.stats['expirations'] += 1
+                else:
+                    self.stats['evictions'] += 1
+            
+            return True
+    
+    def delete(self, cache_key: str) -> bool:
+        """Remove a single entry"""
+        
+        with self._lock:
+            return self._remove(cache_key)
+    
+    def delete_prefix(self, key_prefix: str) -> int:
+        """Remove every entry whose key starts with key_prefix"""
+        
+        with self._lock:
+            matching = [k for k in self._entries if k.startswith(key_prefix)]
+            for cache_key in matching:
+                self._remove(cache_key)
+            return len(matching)
+    
+    def purge_expired(self) -> int:
+        """Sweep the whole tier and drop expired entries"""
+        
+        current_time = time.time()
+        
+        with self._lock:
+            expired = [k for k, entry in self._entries.items() if current_time > entry[1]]
+            for cache_key in expired:
+                self._remove(cache_key)
+            self.stats['expirations'] += len(expired)
+            return len(expired)
+    
+    def clear(self) -> None:
+        """Drop all entries"""
+        
+        with self._lock:
+            self._entries.clear()
+            self._resident_bytes = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get tier statistics"""
+        
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'resident_bytes': self._resident_bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate_percent': round(self.stats['hits'] / lookups * 100, 2) if lookups else 0.0,
+                **self.stats
+            }
+    
+    def _remove(self, cache_key: str) -> bool:
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return False
+        self._resident_bytes -= entry[2]
+        return True
+
+
+class _InFlightCall:
+    """A computation in progress that followers can wait on"""
+    
+    __slots__ = ('event', 'result', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key
+    
+    The first caller for a key (the leader) runs the computation; callers
+    arriving while it is in flight wait for and share its result. Threads
+    and asyncio tasks are tracked separately. A follower that waits longer
+    than the timeout stops waiting and computes on its own, so a stuck
+    leader can never hang its followers.
+    """
+    
+    def __init__(self, wait_timeout: float = CacheConfig.SINGLE_FLIGHT_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        
+        self.stats = {
+            'leaders': 0,
+            'coalesced': 0,
+            'wait_timeouts': 0
+        }
+    
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once per key across concurrent threads"""
+        
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.stats['leaders'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        
+        if not is_leader:
+            if call.event.wait(self.wait_timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            
+            self.stats['wait_timeouts'] += 1
+            logger.warning(f"Single-flight wait timed out for {key}, computing independently")
+            return fn()
+        
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+    
+    async def ado(self, key: str, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await coro_fn() once per key across concurrent tasks on this loop"""
+        
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        
+        future = self._async_calls.get(flight_key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.stats['wait_timeouts'] += 1
+                logger.warning(f"Single-flight wait timed out for {key}, computing independently")
+                return await coro_fn()
+        
+        future = loop.create_future()
+        # Mark exceptions as retrieved when no follower was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._async_calls[flight_key] = future
+        self.stats['leaders'] += 1
+        
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._async_calls.pop(flight_key, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get single-flight statistics"""
+        
+        return {
+            'in_flight': len(self._calls) + len(self._async_calls),
+            **self.stats
+        }
 
 
 class PerformanceCache:
@@ -51,11 +376,59 @@ class PerformanceCache:
         """Initialize cache with available backends"""
         
         # In-memory cache (Lambda container reuse)
-        self._memory_cache = {}
-        self._memory_cache_ttl = {}
+        self._memory_cache = MemoryCacheTier()
+        
+        # Stampede protection for concurrent misses
+        self._single_flight = SingleFlight()
+        self._update_locks = [threading.Lock() for _ in range(CacheConfig.UPDATE_LOCK_STRIPES)]
+        self._lock_stats = {
+            'acquired': 0,
+            'contended': 0,
+            'timeouts': 0
+        }
+        
+        # Per-tier hit accounting
+        self._tier_stats = {
+            'memory_hits': 0,
+            'redis_hits': 0,
+            'dynamodb_hits': 0,
+            'misses': 0
+        }
+        
+        # Per-user prefix reads not yet merged into the shared history,
+        # and warmed keys awaiting their first hit
+        self._read_history: OrderedDict = OrderedDict()
+        self._warmed_keys: OrderedDict = OrderedDict()
+        self._warm_stats: Dict[str, Dict[str, Any]] = {}
+        self._history_lock = threading.Lock()
+        
+        # Off-loop executor for the async API's network I/O
+        self._io_executor = None
+        
+        # Stale-while-revalidate background refreshes (one per cache key)
+        self._refresh_executor = None
+        self._refreshing = set()
+        self._refresh_tasks = set()
+        self._refresh_lock = threading.Lock()
+        self._swr_stats = {
+            'fresh_hits': 0,
+            'stale_served': 0,
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'refreshes_deduplicated': 0,
+            'refresh_total_ms': 0.0,
+            'refresh_max_ms': 0.0
+        }
+        
+        # Value encoding, compression and large-value offload
+        self._codec = CacheCodec()
+        
+        # Namespace generations: namespace -> (generation, fetched_at)
+        self._generations: Dict[str, tuple] = {}
+        self._generation_lock = threading.Lock()
         
         # DynamoDB cache table
-        self.dynamodb = boto3.resource('dynamodb')
+        self.dynamodb = get_resource('dynamodb')
         self.cache_table_name = os.getenv('CACHE_TABLE_NAME', 'lms-performance-cache')
         
         try:
@@ -80,10 +453,18 @@ class PerformanceCache:
     def _generate_cache_key(self, prefix: str, key: str, user_id: str = None) -> str:
         """Generate standardized cache key"""
         
-        if user_id:
-            cache_key = f"{prefix}:{user_id}:{key}"
+        namespace = self._namespace(prefix, user_id)
+        generations = self._get_generations(self._generation_namespaces(prefix, user_id))
+        prefix_generation = generations[0]
+        user_generation = generations[1] if user_id else 0
+        
+        # Generation 0 keeps the original key layout; a bumped prefix versions user keys too
+        if prefix_generation and user_id:
+            cache_key = f"{namespace}:v{prefix_generation}.{user_generation}:{key}"
+        elif prefix_generation or user_generation:
+            cache_key = f"{namespace}:v{prefix_generation or user_generation}:{key}"
         else:
-            cache_key = f"{prefix}:{key}"
+            cache_key = f"{namespace}:{key}"
         
         # Hash long keys to avoid DynamoDB key length limits
         if len(cache_key) > 255:
@@ -91,28 +472,153 @@ class PerformanceCache:
         
         return cache_key
     
-    def _serialize_value(self, value: Any) -> str:
-        """Serialize value for storage"""
+    def _namespace(self, prefix: str, user_id: str = None) -> str:
+        """Namespace that a generation counter applies to"""
+        
+        return f"{prefix}:{user_id}" if user_id else prefix
+    
+    def _generation_namespaces(self, prefix: str, user_id: str = None) -> List[str]:
+        """Namespaces whose generations version a key: the prefix, then the user's namespace"""
+        
+        return [prefix, self._namespace(prefix, user_id)] if user_id else [prefix]
+    
+    def _generation_key(self, namespace: str) -> str:
+        """Storage key of a namespace generation counter"""
+        
+        return f"{CacheConfig.GENERATION_KEY_PREFIX}:{namespace}"
+    
+    def _get_generations(self, namespaces: List[str]) -> List[int]:
+        """
+        Current generations of namespaces, in order
+        
+        Shared counters are re-read at most once per
+        GENERATION_REFRESH_SECONDS, all stale ones in a single round trip;
+        local bumps apply immediately.
+        """
+        
+        now = time.time()
+        with self._generation_lock:
+            stale = [
+                name for name in namespaces
+                if name not in self._generations or now - self._generations[name][1] >= CacheConfig.GENERATION_REFRESH_SECONDS
+            ]
         
-        def decimal_serializer(obj):
-            if isinstance(obj, Decimal):
-                return float(obj)
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+        fetched = self._fetch_generations(stale) if stale else {}
         
-        return json.dumps(value, default=decimal_serializer, separators=(',', ':'))
+        with self._generation_lock:
+            for name in stale:
+                current = self._generations.get(name)
+                generation = fetched.get(name)
+                if generation is None:
+                    generation = current[0] if current else 0
+                elif current and current[0] > generation:
+                    # Never step back behind a bump made by this container
+                    generation = current[0]
+                self._generations[name] = (generation, now)
+        
+            return [self._generations[name][0] for name in namespaces]
     
-    def _deserialize_value(self, value: str) -> Any:
-        """Deserialize value from storage"""
+    def _fetch_generations(self, namespaces: List[str]) -> Dict[str, int]:
+        """Read namespace generations from the shared store in one round trip (empty on error)"""
+        
+        generation_keys = [self._generation_key(name) for name in namespaces]
         
         try:
-            return json.loads(value)
-        except json.JSONDecodeError:
-            return value
+            if self.redis_client:
+                if len(generation_keys) == 1:
+                    values = [self.redis_client.get(generation_keys[0])]
+                else:
+                    values = self.redis_client.mget(generation_keys)
+                return {name: int(value) if value else 0 for name, value in zip(namespaces, values)}
+            
+            if self.cache_table:
+                if len(generation_keys) == 1:
+                    response = self.cache_table.get_item(
+                        Key={'cache_key': generation_keys[0]},
+                        ConsistentRead=True
+                    )
+                    return {namespaces[0]: int(response.get('Item', {}).get('generation', 0))}
+                
+                stored = {
+                    item['cache_key']: int(item.get('generation', 0))
+                    for item in self._batch_get_items(generation_keys, consistent_read=True)
+                }
+                return {name: stored.get(key, 0) for name, key in zip(namespaces, generation_keys)}
+        except Exception as e:
+            logger.warning(f"Cache generation read error: {e}")
+        
+        return {}
+    
+    def _bump_generation(self, namespace: str) -> int:
+        """Atomically increment a namespace generation"""
+        
+        generation_key = self._generation_key(namespace)
+        generation = None
+        
+        try:
+            if self.redis_client:
+                generation = int(self.redis_client.incr(generation_key))
+            elif self.cache_table:
+                response = self.cache_table.update_item(
+                    Key={'cache_key': generation_key},
+                    UpdateExpression='ADD #generation :one',
+                    ExpressionAttributeNames={'#generation': 'generation'},
+                    ExpressionAttributeValues={':one': 1},
+                    ReturnValues='UPDATED_NEW'
+                )
+                generation = int(response['Attributes']['generation'])
+        except Exception as e:
+            logger.warning(f"Cache generation increment error: {e}")
+        
+        with self._generation_lock:
+            current = self._generations.get(namespace)
+            if generation is None:
+                # Shared store unavailable: invalidate this container at least
+                generation = (current[0] if current else 0) + 1
+            self._generations[namespace] = (generation, time.time())
+        
+        return generation
     
     def _is_expired(self, ttl_timestamp: float) -> bool:
         """Check if cache entry is expired"""
         return time.time() > ttl_timestamp
     
+    def _has_remote_tiers(self) -> bool:
+        """Whether any networked tier (Redis or DynamoDB) is configured"""
+        
+        return self.redis_client is not None or self.cache_table is not None
+    
+    async def _run_io(self, fn: Callable, *args) -> Any:
+        """Run blocking tier I/O on the cache I/O pool in the caller's context (inline when there is none to do)"""
+        
+        if not self._has_remote_tiers():
+            return fn(*args)
+        
+        if self._io_executor is None:
+            with self._refresh_lock:
+                if self._io_executor is None:
+                    self._io_executor = ThreadPoolExecutor(
+                        max_workers=CacheConfig.IO_WORKERS,
+                        thread_name_prefix="cache-io"
+                    )
+        
+        return await asyncio.get_running_loop().run_in_executor(self._io_executor, contextvars.copy_context().run, fn, *args)
+    
+    async def _agenerate_cache_key(self, prefix: str, key: str, user_id: str = None) -> str:
+        """Generate a cache key, re-reading a stale namespace generation off-loop"""
+        
+        now = time.time()
+        with self._generation_lock:
+            fresh = all(
+                name in self._generations and now - self._generations[name][1] < CacheConfig.GENERATION_REFRESH_SECONDS
+                for name in self._generation_namespaces(prefix, user_id)
+            )
+        
+        if fresh:
+            return self._generate_cache_key(prefix, key, user_id)
+        
+        return await self._run_io(self._generate_cache_key, prefix, key, user_id)
+    
     def get(self, prefix: str, key: str, user_id: str = None) -> Optional[Any]:
         """
         Get value from cache with multi-tier lookup
@@ -129,25 +635,59 @@ class PerformanceCache:
         cache_key = self._generate_cache_key(prefix, key, user_id)
         
         # 1. Check in-memory cache first (fastest)
-        if cache_key in self._memory_cache:
-            ttl = self._memory_cache_ttl.get(cache_key, 0)
-            if not self._is_expired(ttl):
-                logger.debug(f"Cache HIT (memory): {cache_key}")
-                return self._memory_cache[cache_key]
-            else:
-                # Remove expired entry
-                del self._memory_cache[cache_key]
-                del self._memory_cache_ttl[cache_key]
+        value = self._get_from_memory(cache_key)
+        if value is None:
+            value = self._get_from_remote(prefix, cache_key)
+        
+        if self._record_read(prefix, user_id, [cache_key] if value is not None else []):
+            self.get_read_history(user_id)
+        
+        return value
+    
+    async def aget(self, prefix: str, key: str, user_id: str = None) -> Optional[Any]:
+        """
+        Async variant of get
+        
+        The memory tier is read inline; Redis and DynamoDB lookups run on
+        the cache I/O pool so the event loop is never blocked.
+        """
+        
+        cache_key = await self._agenerate_cache_key(prefix, key, user_id)
+        
+        value = self._get_from_memory(cache_key)
+        if value is None:
+            value = await self._run_io(self._get_from_remote, prefix, cache_key)
+        
+        if self._record_read(prefix, user_id, [cache_key] if value is not None else []):
+            await self._run_io(self.get_read_history, user_id)
+        
+        return value
+    
+    def _get_from_memory(self, cache_key: str) -> Optional[Any]:
+        """Memory tier lookup (no I/O)"""
+        
+        value = self._memory_cache.get(cache_key)
+        if value is not None:
+            self._tier_stats['memory_hits'] += 1
+            logger.debug(f"Cache HIT (memory): {cache_key}")
+        return value
+    
+    def _get_from_remote(self, prefix: str, cache_key: str) -> Optional[Any]:
+        """Redis then DynamoDB lookup, backfilling the memory tier"""
         
         # 2. Check Redis cache (if available)
         if self.redis_client:
             try:
                 cached_value = self.redis_client.get(cache_key)
                 if cached_value:
-                    value = self._deserialize_value(cached_value.decode('utf-8'))
+                    value, raw_size = self._codec.decode(prefix, cached_value)
                     # Store in memory cache for faster subsequent access
-                    self._memory_cache[cache_key] = value
-                    self._memory_cache_ttl[cache_key] = time.time() + CacheConfig.SHORT_TTL
+                    self._memory_cache.set(
+                        cache_key, value,
+                        time.time() + CacheConfig.SHORT_TTL,
+                        raw_size
+                    )
+                    self._tier_stats['redis_hits'] += 1
                     logger.debug(f"Cache HIT (Redis): {cache_key}")
                     return value
             except Exception as e:
@@ -162,10 +702,10 @@ class PerformanceCache:
                     ttl = float(item.get('ttl', 0))
                     
                     if not self._is_expired(ttl):
-                        value = self._deserialize_value(item['value'])
+                        value, raw_size = self._codec.decode(prefix, item['value'])
                         # Store in higher-tier caches
-                        self._memory_cache[cache_key] = value
-                        self._memory_cache_ttl[cache_key] = ttl
+                        self._memory_cache.set(cache_key, value, ttl, raw_size)
+                        self._tier_stats['dynamodb_hits'] += 1
                         logger.debug(f"Cache HIT (DynamoDB): {cache_key}")
                         return value
                     else:
@@ -174,9 +714,233 @@ class PerformanceCache:
             except Exception as e:
                 logger.warning(f"DynamoDB cache error: {e}")
         
+        self._tier_stats['misses'] += 1
         logger.debug(f"Cache MISS: {cache_key}")
         return None
     
+    def get_many(self, prefix: str, keys: List[str], user_id: str = None) -> List[Optional[Any]]:
+        """
+        Get many values with one round trip per tier
+        
+        Memory is checked first, the remaining keys go to Redis as a single
+        MGET, and whatever is still missing is read from DynamoDB with
+        chunked BatchGetItem calls.
+        
+        Args:
+            prefix: Cache key prefix
+            keys: Cache keys
+            user_id: User ID for user-specific caching
+        
+        Returns:
+            Values in the same order as keys (None for misses)
+        """
+        
+        cache_keys = [self._generate_cache_key(prefix, key, user_id) for key in keys]
+        
+        # 1. Memory tier
+        found = self._get_many_from_memory(cache_keys)
+        
+        pending = [k for k in dict.fromkeys(cache_keys) if k not in found]
+        if pending:
+            found.update(self._get_many_from_remote(prefix, pending))
+        
+        if self._record_read(prefix, user_id, list(found)):
+            self.get_read_history(user_id)
+        
+        return [found.get(cache_key) for cache_key in cache_keys]
+    
+    async def aget_many(self, prefix: str, keys: List[str], user_id: str = None) -> List[Optional[Any]]:
+        """Async variant of get_many; Redis and DynamoDB batches run off-loop"""
+        
+        # Refreshes the namespace generation off-loop so the keys below resolve locally
+        await self._agenerate_cache_key(prefix, "", user_id)
+        cache_keys = [self._generate_cache_key(prefix, key, user_id) for key in keys]
+        
+        found = self._get_many_from_memory(cache_keys)
+        
+        pending = [k for k in dict.fromkeys(cache_keys) if k not in found]
+        if pending:
+            found.update(await self._run_io(self._get_many_from_remote, prefix, pending))
+        
+        if self._record_read(prefix, user_id, list(found)):
+            await self._run_io(self.get_read_history, user_id)
+        
+        return [found.get(cache_key) for cache_key in cache_keys]
+    
+    def _get_many_from_memory(self, cache_keys: List[str]) -> Dict[str, Any]:
+        """Memory tier bulk lookup (no I/O)"""
+        
+        found = {}
+        for cache_key in dict.fromkeys(cache_keys):
+            value = self._memory_cache.get(cache_key)
+            if value is not None:
+                found[cache_key] = value
+                self._tier_stats['memory_hits'] += 1
+        return found
+        
+    def _get_many_from_remote(self, prefix: str, pending: List[str]) -> Dict[str, Any]:
+        """Redis MGET then DynamoDB BatchGetItem for keys missing from memory"""
+        
+        found = {}
+        
+        # 2. Redis tier (single MGET)
+        if pending and self.redis_client:
+            try:
+                redis_values = self.redis_client.mget(pending)
+                expires_at = time.time() + CacheConfig.SHORT_TTL
+                for cache_key, cached_value in zip(pending, redis_values):
+                    if cached_value:
+                        value, raw_size = self._codec.decode(prefix, cached_value)
+                        self._memory_cache.set(cache_key, value, expires_at, raw_size)
+                        found[cache_key] = value
+                        self._tier_stats['redis_hits'] += 1
+            except Exception as e:
+                logger.warning(f"Redis bulk get error: {e}")
+            
+            pending = [k for k in pending if k not in found]
+        
+        # 3. DynamoDB tier (chunked BatchGetItem)
+        if pending and self.cache_table:
+            try:
+                for item in self._batch_get_items(pending):
+                    ttl = float(item.get('ttl', 0))
+                    if self._is_expired(ttl):
+                        continue
+                    cache_key = item['cache_key']
+                    value, raw_size = self._codec.decode(prefix, item['value'])
+                    self._memory_cache.set(cache_key, value, ttl, raw_size)
+                    found[cache_key] = value
+                    self._tier_stats['dynamodb_hits'] += 1
+            except Exception as e:
+                logger.warning(f"DynamoDB bulk get error: {e}")
+            
+            pending = [k for k in pending if k not in found]
+        
+        self._tier_stats['misses'] += len(pending)
+        logger.debug(f"Cache bulk GET: {len(found)} remote hits, {len(pending)} misses")
+        
+        return found
+    
+    def set_many(
+        self,
+        prefix: str,
+        values: Dict[str, Any],
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None
+    ) -> int:
+        """
+        Set many values with one round trip per tier
+        
+        Args:
+            prefix: Cache key prefix
+            values: Mapping of cache key to value
+            ttl_seconds: Time to live in seconds
+            user_id: User ID for user-specific caching
+        
+        Returns:
+            Number of values stored in at least one tier
+        """
+        
+        ttl_timestamp = time.time() + ttl_seconds
+        entries = {}
+        
+        for key, value in values.items():
+            cache_key = self._generate_cache_key(prefix, key, user_id)
+            try:
+                entries[cache_key] = (value, self._codec.encode(prefix, cache_key, value))
+            except ValueError as e:
+                logger.warning(str(e))
+        
+        stored = set()
+        
+        # 1. Memory tier
+        for cache_key, (value, encoded) in entries.items():
+            if self._memory_cache.set(cache_key, value, ttl_timestamp, encoded.raw_size):
+                stored.add(cache_key)
+        
+        # 2. Redis tier (one pipeline)
+        if entries and self.redis_client:
+            try:
+                pipeline = self.redis_client.pipeline(transaction=False)
+                for cache_key, (_, encoded) in entries.items():
+                    pipeline.setex(cache_key, ttl_seconds, encoded.data)
+                pipeline.execute()
+                stored.update(entries)
+            except Exception as e:
+                logger.warning(f"Redis bulk set error: {e}")
+        
+        # 3. DynamoDB tier (chunked BatchWriteItem)
+        if entries and self.cache_table:
+            try:
+                created_at = datetime.utcnow().isoformat()
+                self._batch_write_items([
+                    {
+                        'cache_key': cache_key,
+                        'value': encoded.data,
+                        'codec': encoded.codec,
+                        'ttl': int(ttl_timestamp),
+                        'created_at': created_at
+                    }
+                    for cache_key, (_, encoded) in entries.items()
+                ])
+                stored.update(entries)
+            except Exception as e:
+                logger.warning(f"DynamoDB bulk set error: {e}")
+        
+        logger.debug(f"Cache bulk SET: {len(stored)} of {len(values)} entries (TTL: {ttl_seconds}s)")
+        return len(stored)
+    
+    def _batch_get_items(self, cache_keys: List[str], consistent_read: bool = False) -> List[Dict[str, Any]]:
+        """BatchGetItem in API-sized chunks, retrying unprocessed keys with backoff"""
+        
+        items = []
+        
+        for start in range(0, len(cache_keys), CacheConfig.BATCH_GET_SIZE):
+            request = {
+                self.cache_table_name: {
+                    'Keys': [{'cache_key': k} for k in cache_keys[start:start + CacheConfig.BATCH_GET_SIZE]],
+                    'ConsistentRead': consistent_read
+                }
+            }
+            
+            for attempt in range(CacheConfig.BATCH_MAX_RETRIES + 1):
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                items.extend(response.get('Responses', {}).get(self.cache_table_name, []))
+                
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                if attempt < CacheConfig.BATCH_MAX_RETRIES:
+                    time.sleep(CacheConfig.BATCH_RETRY_DELAY * (2 ** attempt))
+            else:
+                unprocessed = len(request.get(self.cache_table_name, {}).get('Keys', []))
+                logger.warning(f"BatchGetItem left {unprocessed} keys unprocessed")
+        
+        return items
+    
+    def _batch_write_items(self, items: List[Dict[str, Any]]) -> None:
+        """BatchWriteItem in API-sized chunks, retrying unprocessed items with backoff"""
+        
+        for start in range(0, len(items), CacheConfig.BATCH_WRITE_SIZE):
+            request = {
+                self.cache_table_name: [
+                    {'PutRequest': {'Item': item}}
+                    for item in items[start:start + CacheConfig.BATCH_WRITE_SIZE]
+                ]
+            }
+            
+            for attempt in range(CacheConfig.BATCH_MAX_RETRIES + 1):
+                response = self.dynamodb.batch_write_item(RequestItems=request)
+                
+                request = response.get('UnprocessedItems') or {}
+                if not request:
+                    break
+                if attempt < CacheConfig.BATCH_MAX_RETRIES:
+                    time.sleep(CacheConfig.BATCH_RETRY_DELAY * (2 ** attempt))
+            else:
+                unprocessed = len(request.get(self.cache_table_name, []))
+                logger.warning(f"BatchWriteItem left {unprocessed} items unprocessed")
+    
     def set(
         self, 
         prefix: str, 
@@ -200,33 +964,81 @@ class PerformanceCache:
         """
         
         cache_key = self._generate_cache_key(prefix, key, user_id)
-        serialized_value = self._serialize_value(value)
         
-        # Check size limit
-        if len(serialized_value) > CacheConfig.MAX_VALUE_SIZE:
-            logger.warning(f"Cache value too large: {len(serialized_value)} bytes")
+        # Encode (compressing or spilling large values to the blob store)
+        try:
+            encoded = self._codec.encode(prefix, cache_key, value)
+        except ValueError as e:
+            logger.warning(str(e))
             return False
         
         ttl_timestamp = time.time() + ttl_seconds
-        success = False
         
-        # 1. Store in memory cache
-        try:
-            self._memory_cache[cache_key] = value
-            self._memory_cache_ttl[cache_key] = ttl_timestamp
+        # 1. Store in memory cache (bounded, evicts LRU entries itself)
+        success = self._set_in_memory(cache_key, value, ttl_timestamp, encoded.raw_size)
+        
+        if self._set_remote(cache_key, encoded, ttl_seconds, ttl_timestamp):
             success = True
-            
-            # Cleanup memory cache if too large
-            if len(self._memory_cache) > CacheConfig.MAX_CACHE_ENTRIES:
-                self._cleanup_memory_cache()
+        
+        if success:
+            logger.debug(f"Cache SET: {cache_key} (TTL: {ttl_seconds}s)")
+        
+        return success
+    
+    async def aset(
+        self,
+        prefix: str,
+        key: str,
+        value: Any,
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None
+    ) -> bool:
+        """
+        Async variant of set
+        
+        Encoding (which may spill to S3) and the Redis/DynamoDB writes run
+        together on the cache I/O pool; the memory tier is written inline.
+        """
+        
+        cache_key = await self._agenerate_cache_key(prefix, key, user_id)
+        ttl_timestamp = time.time() + ttl_seconds
+        
+        def store_remote():
+            encoded = self._codec.encode(prefix, cache_key, value)
+            return encoded, self._set_remote(cache_key, encoded, ttl_seconds, ttl_timestamp)
+        
+        try:
+            encoded, success = await self._run_io(store_remote)
+        except ValueError as e:
+            logger.warning(str(e))
+            return False
                 
+        if self._set_in_memory(cache_key, value, ttl_timestamp, encoded.raw_size):
+            success = True
+        
+        if success:
+            logger.debug(f"Cache SET: {cache_key} (TTL: {ttl_seconds}s)")
+        
+        return success
+    
+    def _set_in_memory(self, cache_key: str, value: Any, ttl_timestamp: float, size_bytes: int) -> bool:
+        """Memory tier write (no I/O)"""
+        
+        try:
+            return self._memory_cache.set(cache_key, value, ttl_timestamp, size_bytes)
         except Exception as e:
             logger.warning(f"Memory cache error: {e}")
+            return False
+    
+    def _set_remote(self, cache_key: str, encoded: EncodedValue, ttl_seconds: int, ttl_timestamp: float) -> bool:
+        """Redis and DynamoDB writes"""
+        
+        success = False
         
         # 2. Store in Redis cache (if available)
         if self.redis_client:
             try:
-                self.redis_client.setex(cache_key, ttl_seconds, serialized_value)
+                self.redis_client.setex(cache_key, ttl_seconds, encoded.data)
                 success = True
             except Exception as e:
                 logger.warning(f"Redis cache error: {e}")
@@ -237,7 +1049,8 @@ class PerformanceCache:
                 self.cache_table.put_item(
                     Item={
                         'cache_key': cache_key,
-                        'value': serialized_value,
+                        'value': encoded.data,
+                        'codec': encoded.codec,
                         'ttl': int(ttl_timestamp),
                         'created_at': datetime.utcnow().isoformat()
                     }
@@ -246,9 +1059,6 @@ class PerformanceCache:
             except Exception as e:
                 logger.warning(f"DynamoDB cache error: {e}")
         
-        if success:
-            logger.debug(f"Cache SET: {cache_key} (TTL: {ttl_seconds}s)")
-        
         return success
     
     def delete(self, prefix: str, key: str, user_id: str = None) -> bool:
@@ -268,9 +1078,7 @@ class PerformanceCache:
         success = False
         
         # Delete from memory cache
-        if cache_key in self._memory_cache:
-            del self._memory_cache[cache_key]
-            del self._memory_cache_ttl[cache_key]
+        if self._memory_cache.delete(cache_key):
             success = True
         
         # Delete from Redis cache
@@ -294,80 +1102,630 @@ class PerformanceCache:
         
         return success
     
-    def invalidate_pattern(self, prefix: str, user_id: str = None) -> int:
+    def update(
+        self,
+        prefix: str,
+        key: str,
+        update: Callable[[Optional[Any]], Any],
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None
+    ) -> Optional[Any]:
         """
-        Invalidate all cache entries matching a pattern
+        Read-modify-write one entry without losing concurrent updates
+        
+        Updates to a key are serialized by an in-process lock and, across
+        containers, by the same DynamoDB lock row get_or_compute uses; the
+        current value is re-read from the shared tiers under the lock.
         
         Args:
-            prefix: Cache key prefix to match
-            user_id: User ID for user-specific invalidation
+            prefix: Cache key prefix
+            key: Cache key
+            update: Function of the current value (None when absent) returning
+                the new value (None leaves the entry unchanged)
+            ttl_seconds: Time to live in seconds
+            user_id: User ID for user-specific caching
+        
+        Returns:
+            The new value, or None if unchanged or the lock was not obtained in time
+        """
+        
+        cache_key = self._generate_cache_key(prefix, key, user_id)
+        token = uuid.uuid4().hex
+        deadline = time.time() + CacheConfig.DISTRIBUTED_LOCK_TTL
+        
+        with self._update_locks[hash(cache_key) % CacheConfig.UPDATE_LOCK_STRIPES]:
+            while not self._acquire_lock(cache_key, token):
+                if time.time() >= deadline:
+                    self._lock_stats['timeouts'] += 1
+                    logger.warning(f"Distributed lock wait timed out for {cache_key}, update skipped")
+                    return None
+                time.sleep(CacheConfig.DISTRIBUTED_LOCK_POLL)
+            
+            try:
+                if self._has_remote_tiers():
+                    current = self._get_from_remote(prefix, cache_key)
+                else:
+                    current = self._memory_cache.get(cache_key)
+                value = update(current)
+                if value is not None:
+                    self.set(prefix, key, value, ttl_seconds, user_id)
+                return value
+            finally:
+                self._release_lock(cache_key, token)
+    
+    async def aupdate(
+        self,
+        prefix: str,
+        key: str,
+        update: Callable[[Optional[Any]], Any],
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None
+    ) -> Optional[Any]:
+        """Async variant of update (the whole update runs on the cache I/O pool)"""
+        
+        return await self._run_io(self.update, prefix, key, update, ttl_seconds, user_id)
+    
+    def get_or_compute(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Any],
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None,
+        distributed_lock: bool = False
+    ) -> Any:
+        """
+        Get value from cache, computing it once on a miss
+        
+        Args:
+            prefix: Cache key prefix
+            key: Cache key
+            compute: Zero-argument function producing the value
+            ttl_seconds: Time to live in seconds
+            user_id: User ID for user-specific caching
+            distributed_lock: Coordinate across containers via a DynamoDB lock row
+        
+        Returns:
+            Cached or freshly computed value
+        """
+        
+        cached_value = self.get(prefix, key, user_id)
+        if cached_value is not None:
+            return cached_value
+        
+        return self.load_coalesced(prefix, key, compute, ttl_seconds, user_id, distributed_lock)
+    
+    def load_coalesced(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Any],
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None,
+        distributed_lock: bool = False
+    ) -> Any:
+        """Compute and cache a value after a miss, coalescing concurrent callers"""
+        
+        cache_key = self._generate_cache_key(prefix, key, user_id)
+        
+        def load():
+            # A previous leader may have filled the cache while we queued
+            value = self._memory_cache.peek(cache_key)
+            if value is not None:
+                return value
             
+            if distributed_lock:
+                return self._compute_with_lock(prefix, key, cache_key, compute, ttl_seconds, user_id)
+            
+            value = compute()
+            if value is not None:
+                self.set(prefix, key, value, ttl_seconds, user_id)
+            return value
+        
+        return self._single_flight.do(cache_key, load)
+    
+    async def aget_or_compute(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None,
+        distributed_lock: bool = False
+    ) -> Any:
+        """Async variant of get_or_compute; compute returns an awaitable"""
+        
+        cached_value = await self.aget(prefix, key, user_id)
+        if cached_value is not None:
+            return cached_value
+        
+        return await self.aload_coalesced(prefix, key, compute, ttl_seconds, user_id, distributed_lock)
+    
+    async def aload_coalesced(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None,
+        distributed_lock: bool = False
+    ) -> Any:
+        """Async variant of load_coalesced"""
+        
+        cache_key = await self._agenerate_cache_key(prefix, key, user_id)
+        
+        async def load():
+            value = self._memory_cache.peek(cache_key)
+            if value is not None:
+                return value
+            
+            if distributed_lock:
+                return await self._acompute_with_lock(prefix, key, cache_key, compute, ttl_seconds, user_id)
+            
+            value = await compute()
+            if value is not None:
+                await self.aset(prefix, key, value, ttl_seconds, user_id)
+            return value
+        
+        return await self._single_flight.ado(cache_key, load)
+    
+    def get_or_revalidate(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Any],
+        soft_ttl_seconds: int,
+        hard_ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None,
+        distributed_lock: bool = False
+    ) -> Any:
+        """
+        Get value with stale-while-revalidate semantics
+        
+        Entries younger than the soft TTL are returned as-is. Between the
+        soft and hard TTL the stale value is returned immediately and one
+        background refresh is scheduled for the key. Past the hard TTL the
+        entry is gone and the value is computed inline (coalesced).
+        
+        Args:
+            prefix: Cache key prefix
+            key: Cache key
+            compute: Zero-argument function producing the value
+            soft_ttl_seconds: Age after which the value is refreshed in the background
+            hard_ttl_seconds: Age after which the value is no longer served
+            user_id: User ID for user-specific caching
+            distributed_lock: Coordinate inline computes across containers
+        
         Returns:
-            Number of entries invalidated
+            Cached (possibly stale) or freshly computed value
         """
         
-        pattern = self._generate_cache_key(prefix, "", user_id).rstrip(":")
-        invalidated = 0
+        entry = self.get(prefix, key, user_id)
+        if self._is_swr_entry(entry):
+            if time.time() >= entry['fresh_until']:
+                self._swr_stats['stale_served'] += 1
+                self._schedule_refresh(prefix, key, compute, soft_ttl_seconds, hard_ttl_seconds, user_id)
+            else:
+                self._swr_stats['fresh_hits'] += 1
+            return entry['value']
         
-        # Invalidate memory cache
-        keys_to_delete = [k for k in self._memory_cache.keys() if k.startswith(pattern)]
-        for key in keys_to_delete:
-            del self._memory_cache[key]
-            if key in self._memory_cache_ttl:
-                del self._memory_cache_ttl[key]
-            invalidated += 1
+        entry = self.load_coalesced(
+            prefix, key,
+            lambda: self._make_swr_entry(compute(), soft_ttl_seconds),
+            hard_ttl_seconds, user_id, distributed_lock
+        )
+        return entry['value'] if self._is_swr_entry(entry) else entry
+    
+    async def aget_or_revalidate(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        soft_ttl_seconds: int,
+        hard_ttl_seconds: int = CacheConfig.DEFAULT_TTL,
+        user_id: str = None,
+        distributed_lock: bool = False
+    ) -> Any:
+        """Async variant of get_or_revalidate; refreshes run as tasks on the current loop"""
         
-        # Invalidate Redis cache (if available)
-        if self.redis_client:
+        entry = await self.aget(prefix, key, user_id)
+        if self._is_swr_entry(entry):
+            if time.time() >= entry['fresh_until']:
+                self._swr_stats['stale_served'] += 1
+                self._schedule_arefresh(prefix, key, compute, soft_ttl_seconds, hard_ttl_seconds, user_id)
+            else:
+                self._swr_stats['fresh_hits'] += 1
+            return entry['value']
+        
+        async def load():
+            return self._make_swr_entry(await compute(), soft_ttl_seconds)
+        
+        entry = await self.aload_coalesced(prefix, key, load, hard_ttl_seconds, user_id, distributed_lock)
+        return entry['value'] if self._is_swr_entry(entry) else entry
+    
+    def _make_swr_entry(self, value: Any, soft_ttl_seconds: int) -> Optional[Dict[str, Any]]:
+        """Wrap a value with its freshness deadline (None is never cached)"""
+        
+        if value is None:
+            return None
+        
+        return {
+            CacheConfig.SWR_MARKER: 1,
+            'value': value,
+            'fresh_until': time.time() + soft_ttl_seconds
+        }
+    
+    def _is_swr_entry(self, entry: Any) -> bool:
+        """Check whether a cached value is a stale-while-revalidate entry"""
+        
+        return isinstance(entry, dict) and CacheConfig.SWR_MARKER in entry
+    
+    def _claim_refresh(self, prefix: str, key: str, user_id: str) -> Optional[str]:
+        """Reserve the refresh slot for a key; None if a refresh is already running"""
+        
+        cache_key = self._generate_cache_key(prefix, key, user_id)
+        
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                self._swr_stats['refreshes_deduplicated'] += 1
+                return None
+            self._refreshing.add(cache_key)
+        
+        return cache_key
+    
+    def _finish_refresh(self, cache_key: str, started_at: float, success: bool) -> None:
+        """Release the refresh slot and record its duration"""
+        
+        duration_ms = (time.time() - started_at) * 1000
+        
+        with self._refresh_lock:
+            self._refreshing.discard(cache_key)
+            if success:
+                self._swr_stats['refreshes'] += 1
+            else:
+                self._swr_stats['refresh_failures'] += 1
+            self._swr_stats['refresh_total_ms'] += duration_ms
+            self._swr_stats['refresh_max_ms'] = max(self._swr_stats['refresh_max_ms'], duration_ms)
+    
+    def _schedule_refresh(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Any],
+        soft_ttl_seconds: int,
+        hard_ttl_seconds: int,
+        user_id: str
+    ) -> None:
+        """Refresh a stale entry on the background refresh pool"""
+        
+        cache_key = self._claim_refresh(prefix, key, user_id)
+        if cache_key is None:
+            return
+        
+        def refresh():
+            started_at = time.time()
+            success = False
             try:
-                keys = self.redis_client.keys(f"{pattern}*")
-                if keys:
-                    self.redis_client.delete(*keys)
-                    invalidated += len(keys)
+                entry = self._make_swr_entry(compute(), soft_ttl_seconds)
+                if entry is not None:
+                    self.set(prefix, key, entry, hard_ttl_seconds, user_id)
+                success = True
             except Exception as e:
-                logger.warning(f"Redis pattern delete error: {e}")
+                logger.warning(f"Background cache refresh failed for {cache_key}: {e}")
+            finally:
+                self._finish_refresh(cache_key, started_at, success)
         
-        # Note: DynamoDB doesn't support pattern deletion efficiently
-        # We rely on TTL for cleanup
+        with self._refresh_lock:
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=CacheConfig.REFRESH_WORKERS,
+                    thread_name_prefix="cache-refresh"
+                )
         
-        logger.info(f"Cache invalidated {invalidated} entries for pattern: {pattern}")
-        return invalidated
+        self._refresh_executor.submit(refresh)
     
-    def _cleanup_memory_cache(self) -> None:
-        """Clean up expired entries from memory cache"""
+    def _schedule_arefresh(
+        self,
+        prefix: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        soft_ttl_seconds: int,
+        hard_ttl_seconds: int,
+        user_id: str
+    ) -> None:
+        """Refresh a stale entry as a task on the running event loop"""
         
-        current_time = time.time()
-        expired_keys = [
-            key for key, ttl in self._memory_cache_ttl.items()
-            if current_time > ttl
-        ]
+        cache_key = self._claim_refresh(prefix, key, user_id)
+        if cache_key is None:
+            return
+        
+        async def refresh():
+            started_at = time.time()
+            success = False
+            try:
+                entry = self._make_swr_entry(await compute(), soft_ttl_seconds)
+                if entry is not None:
+                    await self.aset(prefix, key, entry, hard_ttl_seconds, user_id)
+                success = True
+            except Exception as e:
+                logger.warning(f"Background cache refresh failed for {cache_key}: {e}")
+            finally:
+                self._finish_refresh(cache_key, started_at, success)
+        
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    def _compute_with_lock(
+        self,
+        prefix: str,
+        key: str,
+        cache_key: str,
+        compute: Callable[[], Any],
+        ttl_seconds: int,
+        user_id: str
+    ) -> Any:
+        """Compute under a cross-container lock, or wait for the lock holder's result"""
+        
+        token = uuid.uuid4().hex
+        deadline = time.time() + CacheConfig.DISTRIBUTED_LOCK_TTL
+        
+        while True:
+            if self._acquire_lock(cache_key, token):
+                try:
+                    value = compute()
+                    if value is not None:
+                        self.set(prefix, key, value, ttl_seconds, user_id)
+                    return value
+                finally:
+                    self._release_lock(cache_key, token)
+            
+            if time.time() >= deadline:
+                self._lock_stats['timeouts'] += 1
+                logger.warning(f"Distributed lock wait timed out for {cache_key}, computing independently")
+                value = compute()
+                if value is not None:
+                    self.set(prefix, key, value, ttl_seconds, user_id)
+                return value
+            
+            time.sleep(CacheConfig.DISTRIBUTED_LOCK_POLL)
+            value = self.get(prefix, key, user_id)
+            if value is not None:
+                return value
+    
+    async def _acompute_with_lock(
+        self,
+        prefix: str,
+        key: str,
+        cache_key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: int,
+        user_id: str
+    ) -> Any:
+        """Async variant of _compute_with_lock"""
         
-        for key in expired_keys:
-            del self._memory_cache[key]
-            del self._memory_cache_ttl[key]
+        token = uuid.uuid4().hex
+        deadline = time.time() + CacheConfig.DISTRIBUTED_LOCK_TTL
         
-        # If still too large, remove oldest entries
-        if len(self._memory_cache) > CacheConfig.MAX_CACHE_ENTRIES:
-            # Sort by TTL and remove oldest
-            sorted_keys = sorted(
-                self._memory_cache_ttl.items(),
-                key=lambda x: x[1]
+        while True:
+            if await self._run_io(self._acquire_lock, cache_key, token):
+                try:
+                    value = await compute()
+                    if value is not None:
+                        await self.aset(prefix, key, value, ttl_seconds, user_id)
+                    return value
+                finally:
+                    await self._run_io(self._release_lock, cache_key, token)
+            
+            if time.time() >= deadline:
+                self._lock_stats['timeouts'] += 1
+                logger.warning(f"Distributed lock wait timed out for {cache_key}, computing independently")
+                value = await compute()
+                if value is not None:
+                    await self.aset(prefix, key, value, ttl_seconds, user_id)
+                return value
+            
+            await asyncio.sleep(CacheConfig.DISTRIBUTED_LOCK_POLL)
+            value = await self.aget(prefix, key, user_id)
+            if value is not None:
+                return value
+    
+    def _acquire_lock(self, cache_key: str, token: str) -> bool:
+        """
+        Try to take the short-lived lock row for a cache key
+        
+        The row expires after DISTRIBUTED_LOCK_TTL, so a crashed holder only
+        blocks other containers until then. Without a cache table there is
+        nothing to coordinate on and the lock is always granted.
+        """
+        
+        if not self.cache_table:
+            return True
+        
+        now = int(time.time())
+        try:
+            self.cache_table.put_item(
+                Item={
+                    'cache_key': f"{CacheConfig.LOCK_KEY_PREFIX}:{cache_key}",
+                    'owner': token,
+                    'ttl': now + CacheConfig.DISTRIBUTED_LOCK_TTL,
+                    'created_at': datetime.utcnow().isoformat()
+                },
+                ConditionExpression='attribute_not_exists(cache_key) OR #ttl < :now',
+                ExpressionAttributeNames={'#ttl': 'ttl'},
+                ExpressionAttributeValues={':now': now}
+            )
+            self._lock_stats['acquired'] += 1
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                self._lock_stats['contended'] += 1
+                return False
+            logger.warning(f"Distributed lock error: {e}")
+            return True
+        except Exception as e:
+            logger.warning(f"Distributed lock error: {e}")
+            return True
+    
+    def _release_lock(self, cache_key: str, token: str) -> None:
+        """Release a lock row if we still own it"""
+        
+        if not self.cache_table:
+            return
+        
+        try:
+            self.cache_table.delete_item(
+                Key={'cache_key': f"{CacheConfig.LOCK_KEY_PREFIX}:{cache_key}"},
+                ConditionExpression='#owner = :token',
+                ExpressionAttributeNames={'#owner': 'owner'},
+                ExpressionAttributeValues={':token': token}
             )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                logger.warning(f"Distributed lock release error: {e}")
+        except Exception as e:
+            logger.warning(f"Distributed lock release error: {e}")
+    
+    def invalidate_pattern(self, prefix: str, user_id: str = None) -> int:
+        """
+        Invalidate all cache entries in a (prefix, user) namespace
+        
+        Bumps the namespace generation so every tier stops resolving the
+        old keys at once; orphaned entries age out through LRU and TTL.
+        Every key carries its prefix's generation, so invalidating a prefix
+        without a user also invalidates each user's entries under it.
+        Other containers pick up the bump on their next generation refresh
+        (CacheConfig.GENERATION_REFRESH_SECONDS); use delete() for entries
+        that must disappear everywhere at once.
+        
+        Args:
+            prefix: Cache key prefix to match
+            user_id: User ID for user-specific invalidation (None: the whole prefix, all users)
+            
+        Returns:
+            Number of namespaces invalidated
+        """
+        
+        namespace = self._namespace(prefix, user_id)
+        generation = self._bump_generation(namespace)
+        
+        logger.info(f"Cache namespace {namespace} advanced to generation {generation}")
+        return 1
+    
+    def _record_read(self, prefix: str, user_id: Optional[str], hit_keys: List[str]) -> bool:
+        """
+        Track warmed-entry usage and per-user prefix reads
+        
+        Returns:
+            True when the user's local reads are due to be merged into the shared history
+        """
+        
+        with self._history_lock:
+            for cache_key in hit_keys:
+                warmed_prefix = self._warmed_keys.pop(cache_key, None)
+                if warmed_prefix:
+                    self._warm_stats[warmed_prefix]['used'] += 1
+            
+            if not user_id or prefix == CacheConfig.READ_HISTORY_PREFIX:
+                return False
             
-            keys_to_remove = sorted_keys[:len(self._memory_cache) - CacheConfig.MAX_CACHE_ENTRIES + 100]
-            for key, _ in keys_to_remove:
-                if key in self._memory_cache:
-                    del self._memory_cache[key]
-                del self._memory_cache_ttl[key]
+            pending = self._read_history.setdefault(user_id, {})
+            self._read_history.move_to_end(user_id)
+            pending[prefix] = pending.get(prefix, 0) + 1
+            
+            while len(self._read_history) > CacheConfig.MAX_TRACKED_USERS:
+                self._read_history.popitem(last=False)
+            
+            return sum(pending.values()) >= CacheConfig.READ_HISTORY_FLUSH_EVERY
+    
+    def get_read_history(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get which prefixes a user reads, merging this container's pending reads
         
-        logger.debug(f"Memory cache cleanup: {len(expired_keys)} expired, {len(self._memory_cache)} remaining")
+        Args:
+            user_id: User ID
+        
+        Returns:
+            Mapping of prefix to {'reads', 'last_read'}
+        """
+        
+        history = self.get(CacheConfig.READ_HISTORY_PREFIX, "reads", user_id) or {}
+        
+        with self._history_lock:
+            pending = self._read_history.pop(user_id, None)
+        
+        if pending:
+            now = time.time()
+            for prefix, reads in pending.items():
+                entry = history.setdefault(prefix, {'reads': 0, 'last_read': 0})
+                entry['reads'] += reads
+                entry['last_read'] = now
+            self.set(CacheConfig.READ_HISTORY_PREFIX, "reads", history, CacheConfig.READ_HISTORY_TTL, user_id)
+        
+        return history
+    
+    def record_warmed(self, prefix: str, key: str, user_id: str, warm_ms: float) -> None:
+        """
+        Record a warmed entry so later hits on it can be attributed to warming
+        
+        Args:
+            prefix: Cache key prefix
+            key: Cache key
+            user_id: User ID the entry was warmed for
+            warm_ms: Time spent fetching and storing the entry
+        """
+        
+        cache_key = self._generate_cache_key(prefix, key, user_id)
+        
+        with self._history_lock:
+            self._warmed_keys[cache_key] = prefix
+            self._warmed_keys.move_to_end(cache_key)
+            while len(self._warmed_keys) > CacheConfig.MAX_WARMED_KEYS:
+                self._warmed_keys.popitem(last=False)
+            
+            stats = self._warm_stats.setdefault(prefix, {'warmed': 0, 'used': 0, 'warm_ms': 0.0})
+            stats['warmed'] += 1
+            stats['warm_ms'] += warm_ms
+    
+    def _cleanup_memory_cache(self) -> None:
+        """Clean up expired entries from memory cache"""
+        
+        expired_count = self._memory_cache.purge_expired()
+        logger.debug(f"Memory cache cleanup: {expired_count} expired, {len(self._memory_cache)} remaining")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         
+        memory_stats = self._memory_cache.get_stats()
+        
         stats = {
-            'memory_cache_size': len(self._memory_cache),
-            'memory_cache_limit': CacheConfig.MAX_CACHE_ENTRIES,
+            'memory_cache_size': memory_stats['entries'],
+            'memory_cache_limit': memory_stats['max_entries'],
+            'memory_cache_bytes': memory_stats['resident_bytes'],
+            'memory_cache_bytes_limit': memory_stats['max_bytes'],
+            'memory_cache': memory_stats,
+            'tier_hits': dict(self._tier_stats),
+            'single_flight': self._single_flight.get_stats(),
+            'distributed_locks': dict(self._lock_stats),
+            'namespaces_tracked': len(self._generations),
+            'codec': self._codec.get_stats(),
+            'warming': {
+                prefix: {
+                    **stats,
+                    'avg_warm_ms': stats['warm_ms'] / stats['warmed'] if stats['warmed'] else 0.0,
+                    'hit_rate_percent': stats['used'] / stats['warmed'] * 100 if stats['warmed'] else 0.0
+                }
+                for prefix, stats in list(self._warm_stats.items())
+            },
+            'stale_while_revalidate': {
+                **self._swr_stats,
+                'refreshes_in_flight': len(self._refreshing),
+                'avg_refresh_ms': (
+                    self._swr_stats['refresh_total_ms'] / self._swr_stats['refreshes']
+                    if self._swr_stats['refreshes'] else 0.0
+                )
+            },
             'redis_available': self.redis_client is not None,
             'dynamodb_available': self.cache_table is not None
         }
@@ -385,27 +1743,36 @@ class PerformanceCache:
 
 
 # Global cache instance
-performance_cache = PerformanceCache()
+performance_cache = LazyProxy(PerformanceCache)
 
 
 def cache_decorator(
     prefix: str,
     ttl_seconds: int = CacheConfig.DEFAULT_TTL,
     user_specific: bool = True,
-    key_generator: callable = None
+    key_generator: callable = None,
+    single_flight: bool = True,
+    distributed_lock: bool = False,
+    soft_ttl_seconds: Optional[int] = None
 ):
     """
     Decorator for caching function results
     
     Args:
         prefix: Cache key prefix
-        ttl_seconds: Time to live in seconds
+        ttl_seconds: Time to live in seconds (the hard TTL when soft_ttl_seconds is set)
         user_specific: Whether to include user_id in cache key
         key_generator: Custom function to generate cache key from args
+        single_flight: Coalesce concurrent misses so only one caller computes
+        distributed_lock: Also coalesce across containers via a DynamoDB lock row
+        soft_ttl_seconds: Serve stale values past this age while one background refresh runs
+    
+    Coroutine functions get an async wrapper that uses the async cache API,
+    so the awaited result (not the coroutine object) is cached.
     """
     
     def decorator(func):
-        def wrapper(*args, **kwargs):
+        def resolve_key(args, kwargs):
             # Generate cache key
             if key_generator:
                 cache_key = key_generator(*args, **kwargs)
@@ -424,11 +1791,61 @@ def cache_decorator(
                 elif 'user_id' in kwargs:
                     user_id = kwargs['user_id']
             
+            return cache_key, user_id
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key, user_id = resolve_key(args, kwargs)
+                
+                if soft_ttl_seconds is not None:
+                    return await performance_cache.aget_or_revalidate(
+                        prefix, cache_key,
+                        lambda: func(*args, **kwargs),
+                        soft_ttl_seconds, ttl_seconds, user_id, distributed_lock
+                    )
+                
+                cached_result = await performance_cache.aget(prefix, cache_key, user_id)
+                if cached_result is not None:
+                    return cached_result
+                
+                if single_flight:
+                    return await performance_cache.aload_coalesced(
+                        prefix, cache_key,
+                        lambda: func(*args, **kwargs),
+                        ttl_seconds, user_id, distributed_lock
+                    )
+                
+                result = await func(*args, **kwargs)
+                await performance_cache.aset(prefix, cache_key, result, ttl_seconds, user_id)
+                
+                return result
+            
+            return async_wrapper
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key, user_id = resolve_key(args, kwargs)
+            
+            if soft_ttl_seconds is not None:
+                return performance_cache.get_or_revalidate(
+                    prefix, cache_key,
+                    lambda: func(*args, **kwargs),
+                    soft_ttl_seconds, ttl_seconds, user_id, distributed_lock
+                )
+            
             # Try to get from cache
             cached_result = performance_cache.get(prefix, cache_key, user_id)
             if cached_result is not None:
                 return cached_result
             
+            if single_flight:
+                return performance_cache.load_coalesced(
+                    prefix, cache_key,
+                    lambda: func(*args, **kwargs),
+                    ttl_seconds, user_id, distributed_lock
+                )
+            
             # Execute function and cache result
             result = func(*args, **kwargs)
             performance_cache.set(prefix, cache_key, result, ttl_seconds, user_id)
@@ -443,12 +1860,15 @@ def invalidate_user_cache(user_id: str, prefixes: List[str] = None) -> int:
     """
     Invalidate all cache entries for a specific user
     
+    Runs in constant time per prefix regardless of how many entries
+    the user has cached.
+    
     Args:
         user_id: User ID
         prefixes: Specific prefixes to invalidate (all if None)
         
     Returns:
-        Number of entries invalidated
+        Number of namespaces invalidated
     """
     
     if prefixes is None:
@@ -466,31 +1886,28 @@ def invalidate_user_cache(user_id: str, prefixes: List[str] = None) -> int:
     return total_invalidated
 
 
-def warm_cache_for_user(user_id: str) -> Dict[str, Any]:
+def warm_cache_for_user(
+    user_id: str,
+    prefixes: List[str] = None,
+    time_budget_seconds: float = None
+) -> Dict[str, Any]:
     """
     Pre-warm cache with commonly accessed user data
     
+    Fetches, in parallel and within a time budget, the data the user has a
+    read history for: file list, recent conversations, the active
+    conversation's last messages and subject context.
+    
     Args:
         user_id: User ID
+        prefixes: Restrict warming to these prefixes (all learned prefixes if None)
+        time_budget_seconds: Wall-clock budget for the whole warm-up
         
     Returns:
         Cache warming results
     """
     
-    results = {
-        'user_id': user_id,
-        'warmed_entries': 0,
-        'errors': []
-    }
-    
-    try:
-        # This would be implemented to pre-load common data
-        # For now, just return placeholder
-        logger.info(f"Cache warming initiated for user: {user_id}")
-        results['warmed_entries'] = 0
-        
-    except Exception as e:
-        results['errors'].append(str(e))
-        logger.error(f"Cache warming error for user {user_id}: {e}")
+    from .cache_warming import cache_warmer
     
-    return results
\ No newline at end of file
+    return cache_warmer.warm(user_id, prefixes, time_budget_seconds)
+        
\ No newline at end of file
@@ -15,10 +15,12 @@ import logging
 # Import performance components
 from .performance_cache import performance_cache, CacheConfig, invalidate_user_cache
 from .connection_pool import (
-    dynamodb_pool, s3_pool, bedrock_pool, cleanup_connection_pools
+    aws_clients, dynamodb_pool, s3_pool, bedrock_pool, cleanup_connection_pools
 )
 from .async_processor import async_task_manager, background_task_queue
+from .cpu_lane import cpu_lane
 from .performance_monitor import performance_monitor, track_performance
+from .lazy import LazyProxy
 
 logger = logging.getLogger(__name__)
 
@@ -102,7 +104,7 @@ class PerformanceOptimizer:
         # Check cache first
         cached_response = None
         if self.config['cache_enabled'] and cache_key:
-            cached_response = self.cache.get(
+            cached_response = await self.cache.aget(
                 prefix="api_responses",
                 key=cache_key,
                 user_id=user_id
@@ -131,7 +133,7 @@ class PerformanceOptimizer:
         """Cache API response"""
         
         if self.config['cache_enabled'] and cache_key:
-            success = self.cache.set(
+            success = await self.cache.aset(
                 prefix="api_responses",
                 key=cache_key,
                 value=response_data,
@@ -144,6 +146,50 @@ class PerformanceOptimizer:
             else:
                 logger.warning(f"Failed to cache response for request {request_id}")
     
+    async def compute_response(
+        self,
+        request_id: str,
+        cache_key: str,
+        compute: Callable,
+        user_id: Optional[str] = None,
+        cache_ttl: int = CacheConfig.DEFAULT_TTL,
+        distributed_lock: bool = False,
+        soft_ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Compute and cache an API response after a cache miss
+        
+        Concurrent misses for the same cache key are coalesced so that only
+        one caller runs compute; the others receive its result. With a soft
+        TTL, stale responses are served while one background refresh runs.
+        """
+        
+        if not (self.config['cache_enabled'] and cache_key):
+            return await compute()
+        
+        if soft_ttl is not None:
+            return await self.cache.aget_or_revalidate(
+                prefix="api_responses",
+                key=cache_key,
+                compute=compute,
+                soft_ttl_seconds=soft_ttl,
+                hard_ttl_seconds=cache_ttl,
+                user_id=user_id,
+                distributed_lock=distributed_lock
+            )
+        
+        response_data = await self.cache.aload_coalesced(
+            prefix="api_responses",
+            key=cache_key,
+            compute=compute,
+            ttl_seconds=cache_ttl,
+            user_id=user_id,
+            distributed_lock=distributed_lock
+        )
+        
+        logger.debug(f"Computed response for request {request_id}")
+        return response_data
+    
     async def submit_background_task(
         self,
         task_type: str,
@@ -216,7 +262,7 @@ class PerformanceOptimizer:
             'cache_types': [
                 CacheConfig.USER_FILES,
                 CacheConfig.CHAT_HISTORY,
-                CacheConfig.ANALYTICS
+                CacheConfig.SUBJECT_CONTEXT
             ]
         }
         
@@ -263,7 +309,8 @@ class PerformanceOptimizer:
         if self.config['connection_pooling_enabled']:
             connection_stats = {
                 'dynamodb': dynamodb_pool.get_connection_stats(),
-                'active_connections': len(dynamodb_pool.aws_client._clients)
+                'active_connections': len(dynamodb_pool.aws_client._clients),
+                'aws_clients': aws_clients.get_stats()
             }
         
         # Combine all metrics
@@ -271,6 +318,9 @@ class PerformanceOptimizer:
             'performance_summary': summary,
             'cache_statistics': cache_stats,
             'connection_statistics': connection_stats,
+            'task_scheduler': self.task_manager.get_scheduler_stats(),
+            'task_persistence': self.task_manager.get_persistence_stats(),
+            'cpu_lane': cpu_lane.get_stats(),
             'configuration': self.config,
             'thresholds': self.thresholds
         }
@@ -310,8 +360,10 @@ class PerformanceOptimizer:
             cache_stats = metrics['cache_statistics']
             cache_size = cache_stats.get('memory_cache_size', 0)
             cache_limit = cache_stats.get('memory_cache_limit', 1)
+            cache_bytes = cache_stats.get('memory_cache_bytes', 0)
+            cache_bytes_limit = cache_stats.get('memory_cache_bytes_limit', 1)
             
-            if cache_size / cache_limit > 0.9:
+            if cache_size / cache_limit > 0.9 or cache_bytes / cache_bytes_limit > 0.9:
                 issues.append("Cache near capacity")
                 recommendations.append("Increase cache size or implement better eviction")
         
@@ -415,6 +467,7 @@ class PerformanceOptimizer:
                 health['components']['cache'] = {
                     'status': 'healthy',
                     'memory_usage': cache_stats.get('memory_cache_size', 0),
+                    'memory_bytes': cache_stats.get('memory_cache_bytes', 0),
                     'redis_available': cache_stats.get('redis_available', False),
                     'dynamodb_available': cache_stats.get('dynamodb_available', False)
                 }
@@ -461,23 +514,29 @@ class PerformanceOptimizer:
 
 
 # Global performance optimizer instance
-performance_optimizer = PerformanceOptimizer()
+performance_optimizer = LazyProxy(PerformanceOptimizer)
 
 
 def optimize_api_endpoint(
     cache_key_generator: Optional[Callable] = None,
     cache_ttl: int = CacheConfig.DEFAULT_TTL,
     enable_monitoring: bool = True,
-    enable_caching: bool = True
+    enable_caching: bool = True,
+    single_flight: bool = True,
+    distributed_lock: bool = False,
+    soft_ttl: Optional[int] = None
 ):
     """
     Decorator to optimize API endpoints with all performance features
     
     Args:
         cache_key_generator: Function to generate cache key from request
-        cache_ttl: Cache TTL in seconds
+        cache_ttl: Cache TTL in seconds (the hard TTL when soft_ttl is set)
         enable_monitoring: Enable performance monitoring
         enable_caching: Enable response caching
+        single_flight: Coalesce concurrent cache misses into one handler call
+        distributed_lock: Also coalesce across containers via a DynamoDB lock row
+        soft_ttl: Serve stale responses past this age while one background refresh runs
     """
     
     def decorator(func):
@@ -498,6 +557,9 @@ def optimize_api_endpoint(
                 except Exception as e:
                     logger.warning(f"Cache key generation failed: {e}")
             
+            # Stale-while-revalidate entries are read by compute_response
+            stale_while_revalidate = bool(enable_caching and cache_key and soft_ttl is not None)
+            
             # Start optimization
             if enable_monitoring or enable_caching:
                 cached_response = await performance_optimizer.optimize_request(
@@ -505,7 +567,7 @@ def optimize_api_endpoint(
                     endpoint=endpoint,
                     method="POST",  # Default to POST
                     user_id=user_id,
-                    cache_key=cache_key,
+                    cache_key=None if stale_while_revalidate else cache_key,
                     cache_ttl=cache_ttl
                 )
                 
@@ -514,10 +576,22 @@ def optimize_api_endpoint(
             
             # Execute function
             try:
-                result = await func(*args, **kwargs)
+                if enable_caching and cache_key and (single_flight or stale_while_revalidate):
+                    # Computes and caches once for all concurrent misses
+                    result = await performance_optimizer.compute_response(
+                        request_id=request_id,
+                        cache_key=cache_key,
+                        compute=lambda: func(*args, **kwargs),
+                        user_id=user_id,
+                        cache_ttl=cache_ttl,
+                        distributed_lock=distributed_lock,
+                        soft_ttl=soft_ttl
+                    )
+                else:
+                    result = await func(*args, **kwargs)
                 
                 # Cache response
-                if enable_caching and cache_key:
+                if enable_caching and cache_key and not (single_flight or stale_while_revalidate):
                     await performance_optimizer.cache_response(
                         request_id=request_id,
                         cache_key=cache_key,
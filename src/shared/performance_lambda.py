@@ -15,6 +15,7 @@ from .performance_integration import (
     performance_optimizer, initialize_performance_system, cleanup_performance_system
 )
 from .performance_cache import performance_cache, CacheConfig
+from .semantic_cache import semantic_response_cache
 from .connection_pool import cleanup_connection_pools
 from .async_processor import async_task_manager, background_task_queue
 from .performance_monitor import performance_monitor
@@ -28,6 +29,11 @@ def lambda_handler(event, context):
     Lambda handler for performance optimization endpoints
     """
     
+    # SQS-triggered background task batches (partial batch responses)
+    records = event.get('Records') or []
+    if records and records[0].get('eventSource') == 'aws:sqs':
+        return asyncio.run(background_task_queue.handle_sqs_event(event))
+    
     try:
         # Initialize performance system
         asyncio.run(initialize_performance_system())
@@ -212,6 +218,7 @@ async def handle_cache_stats(query_params: Dict[str, str]) -> Dict[str, Any]:
             },
             'body': json.dumps({
                 'cache_stats': stats,
+                'semantic_cache_stats': semantic_response_cache.get_stats(),
                 'timestamp': datetime.utcnow().isoformat()
             })
         }
@@ -6,20 +6,16 @@ Provides vector database operations for RAG functionality
 import os
 import json
 import uuid
+import importlib.util
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-try:
-    from pinecone import Pinecone
-    PINECONE_AVAILABLE = True
-except ImportError:
-    try:
-        # Fallback for older pinecone-client package
-        import pinecone
-        PINECONE_AVAILABLE = True
-    except ImportError:
-        PINECONE_AVAILABLE = False
-        print("Warning: Pinecone not available. Install with: pip install pinecone")
+from .lazy import LazyProxy
+
+# Pinecone is imported on first use; only check that it is installed here
+PINECONE_AVAILABLE = importlib.util.find_spec('pinecone') is not None
+if not PINECONE_AVAILABLE:
+    print("Warning: Pinecone not available. Install with: pip install pinecone")
 
 
 class PineconeUtils:
@@ -30,9 +26,19 @@ class PineconeUtils:
         self.index_name = index_name
         self.pc = None
         self.index = None
+        self._connected = False
+    
+    def _connect(self) -> None:
+        """Connect to Pinecone on first use instead of at import time"""
+        
+        if self._connected or self.index is not None:
+            return
+        self._connected = True
         
         if PINECONE_AVAILABLE and self.api_key:
             try:
+                from pinecone import Pinecone
+                
                 self.pc = Pinecone(api_key=self.api_key)
                 if self.pc.has_index(self.index_name):
                     self.index = self.pc.Index(self.index_name)
@@ -43,10 +49,12 @@ class PineconeUtils:
     
     def is_available(self) -> bool:
         """Check if Pinecone is available and configured"""
+        self._connect()
         return PINECONE_AVAILABLE and self.index is not None
     
     def create_index_if_not_exists(self, dimension: int = 1536, metric: str = "cosine") -> bool:
         """Create Pinecone index if it doesn't exist"""
+        self._connect()
         if not PINECONE_AVAILABLE or not self.pc:
             return False
         
@@ -245,7 +253,7 @@ def format_rag_context(matches: List[Dict[str, Any]], max_context_length: int =
 
 
 # Global instance for easy import
-pinecone_utils = PineconeUtils()
+pinecone_utils = LazyProxy(PineconeUtils)
 
 
 # Helper functions for common RAG operations
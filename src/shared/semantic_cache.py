@@ -0,0 +1,325 @@
+"""
+Semantic Response Cache for Bedrock Completions
+Reuses answers for near-identical questions asked against the same retrieved documents
+"""
+
+import os
+import math
+import time
+import uuid
+import base64
+import struct
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+import logging
+
+from .performance_cache import performance_cache, CacheConfig
+from .lazy import LazyProxy
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCacheConfig:
+    """Semantic cache configuration settings"""
+    
+    SIMILARITY_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.95))
+    NEAR_MISS_MARGIN = 0.05          # Misses this close to the threshold are counted separately
+    MAX_ENTRIES_PER_SCOPE = 64       # Oldest questions are dropped beyond this (keeps a 1536-dim index under the item limit)
+    TTL = CacheConfig.LONG_TTL
+    
+    # A sample of hits is re-generated to measure the false-hit rate
+    VERIFY_SAMPLE_RATE = float(os.getenv('SEMANTIC_CACHE_VERIFY_RATE', 0.02))
+    ANSWER_AGREEMENT = 0.85          # Cached vs fresh answer similarity below this is a false hit
+    
+    MAX_LOCAL_SCOPES = 256           # Decoded vector indexes kept in process
+    SCOPE_KEY = "semantic"
+
+
+def context_fingerprint(documents: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    Order-independent fingerprint of a retrieved document set
+    
+    Args:
+        documents: RAG context items (file_id/chunk_index, id, or text)
+    
+    Returns:
+        Short hex digest ("none" for an empty set)
+    """
+    
+    if not documents:
+        return "none"
+    
+    parts = set()
+    for doc in documents:
+        if doc.get('file_id'):
+            parts.add(f"{doc['file_id']}#{doc.get('chunk_index', 0)}")
+        elif doc.get('id'):
+            parts.add(str(doc['id']))
+        else:
+            parts.add(hashlib.sha256(doc.get('text', '').encode('utf-8')).hexdigest())
+    
+    return hashlib.sha256("|".join(sorted(parts)).encode('utf-8')).hexdigest()[:16]
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def _pack(vector: List[float]) -> str:
+    """Pack a unit vector as base64 float16"""
+    
+    return base64.b64encode(struct.pack(f"<{len(vector)}e", *vector)).decode('ascii')
+
+
+def _unpack(packed: str) -> List[float]:
+    data = base64.b64decode(packed)
+    return list(struct.unpack(f"<{len(data) // 2}e", data))
+
+
+class SemanticResponseCache:
+    """
+    Caches LLM answers by question embedding within a (model, subject, document set) scope
+    
+    Each scope has one BEDROCK_RESPONSES index entry holding only answer ids
+    and packed question vectors; a decoded copy is kept in process and
+    searched locally with cosine similarity. Every answer is its own
+    BEDROCK_RESPONSES entry, read only on a hit. The index is changed with
+    the cache's locked read-modify-write, so concurrent stores are kept.
+    """
+    
+    def __init__(self, cache=performance_cache, threshold: float = SemanticCacheConfig.SIMILARITY_THRESHOLD):
+        self.cache = cache
+        self.threshold = threshold
+        self._local_index: OrderedDict = OrderedDict()  # scope key -> (version, [(entry, vector)])
+        self._lock = threading.Lock()
+        self.stats = {
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'near_misses': 0,
+            'stores': 0,
+            'verifications': 0,
+            'false_hits': 0,
+            'hit_similarity_total': 0.0
+        }
+    
+    def _scope_key(self, fingerprint: str, subject_id: Optional[str], model_id: str) -> str:
+        return f"{SemanticCacheConfig.SCOPE_KEY}:{model_id}:{subject_id or 'global'}:{fingerprint}"
+    
+    def _response_key(self, scope_key: str, entry_id: str) -> str:
+        return f"{scope_key}:{entry_id}"
+    
+    async def _load_scope(self, scope_key: str) -> List[Tuple[str, List[float]]]:
+        """Fetch a scope index as (entry id, vector) pairs (decoded once per index version)"""
+        
+        index = await self.cache.aget(CacheConfig.BEDROCK_RESPONSES, scope_key) or {'version': None, 'entries': []}
+        
+        with self._lock:
+            cached = self._local_index.get(scope_key)
+            if cached and cached[0] == index['version']:
+                self._local_index.move_to_end(scope_key)
+                return cached[1]
+        
+        vectors = [(entry['id'], _unpack(entry['embedding'])) for entry in index['entries']]
+        
+        with self._lock:
+            self._local_index[scope_key] = (index['version'], vectors)
+            while len(self._local_index) > SemanticCacheConfig.MAX_LOCAL_SCOPES:
+                self._local_index.popitem(last=False)
+        
+        return vectors
+    
+    async def lookup(
+        self,
+        embedding: List[float],
+        fingerprint: str,
+        subject_id: Optional[str] = None,
+        model_id: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically equivalent question
+        
+        Args:
+            embedding: Question embedding
+            fingerprint: Retrieved document set fingerprint
+            subject_id: Subject scope
+            model_id: Model that produced the answers
+        
+        Returns:
+            Best matching entry with its similarity, or None
+        """
+        
+        scope_key = self._scope_key(fingerprint, subject_id, model_id)
+        vectors = await self._load_scope(scope_key)
+        query_vector = _normalize(embedding)
+        
+        best_id, best_similarity = None, -1.0
+        for entry_id, vector in vectors:
+            similarity = _dot(query_vector, vector)
+            if similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+        
+        self.stats['lookups'] += 1
+        
+        if best_id is not None and best_similarity >= self.threshold:
+            # The answer may have expired or been evicted before its index entry
+            entry = await self.cache.aget(CacheConfig.BEDROCK_RESPONSES, self._response_key(scope_key, best_id))
+            if entry is not None:
+                self.stats['hits'] += 1
+                self.stats['hit_similarity_total'] += best_similarity
+                return {**entry, 'id': best_id, 'similarity': best_similarity, 'scope_key': scope_key}
+        
+        self.stats['misses'] += 1
+        if best_similarity >= self.threshold - SemanticCacheConfig.NEAR_MISS_MARGIN:
+            self.stats['near_misses'] += 1
+        return None
+    
+    async def store(
+        self,
+        query: str,
+        embedding: List[float],
+        response: Any,
+        fingerprint: str,
+        subject_id: Optional[str] = None,
+        model_id: str = ""
+    ) -> None:
+        """Store an answer under its own key and append it to its scope index"""
+        
+        scope_key = self._scope_key(fingerprint, subject_id, model_id)
+        entry_id = uuid.uuid4().hex
+        
+        # The answer goes first so an indexed entry always has one to read
+        await self.cache.aset(
+            CacheConfig.BEDROCK_RESPONSES,
+            self._response_key(scope_key, entry_id),
+            {'query': query, 'response': response, 'created_at': time.time()},
+            SemanticCacheConfig.TTL
+        )
+        
+        indexed = {'id': entry_id, 'embedding': _pack(_normalize(embedding))}
+        
+        def append(index: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            entries = (index or {}).get('entries', []) + [indexed]
+            return {'version': uuid.uuid4().hex, 'entries': entries[-SemanticCacheConfig.MAX_ENTRIES_PER_SCOPE:]}
+        
+        await self.cache.aupdate(CacheConfig.BEDROCK_RESPONSES, scope_key, append, SemanticCacheConfig.TTL)
+        self.stats['stores'] += 1
+    
+    async def report_false_hit(self, hit: Dict[str, Any]) -> None:
+        """Count a wrong cached answer and drop it from its scope index (the answer itself expires)"""
+        
+        self.stats['false_hits'] += 1
+        
+        def remove(index: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if not index:
+                return None
+            entries = [entry for entry in index['entries'] if entry['id'] != hit['id']]
+            return {'version': uuid.uuid4().hex, 'entries': entries}
+        
+        await self.cache.aupdate(CacheConfig.BEDROCK_RESPONSES, hit['scope_key'], remove, SemanticCacheConfig.TTL)
+    
+    async def get_or_invoke(
+        self,
+        query: str,
+        documents: Optional[List[Dict[str, Any]]],
+        invoke: Callable[[], Awaitable[Any]],
+        embed: Callable[[str], Awaitable[Optional[List[float]]]],
+        subject_id: Optional[str] = None,
+        model_id: str = "",
+        text_of: Callable[[Any], str] = str
+    ) -> Tuple[Any, str]:
+        """
+        Return a cached answer for an equivalent question, or invoke the model
+        
+        Args:
+            query: User question
+            documents: Retrieved documents the answer is grounded in
+            invoke: Produces a fresh answer (exceptions propagate, nothing is cached)
+            embed: Embeds text; None/empty disables caching for this call
+            subject_id: Subject scope
+            model_id: Model identifier (part of the scope)
+            text_of: Extracts answer text for false-hit verification
+        
+        Returns:
+            Tuple of (answer, cache status: hit, miss, false_hit or bypass)
+        """
+        
+        try:
+            embedding = await embed(query)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            embedding = None
+        
+        if not embedding:
+            return await invoke(), 'bypass'
+        
+        fingerprint = context_fingerprint(documents)
+        
+        try:
+            hit = await self.lookup(embedding, fingerprint, subject_id, model_id)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            hit = None
+        
+        if hit and random.random() < SemanticCacheConfig.VERIFY_SAMPLE_RATE:
+            # Sampled verification: regenerate and compare the answers
+            self.stats['verifications'] += 1
+            fresh = await invoke()
+            if not fresh:
+                return fresh, 'miss'
+            
+            try:
+                cached_vector = await embed(text_of(hit['response']))
+                fresh_vector = await embed(text_of(fresh))
+            except Exception as e:
+                logger.warning(f"Semantic cache verification failed: {e}")
+                cached_vector = fresh_vector = None
+            
+            if not cached_vector or not fresh_vector:
+                return fresh, 'hit'
+            
+            agreement = _dot(_normalize(cached_vector), _normalize(fresh_vector))
+            if agreement >= SemanticCacheConfig.ANSWER_AGREEMENT:
+                return fresh, 'hit'
+            
+            logger.info(f"Semantic cache false hit (answer agreement {agreement:.2f}) for: {query[:80]}")
+            await self.report_false_hit(hit)
+            await self.store(query, embedding, fresh, fingerprint, subject_id, model_id)
+            return fresh, 'false_hit'
+        
+        if hit:
+            logger.debug(f"Semantic cache HIT ({hit['similarity']:.3f}): {query[:80]}")
+            return hit['response'], 'hit'
+        
+        response = await invoke()
+        if response:
+            try:
+                await self.store(query, embedding, response, fingerprint, subject_id, model_id)
+            except Exception as e:
+                logger.warning(f"Semantic cache store failed: {e}")
+        
+        return response, 'miss'
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get semantic cache statistics"""
+        
+        stats = dict(self.stats)
+        stats['hit_rate_percent'] = stats['hits'] / stats['lookups'] * 100 if stats['lookups'] else 0.0
+        stats['false_hit_rate_percent'] = (
+            stats['false_hits'] / stats['verifications'] * 100 if stats['verifications'] else 0.0
+        )
+        stats['avg_hit_similarity'] = stats['hit_similarity_total'] / stats['hits'] if stats['hits'] else 0.0
+        stats['local_scopes'] = len(self._local_index)
+        return stats
+
+
+# Global semantic cache instance
+semantic_response_cache = LazyProxy(SemanticResponseCache)
@@ -0,0 +1,272 @@
+"""
+Task Scheduler for LMS API
+Bounded, prioritized and per-user fair admission for in-process async tasks
+"""
+
+import os
+import time
+import bisect
+import asyncio
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerConfig:
+    """Task scheduler configuration settings"""
+    
+    # Priority classes, highest first; a class only runs when no higher class can
+    PRIORITY_CLASSES = ['interactive', 'batch']
+    DEFAULT_PRIORITY = 'interactive'
+    
+    # Task types that a user is not waiting on
+    TASK_PRIORITIES = {
+        'file_processing': 'batch',
+        'document_indexing': 'batch',
+        'analytics_calculation': 'batch',
+        'cache_warming': 'batch'
+    }
+    
+    # Tasks running at once, overall and per task type
+    MAX_CONCURRENT = int(os.getenv('TASK_MAX_CONCURRENT', 10))
+    DEFAULT_TYPE_LIMIT = int(os.getenv('TASK_TYPE_LIMIT', 4))
+    TYPE_LIMITS = {
+        'file_processing': 4,
+        'document_indexing': 4,
+        'quiz_generation': 6,
+        'analytics_calculation': 2,
+        'cache_warming': 2
+    }
+    
+    # Queued (not yet running) tasks per priority class before submissions are rejected
+    QUEUE_LIMITS = {
+        'interactive': int(os.getenv('TASK_QUEUE_LIMIT_INTERACTIVE', 100)),
+        'batch': int(os.getenv('TASK_QUEUE_LIMIT_BATCH', 500))
+    }
+    
+    DEFAULT_USER_WEIGHT = 1.0
+    LATENCY_SAMPLES = 500   # Recent wait/run times kept per class for percentiles
+
+
+class TaskQueueFullError(Exception):
+    """Raised when a priority class's queue is at capacity"""
+    def __init__(self, message: str, priority: str = None, task_type: str = None, queue_depth: int = None):
+        super().__init__(message)
+        self.priority = priority
+        self.task_type = task_type
+        self.queue_depth = queue_depth
+
+
+@dataclass(order=True)
+class _Job:
+    """A queued unit of work, ordered by (virtual start tag, submission order)"""
+    tag: float
+    seq: int
+    task_type: str = field(compare=False)
+    user_id: str = field(compare=False)
+    priority: str = field(compare=False)
+    start: Callable[[], Awaitable[Any]] = field(compare=False)
+    enqueued_at: float = field(default_factory=time.monotonic, compare=False)
+
+
+def _percentile(samples: deque, percent: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class _ClassState:
+    """Queue, fairness bookkeeping and metrics for one priority class"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.queue: List[_Job] = []          # Sorted by (virtual start tag, seq)
+        self.virtual_time = 0.0
+        self.user_finish: Dict[str, float] = {}
+        self.running = 0
+        self.counters = {'submitted': 0, 'rejected': 0, 'started': 0, 'completed': 0, 'failed': 0}
+        self.wait_times = deque(maxlen=SchedulerConfig.LATENCY_SAMPLES)
+        self.run_times = deque(maxlen=SchedulerConfig.LATENCY_SAMPLES)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.counters)
+        stats.update({
+            'queue_depth': len(self.queue),
+            'running': self.running,
+            'avg_wait_seconds': sum(self.wait_times) / len(self.wait_times) if self.wait_times else 0.0,
+            'p95_wait_seconds': _percentile(self.wait_times, 95),
+            'avg_run_seconds': sum(self.run_times) / len(self.run_times) if self.run_times else 0.0,
+            'p95_run_seconds': _percentile(self.run_times, 95)
+        })
+        return stats
+
+
+class FairTaskScheduler:
+    """
+    Admits queued tasks under global and per-type concurrency limits
+    
+    Priority classes are served strictly in order. Within a class, users
+    share capacity by start-time fair queuing: each job is tagged with
+    max(class virtual time, the user's previous finish tag) and the
+    lowest runnable tag goes next, so one user's backlog cannot delay
+    another user's first task by more than one job per user ahead of it.
+    A job whose task type is at its limit is skipped, not waited on.
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: int = SchedulerConfig.MAX_CONCURRENT,
+        type_limits: Optional[Dict[str, int]] = None,
+        queue_limits: Optional[Dict[str, int]] = None
+    ):
+        self.max_concurrent = max_concurrent
+        self.type_limits = {**SchedulerConfig.TYPE_LIMITS, **(type_limits or {})}
+        self.queue_limits = {**SchedulerConfig.QUEUE_LIMITS, **(queue_limits or {})}
+        self._classes = {name: _ClassState(name) for name in SchedulerConfig.PRIORITY_CLASSES}
+        self._running_by_type: Dict[str, int] = {}
+        self._running = 0
+        self._seq = itertools.count()
+    
+    def priority_for(self, task_type: str) -> str:
+        """Priority class for a task type"""
+        
+        return SchedulerConfig.TASK_PRIORITIES.get(task_type, SchedulerConfig.DEFAULT_PRIORITY)
+    
+    def type_limit(self, task_type: str) -> int:
+        return self.type_limits.get(task_type, SchedulerConfig.DEFAULT_TYPE_LIMIT)
+    
+    def check_capacity(self, task_type: str, priority: Optional[str] = None) -> str:
+        """
+        Ensure a task of this type can be queued
+        
+        Args:
+            task_type: Task type
+            priority: Priority class (defaults to the task type's class)
+        
+        Returns:
+            Resolved priority class
+        
+        Raises:
+            TaskQueueFullError: The class's queue is full
+        """
+        
+        priority = priority or self.priority_for(task_type)
+        state = self._classes.get(priority)
+        if state is None:
+            raise ValueError(f"Unknown task priority: {priority}")
+        
+        limit = self.queue_limits.get(priority)
+        if limit is not None and len(state.queue) >= limit:
+            state.counters['rejected'] += 1
+            raise TaskQueueFullError(
+                f"Task queue '{priority}' is full ({limit} queued); retry later",
+                priority=priority,
+                task_type=task_type,
+                queue_depth=len(state.queue)
+            )
+        return priority
+    
+    def submit(
+        self,
+        task_type: str,
+        user_id: str,
+        start: Callable[[], Awaitable[Any]],
+        priority: Optional[str] = None,
+        weight: float = SchedulerConfig.DEFAULT_USER_WEIGHT
+    ) -> None:
+        """
+        Queue a task and start whatever is now runnable
+        
+        Must be called from the event loop that should run the task.
+        
+        Args:
+            task_type: Task type (selects the concurrency limit and default class)
+            user_id: User the task is fair-shared under
+            start: Zero-argument coroutine function that runs the task
+            priority: Priority class override
+            weight: User's share relative to others in the class
+        
+        Raises:
+            TaskQueueFullError: The class's queue is full
+        """
+        
+        priority = self.check_capacity(task_type, priority)
+        state = self._classes[priority]
+        
+        tag = max(state.virtual_time, state.user_finish.get(user_id, 0.0))
+        state.user_finish[user_id] = tag + 1.0 / max(weight, 1e-6)
+        
+        job = _Job(tag=tag, seq=next(self._seq), task_type=task_type, user_id=user_id, priority=priority, start=start)
+        bisect.insort(state.queue, job)
+        state.counters['submitted'] += 1
+        
+        self._dispatch()
+    
+    def _next_job(self) -> Optional[_Job]:
+        """Remove and return the next runnable job, if any"""
+        
+        if self._running >= self.max_concurrent:
+            return None
+        
+        for name in SchedulerConfig.PRIORITY_CLASSES:
+            state = self._classes[name]
+            for index, job in enumerate(state.queue):
+                if self._running_by_type.get(job.task_type, 0) < self.type_limit(job.task_type):
+                    del state.queue[index]
+                    state.virtual_time = max(state.virtual_time, job.tag)
+                    if not state.queue:
+                        # Idle class: forget finish tags so returning users start fresh
+                        state.user_finish.clear()
+                    return job
+        return None
+    
+    def _dispatch(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            
+            state = self._classes[job.priority]
+            state.running += 1
+            state.counters['started'] += 1
+            state.wait_times.append(time.monotonic() - job.enqueued_at)
+            self._running += 1
+            self._running_by_type[job.task_type] = self._running_by_type.get(job.task_type, 0) + 1
+            
+            asyncio.get_running_loop().create_task(self._run(job))
+    
+    async def _run(self, job: _Job) -> None:
+        state = self._classes[job.priority]
+        started = time.monotonic()
+        
+        try:
+            await job.start()
+            state.counters['completed'] += 1
+        except Exception as e:
+            state.counters['failed'] += 1
+            # Task owners log their own failures
+            logger.debug(f"Scheduled {job.task_type} task for user {job.user_id} failed: {e}")
+        finally:
+            state.run_times.append(time.monotonic() - started)
+            state.running -= 1
+            self._running -= 1
+            self._running_by_type[job.task_type] -= 1
+            self._dispatch()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait time and run time per priority class"""
+        
+        return {
+            'running': self._running,
+            'max_concurrent': self.max_concurrent,
+            'running_by_type': {k: v for k, v in self._running_by_type.items() if v},
+            'classes': {
+                name: {**state.get_stats(), 'queue_limit': self.queue_limits.get(name)}
+                for name, state in self._classes.items()
+            }
+        }
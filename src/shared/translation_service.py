@@ -4,11 +4,15 @@ Provides comprehensive translation capabilities with round-trip validation
 """
 
 import json
-import boto3
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from .connection_pool import get_client, get_resource
+from .async_aws import async_aws
+from .workflow_graph import Deadline
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -16,11 +20,14 @@ logger.setLevel(logging.INFO)
 class TranslationService:
     """Advanced translation service with round-trip validation"""
     
+    # Typical cost of the back-translation; skipped when a deadline leaves less
+    ROUND_TRIP_EXPECTED_MS = 400
+    
     def __init__(self):
         """Initialize AWS services"""
-        self.translate = boto3.client('translate')
-        self.comprehend = boto3.client('comprehend')
-        self.dynamodb = boto3.resource('dynamodb')
+        self.translate = get_client('translate')
+        self.comprehend = get_client('comprehend')
+        self.dynamodb = get_resource('dynamodb')
         
         # Translation history table
         self.translations_table = self.dynamodb.Table('lms-translations')
@@ -46,9 +53,10 @@ class TranslationService:
         text: str,
         target_language: str,
         user_id: str = None,
-        enable_round_trip: bool = True
+        enable_round_trip: bool = True,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
-        """Detect source language and translate with validation"""
+        """Detect source language and translate with validation (shed when the deadline is near)"""
         
         try:
             # Detect source language
@@ -71,7 +79,9 @@ class TranslationService:
             
             # Round-trip validation if enabled
             round_trip_data = {}
-            if enable_round_trip:
+            if enable_round_trip and deadline and not deadline.allows(self.ROUND_TRIP_EXPECTED_MS):
+                round_trip_data = {"validation_performed": False, "shed": "deadline"}
+            elif enable_round_trip:
                 round_trip_data = await self._perform_round_trip_validation(
                     text, translated_text, source_language, target_language
                 )
@@ -112,26 +122,26 @@ class TranslationService:
         """Translate multiple texts efficiently"""
         
         try:
-            results = []
-            
-            for i, text in enumerate(texts):
+            async def translate_one(i: int, text: str) -> Dict[str, Any]:
                 if not text.strip():
-                    results.append({
+                    return {
                         "index": i,
                         "success": False,
                         "error": "Empty text"
-                    })
-                    continue
+                    }
                 
                 # Translate individual text
                 translation_result = await self.detect_and_translate(
                     text, target_language, user_id, enable_round_trip=False
                 )
                 
-                results.append({
+                return {
                     "index": i,
                     **translation_result
-                })
+                }
+            
+            # Texts are translated concurrently
+            results = await asyncio.gather(*(translate_one(i, text) for i, text in enumerate(texts)))
             
             # Calculate batch statistics
             successful_translations = len([r for r in results if r.get("success", False)])
@@ -211,7 +221,7 @@ class TranslationService:
         """Advanced language detection with confidence scoring"""
         
         try:
-            response = self.comprehend.detect_dominant_language(Text=text)
+            response = await async_aws.detect('dominant_language', text, client=self.comprehend)
             
             if response['Languages']:
                 # Get the most confident language
@@ -233,6 +243,12 @@ class TranslationService:
             logger.warning(f"Language detection failed: {str(e)}")
             return "en"
     
+    async def _auto_translate(self, text: str, target_lang: str) -> Tuple[str, str]:
+        """Detect the source language and translate; returns (source language, translation)"""
+        
+        source_lang = await self._detect_language_advanced(text)
+        return source_lang, await self._translate_text(text, source_lang, target_lang)
+    
     async def _translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
         """Translate text using Amazon Translate"""
         
@@ -243,13 +259,7 @@ class TranslationService:
             if target_lang not in self.supported_languages:
                 target_lang = "en"
             
-            response = self.translate.translate_text(
-                Text=text,
-                SourceLanguageCode=source_lang,
-                TargetLanguageCode=target_lang
-            )
-            
-            translated_text = response['TranslatedText']
+            translated_text = await async_aws.translate_text(text, source_lang, target_lang, client=self.translate)
             logger.info(f"Translated text from {source_lang} to {target_lang}")
             
             return translated_text
@@ -330,49 +340,40 @@ class TranslationService:
         
         translated_quiz = quiz_content.copy()
         
+        async def translate_question(question: Dict) -> Dict:
+            translated_question = question.copy()
+            fields = [name for name in ('question', 'explanation') if name in question]
+            options = list(question.get('options', {}).items())
+            
+            # Question text, explanation and options are translated concurrently
+            translations = await asyncio.gather(
+                *(self._auto_translate(question[name], target_language) for name in fields),
+                *(self._auto_translate(option_text, target_language) for _, option_text in options)
+            )
+            
+            for name, (_, translated) in zip(fields, translations):
+                translated_question[name] = translated
+            if 'options' in question:
+                translated_question['options'] = {
+                    key: translated for (key, _), (_, translated) in zip(options, translations[len(fields):])
+                }
+            
+            return translated_question
+        
         # Translate quiz title
         if 'quiz_title' in quiz_content:
-            source_lang = await self._detect_language_advanced(quiz_content['quiz_title'])
-            translated_title = await self._translate_text(
-                quiz_content['quiz_title'], source_lang, target_language
+            source_lang, translated_quiz['quiz_title'] = await self._auto_translate(
+                quiz_content['quiz_title'], target_language
             )
-            translated_quiz['quiz_title'] = translated_title
             translation_log.append(f"Translated quiz title from {source_lang}")
         
         # Translate questions
         if 'questions' in quiz_content:
-            translated_questions = []
-            
-            for question in quiz_content['questions']:
-                translated_question = question.copy()
-                
-                # Translate question text
-                if 'question' in question:
-                    source_lang = await self._detect_language_advanced(question['question'])
-                    translated_question['question'] = await self._translate_text(
-                        question['question'], source_lang, target_language
-                    )
-                
-                # Translate options
-                if 'options' in question:
-                    translated_options = {}
-                    for key, option_text in question['options'].items():
-                        source_lang = await self._detect_language_advanced(option_text)
-                        translated_options[key] = await self._translate_text(
-                            option_text, source_lang, target_language
-                        )
-                    translated_question['options'] = translated_options
-                
-                # Translate explanation
-                if 'explanation' in question:
-                    source_lang = await self._detect_language_advanced(question['explanation'])
-                    translated_question['explanation'] = await self._translate_text(
-                        question['explanation'], source_lang, target_language
-                    )
-                
-                translated_questions.append(translated_question)
+            translated_questions = await asyncio.gather(
+                *(translate_question(question) for question in quiz_content['questions'])
+            )
             
-            translated_quiz['questions'] = translated_questions
+            translated_quiz['questions'] = list(translated_questions)
             translation_log.append(f"Translated {len(translated_questions)} questions")
         
         return translated_quiz
@@ -386,31 +387,24 @@ class TranslationService:
         """Translate lesson-specific content"""
         
         translated_lesson = lesson_content.copy()
+        fields = [name for name in ('title', 'content') if name in lesson_content]
+        objectives = lesson_content.get('objectives')
+        if not isinstance(objectives, list):
+            objectives = None
         
-        # Translate lesson title
-        if 'title' in lesson_content:
-            source_lang = await self._detect_language_advanced(lesson_content['title'])
-            translated_lesson['title'] = await self._translate_text(
-                lesson_content['title'], source_lang, target_language
-            )
-            translation_log.append(f"Translated lesson title from {source_lang}")
+        # Title, body and objectives are translated concurrently
+        translations = await asyncio.gather(
+            *(self._auto_translate(lesson_content[name], target_language) for name in fields),
+            *(self._auto_translate(objective, target_language) for objective in objectives or [])
+        )
         
-        # Translate lesson content/body
-        if 'content' in lesson_content:
-            source_lang = await self._detect_language_advanced(lesson_content['content'])
-            translated_lesson['content'] = await self._translate_text(
-                lesson_content['content'], source_lang, target_language
-            )
-            translation_log.append(f"Translated lesson content from {source_lang}")
+        for name, (source_lang, translated) in zip(fields, translations):
+            translated_lesson[name] = translated
+            translation_log.append(f"Translated lesson {name} from {source_lang}")
         
         # Translate objectives
-        if 'objectives' in lesson_content and isinstance(lesson_content['objectives'], list):
-            translated_objectives = []
-            for objective in lesson_content['objectives']:
-                source_lang = await self._detect_language_advanced(objective)
-                translated_objectives.append(
-                    await self._translate_text(objective, source_lang, target_language)
-                )
+        if objectives is not None:
+            translated_objectives = [translated for _, translated in translations[len(fields):]]
             translated_lesson['objectives'] = translated_objectives
             translation_log.append(f"Translated {len(translated_objectives)} objectives")
         
@@ -424,31 +418,27 @@ class TranslationService:
     ) -> Dict[str, Any]:
         """Translate generic content structure"""
         
-        translated_content = {}
+        translated_content = dict(content)
         
-        for key, value in content.items():
-            if isinstance(value, str) and value.strip():
-                # Translate string values
-                source_lang = await self._detect_language_advanced(value)
-                translated_content[key] = await self._translate_text(
-                    value, source_lang, target_language
-                )
-                translation_log.append(f"Translated field '{key}' from {source_lang}")
-            elif isinstance(value, list):
-                # Translate list items if they are strings
-                translated_list = []
-                for item in value:
-                    if isinstance(item, str) and item.strip():
-                        source_lang = await self._detect_language_advanced(item)
-                        translated_list.append(
-                            await self._translate_text(item, source_lang, target_language)
-                        )
-                    else:
-                        translated_list.append(item)
-                translated_content[key] = translated_list
-            else:
-                # Keep non-string values as-is
-                translated_content[key] = value
+        async def translate_field(key: str, value: str) -> None:
+            source_lang, translated_content[key] = await self._auto_translate(value, target_language)
+            translation_log.append(f"Translated field '{key}' from {source_lang}")
+        
+        async def translate_item(item: Any) -> Any:
+            if isinstance(item, str) and item.strip():
+                return (await self._auto_translate(item, target_language))[1]
+            return item
+        
+        async def translate_list(key: str, items: List) -> None:
+            # Translate list items if they are strings
+            translated_content[key] = list(await asyncio.gather(*(translate_item(item) for item in items)))
+        
+        # Every field is translated concurrently; non-string values are kept as-is
+        await asyncio.gather(*(
+            translate_field(key, value) if isinstance(value, str) else translate_list(key, value)
+            for key, value in content.items()
+            if (isinstance(value, str) and value.strip()) or isinstance(value, list)
+        ))
         
         return translated_content
     
@@ -479,7 +469,7 @@ class TranslationService:
                 'ttl': int((datetime.utcnow().timestamp() + 86400 * 30))  # 30 days TTL
             }
             
-            self.translations_table.put_item(Item=translation_item)
+            await async_aws.put_item(self.translations_table, translation_item)
             return translation_id
             
         except Exception as e:
@@ -512,7 +502,7 @@ class TranslationService:
                 'ttl': int((datetime.utcnow().timestamp() + 86400 * 90))  # 90 days TTL
             }
             
-            self.translations_table.put_item(Item=translation_item)
+            await async_aws.put_item(self.translations_table, translation_item)
             return translation_id
             
         except Exception as e:
@@ -527,7 +517,8 @@ class TranslationService:
         """Get user's translation history"""
         
         try:
-            response = self.translations_table.query(
+            response = await async_aws.query(
+                self.translations_table,
                 IndexName='user-id-index',
                 KeyConditionExpression='user_id = :user_id',
                 ExpressionAttributeValues={':user_id': user_id},
@@ -562,11 +553,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Route based on API path
         if api_path == '/translate':
-            return await handle_translation(translation_service, body)
+            return asyncio.run(handle_translation(translation_service, body))
         elif api_path == '/batch-translate':
-            return await handle_batch_translation(translation_service, body)
+            return asyncio.run(handle_batch_translation(translation_service, body))
         elif api_path == '/translate-educational':
-            return await handle_educational_translation(translation_service, body)
+            return asyncio.run(handle_educational_translation(translation_service, body))
         elif api_path == '/supported-languages':
             return handle_supported_languages(translation_service)
         else:
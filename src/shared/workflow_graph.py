@@ -0,0 +1,578 @@
+"""
+Workflow Graph for LMS API
+Builds node workflows once into validated, immutable execution plans reused across requests
+"""
+
+import copy
+import time
+import heapq
+import asyncio
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Callable, Mapping, Tuple, FrozenSet, Iterable
+import logging
+
+from .workflow_metrics import WorkflowMetrics
+
+logger = logging.getLogger(__name__)
+
+END = "END"
+
+
+class WorkflowGraphError(Exception):
+    """Raised when a workflow graph is invalid"""
+    
+    def __init__(self, message: str, nodes: Optional[List[str]] = None):
+        self.message = message
+        self.nodes = nodes or []
+        super().__init__(self.message)
+
+
+def _find_cycle(order: List[str], successors: Mapping[str, Iterable[str]]) -> Optional[List[str]]:
+    """Depth-first search for a back edge; returns the cycle's path"""
+    
+    visiting, done = set(), set()
+    
+    def visit(node: str, path: List[str]) -> Optional[List[str]]:
+        visiting.add(node)
+        for target in successors.get(node, ()):
+            if target in visiting:
+                return path[path.index(target):] + [target]
+            if target not in done:
+                cycle = visit(target, path + [target])
+                if cycle:
+                    return cycle
+        visiting.discard(node)
+        done.add(node)
+        return None
+    
+    for node in order:
+        if node not in done:
+            cycle = visit(node, [node])
+            if cycle:
+                return cycle
+    return None
+
+
+def validate_graph(
+    entry_point: Optional[str],
+    nodes: List[str],
+    edges: Mapping[str, List[str]],
+    routes: Mapping[str, Mapping[Any, str]],
+    end: str = END,
+    dependencies: Optional[Mapping[str, Iterable[str]]] = None
+) -> None:
+    """
+    Check a workflow graph before it is run
+    
+    Args:
+        entry_point: First node
+        nodes: Node names
+        edges: Direct edges (node -> successor names; several fan out)
+        routes: Conditional edges (node -> {condition result: successor name})
+        end: Name of the terminal pseudo-node
+        dependencies: Data dependencies (node -> nodes that must finish first)
+    
+    Raises:
+        WorkflowGraphError: Missing entry point, unknown successors,
+            unreachable nodes or a cycle
+    """
+    
+    known = set(nodes)
+    if entry_point not in known:
+        raise WorkflowGraphError(f"Entry point {entry_point!r} is not a node")
+    
+    for node in set(edges) | set(routes):
+        if node not in known:
+            raise WorkflowGraphError(f"Edges declared from unknown node {node!r}", [node])
+    
+    successors: Dict[str, List[str]] = {}
+    for node in nodes:
+        targets = list(edges.get(node, [])) + list(routes.get(node, {}).values())
+        unknown = [target for target in targets if target != end and target not in known]
+        if unknown:
+            raise WorkflowGraphError(f"Node {node!r} leads to unknown nodes {unknown}", unknown)
+        successors[node] = list(dict.fromkeys(target for target in targets if target != end))
+    
+    # Every node must be reachable from the entry point
+    reachable = {entry_point}
+    frontier = [entry_point]
+    while frontier:
+        for target in successors[frontier.pop()]:
+            if target not in reachable:
+                reachable.add(target)
+                frontier.append(target)
+    unreachable = sorted(known - reachable)
+    if unreachable:
+        raise WorkflowGraphError(f"Unreachable nodes: {unreachable}", unreachable)
+    
+    # Control flow and data dependencies together must be acyclic
+    combined = {node: list(targets) for node, targets in successors.items()}
+    for node, producers in (dependencies or {}).items():
+        for producer in producers:
+            combined[producer].append(node)
+    cycle = _find_cycle([entry_point] + list(nodes), combined)
+    if cycle:
+        raise WorkflowGraphError(f"Cycle: {' -> '.join(cycle)}", cycle)
+
+
+class Deadline:
+    """Time budget for one workflow run, such as what is left of a Lambda invocation"""
+    
+    def __init__(self, budget_ms: float, reserve_ms: float = 0.0):
+        self.budget_ms = budget_ms
+        self.reserve_ms = reserve_ms
+        self.expires_at = time.monotonic() + (budget_ms - reserve_ms) / 1000
+    
+    @classmethod
+    def from_lambda_context(cls, context: Any, reserve_ms: float = 0.0) -> Optional['Deadline']:
+        """
+        Deadline from a Lambda context
+        
+        Args:
+            context: Lambda context (None or without get_remaining_time_in_millis: no deadline)
+            reserve_ms: Time kept back for work after the workflow (storing, responding)
+        """
+        
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return cls(get_remaining(), reserve_ms) if get_remaining else None
+    
+    def remaining_ms(self) -> float:
+        """Milliseconds left (never negative)"""
+        
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000)
+    
+    def allows(self, expected_ms: float) -> bool:
+        """Whether work expected to take expected_ms fits in what is left"""
+        
+        return self.remaining_ms() >= expected_ms
+
+
+@dataclass(frozen=True)
+class _Node:
+    """One compiled node: its function, successors and dependencies"""
+    
+    name: str
+    function: Callable
+    targets: Tuple[str, ...]                # Direct successors (all run)
+    condition: Optional[Callable]
+    routes: Mapping[Any, Optional[str]]     # Condition result -> successor (None ends the branch)
+    successors: Tuple[str, ...]             # Every node this one can activate
+    control_preds: Tuple[str, ...]
+    data_preds: Tuple[str, ...]             # Writers of keys this node reads, not otherwise ordered
+    writes: Optional[FrozenSet[str]]        # None: any key
+    optional: bool = False                  # May be shed when the deadline is near
+    expected_ms: float = 0.0
+    tail_ms: float = 0.0                    # Longest chain of required work after this node
+
+
+def _combine(current: Any, update: Any) -> Any:
+    """Default reducer: concatenate lists, update dicts, union sets"""
+    
+    if isinstance(current, dict):
+        return {**current, **update}
+    if isinstance(current, set):
+        return current | update
+    return current + update
+
+
+def _overlaps(reads: Optional[FrozenSet[str]], writes: Optional[FrozenSet[str]]) -> bool:
+    """Whether a node reading `reads` can see a write to `writes` (None: any key)"""
+    
+    if reads is None or writes is None:
+        return reads is None and writes is None or bool(reads or writes)
+    return bool(reads & writes)
+
+
+class CompiledWorkflow:
+    """
+    Immutable execution plan for a workflow graph
+    
+    Graphs without fan-out run as a chain: one precomputed step lookup per
+    node. Graphs with fan-out run as a DAG: a node starts once each of its
+    control predecessors has finished or been skipped (and some branch
+    reached it), and each node writing a key it reads has done the same,
+    so independent nodes overlap. Every DAG node works on its own view of
+    the state; its write keys (and reducer keys) are folded back in plan
+    order, so the result does not depend on which concurrent node finished
+    first.
+    
+    Under a deadline, an optional node is shed (passed through without
+    running, its edges still followed) when its expected time plus the
+    required work after it no longer fits in what is left.
+    
+    Every node that runs is timed and charged with the AWS calls and
+    Bedrock tokens it causes (see WorkflowMetrics); each run emits one
+    structured metrics record per node.
+    """
+    
+    __slots__ = ('name', 'entry_point', 'order', 'parallel', '_nodes', '_index', '_reducers')
+    
+    def __init__(
+        self,
+        name: str,
+        entry_point: str,
+        order: List[str],
+        nodes: Mapping[str, _Node],
+        reducers: Mapping[str, Callable],
+        parallel: bool
+    ):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'entry_point', entry_point)
+        object.__setattr__(self, 'order', tuple(order))
+        object.__setattr__(self, 'parallel', parallel)
+        object.__setattr__(self, '_nodes', MappingProxyType(dict(nodes)))
+        object.__setattr__(self, '_index', MappingProxyType({node: i for i, node in enumerate(order)}))
+        object.__setattr__(self, '_reducers', MappingProxyType(dict(reducers)))
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    @property
+    def nodes(self) -> List[str]:
+        """Node names in plan order"""
+        
+        return list(self.order)
+    
+    def successors(self, node: str) -> List[str]:
+        """Nodes that can run after a node"""
+        
+        return list(self._nodes[node].successors)
+    
+    def dependencies(self, node: str) -> List[str]:
+        """Nodes a node waits for (control predecessors, then writers of keys it reads)"""
+        
+        spec = self._nodes[node]
+        return list(spec.control_preds) + list(spec.data_preds)
+    
+    async def ainvoke(
+        self,
+        initial_state: Dict[str, Any],
+        timings: Optional[Dict[str, Tuple[float, float]]] = None,
+        deadline: Optional[Deadline] = None,
+        shed: Optional[List[str]] = None,
+        metrics: Optional[WorkflowMetrics] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute the workflow
+        
+        Args:
+            initial_state: Workflow state
+            timings: Filled with node -> (start, end) in milliseconds from the start of the run
+            deadline: Time budget; optional nodes that no longer fit are shed
+            shed: Filled with the names of shed nodes, in the order they were shed
+            metrics: Filled with each node's duration, AWS calls and Bedrock tokens
+        
+        Returns:
+            Final state
+        """
+        
+        if shed is None:
+            shed = []
+        if metrics is None:
+            metrics = WorkflowMetrics(self.name)
+        try:
+            if self.parallel:
+                return await self._run_dag(initial_state, deadline, shed, metrics)
+            return await self._run_chain(initial_state, deadline, shed, metrics)
+        finally:
+            if timings is not None:
+                timings.update({node: (stats['start_ms'], stats['end_ms']) for node, stats in metrics.nodes.items()})
+            metrics.emit()
+    
+    async def _run_chain(
+        self,
+        initial_state: Dict[str, Any],
+        deadline: Optional[Deadline],
+        shed: List[str],
+        metrics: WorkflowMetrics
+    ) -> Dict[str, Any]:
+        nodes = self._nodes
+        state = initial_state
+        node = self.entry_point
+        
+        while node is not None:
+            spec = nodes[node]
+            if self._sheds(spec, deadline):
+                shed.append(node)
+            else:
+                state = await metrics.run_node(node, spec.function, state)
+            if spec.condition is None:
+                node = spec.targets[0] if spec.targets else None
+            else:
+                node = spec.routes.get(spec.condition(state))
+        
+        return state
+    
+    @staticmethod
+    def _sheds(spec: _Node, deadline: Optional[Deadline]) -> bool:
+        return spec.optional and deadline is not None and not deadline.allows(spec.expected_ms + spec.tail_ms)
+    
+    def _view(self, state: Dict[str, Any], spec: _Node) -> Dict[str, Any]:
+        """A node's own state: reducer keys start empty (its additions are merged), written containers are copied"""
+        
+        view = dict(state)
+        for key in (state if spec.writes is None else spec.writes):
+            if isinstance(view.get(key), (list, dict, set)):
+                view[key] = copy.copy(view[key])
+        for key in self._reducers:
+            if key in view:
+                view[key] = type(view[key])()
+        return view
+    
+    def _fold(self, initial_state: Dict[str, Any], updates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply finished nodes' updates in plan order"""
+        
+        state = dict(initial_state)
+        for node in self.order:
+            for key, value in updates.get(node, {}).items():
+                reducer = self._reducers.get(key)
+                state[key] = reducer(state[key], value) if reducer and key in state else value
+        return state
+    
+    async def _run_dag(
+        self,
+        initial_state: Dict[str, Any],
+        deadline: Optional[Deadline],
+        shed: List[str],
+        metrics: WorkflowMetrics
+    ) -> Dict[str, Any]:
+        nodes = self._nodes
+        pending_edges = {node: len(spec.control_preds) for node, spec in nodes.items()}
+        activated = {self.entry_point}
+        resolved = set()  # Finished or skipped
+        updates: Dict[str, Dict[str, Any]] = {}
+        running: Dict[asyncio.Future, str] = {}
+        started = set()
+        state = dict(initial_state)
+        
+        def resolve_edges(node: str, live: Iterable[Optional[str]]) -> None:
+            live = set(live)
+            for target in nodes[node].successors:
+                pending_edges[target] -= 1
+                if target in live:
+                    activated.add(target)
+        
+        def advance() -> None:
+            # Skip nodes no branch reached; start nodes whose dependencies are resolved
+            changed = True
+            while changed:
+                changed = False
+                for node in self.order:
+                    if node in resolved or node in started or pending_edges[node]:
+                        continue
+                    spec = nodes[node]
+                    if node not in activated:
+                        resolved.add(node)
+                        resolve_edges(node, ())
+                        changed = True
+                    elif all(producer in resolved for producer in spec.data_preds):
+                        if self._sheds(spec, deadline):
+                            # Passed through: nothing merged, edges followed as if it ran
+                            shed.append(node)
+                            resolved.add(node)
+                            resolve_edges(node, self._live(spec, state))
+                            changed = True
+                        else:
+                            started.add(node)
+                            running[asyncio.ensure_future(metrics.run_node(node, spec.function, self._view(state, spec)))] = node
+        
+        advance()
+        try:
+            while running:
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in sorted(finished, key=lambda f: self._index[running[f]]):
+                    node = running.pop(future)
+                    spec = nodes[node]
+                    result = future.result()
+                    
+                    keys = result.keys() if spec.writes is None else spec.writes | self._reducers.keys()
+                    updates[node] = {key: result[key] for key in keys if key in result}
+                    state = self._fold(initial_state, updates)
+                    resolved.add(node)
+                    resolve_edges(node, self._live(spec, state))
+                advance()
+        except BaseException:
+            for future in running:
+                future.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+        
+        return state
+    
+    @staticmethod
+    def _live(spec: _Node, state: Dict[str, Any]) -> List[Optional[str]]:
+        """Successors a finished node activates"""
+        
+        live: List[Optional[str]] = list(spec.targets)
+        if spec.condition is not None:
+            live.append(spec.routes.get(spec.condition(state)))
+        return live
+
+
+class WorkflowGraph:
+    """Builder for a workflow of async nodes, compiled once into a CompiledWorkflow"""
+    
+    def __init__(self, name: str = "workflow"):
+        self.name = name
+        self.nodes: Dict[str, Callable] = {}
+        self.edges: Dict[str, List[str]] = {}
+        self.conditional_edges: Dict[str, Dict[str, Any]] = {}
+        self.reads: Dict[str, Optional[FrozenSet[str]]] = {}
+        self.writes: Dict[str, Optional[FrozenSet[str]]] = {}
+        self.optional: Dict[str, bool] = {}
+        self.expected_ms: Dict[str, float] = {}
+        self.reducers: Dict[str, Callable] = {}
+        self.entry_point = None
+    
+    def add_node(
+        self,
+        name: str,
+        func: Callable,
+        reads: Optional[Iterable[str]] = None,
+        writes: Optional[Iterable[str]] = None,
+        optional: bool = False,
+        expected_ms: float = 0.0
+    ):
+        """
+        Add a processing node
+        
+        Args:
+            name: Node name
+            func: Async function taking and returning the state
+            reads: State keys the node reads (None: any)
+            writes: State keys the node sets (None: any); reducer keys are always merged
+            optional: The node may be shed when a run's deadline is near
+            expected_ms: Typical duration, used to budget runs with a deadline
+        """
+        self.nodes[name] = func
+        self.reads[name] = frozenset(reads) if reads is not None else None
+        self.writes[name] = frozenset(writes) if writes is not None else None
+        self.optional[name] = optional
+        self.expected_ms[name] = expected_ms
+    
+    def add_edge(self, from_node: str, to_node: str):
+        """Add a direct edge between nodes (several edges from one node fan out)"""
+        self.edges.setdefault(from_node, []).append(to_node)
+    
+    def add_conditional_edges(self, from_node: str, condition_func: Callable, mapping: dict):
+        """Add conditional edges (condition results missing from mapping end the branch)"""
+        self.conditional_edges[from_node] = {
+            'condition': condition_func,
+            'mapping': mapping
+        }
+    
+    def add_reducer(self, key: str, reducer: Optional[Callable] = None):
+        """
+        Merge a state key that concurrent nodes add to
+        
+        Each node sees the key empty and its additions are merged with
+        reducer(current, update); the default concatenates lists and
+        updates dicts.
+        """
+        self.reducers[key] = reducer
+    
+    def set_entry_point(self, node_name: str):
+        """Set the entry point for the workflow"""
+        self.entry_point = node_name
+    
+    def _data_dependencies(self, successors: Mapping[str, List[str]]) -> Dict[str, List[str]]:
+        """Node -> writers of keys it reads that control flow does not already order"""
+        
+        names = list(self.nodes)
+        descendants: Dict[str, set] = {}
+        for node in names:
+            seen, frontier = set(), [node]
+            while frontier:
+                for target in successors.get(frontier.pop(), ()):
+                    if target not in seen:
+                        seen.add(target)
+                        frontier.append(target)
+            descendants[node] = seen
+        
+        dependencies: Dict[str, List[str]] = {node: [] for node in names}
+        for i, reader in enumerate(names):
+            for j, writer in enumerate(names):
+                if reader == writer or writer in descendants[reader] or reader in descendants[writer]:
+                    continue
+                if not _overlaps(self.reads[reader], self.writes[writer]):
+                    continue
+                # Unordered nodes reading each other's writes: the later-declared one waits
+                if j > i and _overlaps(self.reads[writer], self.writes[reader]):
+                    continue
+                dependencies[reader].append(writer)
+        return dependencies
+    
+    def compile(self) -> CompiledWorkflow:
+        """
+        Validate the graph and build its execution plan
+        
+        Raises:
+            WorkflowGraphError: The graph is invalid (see validate_graph)
+        """
+        
+        routes = {node: conditional['mapping'] for node, conditional in self.conditional_edges.items()}
+        
+        def resolve(target: Optional[str]) -> Optional[str]:
+            return None if target in (None, END) else target
+        
+        successors = {
+            name: list(dict.fromkeys(filter(None, map(resolve, self.edges.get(name, []) + list(routes.get(name, {}).values())))))
+            for name in self.nodes
+        }
+        dependencies = self._data_dependencies(successors)
+        validate_graph(self.entry_point, list(self.nodes), self.edges, routes, dependencies=dependencies)
+        
+        control_preds: Dict[str, List[str]] = {name: [] for name in self.nodes}
+        for name, targets in successors.items():
+            for target in targets:
+                control_preds[target].append(name)
+        
+        # Plan order: topological over control and data edges, ties in declaration order
+        declared = {name: i for i, name in enumerate(self.nodes)}
+        blockers = {name: set(control_preds[name]) | set(dependencies[name]) for name in self.nodes}
+        heap = [(declared[name], name) for name, before in blockers.items() if not before]
+        order = []
+        while heap:
+            _, name = heapq.heappop(heap)
+            order.append(name)
+            for follower, before in blockers.items():
+                if name in before:
+                    before.discard(name)
+                    if not before:
+                        heapq.heappush(heap, (declared[follower], follower))
+        
+        # Required work still to come after each node (optional successors may be shed)
+        tail_ms: Dict[str, float] = {}
+        for name in reversed(order):
+            tail_ms[name] = max((
+                (0.0 if self.optional[target] else self.expected_ms[target]) + tail_ms[target]
+                for target in successors[name]
+            ), default=0.0)
+        
+        nodes = {}
+        for name, function in self.nodes.items():
+            conditional = self.conditional_edges.get(name) or {'condition': None, 'mapping': {}}
+            nodes[name] = _Node(
+                name=name,
+                function=function,
+                targets=tuple(filter(None, map(resolve, self.edges.get(name, [])))),
+                condition=conditional['condition'],
+                routes=MappingProxyType({result: resolve(target) for result, target in conditional['mapping'].items()}),
+                successors=tuple(successors[name]),
+                control_preds=tuple(control_preds[name]),
+                data_preds=tuple(dependencies[name]),
+                writes=self.writes[name],
+                optional=self.optional[name],
+                expected_ms=self.expected_ms[name],
+                tail_ms=tail_ms[name]
+            )
+        
+        # Chains (each node activates at most one successor) skip the DAG scheduler
+        parallel = any(
+            len(spec.targets) > 1 or (spec.targets and spec.condition is not None) for spec in nodes.values()
+        )
+        reducers = {key: reducer or _combine for key, reducer in self.reducers.items()}
+
+        logger.info(f"Compiled workflow {self.name}: {len(nodes)} nodes, {'parallel' if parallel else 'sequential'}")
+        return CompiledWorkflow(self.name, self.entry_point, order, nodes, reducers, parallel)
@@ -0,0 +1,242 @@
+"""
+Workflow Metrics for LMS API
+Per-node latency, AWS call counts and Bedrock token usage for chat workflow runs
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Callable, Iterator, Mapping
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowMetricsConfig:
+    """Workflow metrics configuration settings"""
+    
+    # Structured records are written as CloudWatch embedded metric format lines (on by default in Lambda)
+    EMIT = os.getenv('WORKFLOW_METRICS_EMIT', 'true' if os.getenv('AWS_LAMBDA_FUNCTION_NAME') else 'false').lower() == 'true'
+    NAMESPACE = os.getenv('WORKFLOW_METRICS_NAMESPACE', 'LMS/Workflows')
+    
+    # Bedrock response headers carrying token counts (InvokeModel, Converse)
+    INPUT_TOKENS_HEADER = 'x-amzn-bedrock-input-token-count'
+    OUTPUT_TOKENS_HEADER = 'x-amzn-bedrock-output-token-count'
+
+
+class NodeUsage:
+    """AWS calls and Bedrock tokens charged to one running node"""
+    
+    __slots__ = ('calls', 'input_tokens', 'output_tokens', '_lock')
+    
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()  # boto3 calls finish on I/O pool threads
+    
+    def add_call(self, service: str, operation: str) -> None:
+        name = f"{service}.{operation}"
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+    
+    def add_tokens(self, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+    
+    @property
+    def aws_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+# The node a coroutine (or an I/O thread running in its context) works for
+_node_usage: ContextVar[Optional[NodeUsage]] = ContextVar('workflow_node_usage', default=None)
+
+# The run an instrumented node function reports to (for graphs this module does not execute)
+_current_run: ContextVar[Optional['WorkflowMetrics']] = ContextVar('workflow_metrics_run', default=None)
+
+
+def record_aws_call(service: str, operation: str) -> None:
+    """Charge an AWS call to the running node (no-op outside a workflow)"""
+    
+    usage = _node_usage.get()
+    if usage is not None:
+        usage.add_call(service, operation)
+
+
+def record_tokens(input_tokens: int, output_tokens: int) -> None:
+    """Charge Bedrock tokens to the running node (no-op outside a workflow)"""
+    
+    usage = _node_usage.get()
+    if usage is not None and (input_tokens or output_tokens):
+        usage.add_tokens(int(input_tokens or 0), int(output_tokens or 0))
+
+
+def record_response_headers(headers: Mapping[str, str]) -> None:
+    """Charge the token counts a Bedrock response reports in its headers"""
+    
+    input_tokens = headers.get(WorkflowMetricsConfig.INPUT_TOKENS_HEADER)
+    output_tokens = headers.get(WorkflowMetricsConfig.OUTPUT_TOKENS_HEADER)
+    if input_tokens is not None or output_tokens is not None:
+        record_tokens(int(input_tokens or 0), int(output_tokens or 0))
+
+
+def record_stream_chunk(chunk: Dict[str, Any]) -> None:
+    """Charge the token counts in a streamed chunk (the last one carries the invocation metrics)"""
+    
+    metrics = chunk.get('amazon-bedrock-invocationMetrics')
+    if metrics:
+        record_tokens(metrics.get('inputTokenCount', 0), metrics.get('outputTokenCount', 0))
+
+
+def record_message_usage(message: Any) -> None:
+    """Charge the token usage LangChain reports on a chat model response"""
+    
+    usage = getattr(message, 'usage_metadata', None) or {}
+    record_tokens(usage.get('input_tokens', 0), usage.get('output_tokens', 0))
+
+
+class WorkflowMetrics:
+    """
+    Per-node cost breakdown for one workflow run
+    
+    Each node runs with its own NodeUsage in context, so AWS calls made by
+    the registry clients (counted by their boto3 event hooks) and Bedrock
+    token counts are charged to the node that caused them, including calls
+    made from tasks and I/O threads the node starts.
+    """
+    
+    def __init__(self, workflow: str):
+        self.workflow = workflow
+        self.started = time.perf_counter()
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+    
+    async def run_node(self, node: str, function: Callable, state: Any) -> Any:
+        """Run a node function, timing it and charging its calls and tokens to it"""
+        
+        usage = NodeUsage()
+        token = _node_usage.set(usage)
+        node_started = time.perf_counter()
+        try:
+            return await function(state)
+        finally:
+            ended = time.perf_counter()
+            _node_usage.reset(token)
+            self.nodes[node] = {
+                'start_ms': round((node_started - self.started) * 1000, 1),
+                'end_ms': round((ended - self.started) * 1000, 1),
+                'ms': round((ended - node_started) * 1000, 1),
+                'aws_calls': usage.aws_calls,
+                'calls': dict(usage.calls),
+                'input_tokens': usage.input_tokens,
+                'output_tokens': usage.output_tokens
+            }
+    
+    @contextmanager
+    def activate(self) -> Iterator['WorkflowMetrics']:
+        """Make this the run that instrumented node functions report to"""
+        
+        token = _current_run.set(self)
+        try:
+            yield self
+        finally:
+            _current_run.reset(token)
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        Compact breakdown for processing metadata
+        
+        Returns:
+            Totals, the slowest node and per-node ms and aws_calls (with
+            per-operation calls and tokens only where there were any)
+        """
+        
+        nodes = {}
+        for node, stats in self.nodes.items():
+            compact = {'ms': stats['ms'], 'aws_calls': stats['aws_calls']}
+            if stats['calls']:
+                compact['calls'] = stats['calls']
+            if stats['input_tokens'] or stats['output_tokens']:
+                compact['input_tokens'] = stats['input_tokens']
+                compact['output_tokens'] = stats['output_tokens']
+            nodes[node] = compact
+        
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'aws_calls': sum(stats['aws_calls'] for stats in self.nodes.values()),
+            'input_tokens': sum(stats['input_tokens'] for stats in self.nodes.values()),
+            'output_tokens': sum(stats['output_tokens'] for stats in self.nodes.values()),
+            'slowest_node': max(self.nodes, key=lambda node: self.nodes[node]['ms']) if self.nodes else None,
+            'nodes': nodes
+        }
+    
+    def records(self) -> List[Dict[str, Any]]:
+        """
+        One embedded-metric-format record per node
+        
+        CloudWatch extracts DurationMs, AwsCalls, InputTokens and OutputTokens
+        by workflow and node from these log lines, so percentiles (p95) can
+        be compared node by node without any API calls.
+        """
+        
+        timestamp = int(time.time() * 1000)
+        return [
+            {
+                '_aws': {
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': WorkflowMetricsConfig.NAMESPACE,
+                        'Dimensions': [['Workflow', 'Node']],
+                        'Metrics': [
+                            {'Name': 'DurationMs', 'Unit': 'Milliseconds'},
+                            {'Name': 'AwsCalls', 'Unit': 'Count'},
+                            {'Name': 'InputTokens', 'Unit': 'Count'},
+                            {'Name': 'OutputTokens', 'Unit': 'Count'}
+                        ]
+                    }]
+                },
+                'Workflow': self.workflow,
+                'Node': node,
+                'DurationMs': stats['ms'],
+                'AwsCalls': stats['aws_calls'],
+                'InputTokens': stats['input_tokens'],
+                'OutputTokens': stats['output_tokens'],
+                'calls': stats['calls']
+            }
+            for node, stats in self.nodes.items()
+        ]
+    
+    def emit(self, write: Optional[Callable[[str], Any]] = None) -> None:
+        """Write the structured records, one JSON line each (stdout by default, which Lambda ships to CloudWatch)"""
+        
+        if not WorkflowMetricsConfig.EMIT:
+            return
+        write = write or sys.stdout.write
+        try:
+            for record in self.records():
+                write(json.dumps(record) + "\n")
+        except Exception as e:
+            logger.warning(f"Could not emit workflow metrics for {self.workflow}: {e}")
+
+
+def instrument_node(node: str, function: Callable) -> Callable:
+    """
+    Wrap a node function so it reports to the active WorkflowMetrics run
+    
+    For graphs executed by another engine (LangGraph); outside an active
+    run the function is called as is.
+    """
+    
+    async def instrumented(state: Any) -> Any:
+        metrics = _current_run.get()
+        if metrics is None:
+            return await function(state)
+        return await metrics.run_node(node, function, state)
+    
+    instrumented.__name__ = getattr(function, '__name__', node)
+    return instrumented
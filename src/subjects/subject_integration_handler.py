@@ -4,23 +4,33 @@ Implements subject-specific AI chat, file management, and assignment workflows
 """
 
 import json
-import boto3
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import uuid
-from supabase import create_client
+
+# Shared utilities
+import sys
+sys.path.append('/opt/python')  # Lambda layer path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.lazy import LazyProxy, lazy_client, lazy_resource
+from shared.cache_warming import cache_warmer
 
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-s3_client = boto3.client('s3')
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime')
+dynamodb = lazy_resource('dynamodb')
+s3_client = lazy_client('s3')
+bedrock_agent_runtime = lazy_client('bedrock-agent-runtime')
 
 # Initialize Supabase client (read-only for existing data)
-supabase = create_client(
-    os.getenv('SUPABASE_URL'),
-    os.getenv('SUPABASE_ANON_KEY')
-)
+def _create_supabase_client():
+    from supabase import create_client
+    return create_client(
+        os.getenv('SUPABASE_URL'),
+        os.getenv('SUPABASE_ANON_KEY')
+    )
+
+supabase = LazyProxy(_create_supabase_client)
 
 def lambda_response(status_code: int, body: Dict[Any, Any]) -> Dict[str, Any]:
     """Helper function to create Lambda response"""
@@ -551,6 +561,7 @@ class SubjectFileService:
             }
             
             self.files_table.put_item(Item=file_metadata)
+            cache_warmer.invalidate_files(user_id, subject_id)
             
             # If this is assignment material, notify enrolled students
             if assignment_id:
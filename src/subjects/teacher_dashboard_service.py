@@ -4,24 +4,33 @@ Provides comprehensive analytics and insights for teachers about their subjects
 """
 
 import json
-import boto3
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from collections import defaultdict
 import statistics
-from supabase import create_client
+
+# Shared utilities
+import sys
+sys.path.append('/opt/python')  # Lambda layer path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.lazy import LazyProxy, lazy_client, lazy_resource
 
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime')
-comprehend = boto3.client('comprehend')
+dynamodb = lazy_resource('dynamodb')
+bedrock_agent_runtime = lazy_client('bedrock-agent-runtime')
+comprehend = lazy_client('comprehend')
 
 # Initialize Supabase client
-supabase = create_client(
-    os.getenv('SUPABASE_URL'),
-    os.getenv('SUPABASE_ANON_KEY')
-)
+def _create_supabase_client():
+    from supabase import create_client
+    return create_client(
+        os.getenv('SUPABASE_URL'),
+        os.getenv('SUPABASE_ANON_KEY')
+    )
+
+supabase = LazyProxy(_create_supabase_client)
 
 class TeacherDashboardService:
     """Service for teacher dashboard with AI-enhanced analytics"""
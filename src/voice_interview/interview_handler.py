@@ -4,7 +4,6 @@ Handles AI-powered voice interviews using Bedrock Agents and WebSocket
 """
 
 import json
-import boto3
 import os
 import uuid
 import asyncio
@@ -19,6 +18,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.agent_utils import agent_invoker
 from shared.bedrock_agent_service import BedrockAgentError
+from shared.connection_pool import get_client, get_resource
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -59,7 +59,7 @@ def handle_connect(connection_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
     
     try:
         # Store connection info
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         connections_table = dynamodb.Table('lms-websocket-connections')
         
         # Extract user info from query parameters
@@ -90,7 +90,7 @@ def handle_disconnect(connection_id: str, event: Dict[str, Any]) -> Dict[str, An
     
     try:
         # Clean up connection
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         connections_table = dynamodb.Table('lms-websocket-connections')
         
         # Get connection info before deleting
@@ -328,7 +328,7 @@ def store_interview_session(
 ):
     """Store interview session in DynamoDB"""
     
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = get_resource('dynamodb')
     sessions_table = dynamodb.Table('lms-interview-sessions')
     
     session_data = {
@@ -350,7 +350,7 @@ def store_interview_session(
 def store_interview_turn(session_id: str, user_input: str, ai_response: str):
     """Store interview conversation turn"""
     
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = get_resource('dynamodb')
     turns_table = dynamodb.Table('lms-interview-turns')
     sessions_table = dynamodb.Table('lms-interview-sessions')
     
@@ -384,7 +384,7 @@ def get_interview_session(session_id: str) -> Dict[str, Any]:
     """Get interview session data"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         sessions_table = dynamodb.Table('lms-interview-sessions')
         
         response = sessions_table.get_item(Key={'session_id': session_id})
@@ -399,7 +399,7 @@ def get_interview_history(session_id: str, limit: int = 10) -> list:
     """Get interview conversation history"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         turns_table = dynamodb.Table('lms-interview-turns')
         
         response = turns_table.query(
@@ -428,7 +428,7 @@ def update_connection_session(connection_id: str, session_id: str):
     """Update connection with session ID"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         connections_table = dynamodb.Table('lms-websocket-connections')
         
         connections_table.update_item(
@@ -448,7 +448,7 @@ def end_interview_session(session_id: str, end_reason: str) -> Dict[str, Any]:
     """End interview session and generate summary"""
     
     try:
-        dynamodb = boto3.resource('dynamodb')
+        dynamodb = get_resource('dynamodb')
         sessions_table = dynamodb.Table('lms-interview-sessions')
         
         # Update session status
@@ -482,7 +482,7 @@ def send_websocket_message(connection_id: str, message: Dict[str, Any]):
     
     try:
         # Get API Gateway management API endpoint
-        api_gateway_management = boto3.client(
+        api_gateway_management = get_client(
             'apigatewaymanagementapi',
             endpoint_url=f"https://{os.environ.get('API_GATEWAY_ID')}.execute-api.{os.environ.get('AWS_REGION')}.amazonaws.com/{os.environ.get('STAGE', 'dev')}"
         )
@@ -496,7 +496,7 @@ def send_websocket_message(connection_id: str, message: Dict[str, Any]):
         logger.error(f"Error sending WebSocket message: {str(e)}")
         # Connection might be closed, clean up
         try:
-            dynamodb = boto3.resource('dynamodb')
+            dynamodb = get_resource('dynamodb')
             connections_table = dynamodb.Table('lms-websocket-connections')
             connections_table.delete_item(Key={'connection_id': connection_id})
         except:
@@ -4,7 +4,6 @@ Handles voice interview functionality as a Bedrock Agent action group
 """
 
 import json
-import boto3
 import os
 import uuid
 import base64
@@ -19,11 +18,18 @@ import time
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Shared utilities
+import sys
+sys.path.append('/opt/python')  # Lambda layer path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.lazy import lazy_client, lazy_resource
+
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-transcribe = boto3.client('transcribe')
-bedrock_runtime = boto3.client('bedrock-runtime')
-s3_client = boto3.client('s3')
+dynamodb = lazy_resource('dynamodb')
+transcribe = lazy_client('transcribe')
+bedrock_runtime = lazy_client('bedrock-runtime')
+s3_client = lazy_client('s3')
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -5,7 +5,6 @@ Task 15: Voice Interview Practice Integration
 """
 
 import json
-import boto3
 import os
 import logging
 import uuid
@@ -19,11 +18,19 @@ from datetime import datetime
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Shared utilities
+import sys
+sys.path.append('/opt/python')  # Lambda layer path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from shared.lazy import lazy_client, lazy_resource
+from shared.connection_pool import get_client
+
 # Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-transcribe = boto3.client('transcribe')
-bedrock_runtime = boto3.client('bedrock-agent-runtime')
-s3_client = boto3.client('s3')
+dynamodb = lazy_resource('dynamodb')
+transcribe = lazy_client('transcribe')
+bedrock_runtime = lazy_client('bedrock-agent-runtime')
+s3_client = lazy_client('s3')
 
 def lambda_handler(event, context):
     """Main WebSocket Lambda handler for voice interviews"""
@@ -478,7 +485,7 @@ def send_voice_message(connection_id: str, request_context: Dict, message: Dict[
         domain_name = request_context['domainName']
         stage = request_context['stage']
         
-        apigateway_client = boto3.client(
+        apigateway_client = get_client(
             'apigatewaymanagementapi',
             endpoint_url=f'https://{domain_name}/{stage}'
         )
@@ -537,7 +544,7 @@ def generate_interview_question(subject: str, difficulty: str, interview_type: s
     """Generate interview question using Bedrock Agent"""
     try:
         # Use Bedrock Agent to generate contextual questions
-        bedrock_runtime = boto3.client('bedrock-agent-runtime')
+        bedrock_runtime = get_client('bedrock-agent-runtime')
         
         prompt = f"""Generate a {difficulty} level {interview_type} interview question about {subject}.
 
@@ -7,16 +7,34 @@ Task 12: Frontend-Backend API Integration
 import json
 import boto3
 import os
+import asyncio
 import logging
 from typing import Dict, Any
 from botocore.exceptions import ClientError
 import uuid
 from datetime import datetime
 
+# Shared AWS client registry (not packaged with every Lambda)
+try:
+    from shared.connection_pool import get_client
+except ImportError:
+    get_client = boto3.client
+
+# Chat workflow with Bedrock token streaming (when packaged with this Lambda)
+try:
+    from chat.langgraph_chat_handler import stream_langgraph_workflow, DEADLINE_RESERVE_MS
+    from shared.workflow_graph import Deadline
+except ImportError:
+    stream_langgraph_workflow = None
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Streamed tokens are coalesced: one partial_response per interval, or sooner once this many characters are buffered
+STREAM_FLUSH_MS = int(os.getenv('WEBSOCKET_STREAM_FLUSH_MS', 50))
+STREAM_FLUSH_CHARS = int(os.getenv('WEBSOCKET_STREAM_FLUSH_CHARS', 200))
+
 def lambda_handler(event, context):
     """Main WebSocket Lambda handler"""
     try:
@@ -136,9 +154,17 @@ def handle_message(event, context):
             'message': 'AI is thinking...'
         })
         
+        if message_data.get('mode') == 'workflow' and stream_langgraph_workflow:
+            deadline = Deadline.from_lambda_context(context, DEADLINE_RESERVE_MS)
+            asyncio.run(stream_workflow_message(connection_id, event['requestContext'], message_data, message, session_id, user_id, deadline))
+            return {
+                'statusCode': 200,
+                'body': 'Message processed'
+            }
+        
         # Process message with Bedrock Agent
         try:
-            bedrock_runtime = boto3.client('bedrock-agent-runtime')
+            bedrock_runtime = get_client('bedrock-agent-runtime')
             
             response = bedrock_runtime.invoke_agent(
                 agentId=os.environ.get('BEDROCK_AGENT_ID', 'ZTBBVSC6Y1'),
@@ -201,6 +227,93 @@ def handle_message(event, context):
             'body': f'Message handling failed: {str(e)}'
         }
 
+async def stream_workflow_message(connection_id: str, request_context: Dict, message_data: Dict[str, Any],
+                                  message: str, session_id: str, user_id: str, deadline=None):
+    """
+    Forward the chat workflow's streamed tokens as partial_response frames
+    
+    The first token is posted at once; later tokens are buffered and posted
+    together every STREAM_FLUSH_MS (or once STREAM_FLUSH_CHARS accumulate),
+    so a reply costs a few dozen post_to_connection calls instead of one per token.
+    """
+    loop = asyncio.get_running_loop()
+    stream = stream_langgraph_workflow(user_id, message, message_data.get('conversation_id'), message_data.get('subject_id'), deadline)
+    buffered = []
+    buffered_chars = 0
+    last_post = None
+    next_frame = None
+    
+    async def send(frame: Dict[str, Any]):
+        # Posting blocks; run it off the loop so Bedrock keeps streaming meanwhile
+        return await loop.run_in_executor(None, send_message_to_connection, connection_id, request_context, frame)
+    
+    async def flush():
+        nonlocal buffered, buffered_chars, last_post
+        if not buffered:
+            return True
+        content = ''.join(buffered)
+        buffered, buffered_chars, last_post = [], 0, loop.time()
+        return await send({
+            'type': 'partial_response',
+            'content': content,
+            'session_id': session_id
+        })
+    
+    try:
+        while True:
+            if next_frame is None:
+                next_frame = asyncio.ensure_future(stream.__anext__())
+            
+            # Wait for the next token, but no longer than the buffered text may be held back
+            timeout = max(0.0, last_post + STREAM_FLUSH_MS / 1000 - loop.time()) if buffered else None
+            done, _ = await asyncio.wait({next_frame}, timeout=timeout)
+            if not done:
+                if not await flush():
+                    break  # Client went away; stops the workflow
+                continue
+            
+            try:
+                frame = next_frame.result()
+            except StopAsyncIteration:
+                break
+            next_frame = None
+            
+            if frame['type'] == 'partial_response':
+                buffered.append(frame['content'])
+                buffered_chars += len(frame['content'])
+                if last_post is None or buffered_chars >= STREAM_FLUSH_CHARS:
+                    if not await flush():
+                        break  # Client went away; stops the workflow
+            else:
+                if not await flush():
+                    break
+                await send({
+                    'type': 'final_response',
+                    'content': frame['response'],
+                    'session_id': session_id,
+                    'conversation_id': frame.get('conversation_id'),
+                    'citations': frame.get('citations', []),
+                    'tools_used': frame.get('tools_used', []),
+                    'time_to_first_token_ms': frame.get('time_to_first_token_ms'),
+                    'total_latency_ms': frame.get('total_latency_ms'),
+                    'shed_stages': frame.get('shed_stages', []),
+                    'timestamp': frame.get('timestamp', datetime.utcnow().isoformat())
+                })
+    
+    except Exception as e:
+        logger.error(f"Chat workflow error: {str(e)}")
+        await send({
+            'type': 'error',
+            'message': "I'm sorry, I'm having trouble connecting to the AI service right now.",
+            'error': str(e)
+        })
+    
+    finally:
+        if next_frame is not None and not next_frame.done():
+            next_frame.cancel()
+            await asyncio.gather(next_frame, return_exceptions=True)
+        await stream.aclose()
+
 def handle_default(event, context):
     """Handle default WebSocket route"""
     try:
@@ -230,7 +343,7 @@ def send_message_to_connection(connection_id: str, request_context: Dict, messag
         domain_name = request_context['domainName']
         stage = request_context['stage']
         
-        apigateway_client = boto3.client(
+        apigateway_client = get_client(
             'apigatewaymanagementapi',
             endpoint_url=f'https://{domain_name}/{stage}'
         )
@@ -0,0 +1,143 @@
+"""
+Async AWS I/O Tests
+Tests for the awaitable AWS facade
+"""
+
+import io
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from src.shared.async_aws import AsyncAWS
+
+
+class TestAsyncAWS:
+    """Test that blocking calls run off the event loop and results are unwrapped"""
+    
+    def setup_method(self):
+        """Fresh facade over a mock registry per test"""
+        
+        self.registry = Mock()
+        self.aws = AsyncAWS(max_workers=4, registry=self.registry)
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(self):
+        """Gathered calls run in parallel instead of back to back"""
+        
+        def slow_detect(**params):
+            time.sleep(0.2)
+            return {'Languages': [{'LanguageCode': 'en'}]}
+        
+        client = Mock()
+        client.detect_dominant_language.side_effect = slow_detect
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            self.aws.detect('dominant_language', 'hello', client=client) for _ in range(4)
+        ))
+        elapsed = time.perf_counter() - started
+        
+        assert len(results) == 4
+        assert elapsed < 0.6
+        client.detect_dominant_language.assert_called_with(Text='hello')
+    
+    @pytest.mark.asyncio
+    async def test_get_item_returns_none_when_missing(self):
+        """A missing item comes back as None rather than an empty response"""
+        
+        table = Mock()
+        table.get_item.return_value = {}
+        
+        assert await self.aws.get_item(table, {'id': '1'}) is None
+        table.get_item.assert_called_once_with(Key={'id': '1'})
+    
+    @pytest.mark.asyncio
+    async def test_table_names_resolve_through_registry(self):
+        """Table names are looked up on the shared registry"""
+        
+        self.registry.table.return_value.put_item.return_value = {}
+        
+        await self.aws.put_item('lms-tasks', {'id': '1'})
+        
+        self.registry.table.assert_called_once_with('lms-tasks')
+        self.registry.table.return_value.put_item.assert_called_once_with(Item={'id': '1'})
+    
+    @pytest.mark.asyncio
+    async def test_batch_get_retries_unprocessed_keys(self):
+        """Unprocessed keys are requested again and all items are returned"""
+        
+        dynamodb = self.registry.resource.return_value
+        dynamodb.batch_get_item.side_effect = [
+            {'Responses': {'t': [{'id': '1'}]}, 'UnprocessedKeys': {'t': {'Keys': [{'id': '2'}]}}},
+            {'Responses': {'t': [{'id': '2'}]}, 'UnprocessedKeys': {}}
+        ]
+        
+        items = await self.aws.batch_get('t', [{'id': '1'}, {'id': '2'}])
+        
+        assert sorted(item['id'] for item in items) == ['1', '2']
+        assert dynamodb.batch_get_item.call_args_list[1].kwargs == {'RequestItems': {'t': {'Keys': [{'id': '2'}]}}}
+    
+    @pytest.mark.asyncio
+    async def test_invoke_model_parses_json(self):
+        """Bedrock request bodies are serialized and responses parsed"""
+        
+        client = Mock()
+        client.invoke_model.return_value = {'body': io.BytesIO(b'{"embedding": [0.1, 0.2]}')}
+        
+        result = await self.aws.invoke_model('titan', {'inputText': 'hi'}, client=client)
+        
+        assert result == {'embedding': [0.1, 0.2]}
+        assert json.loads(client.invoke_model.call_args.kwargs['body']) == {'inputText': 'hi'}
+    
+    @pytest.mark.asyncio
+    async def test_invoke_model_stream_yields_chunks_as_they_arrive(self):
+        """Streamed chunks reach the caller before the generation finishes"""
+        
+        def events():
+            for text in ('Hel', 'lo'):
+                yield {'chunk': {'bytes': json.dumps({'type': 'content_block_delta', 'delta': {'text': text}}).encode()}}
+                time.sleep(0.1)
+        
+        client = Mock()
+        client.invoke_model_with_response_stream.return_value = {'body': events()}
+        
+        started = time.perf_counter()
+        arrivals, texts = [], []
+        async for chunk in self.aws.invoke_model_stream('claude', {'messages': []}, client=client):
+            arrivals.append(time.perf_counter() - started)
+            texts.append(chunk['delta']['text'])
+        
+        assert texts == ['Hel', 'lo']
+        assert arrivals[0] < 0.08
+        assert json.loads(client.invoke_model_with_response_stream.call_args.kwargs['body']) == {'messages': []}
+    
+    @pytest.mark.asyncio
+    async def test_invoke_model_stream_raises_stream_errors(self):
+        """An error while reading the stream surfaces from the iterator"""
+        
+        def events():
+            yield {'chunk': {'bytes': b'{"type": "message_start"}'}}
+            raise RuntimeError("modelStreamErrorException")
+        
+        client = Mock()
+        client.invoke_model_with_response_stream.return_value = {'body': events()}
+        
+        received = []
+        with pytest.raises(RuntimeError):
+            async for chunk in self.aws.invoke_model_stream('claude', {}, client=client):
+                received.append(chunk)
+        assert received == [{'type': 'message_start'}]
+    
+    @pytest.mark.asyncio
+    async def test_translate_text_returns_translation(self):
+        """translate_text unwraps the translated string"""
+        
+        client = Mock()
+        client.translate_text.return_value = {'TranslatedText': 'hola'}
+        
+        assert await self.aws.translate_text('hello', 'en', 'es', client=client) == 'hola'
+        client.translate_text.assert_called_once_with(
+            Text='hello', SourceLanguageCode='en', TargetLanguageCode='es'
+        )
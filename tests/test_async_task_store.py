@@ -0,0 +1,159 @@
+"""
+Async Task Store Tests
+Tests for delta-based, coalesced task persistence in AsyncTaskManager
+"""
+
+import os
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.async_processor import AsyncTaskManager, TaskStoreConfig, report_progress
+from src.shared.cache_codec import LocalBlobStore
+
+
+class TestAsyncTaskStore:
+    """Test the writes a task makes to its DynamoDB row"""
+    
+    def setup_method(self):
+        """Task manager over a mock table"""
+        
+        self.manager = AsyncTaskManager()
+        self.table = Mock()
+        self.table.put_item.return_value = {}
+        self.table.update_item.return_value = {}
+        self.manager.tasks_table = self.table
+    
+    async def _run(self, task_function, *args):
+        task_id = await self.manager.submit_task('quiz_generation', 'user-1', task_function, *args)
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if self.manager._active_tasks[task_id].status in ('completed', 'failed'):
+                break
+        return task_id
+    
+    def _updates(self):
+        # Task row deltas only (not the idempotency marker)
+        return [
+            call.kwargs for call in self.table.update_item.call_args_list
+            if not call.kwargs['Key']['task_id'].startswith('idempotency#')
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_lifecycle_is_one_put_and_deltas(self):
+        """Only the initial row is a full put; transitions are update_item deltas"""
+        
+        async def work():
+            return {'score': 0.5}
+        
+        task_id = await self._run(work)
+        
+        task_puts = [call for call in self.table.put_item.call_args_list if call.kwargs['Item']['task_id'] == task_id]
+        assert len(task_puts) == 1
+        updates = self._updates()
+        assert [u['ExpressionAttributeValues'][':status'] for u in updates] == ['running', 'completed']
+        assert updates[-1]['Key'] == {'task_id': task_id}
+        assert float(updates[-1]['ExpressionAttributeValues'][':result']['score']) == 0.5
+    
+    @pytest.mark.asyncio
+    async def test_progress_writes_are_coalesced(self):
+        """Many progress reports produce at most one write per interval"""
+        
+        async def work():
+            for step in range(20):
+                report_progress(step * 5)
+                await asyncio.sleep(0.005)
+            return {'done': True}
+        
+        with patch.object(TaskStoreConfig, 'PROGRESS_WRITE_INTERVAL', 0.05):
+            await self._run(work)
+        
+        stats = self.manager.get_persistence_stats()
+        assert stats['progress_updates'] == 20
+        assert 1 <= stats['progress_writes'] <= 4
+        
+        progress_writes = [u for u in self._updates() if 'ConditionExpression' in u]
+        assert all(u['ConditionExpression'] == '#status = :running' for u in progress_writes)
+    
+    @pytest.mark.asyncio
+    async def test_sync_tasks_can_report_progress(self):
+        """report_progress works from the task thread pool"""
+        
+        def work():
+            report_progress(40)
+            return {'done': True}
+        
+        with patch.object(TaskStoreConfig, 'PROGRESS_WRITE_INTERVAL', 0.0):
+            await self._run(work)
+            await asyncio.sleep(0.02)
+        
+        assert self.manager.get_persistence_stats()['progress_updates'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_large_results_are_stored_out_of_line(self, tmp_path):
+        """Oversized results leave only a reference on the task row"""
+        
+        self.manager._result_store = LocalBlobStore(str(tmp_path))
+        big_result = {'questions': ['q' * 100] * 10}
+        
+        async def work():
+            return big_result
+        
+        with patch.object(TaskStoreConfig, 'INLINE_RESULT_LIMIT', 100):
+            task_id = await self._run(work)
+        
+        final = self._updates()[-1]['ExpressionAttributeValues']
+        assert ':result' not in final
+        assert final[':result_ref'].startswith('file://')
+        
+        # A poller in another container sees only the status row
+        self.manager._active_tasks.clear()
+        self.manager._task_results.clear()
+        self.table.get_item.return_value = {'Item': {
+            'task_id': task_id, 'task_type': 'quiz_generation', 'user_id': 'user-1',
+            'status': 'completed', 'created_at': '2024-01-01T00:00:00', 'result_ref': final[':result_ref']
+        }}
+        
+        assert await self.manager.get_task_result(task_id) == big_result
+        projection = self.table.get_item.call_args.kwargs['ProjectionExpression']
+        assert '#result,' not in projection and not projection.endswith('#result')
+
+    @pytest.mark.asyncio
+    async def test_large_results_stay_inline_without_a_bucket(self):
+        """With no result bucket nothing is written to container-local storage"""
+        
+        async def work(size):
+            return {'questions': ['q' * 100] * size}
+        
+        with patch.object(TaskStoreConfig, 'RESULT_BUCKET', None), \
+             patch.object(TaskStoreConfig, 'INLINE_RESULT_LIMIT', 100):
+            await self._run(work, 10)
+            with patch.object(TaskStoreConfig, 'MAX_INLINE_RESULT', 1000):
+                await self._run(work, 20)
+        
+        kept, refused = [
+            update['ExpressionAttributeValues'] for update in self._updates()
+            if update['ExpressionAttributeValues'][':status'] == 'completed'
+        ]
+        assert len(kept[':result']['questions']) == 10 and ':result_ref' not in kept
+        assert ':result' not in refused and ':result_ref' not in refused
+        assert refused[':error'] == 'Result too large to store'
+        assert self.manager.get_persistence_stats()['results_too_large'] == 1
+    
+    def test_cancelled_task_is_recorded(self):
+        """A task cancelled with its loop gets a terminal state and frees its idempotency key"""
+        
+        self.manager.tasks_table = None
+        
+        async def work():
+            await asyncio.sleep(1)
+        
+        first = asyncio.run(self.manager.submit_task('quiz_generation', 'user-1', work))
+        task = self.manager._active_tasks[first]
+        second = asyncio.run(self.manager.submit_task('quiz_generation', 'user-1', work))
+        
+        assert (task.status, task.error) == ('cancelled', 'Task cancelled before completion')
+        assert task.completed_at is not None
+        assert second != first
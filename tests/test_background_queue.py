@@ -0,0 +1,145 @@
+"""
+Background Queue Tests
+Tests for concurrent SQS batch consumption and partial batch failures
+"""
+
+import os
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import patch
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.async_processor import BackgroundTaskQueue, LocalQueue, QueueConfig
+
+QUEUE_URL = 'local://background'
+
+
+class TestBackgroundTaskQueue:
+    """Test batch processing against the in-memory queue"""
+    
+    def setup_method(self):
+        """Queue over LocalQueue with a synthetic processor"""
+        
+        self.sqs = LocalQueue()
+        self.queue = BackgroundTaskQueue(sqs_client=self.sqs, queue_url=QUEUE_URL)
+        self.queue.dedup_table = None
+        self.enqueued = 0
+        self.in_flight = 0
+        self.peak = 0
+        
+        async def synthetic(user_id, task_data):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(task_data.get('sleep', 0.05))
+            self.in_flight -= 1
+            return not task_data.get('poison')
+        
+        self.queue.task_processors = {'quiz_generation': synthetic, 'file_processing': synthetic}
+    
+    async def _enqueue(self, count, task_type='quiz_generation', **task_data):
+        # Distinct payloads; identical ones would be deduplicated
+        for _ in range(count):
+            self.enqueued += 1
+            await self.queue.enqueue_task(task_type, 'user-1', dict(task_data, index=self.enqueued))
+    
+    @pytest.mark.asyncio
+    async def test_batch_is_processed_concurrently_and_deleted_in_one_call(self):
+        """Ten messages overlap and are acknowledged with one DeleteMessageBatch"""
+        
+        await self._enqueue(10)
+        
+        with patch.object(QueueConfig, 'WAIT_TIME_SECONDS', 0):
+            started = time.perf_counter()
+            processed = await self.queue.process_queue_messages()
+            elapsed = time.perf_counter() - started
+        
+        assert processed == 10
+        assert elapsed < 0.4
+        assert self.sqs.stats['delete_calls'] == 1
+        assert self.sqs.pending_count() == 0
+    
+    @pytest.mark.asyncio
+    async def test_per_type_concurrency_cap(self):
+        """No more than the type limit run at once"""
+        
+        self.queue.type_limits = {'file_processing': 2}
+        await self._enqueue(6, task_type='file_processing', sleep=0.02)
+        
+        with patch.object(QueueConfig, 'WAIT_TIME_SECONDS', 0):
+            assert await self.queue.process_queue_messages() == 6
+        
+        assert self.peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_failed_messages_stay_on_queue(self):
+        """Only successful messages are deleted"""
+        
+        await self._enqueue(3)
+        await self._enqueue(1, poison=True)
+        
+        with patch.object(QueueConfig, 'WAIT_TIME_SECONDS', 0):
+            assert await self.queue.process_queue_messages() == 3
+        
+        assert self.sqs.pending_count() == 1
+        assert self.queue.stats['messages_failed'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_sqs_event_reports_partial_batch_failures(self):
+        """A poison record is reported alone instead of failing the batch"""
+        
+        def record(message_id, body):
+            return {
+                'messageId': message_id,
+                'receiptHandle': f'handle-{message_id}',
+                'body': body,
+                'eventSource': 'aws:sqs',
+                'eventSourceARN': 'arn:aws:sqs:us-east-1:123456789012:lms-background'
+            }
+        
+        good = json.dumps({'task_type': 'quiz_generation', 'user_id': 'u', 'task_data': {'sleep': 0}})
+        poison = json.dumps({'task_type': 'quiz_generation', 'user_id': 'u', 'task_data': {'poison': True}})
+        
+        response = await self.queue.handle_sqs_event({'Records': [
+            record('m1', good), record('m2', 'not json'), record('m3', poison), record('m4', good)
+        ]})
+        
+        assert response == {'batchItemFailures': [{'itemIdentifier': 'm2'}, {'itemIdentifier': 'm3'}]}
+    
+    @pytest.mark.asyncio
+    async def test_visibility_is_extended_for_long_jobs(self):
+        """Messages still in progress have their visibility extended"""
+        
+        await self._enqueue(1, sleep=0.25)
+        
+        with patch.object(QueueConfig, 'WAIT_TIME_SECONDS', 0), \
+                patch.object(QueueConfig, 'VISIBILITY_TIMEOUT', 0.1):
+            assert await self.queue.process_queue_messages() == 1
+        
+        assert self.queue.stats['visibility_extensions'] >= 2
+        assert self.sqs.stats['visibility_changes'] >= 2
+
+    @pytest.mark.asyncio
+    async def test_cache_warming_runs_off_the_event_loop(self):
+        """Blocking warm calls leave the loop free for other messages"""
+        
+        def blocking_warm(user_id, prefixes=None, time_budget_seconds=None):
+            time.sleep(0.2)
+            return {'errors': []}
+        
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        task = asyncio.create_task(ticker())
+        with patch('src.shared.performance_cache.warm_cache_for_user', blocking_warm):
+            assert await self.queue._process_cache_warming_task('user-1', {}) is True
+        task.cancel()
+        
+        assert ticks >= 5
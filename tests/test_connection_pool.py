@@ -0,0 +1,172 @@
+"""
+Connection Pool Tests
+Tests for the process-wide AWS client registry
+"""
+
+import os
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from botocore.stub import Stubber
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.connection_pool import AWSClientRegistry, OptimizedAWSClient, ConnectionPoolConfig
+from src.shared.lazy import lazy_client, lazy_resource
+
+
+class TestAWSClientRegistry:
+    """Test shared client creation, keying and statistics"""
+    
+    def setup_method(self):
+        """Fresh registry per test"""
+        
+        self.registry = AWSClientRegistry()
+    
+    def test_client_is_created_once_and_reused(self):
+        """Repeated lookups return the same client"""
+        
+        first = self.registry.client('s3', region_name='us-east-1')
+        second = self.registry.client('s3', region_name='us-east-1')
+        
+        assert first is second
+        
+        totals = self.registry.get_stats()['totals']
+        assert totals['clients_created'] == 1
+        assert totals['client_reuses'] == 1
+        assert totals['reuse_rate_percent'] == 50.0
+    
+    def test_clients_are_keyed_by_region_and_profile(self):
+        """Region and config profile select distinct clients"""
+        
+        default = self.registry.client('s3', region_name='us-east-1')
+        other_region = self.registry.client('s3', region_name='eu-west-1')
+        fast_fail = self.registry.client('s3', region_name='us-east-1', profile='fast_fail')
+        
+        assert len({id(default), id(other_region), id(fast_fail)}) == 3
+        assert other_region.meta.region_name == 'eu-west-1'
+        assert fast_fail.meta.config.read_timeout == 5
+        assert default.meta.config.read_timeout == ConnectionPoolConfig.READ_TIMEOUT
+        assert default.meta.config.retries['mode'] == 'adaptive'
+    
+    def test_service_default_profile(self):
+        """Long-running services get the longer read timeout unless a profile is named"""
+        
+        pool = self.registry.pool('bedrock-runtime', region_name='us-east-1')
+        
+        assert pool.profile == 'long_running'
+        assert self.registry.pool('bedrock-runtime', region_name='us-east-1', profile='bedrock').profile == 'bedrock'
+    
+    def test_unknown_profile_is_rejected(self):
+        """Typos in profile names fail loudly"""
+        
+        with pytest.raises(ValueError):
+            self.registry.pool('s3', profile='no-such-profile')
+    
+    def test_concurrent_first_use_creates_one_client(self):
+        """Racing threads share a single client"""
+        
+        barrier = threading.Barrier(8)
+        clients = []
+        
+        def use():
+            barrier.wait()
+            clients.append(self.registry.client('sqs', region_name='us-east-1'))
+        
+        with patch('boto3.client', side_effect=lambda *args, **kwargs: Mock()) as client_factory:
+            threads = [threading.Thread(target=use) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        client_factory.assert_called_once()
+        assert len({id(client) for client in clients}) == 1
+    
+    def test_resources_are_per_thread(self):
+        """Each thread gets its own resource, reused within the thread"""
+        
+        main_first = self.registry.resource('dynamodb', region_name='us-east-1')
+        main_second = self.registry.resource('dynamodb', region_name='us-east-1')
+        other = []
+        
+        thread = threading.Thread(target=lambda: other.append(self.registry.resource('dynamodb', region_name='us-east-1')))
+        thread.start()
+        thread.join()
+        
+        assert main_first is main_second
+        assert other[0] is not main_first
+        
+        stats = self.registry.get_stats()['clients'][0]
+        assert stats['resources_created'] == 2
+        assert stats['resource_reuses'] == 1
+    
+    def test_in_flight_calls_are_tracked(self):
+        """Calls are counted and released after success and failure"""
+        
+        client = self.registry.client('sqs', region_name='us-east-1')
+        
+        with Stubber(client) as stubber:
+            stubber.add_response('list_queues', {'QueueUrls': []})
+            stubber.add_client_error('list_queues', 'AWS.SimpleQueueService.NonExistentQueue')
+            
+            client.list_queues()
+            with pytest.raises(Exception):
+                client.list_queues()
+        
+        stats = self.registry.get_stats()['clients'][0]
+        assert stats['calls'] == 2
+        assert stats['in_flight'] == 0
+        assert stats['peak_in_flight'] == 1
+        assert stats['pool_saturation_percent'] == 100 / ConnectionPoolConfig.MAX_POOL_CONNECTIONS
+        assert stats['saturated_calls'] == 0
+    
+    def test_saturation_counts_calls_beyond_pool_size(self):
+        """Calls started while the pool is full are counted as saturated"""
+        
+        pool = OptimizedAWSClient('s3', region_name='us-east-1')
+        limit = pool.config.max_pool_connections
+        contexts = [{} for _ in range(limit + 2)]
+        
+        for context in contexts:
+            pool._on_call_start(context=context)
+        for context in contexts:
+            pool._on_call_end(context=context)
+        
+        stats = pool.get_stats()
+        assert stats['saturated_calls'] == 2
+        assert stats['in_flight'] == 0
+        assert stats['pool_saturation_percent'] > 100
+
+
+class TestLazyRegistryClients:
+    """Test that lazy module-level clients resolve through the registry"""
+    
+    def test_lazy_client_uses_registry(self):
+        """lazy_client defers to the shared registry client"""
+        
+        registry = AWSClientRegistry()
+        
+        with patch('src.shared.connection_pool.aws_clients', registry):
+            client = lazy_client('comprehend', region_name='us-east-1')
+            assert registry.get_stats()['pools'] == 0
+            
+            assert client.meta.service_model.service_name == 'comprehend'
+            assert client.meta.region_name == 'us-east-1'
+        
+        assert registry.get_stats()['totals']['clients_created'] == 1
+    
+    def test_lazy_resource_is_per_thread(self):
+        """A module-level lazy resource forwards to the calling thread's resource"""
+        
+        registry = AWSClientRegistry()
+        
+        with patch('src.shared.connection_pool.aws_clients', registry):
+            dynamodb = lazy_resource('dynamodb', region_name='us-east-1')
+            dynamodb.Table('a')
+            
+            thread = threading.Thread(target=lambda: dynamodb.Table('b'))
+            thread.start()
+            thread.join()
+        
+        assert registry.get_stats()['totals']['resources_created'] == 2
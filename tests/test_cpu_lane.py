@@ -0,0 +1,108 @@
+"""
+CPU Lane Tests
+Tests for the process-pool execution lane for CPU-bound tasks
+"""
+
+import os
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.cpu_lane import CPULane, task_path
+from src.shared.async_processor import AsyncTaskManager
+
+
+def _worker_pid_and_square(value):
+    return os.getpid(), value * value
+
+
+class TestCPULane:
+    """Test task routing, the picklable task protocol and fallbacks"""
+    
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_process(self):
+        """Module-level functions run in a separate, reused process"""
+        
+        lane = CPULane(max_workers=1)
+        try:
+            results = await asyncio.gather(*(lane.run(_worker_pid_and_square, n) for n in range(4)))
+        finally:
+            lane.shutdown()
+        
+        pids = {pid for pid, _ in results}
+        assert [square for _, square in results] == [0, 1, 4, 9]
+        assert os.getpid() not in pids
+        assert len(pids) == 1
+        assert lane.stats['process_tasks'] == 4
+    
+    def test_task_path_requires_module_level_functions(self):
+        """Lambdas, closures and bound methods cannot cross the process boundary"""
+        
+        def nested():
+            pass
+        
+        assert task_path(_worker_pid_and_square).endswith(':_worker_pid_and_square')
+        assert task_path('package.module:function') == 'package.module:function'
+        
+        for invalid in (lambda: None, nested, CPULane().is_cpu_bound, 'no_colon'):
+            with pytest.raises(ValueError):
+                task_path(invalid)
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_threads_without_process_support(self):
+        """Environments without multiprocessing primitives still run tasks"""
+        
+        lane = CPULane(max_workers=2)
+        with patch('src.shared.cpu_lane.ProcessPoolExecutor', side_effect=OSError(38, 'Function not implemented')):
+            pid, square = await lane.run(_worker_pid_and_square, 3)
+        
+        assert (pid, square) == (os.getpid(), 9)
+        assert lane.get_stats()['mode'] == 'thread'
+        lane.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_task_manager_routes_cpu_task_types(self):
+        """Sync functions of CPU-bound task types go to the lane"""
+        
+        manager = AsyncTaskManager()
+        manager.tasks_table = None
+        
+        lane = Mock()
+        lane.is_cpu_bound.side_effect = lambda task_type: task_type == 'text_extraction'
+        lane.run = AsyncMock(return_value={'text': 'ok'})
+        
+        with patch('src.shared.async_processor.cpu_lane', lane):
+            task_id = await manager.submit_task('text_extraction', 'user-1', _worker_pid_and_square, 5)
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+        
+        lane.run.assert_awaited_once_with(_worker_pid_and_square, 5)
+        assert await manager.get_task_result(task_id) == {'text': 'ok'}
+
+    @pytest.mark.asyncio
+    async def test_task_manager_runs_unimportable_cpu_tasks_on_threads(self):
+        """Bound methods of CPU-bound task types fall back to the thread pool"""
+        
+        class Extractor:
+            def extract(self, value):
+                return {'text': value * 2}
+        
+        manager = AsyncTaskManager()
+        manager.tasks_table = None
+        
+        lane = Mock()
+        lane.is_cpu_bound.return_value = True
+        lane.run = AsyncMock()
+        
+        with patch('src.shared.async_processor.cpu_lane', lane):
+            task_ids = [
+                await manager.submit_task('text_extraction', 'user-1', Extractor().extract, n) for n in (1, 2)
+            ]
+            for _ in range(20):
+                await asyncio.sleep(0.01)
+        
+        lane.run.assert_not_awaited()
+        assert [await manager.get_task_result(task_id) for task_id in task_ids] == [{'text': 2}, {'text': 4}]
+        assert manager._lane_fallbacks == {'TestCPULane.test_task_manager_runs_unimportable_cpu_tasks_on_threads.<locals>.Extractor.extract'}
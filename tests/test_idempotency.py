@@ -0,0 +1,191 @@
+"""
+Idempotency Tests
+Tests for deduplicating equivalent task submissions and enqueues
+"""
+
+import os
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+from botocore.exceptions import ClientError
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.async_processor import (
+    AsyncTaskManager, BackgroundTaskQueue, IdempotencyStore, LocalQueue, QueueConfig, derive_idempotency_key
+)
+
+
+def _conditional_check_failed():
+    return ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'exists'}}, 'PutItem')
+
+
+class TestIdempotentSubmission:
+    """Test that equivalent work returns the existing task"""
+    
+    def setup_method(self):
+        """Task manager without a table (in-process claims)"""
+        
+        self.manager = AsyncTaskManager()
+        self.manager.tasks_table = None
+        self.calls = 0
+    
+    async def _work(self, file_id):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return {'file_id': file_id}
+    
+    async def _wait(self, task_id):
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if self.manager._active_tasks[task_id].status in ('completed', 'failed'):
+                return
+    
+    def test_default_key_depends_on_type_user_and_arguments(self):
+        """Keys are stable for equal arguments and differ otherwise"""
+        
+        key = derive_idempotency_key('file_processing', 'user-1', 'file-1', mode='full')
+        
+        assert key == derive_idempotency_key('file_processing', 'user-1', 'file-1', mode='full')
+        assert key != derive_idempotency_key('file_processing', 'user-2', 'file-1', mode='full')
+        assert key != derive_idempotency_key('file_processing', 'user-1', 'file-2', mode='full')
+        assert key != derive_idempotency_key('quiz_generation', 'user-1', 'file-1', mode='full')
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_submission_returns_existing_task(self):
+        """A double click while running and after completion shares one task"""
+        
+        first = await self.manager.submit_task('file_processing', 'user-1', self._work, 'file-1')
+        running = await self.manager.submit_task('file_processing', 'user-1', self._work, 'file-1')
+        await self._wait(first)
+        completed = await self.manager.submit_task('file_processing', 'user-1', self._work, 'file-1')
+        other = await self.manager.submit_task('file_processing', 'user-1', self._work, 'file-2')
+        await self._wait(other)
+        
+        assert first == running == completed
+        assert other != first
+        assert self.calls == 2
+        assert self.manager.get_persistence_stats()['duplicate_submissions'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_failed_task_can_be_resubmitted(self):
+        """A failure releases the key"""
+        
+        async def flaky(file_id):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("transient")
+            return {'file_id': file_id}
+        
+        first = await self.manager.submit_task('file_processing', 'user-1', flaky, 'file-1')
+        await self._wait(first)
+        second = await self.manager.submit_task('file_processing', 'user-1', flaky, 'file-1')
+        await self._wait(second)
+        
+        assert second != first
+        assert self.manager._active_tasks[second].status == 'completed'
+    
+    @pytest.mark.asyncio
+    async def test_claim_held_by_another_container(self):
+        """A failed conditional put returns the owner recorded in the table"""
+        
+        table = Mock()
+        table.put_item.side_effect = _conditional_check_failed()
+        table.get_item.return_value = {'Item': {
+            'task_id': 'idempotency#key', 'owner_id': 'task-from-elsewhere', 'expires_at': 4102444800
+        }}
+        self.manager.tasks_table = table
+        
+        task_id = await self.manager.submit_task('file_processing', 'user-1', self._work, 'file-1')
+        
+        assert task_id == 'task-from-elsewhere'
+        assert self.calls == 0
+        condition = table.put_item.call_args.kwargs['ConditionExpression']
+        assert 'attribute_not_exists(task_id)' in condition
+
+
+class TestIdempotentEnqueue:
+    """Test that equivalent background tasks are sent once"""
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_enqueue_sends_once(self):
+        """The second enqueue returns the first message ID"""
+        
+        sqs = LocalQueue()
+        queue = BackgroundTaskQueue(sqs_client=sqs, queue_url='local://background')
+        queue.dedup_table = None
+        
+        first = await queue.enqueue_task('quiz_generation', 'user-1', {'file_id': 'file-1'})
+        second = await queue.enqueue_task('quiz_generation', 'user-1', {'file_id': 'file-1'})
+        third = await queue.enqueue_task('quiz_generation', 'user-1', {'file_id': 'file-2'})
+        
+        assert first == second
+        assert third != first
+        assert sqs.pending_count() == 2
+        assert queue.stats['duplicate_enqueues'] == 1
+
+    @pytest.mark.asyncio
+    async def test_in_flight_duplicate_reports_pending(self):
+        """A duplicate of an enqueue not yet sent gets a pending status, never the claiming task ID"""
+        
+        sqs = LocalQueue()
+        queue = BackgroundTaskQueue(sqs_client=sqs, queue_url='local://background')
+        queue.dedup_table = None
+        
+        key = derive_idempotency_key('quiz_generation', 'user-1', {'file_id': 'file-1'})
+        await queue.idempotency.claim(None, key, 'task-being-sent')
+        
+        result = await queue.enqueue_task('quiz_generation', 'user-1', {'file_id': 'file-1'})
+        
+        assert result == QueueConfig.DUPLICATE_PENDING
+        assert sqs.pending_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_claim_released_when_message_goes_to_dlq(self):
+        """A message failing on its last receive frees its key; earlier failures keep it"""
+        
+        sqs = LocalQueue()
+        queue = BackgroundTaskQueue(sqs_client=sqs, queue_url='local://background')
+        queue.dedup_table = None
+        
+        async def failing(user_id, task_data):
+            return False
+        
+        queue.task_processors = {'quiz_generation': failing}
+        first = await queue.enqueue_task('quiz_generation', 'user-1', {'file_id': 'file-1'})
+        body = sqs.receive_message(QueueUrl='local://background')['Messages'][0]['Body']
+        
+        def delivery(receive_count):
+            return {'Records': [{
+                'messageId': first, 'receiptHandle': None, 'body': body,
+                'attributes': {'ApproximateReceiveCount': str(receive_count)}
+            }]}
+        
+        with patch.object(QueueConfig, 'MAX_RECEIVE_COUNT', 2):
+            await queue.handle_sqs_event(delivery(1))
+            assert await queue.enqueue_task('quiz_generation', 'user-1', {'file_id': 'file-1'}) == first
+            
+            await queue.handle_sqs_event(delivery(2))
+            again = await queue.enqueue_task('quiz_generation', 'user-1', {'file_id': 'file-1'})
+        
+        assert again not in (first, QueueConfig.DUPLICATE_PENDING)
+        assert sqs.pending_count() == 2
+
+
+class TestIdempotencyStore:
+    """Test that in-process claims stay bounded"""
+    
+    @pytest.mark.asyncio
+    async def test_local_claims_are_bounded_and_expire(self):
+        """Least recently used claims are evicted past the limit; expired ones on access"""
+        
+        store = IdempotencyStore(max_local=3)
+        for n in range(5):
+            await store.claim(None, f'key-{n}', f'task-{n}')
+        
+        assert list(store._local) == ['key-2', 'key-3', 'key-4']
+        
+        await store.claim(None, 'short', 'task-short', hold_seconds=-1)
+        assert await store.claim(None, 'short', 'task-other') is None
+        assert store._local['short'][0]['owner_id'] == 'task-other'
+        assert len(store._local) == 3
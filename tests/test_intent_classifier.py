@@ -0,0 +1,74 @@
+"""
+Intent Classifier Tests
+Tests for the compiled chat intent classifier against the labelled message set
+"""
+
+import pytest
+
+from src.shared.intent_classifier import IntentClassifier, build_chat_intent_classifier, intent_classifier
+from src.shared.lazy import is_constructed
+from benchmark_intent_classifier import legacy_classify, load_labels
+
+
+class TestIntentClassifier:
+    """Test weighted scoring and accuracy on the labelled messages"""
+    
+    def setup_method(self):
+        """Fresh chat classifier per test"""
+        
+        self.classifier = build_chat_intent_classifier()
+    
+    def test_accuracy_is_not_worse_than_keyword_loops(self):
+        """The labelled set scores at least as well as the previous first-match scan"""
+        
+        labels = load_labels()
+        expected = [(row['intent'], row['summary_type']) for row in labels]
+        
+        legacy = [legacy_classify(row['message']) for row in labels]
+        compiled = [self.classifier.classify(row['message']) for row in labels]
+        legacy_correct = sum(1 for got, want in zip(legacy, expected) if got == want)
+        compiled_correct = sum(1 for got, want in zip(compiled, expected) if (got.intent, got.summary_type) == want)
+        
+        assert len(labels) >= 50
+        assert compiled_correct >= legacy_correct
+        assert compiled_correct / len(labels) >= 0.9
+    
+    def test_explicit_request_outweighs_question_words(self):
+        """A translate request phrased as a question is a translation"""
+        
+        result = self.classifier.classify("What is the translation of 'photosynthesis' in German?")
+        
+        assert result.intent == 'translate'
+        assert result.matches == ['what', 'translation', 'in german']
+        assert result.scores['question'] < result.scores['translate']
+    
+    @pytest.mark.parametrize("message, intent", [
+        ("Show me my uploaded files", "general"),
+        ("Somewhere in my notes", "general"),
+        ("I summarized it already, how do I check?", "summarize"),
+    ])
+    def test_phrases_match_at_word_starts(self, message, intent):
+        """'how' inside 'show' does not count; run-on words do"""
+        
+        assert self.classifier.classify(message).intent == intent
+    
+    def test_ties_go_to_the_first_declared_label(self):
+        """Equal scores resolve in declaration order; summary types only for the summary intent"""
+        
+        classifier = IntentClassifier(
+            {'first': {'alpha': 1.0}, 'second': {'beta': 1.0}},
+            {'short': {'quick': 1.0}},
+            summary_intent='second'
+        )
+        
+        assert classifier.classify("beta alpha").intent == 'first'
+        assert classifier.classify("quick beta").summary_type == 'short'
+        assert classifier.classify("quick alpha").summary_type == 'standard'
+        assert classifier.classify("nothing here").intent == 'general'
+    
+    def test_shared_instance_is_built_once(self):
+        """Handlers share one classifier, compiled on first use"""
+        
+        assert intent_classifier.classify("summarize this").intent == 'summarize'
+        assert is_constructed(intent_classifier)
+        assert intent_classifier._resolve() is intent_classifier._resolve()
@@ -0,0 +1,55 @@
+"""
+LangGraph Chat Handler Tests
+Tests for request routing in the LangGraph chat Lambda handler
+"""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chat import langgraph_chat_handler as handler
+
+
+async def _frames(*args, **kwargs):
+    yield b'{"type": "token", "content": "Hi"}\n'
+    yield b'{"type": "done"}\n'
+
+
+async def _workflow(*args, **kwargs):
+    return {'response': 'Hi'}
+
+
+class TestChatStreaming:
+    """Test that clients asking for NDJSON get the streamed frames"""
+    
+    def _post(self, headers):
+        event = {'httpMethod': 'POST', 'headers': headers, 'body': json.dumps({'user_id': 'u1', 'message': 'Hi'})}
+        with patch.object(handler, 'stream_langgraph_chat_http', _frames), \
+             patch.object(handler, 'process_with_langgraph_workflow', wraps=_workflow) as workflow:
+            response = handler.handle_langgraph_chat(event)
+        return response, workflow
+    
+    def test_lowercase_accept_header_streams(self):
+        """Header names are matched case-insensitively"""
+        
+        for name in ('accept', 'Accept', 'ACCEPT'):
+            response, workflow = self._post({name: 'application/x-ndjson'})
+            
+            assert response['statusCode'] == 200
+            assert response['headers']['Content-Type'] == 'application/x-ndjson'
+            assert [json.loads(line)['type'] for line in response['body'].splitlines()] == ['token', 'done']
+            workflow.assert_not_called()
+    
+    def test_json_without_ndjson_accept(self):
+        """Other Accept values get the single JSON response"""
+        
+        response, workflow = self._post({'accept': 'application/json'})
+        
+        workflow.assert_called_once()
+        assert json.loads(response['body']) == {'response': 'Hi'}
@@ -0,0 +1,94 @@
+"""
+Lazy Construction Tests
+Tests for the lazy singleton proxies that keep handler imports cheap
+"""
+
+import os
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.lazy import LazyProxy, is_constructed, lazy_client
+from src.shared.connection_pool import AWSClientRegistry
+
+
+class Service:
+    """Minimal stand-in for a service singleton"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def ping(self) -> str:
+        self.calls += 1
+        return "pong"
+
+
+class TestLazyProxy:
+    """Test deferred construction of module-level singletons"""
+    
+    def test_constructed_on_first_attribute_access(self):
+        """Declaring the proxy builds nothing; first use builds once"""
+        
+        factory = Mock(side_effect=Service)
+        proxy = LazyProxy(factory)
+        
+        assert not is_constructed(proxy)
+        factory.assert_not_called()
+        
+        assert proxy.ping() == "pong"
+        assert proxy.ping() == "pong"
+        
+        factory.assert_called_once()
+        assert is_constructed(proxy)
+        assert proxy.calls == 2
+    
+    def test_concurrent_first_use_builds_once(self):
+        """Racing threads share a single instance"""
+        
+        factory = Mock(side_effect=Service)
+        proxy = LazyProxy(factory)
+        barrier = threading.Barrier(8)
+        
+        def use():
+            barrier.wait()
+            proxy.ping()
+        
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        factory.assert_called_once()
+        assert proxy.calls == 8
+    
+    def test_attribute_writes_and_patching_reach_the_instance(self):
+        """patch.object on a proxy patches the real singleton and restores it"""
+        
+        proxy = LazyProxy(Service)
+        
+        with patch.object(proxy, "ping", return_value="patched"):
+            assert proxy.ping() == "patched"
+        assert proxy.ping() == "pong"
+        
+        proxy.calls = 10
+        assert proxy.calls == 10
+    
+    def test_lazy_client_defers_boto3(self):
+        """AWS clients are not created until a method is called"""
+        
+        with patch("src.shared.connection_pool.aws_clients", AWSClientRegistry()), \
+                patch("boto3.client") as client_factory:
+            client = lazy_client("comprehend")
+            client_factory.assert_not_called()
+            
+            client.detect_dominant_language(Text="hello")
+            client_factory.assert_called_once()
+            assert client_factory.call_args.args == ("comprehend",)
+    
+    def test_plain_objects_count_as_constructed(self):
+        """is_constructed accepts eagerly built singletons too"""
+        
+        assert is_constructed(Service())
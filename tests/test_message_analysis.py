@@ -0,0 +1,113 @@
+"""
+Message Analysis Tests
+Tests for the combined, cached Comprehend analysis of chat messages
+"""
+
+import os
+import time
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.message_analysis import MessageAnalysisService, detect_script_language
+from src.shared.performance_cache import PerformanceCache
+
+LONG_MESSAGE = "Zusammenfassung " * 10
+
+
+def _comprehend(language='en', delay=0.0):
+    def slow(response):
+        def call(**params):
+            time.sleep(delay)
+            return response
+        return call
+    
+    client = Mock()
+    client.detect_dominant_language.side_effect = slow({'Languages': [{'LanguageCode': language, 'Score': 0.98}]})
+    client.detect_key_phrases.side_effect = slow({'KeyPhrases': [{'Text': 'entropy'}]})
+    client.detect_entities.side_effect = slow({'Entities': [{'Text': 'Boltzmann', 'Type': 'PERSON'}]})
+    return client
+
+
+class TestMessageAnalysis:
+    """Test local detection, caching and concurrent Comprehend calls"""
+    
+    def setup_method(self):
+        """Service over a memory-only cache"""
+        
+        cache = PerformanceCache()
+        cache.cache_table = None
+        cache.redis_client = None
+        self.cache = cache
+    
+    def test_local_detector(self):
+        """Distinct scripts and plain English are recognised; ambiguous text is not"""
+        
+        assert detect_script_language("What is the second law?")[0] == 'en'
+        assert detect_script_language("What is the second law?")[1] >= 0.9
+        assert detect_script_language("エントロピーとは何ですか")[0] == 'ja'
+        assert detect_script_language("엔트로피란 무엇입니까")[0] == 'ko'
+        assert detect_script_language("¿Qué es la entropía?") == (None, 0.0)
+        assert detect_script_language("Summarize chapter three")[1] < 0.9
+    
+    @pytest.mark.asyncio
+    async def test_confident_short_message_skips_comprehend(self):
+        """No Comprehend call for a short message the local detector is sure of"""
+        
+        client = _comprehend()
+        service = MessageAnalysisService(cache=self.cache, comprehend=client)
+        
+        analysis = await service.analyze("What is the second law?")
+        
+        assert analysis['language'] == 'en'
+        assert analysis['source'] == 'local'
+        assert analysis['comprehend_calls_avoided'] == 3
+        assert not client.detect_dominant_language.called
+    
+    @pytest.mark.asyncio
+    async def test_calls_run_concurrently_and_results_are_cached(self):
+        """A miss makes three overlapping calls; a normalized repeat makes none"""
+        
+        client = _comprehend(language='en', delay=0.1)
+        service = MessageAnalysisService(cache=self.cache, comprehend=client)
+        
+        started = time.perf_counter()
+        first = await service.analyze(LONG_MESSAGE)
+        elapsed = time.perf_counter() - started
+        repeat = await service.analyze("  " + LONG_MESSAGE.upper())
+        
+        assert elapsed < 0.25
+        assert first['source'] == 'comprehend'
+        assert first['comprehend_calls'] == 3
+        assert first['key_phrases'] == [{'Text': 'entropy'}]
+        assert repeat['source'] == 'cache'
+        assert repeat['entities'] == first['entities']
+        assert client.detect_dominant_language.call_count == 1
+        assert service.get_stats()['calls_avoided_per_turn'] == 1.5
+    
+    @pytest.mark.asyncio
+    async def test_reanalyses_in_detected_language(self):
+        """Phrases and entities are re-requested when Comprehend detects another language"""
+        
+        client = _comprehend(language='de')
+        service = MessageAnalysisService(cache=self.cache, comprehend=client)
+        
+        analysis = await service.analyze(LONG_MESSAGE)
+        
+        assert analysis['language'] == 'de'
+        assert analysis['comprehend_calls'] == 5
+        assert client.detect_key_phrases.call_args.kwargs['LanguageCode'] == 'de'
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_turns_share_one_pass(self):
+        """Simultaneous identical messages call Comprehend once"""
+        
+        client = _comprehend(delay=0.05)
+        service = MessageAnalysisService(cache=self.cache, comprehend=client)
+        
+        results = await asyncio.gather(*(service.analyze(LONG_MESSAGE) for _ in range(3)))
+        
+        assert client.detect_dominant_language.call_count == 1
+        assert sorted(r['comprehend_calls'] for r in results) == [0, 0, 3]
@@ -0,0 +1,1068 @@
+"""
+Performance Cache Tests
+Tests for the multi-tier cache internals (memory tier, DynamoDB/Redis tiers)
+"""
+
+import os
+import time
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from botocore.exceptions import ClientError
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.performance_cache import (
+    PerformanceCache, MemoryCacheTier, SingleFlight, CacheConfig
+)
+from src.shared.cache_codec import CacheCodec, CodecConfig, LocalBlobStore
+
+
+def make_local_cache() -> PerformanceCache:
+    """Create a cache with only the in-memory tier enabled"""
+    
+    cache = PerformanceCache()
+    cache.cache_table = None
+    cache.redis_client = None
+    return cache
+
+
+class TestMemoryCacheTier:
+    """Test the bounded LRU/TTL memory tier"""
+    
+    def test_lru_eviction_by_entry_count(self):
+        """Least recently used entry is evicted first"""
+        
+        tier = MemoryCacheTier(max_entries=3, max_bytes=10 * 1024 * 1024)
+        expires_at = time.time() + 60
+        
+        for key in ["a", "b", "c"]:
+            tier.set(key, {"key": key}, expires_at, 10)
+        
+        # Touch "a" so "b" becomes the LRU entry
+        assert tier.get("a") == {"key": "a"}
+        tier.set("d", {"key": "d"}, expires_at, 10)
+        
+        assert tier.peek("b") is None
+        assert tier.peek("a") is not None
+        assert tier.peek("d") is not None
+        assert len(tier) == 3
+        assert tier.get_stats()["evictions"] == 1
+    
+    def test_eviction_by_resident_bytes(self):
+        """One large value pushes out many small ones"""
+        
+        overhead = CacheConfig.MEMORY_ENTRY_OVERHEAD
+        tier = MemoryCacheTier(max_entries=1000, max_bytes=10 * (100 + overhead + 2))
+        expires_at = time.time() + 60
+        
+        for i in range(10):
+            tier.set(f"k{i}", i, expires_at, 100)
+        assert len(tier) == 10
+        
+        tier.set("big", "x", expires_at, 600)
+        
+        stats = tier.get_stats()
+        assert tier.peek("big") == "x"
+        assert stats["resident_bytes"] <= stats["max_bytes"]
+        assert stats["evictions"] == 4
+        assert len(tier) == 7
+    
+    def test_oversized_value_rejected(self):
+        """Values larger than the whole byte budget are not stored"""
+        
+        tier = MemoryCacheTier(max_entries=10, max_bytes=1024)
+        
+        assert tier.set("huge", "x", time.time() + 60, 4096) is False
+        assert len(tier) == 0
+        assert tier.resident_bytes == 0
+        assert tier.get_stats()["rejected"] == 1
+    
+    def test_ttl_expiration_and_stats(self):
+        """Expired entries are misses and release their bytes"""
+        
+        tier = MemoryCacheTier(max_entries=10, max_bytes=1024 * 1024)
+        tier.set("live", 1, time.time() + 60, 10)
+        tier.set("dead", 2, time.time() - 1, 10)
+        
+        assert tier.get("live") == 1
+        assert tier.get("dead") is None
+        assert tier.get("missing") is None
+        
+        stats = tier.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["expirations"] == 1
+        assert stats["entries"] == 1
+    
+    def test_overwrite_keeps_byte_accounting_exact(self):
+        """Replacing a key does not leak resident bytes"""
+        
+        tier = MemoryCacheTier(max_entries=10, max_bytes=1024 * 1024)
+        expires_at = time.time() + 60
+        
+        tier.set("key", "v1", expires_at, 500)
+        tier.set("key", "v2", expires_at, 50)
+        
+        assert tier.resident_bytes == 50 + len("key") + CacheConfig.MEMORY_ENTRY_OVERHEAD
+        tier.delete("key")
+        assert tier.resident_bytes == 0
+    
+    def test_purge_expired(self):
+        """Full sweep removes every expired entry"""
+        
+        tier = MemoryCacheTier(max_entries=100, max_bytes=1024 * 1024)
+        for i in range(5):
+            tier.set(f"old{i}", i, time.time() - 1, 10)
+        tier.set("new", 1, time.time() + 60, 10)
+        
+        assert tier.purge_expired() == 5
+        assert len(tier) == 1
+
+
+class TestPerformanceCacheMemoryTier:
+    """Test PerformanceCache integration with the memory tier"""
+    
+    def test_stats_report_memory_tier(self):
+        """Cache stats expose entries, bytes, hits and misses"""
+        
+        cache = make_local_cache()
+        cache.set("test_data", "key", {"value": 1}, user_id="user_1")
+        cache.get("test_data", "key", user_id="user_1")
+        cache.get("test_data", "other", user_id="user_1")
+        
+        stats = cache.get_stats()
+        assert stats["memory_cache_size"] == 1
+        assert stats["memory_cache_bytes"] > 0
+        assert stats["memory_cache"]["hits"] == 1
+        assert stats["memory_cache"]["misses"] == 1
+
+
+class TestStampedeProtection:
+    """Test single-flight coalescing of concurrent cache misses"""
+    
+    def test_threads_share_one_computation(self):
+        """Concurrent threads missing the same key compute once"""
+        
+        cache = make_local_cache()
+        calls = []
+        results = []
+        barrier = threading.Barrier(8)
+        
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"answer": 42}
+        
+        def worker():
+            barrier.wait()
+            results.append(cache.get_or_compute("analytics", "dashboard", compute, user_id="teacher_1"))
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1
+        assert results == [{"answer": 42}] * 8
+        assert cache.get_stats()["single_flight"]["coalesced"] >= 1
+    
+    @pytest.mark.asyncio
+    async def test_asyncio_tasks_share_one_computation(self):
+        """Concurrent coroutines missing the same key compute once"""
+        
+        cache = make_local_cache()
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "response"
+        
+        results = await asyncio.gather(*[
+            cache.aget_or_compute(CacheConfig.BEDROCK_RESPONSES, "q1", compute)
+            for _ in range(10)
+        ])
+        
+        assert len(calls) == 1
+        assert results == ["response"] * 10
+    
+    @pytest.mark.asyncio
+    async def test_leader_error_propagates_to_followers(self):
+        """Followers see the leader's exception instead of recomputing"""
+        
+        flight = SingleFlight()
+        calls = []
+        
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            raise ValueError("bedrock unavailable")
+        
+        results = await asyncio.gather(
+            *[flight.ado("key", failing) for _ in range(3)],
+            return_exceptions=True
+        )
+        
+        assert len(calls) == 1
+        assert all(isinstance(r, ValueError) for r in results)
+    
+    def test_follower_timeout_computes_independently(self):
+        """A stuck leader cannot hang its followers"""
+        
+        flight = SingleFlight(wait_timeout=0.05)
+        release = threading.Event()
+        
+        def slow_leader():
+            release.wait(2)
+            return "leader"
+        
+        leader = threading.Thread(target=lambda: flight.do("key", slow_leader))
+        leader.start()
+        time.sleep(0.02)
+        
+        assert flight.do("key", lambda: "follower") == "follower"
+        assert flight.get_stats()["wait_timeouts"] == 1
+        
+        release.set()
+        leader.join()
+    
+    def test_distributed_lock_contention_waits_for_holder(self):
+        """A locked-out container polls the cache instead of recomputing"""
+        
+        cache = make_local_cache()
+        cache.cache_table = Mock()
+        cache.cache_table.put_item.side_effect = ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": "locked"}},
+            "PutItem"
+        )
+        cache.cache_table.get_item.side_effect = [
+            {},  # namespace generation
+            {},
+            {"Item": {"value": '"from-other-container"', "ttl": time.time() + 60}}
+        ]
+        compute = Mock(return_value="local")
+        
+        with patch.object(CacheConfig, "DISTRIBUTED_LOCK_POLL", 0.01):
+            value = cache.get_or_compute(
+                CacheConfig.ANALYTICS, "report", compute, distributed_lock=True
+            )
+        
+        assert value == "from-other-container"
+        compute.assert_not_called()
+        assert cache.get_stats()["distributed_locks"]["contended"] >= 1
+    
+    def test_distributed_lock_released_after_compute(self):
+        """The lock holder deletes its lock row conditioned on ownership"""
+        
+        cache = make_local_cache()
+        cache.cache_table = Mock()
+        cache.cache_table.get_item.return_value = {}
+        
+        value = cache.get_or_compute(
+            CacheConfig.ANALYTICS, "report", lambda: {"ok": True}, distributed_lock=True
+        )
+        
+        assert value == {"ok": True}
+        lock_key = cache.cache_table.put_item.call_args_list[0].kwargs["Item"]["cache_key"]
+        assert lock_key.startswith(f"{CacheConfig.LOCK_KEY_PREFIX}:")
+        delete_kwargs = cache.cache_table.delete_item.call_args.kwargs
+        assert delete_kwargs["Key"] == {"cache_key": lock_key}
+        assert delete_kwargs["ConditionExpression"] == "#owner = :token"
+
+
+class TestBulkOperations:
+    """Test get_many/set_many tier batching"""
+    
+    def test_get_many_preserves_input_order_across_tiers(self):
+        """Memory, Redis and DynamoDB hits come back in request order"""
+        
+        cache = make_local_cache()
+        cache.set("docs", "a", "from-memory")
+        
+        cache.redis_client = Mock()
+        cache.redis_client.mget.return_value = [None, b'"from-redis"', None]
+        
+        cache.cache_table = Mock()
+        cache.dynamodb = Mock()
+        cache.dynamodb.batch_get_item.return_value = {
+            "Responses": {cache.cache_table_name: [
+                {"cache_key": "docs:c", "value": '"from-dynamodb"', "ttl": time.time() + 60}
+            ]}
+        }
+        
+        values = cache.get_many("docs", ["c", "a", "b", "missing", "a"])
+        
+        assert values == ["from-dynamodb", "from-memory", "from-redis", None, "from-memory"]
+        cache.redis_client.mget.assert_called_once_with(["docs:c", "docs:b", "docs:missing"])
+        requested = cache.dynamodb.batch_get_item.call_args.kwargs["RequestItems"]
+        assert requested[cache.cache_table_name]["Keys"] == [
+            {"cache_key": "docs:c"}, {"cache_key": "docs:missing"}
+        ]
+        
+        tier_hits = cache.get_stats()["tier_hits"]
+        assert tier_hits["memory_hits"] == 1
+        assert tier_hits["redis_hits"] == 1
+        assert tier_hits["dynamodb_hits"] == 1
+        assert tier_hits["misses"] == 1
+    
+    def test_batch_get_retries_unprocessed_keys(self):
+        """UnprocessedKeys are re-requested until DynamoDB returns them"""
+        
+        cache = make_local_cache()
+        cache.cache_table = Mock()
+        cache.dynamodb = Mock()
+        table = cache.cache_table_name
+        cache.dynamodb.batch_get_item.side_effect = [
+            {
+                "Responses": {table: [{"cache_key": "docs:k0", "value": "0", "ttl": time.time() + 60}]},
+                "UnprocessedKeys": {table: {"Keys": [{"cache_key": "docs:k1"}]}}
+            },
+            {"Responses": {table: [{"cache_key": "docs:k1", "value": "1", "ttl": time.time() + 60}]}}
+        ]
+        
+        with patch.object(CacheConfig, "BATCH_RETRY_DELAY", 0):
+            values = cache.get_many("docs", ["k0", "k1"])
+        
+        assert values == [0, 1]
+        assert cache.dynamodb.batch_get_item.call_count == 2
+    
+    def test_get_many_chunks_large_requests(self):
+        """Keys are split into BatchGetItem-sized chunks"""
+        
+        cache = make_local_cache()
+        cache.cache_table = Mock()
+        cache.dynamodb = Mock()
+        cache.dynamodb.batch_get_item.return_value = {"Responses": {}}
+        
+        cache.get_many("docs", [f"k{i}" for i in range(250)])
+        
+        sizes = [
+            len(call.kwargs["RequestItems"][cache.cache_table_name]["Keys"])
+            for call in cache.dynamodb.batch_get_item.call_args_list
+        ]
+        assert sizes == [100, 100, 50]
+    
+    def test_set_many_uses_pipeline_and_batch_write(self):
+        """One Redis pipeline and chunked BatchWriteItem with retries"""
+        
+        cache = make_local_cache()
+        cache.redis_client = Mock()
+        pipeline = cache.redis_client.pipeline.return_value
+        cache.cache_table = Mock()
+        cache.dynamodb = Mock()
+        table = cache.cache_table_name
+        cache.dynamodb.batch_write_item.side_effect = [
+            {"UnprocessedItems": {table: [{"PutRequest": {"Item": {"cache_key": "docs:u1:k0"}}}]}},
+            {},
+            {}
+        ]
+        
+        with patch.object(CacheConfig, "BATCH_RETRY_DELAY", 0):
+            stored = cache.set_many("docs", {f"k{i}": i for i in range(30)}, user_id="u1")
+        
+        assert stored == 30
+        assert pipeline.setex.call_count == 30
+        pipeline.execute.assert_called_once()
+        assert cache.dynamodb.batch_write_item.call_count == 3
+        assert cache.get_many("docs", ["k3", "k29"], user_id="u1") == [3, 29]
+
+
+class TestNamespaceInvalidation:
+    """Test generation-based namespace invalidation"""
+    
+    def test_invalidate_hides_entries_on_every_tier(self):
+        """Old keys stop resolving immediately after a bump"""
+        
+        cache = make_local_cache()
+        cache.set(CacheConfig.USER_FILES, "list", ["a.pdf"], user_id="u1")
+        cache.set(CacheConfig.USER_FILES, "list", ["b.pdf"], user_id="u2")
+        
+        assert cache.invalidate_pattern(CacheConfig.USER_FILES, "u1") == 1
+        
+        assert cache.get(CacheConfig.USER_FILES, "list", user_id="u1") is None
+        assert cache.get(CacheConfig.USER_FILES, "list", user_id="u2") == ["b.pdf"]
+        
+        cache.set(CacheConfig.USER_FILES, "list", ["c.pdf"], user_id="u1")
+        assert cache.get(CacheConfig.USER_FILES, "list", user_id="u1") == ["c.pdf"]
+    
+    def test_prefix_invalidation_reaches_user_namespaces(self):
+        """Invalidating a prefix without a user hides every user's entries under it"""
+        
+        cache = make_local_cache()
+        cache.set(CacheConfig.ANALYTICS, "k", {"a": 1}, user_id="u1")
+        cache.set(CacheConfig.ANALYTICS, "k", {"b": 2})
+        cache.set(CacheConfig.USER_FILES, "k", ["a.pdf"], user_id="u1")
+        cache.invalidate_pattern(CacheConfig.ANALYTICS, "u1")
+        cache.set(CacheConfig.ANALYTICS, "k", {"a": 3}, user_id="u1")
+        
+        assert cache.invalidate_pattern(CacheConfig.ANALYTICS) == 1
+        
+        assert cache.get(CacheConfig.ANALYTICS, "k", user_id="u1") is None
+        assert cache.get(CacheConfig.ANALYTICS, "k") is None
+        assert cache.get(CacheConfig.USER_FILES, "k", user_id="u1") == ["a.pdf"]
+        
+        cache.set(CacheConfig.ANALYTICS, "k", {"a": 4}, user_id="u1")
+        assert cache.get(CacheConfig.ANALYTICS, "k", user_id="u1") == {"a": 4}
+        assert cache._generate_cache_key(CacheConfig.ANALYTICS, "k", "u1") == f"{CacheConfig.ANALYTICS}:u1:v1.1:k"
+    
+    def test_redis_generation_uses_incr_not_keys(self):
+        """Invalidation is one INCR; no KEYS scan or bulk delete"""
+        
+        cache = make_local_cache()
+        cache.redis_client = Mock()
+        cache.redis_client.get.return_value = None
+        cache.redis_client.incr.return_value = 7
+        
+        cache.invalidate_pattern(CacheConfig.CHAT_HISTORY, "u1")
+        
+        cache.redis_client.incr.assert_called_once_with(f"gen:{CacheConfig.CHAT_HISTORY}:u1")
+        cache.redis_client.keys.assert_not_called()
+        assert cache._generate_cache_key(CacheConfig.CHAT_HISTORY, "k", "u1") == \
+            f"{CacheConfig.CHAT_HISTORY}:u1:v7:k"
+    
+    def test_dynamodb_generation_atomic_add(self):
+        """Without Redis the counter is an atomic DynamoDB ADD"""
+        
+        cache = make_local_cache()
+        cache.cache_table = Mock()
+        cache.cache_table.update_item.return_value = {"Attributes": {"generation": 3}}
+        
+        cache.invalidate_pattern(CacheConfig.ANALYTICS)
+        
+        update_kwargs = cache.cache_table.update_item.call_args.kwargs
+        assert update_kwargs["Key"] == {"cache_key": f"gen:{CacheConfig.ANALYTICS}"}
+        assert update_kwargs["UpdateExpression"] == "ADD #generation :one"
+        assert cache._generate_cache_key(CacheConfig.ANALYTICS, "k") == f"{CacheConfig.ANALYTICS}:v3:k"
+    
+    def test_other_container_bump_seen_after_refresh(self):
+        """Generations are re-read from the shared store once stale"""
+        
+        cache = make_local_cache()
+        cache.redis_client = Mock()
+        cache.redis_client.get.return_value = None
+        
+        assert cache._generate_cache_key("quiz", "k") == "quiz:k"
+        
+        cache.redis_client.get.return_value = b"2"
+        with patch.object(CacheConfig, "GENERATION_REFRESH_SECONDS", 0):
+            assert cache._generate_cache_key("quiz", "k") == "quiz:v2:k"
+    
+    def test_user_key_reads_both_generations_in_one_round_trip(self):
+        """Prefix and user generations come from one MGET / BatchGetItem, then stay cached"""
+        
+        cache = make_local_cache()
+        cache.redis_client = Mock()
+        cache.redis_client.mget.return_value = [b"2", b"5"]
+        
+        assert cache._generate_cache_key("quiz", "k", "u1") == "quiz:u1:v2.5:k"
+        assert cache._generate_cache_key("quiz", "k2", "u1") == "quiz:u1:v2.5:k2"
+        cache.redis_client.mget.assert_called_once_with(["gen:quiz", "gen:quiz:u1"])
+        cache.redis_client.get.assert_not_called()
+        
+        cache = make_local_cache()
+        cache.cache_table = Mock()
+        cache.dynamodb = Mock()
+        cache.dynamodb.batch_get_item.return_value = {"Responses": {cache.cache_table_name: [
+            {"cache_key": "gen:quiz:u1", "generation": 4}
+        ]}}
+        
+        assert cache._generate_cache_key("quiz", "k", "u1") == "quiz:u1:v4:k"
+        request = cache.dynamodb.batch_get_item.call_args.kwargs["RequestItems"][cache.cache_table_name]
+        assert request["Keys"] == [{"cache_key": "gen:quiz"}, {"cache_key": "gen:quiz:u1"}]
+        assert request["ConsistentRead"] is True
+        cache.cache_table.get_item.assert_not_called()
+        assert cache.dynamodb.batch_get_item.call_count == 1
+
+
+class TestCacheCodec:
+    """Test value encoding, compression and large-value offload"""
+    
+    def test_small_values_stay_uncompressed(self):
+        """Values under the threshold are stored without compression"""
+        
+        codec = CacheCodec(compression='zlib')
+        encoded = codec.encode("docs", "docs:k", {"a": 1})
+        
+        assert encoded.data.startswith(CodecConfig.MAGIC)
+        assert encoded.codec[1] == "n"
+        assert codec.decode("docs", encoded.data) == ({"a": 1}, encoded.raw_size)
+    
+    def test_large_values_compressed_and_reported(self):
+        """Compressible payloads are compressed and counted as bytes saved"""
+        
+        codec = CacheCodec(compression='zlib', compression_threshold=64)
+        value = {"context": "photosynthesis " * 2000}
+        
+        encoded = codec.encode("rag", "rag:k", value)
+        decoded, _ = codec.decode("rag", encoded.data)
+        
+        assert decoded == value
+        assert encoded.codec[1] == "z"
+        stats = codec.get_stats()["rag"]
+        assert stats["compressed"] == 1
+        assert stats["bytes_saved"] > 20000
+        assert stats["encoded"] == 1 and stats["decoded"] == 1
+    
+    def test_oversized_values_spill_to_blob_store(self, tmp_path):
+        """Values over the spill threshold keep only a pointer"""
+        
+        codec = CacheCodec(compression='none', spill_threshold=1024, blob_store=LocalBlobStore(str(tmp_path)))
+        value = ["x" * 5000]
+        
+        encoded = codec.encode("summaries", "summaries:doc1", value)
+        
+        assert len(encoded.data) < 1024
+        assert b"file://" in encoded.data
+        assert codec.decode("summaries", encoded.data)[0] == value
+        assert codec.get_stats()["summaries"]["spilled"] == 1
+    
+    def test_oversized_values_rejected_without_spill_bucket(self):
+        """With no bucket configured nothing is spilled to local disk"""
+        
+        codec = CacheCodec(compression='none', spill_threshold=1024)
+        
+        with patch.object(CodecConfig, "SPILL_BUCKET", None):
+            with pytest.raises(ValueError):
+                codec.encode("summaries", "summaries:doc1", ["x" * 5000])
+            
+            cache = make_local_cache()
+            cache._codec = CacheCodec(compression='none')
+            cache.cache_table = Mock()
+            assert cache.set(CacheConfig.DOCUMENT_PROCESSING, "doc1", {"summary": "y" * (CacheConfig.MAX_VALUE_SIZE + 1)}) is False
+            cache.cache_table.put_item.assert_not_called()
+    
+    def test_legacy_json_records_still_decode(self):
+        """Entries written before the codec existed remain readable"""
+        
+        codec = CacheCodec()
+        
+        assert codec.decode("p", '{"a":1}')[0] == {"a": 1}
+        assert codec.decode("p", b'"text"')[0] == "text"
+    
+    def test_large_value_round_trips_through_tiers(self, tmp_path):
+        """A value over the DynamoDB item limit is cached via a pointer"""
+        
+        cache = make_local_cache()
+        cache._codec = CacheCodec(compression='none', blob_store=LocalBlobStore(str(tmp_path)))
+        cache.cache_table = Mock()
+        value = {"summary": "y" * (CacheConfig.MAX_VALUE_SIZE + 1)}
+        
+        assert cache.set(CacheConfig.DOCUMENT_PROCESSING, "doc1", value) is True
+        
+        item = cache.cache_table.put_item.call_args.kwargs["Item"]
+        assert len(item["value"]) < 1024
+        assert item["codec"] == "jn"
+        
+        cache._memory_cache.clear()
+        cache.cache_table.get_item.return_value = {"Item": item}
+        assert cache.get(CacheConfig.DOCUMENT_PROCESSING, "doc1") == value
+
+
+class TestStaleWhileRevalidate:
+    """Test soft/hard TTL serving with background refresh"""
+    
+    def test_stale_value_served_while_one_refresh_runs(self):
+        """Stale reads return at once and trigger a single refresh"""
+        
+        cache = make_local_cache()
+        calls = []
+        release = threading.Event()
+        
+        def compute():
+            calls.append(1)
+            if len(calls) > 1:
+                release.wait(2)
+            return {"version": len(calls)}
+        
+        first = cache.get_or_revalidate(CacheConfig.ANALYTICS, "dashboard", compute, 0.05, 60)
+        time.sleep(0.1)
+        
+        stale = [
+            cache.get_or_revalidate(CacheConfig.ANALYTICS, "dashboard", compute, 0.05, 60)
+            for _ in range(5)
+        ]
+        release.set()
+        cache._refresh_executor.shutdown(wait=True)
+        
+        assert first == {"version": 1}
+        assert stale == [{"version": 1}] * 5
+        assert len(calls) == 2
+        assert cache.get_or_revalidate(CacheConfig.ANALYTICS, "dashboard", compute, 0.05, 60) == {"version": 2}
+        
+        swr = cache.get_stats()["stale_while_revalidate"]
+        assert swr["stale_served"] == 5
+        assert swr["refreshes"] == 1
+        assert swr["refreshes_deduplicated"] == 4
+        assert swr["fresh_hits"] == 1
+    
+    def test_failed_refresh_keeps_serving_stale_value(self):
+        """A refresh error is counted and the stale entry stays usable"""
+        
+        cache = make_local_cache()
+        cache.get_or_revalidate("analytics", "k", lambda: "old", 0, 60)
+        
+        def failing():
+            raise RuntimeError("dynamodb throttled")
+        
+        assert cache.get_or_revalidate("analytics", "k", failing, 0, 60) == "old"
+        cache._refresh_executor.shutdown(wait=True)
+        
+        assert cache.get_stats()["stale_while_revalidate"]["refresh_failures"] == 1
+        assert cache.get("analytics", "k")["value"] == "old"
+    
+    @pytest.mark.asyncio
+    async def test_async_refresh_runs_on_event_loop(self):
+        """Async callers get the stale value and one refresh task"""
+        
+        cache = make_local_cache()
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+        
+        assert await cache.aget_or_revalidate("api_responses", "k", compute, 0, 60) == 1
+        
+        results = await asyncio.gather(*[
+            cache.aget_or_revalidate("api_responses", "k", compute, 0, 60) for _ in range(3)
+        ])
+        await asyncio.gather(*cache._refresh_tasks)
+        
+        assert results == [1, 1, 1]
+        assert len(calls) == 2
+        assert cache.get("api_responses", "k")["value"] == 2
+
+
+class TestAsyncCacheApi:
+    """Test the async cache interface and coroutine-aware decorator"""
+    
+    @pytest.mark.asyncio
+    async def test_remote_io_runs_off_the_event_loop(self):
+        """Redis/DynamoDB calls from aget/aset happen on the I/O pool"""
+        
+        cache = make_local_cache()
+        cache.cache_table = Mock()
+        loop_thread = threading.get_ident()
+        io_threads = []
+        
+        def record(**kwargs):
+            io_threads.append(threading.get_ident())
+            return {}
+        
+        cache.cache_table.get_item.side_effect = record
+        cache.cache_table.put_item.side_effect = record
+        
+        assert await cache.aget("docs", "k") is None
+        assert await cache.aset("docs", "k", {"v": 1}) is True
+        assert await cache.aget("docs", "k") == {"v": 1}
+        
+        assert io_threads
+        assert loop_thread not in io_threads
+    
+    @pytest.mark.asyncio
+    async def test_aget_many_matches_get_many(self):
+        """Bulk async reads return the same ordered results"""
+        
+        cache = make_local_cache()
+        await cache.aset("docs", "a", 1)
+        await cache.aset("docs", "b", 2)
+        
+        assert await cache.aget_many("docs", ["b", "x", "a"]) == [2, None, 1]
+        assert cache.get_many("docs", ["b", "x", "a"]) == [2, None, 1]
+    
+    @pytest.mark.asyncio
+    async def test_decorator_caches_awaited_result(self):
+        """Coroutine functions cache their result, not the coroutine"""
+        
+        from src.shared import performance_cache as module
+        calls = []
+        
+        @module.cache_decorator("analytics", user_specific=False)
+        async def load_dashboard(course_id):
+            calls.append(course_id)
+            await asyncio.sleep(0)
+            return {"course": course_id}
+        
+        with patch.object(module, "performance_cache", make_local_cache()):
+            first = await load_dashboard("c1")
+            second = await load_dashboard("c1")
+        
+        assert first == second == {"course": "c1"}
+        assert calls == ["c1"]
+        assert asyncio.iscoroutinefunction(load_dashboard)
+
+
+class TestCacheWarming:
+    """Test read-history driven cache warming"""
+    
+    def make_warmer(self, cache):
+        from src.shared.cache_warming import CacheWarmer
+        
+        warmer = CacheWarmer(cache)
+        warmer.dynamodb = Mock()
+        warmer.dynamodb.Table.return_value.query.return_value = {
+            "Items": [{"file_id": "f1", "conversation_id": "c1", "subject_id": "s1", "updated_at": 1}]
+        }
+        return warmer
+    
+    def test_only_prefixes_with_read_history_are_warmed(self):
+        """Prefixes the user never reads are skipped"""
+        
+        from src.shared.cache_warming import WarmingConfig
+        cache = make_local_cache()
+        warmer = self.make_warmer(cache)
+        
+        for _ in range(WarmingConfig.MIN_READS):
+            cache.get(CacheConfig.USER_FILES, WarmingConfig.FILE_LIST_KEY, user_id="u1")
+        
+        results = warmer.warm("u1")
+        
+        assert set(results["prefixes"]) == {CacheConfig.USER_FILES}
+        assert CacheConfig.SUBJECT_CONTEXT in results["skipped_prefixes"]
+        assert results["warmed_entries"] == 1
+        assert cache.get(CacheConfig.USER_FILES, WarmingConfig.FILE_LIST_KEY, user_id="u1")[0]["file_id"] == "f1"
+        
+        warming = cache.get_stats()["warming"][CacheConfig.USER_FILES]
+        assert warming["warmed"] == 1
+        assert warming["used"] == 1
+        assert warming["hit_rate_percent"] == 100.0
+    
+    def test_parallel_targets_within_time_budget(self):
+        """Slow targets are reported as timed out instead of blocking"""
+        
+        cache = make_local_cache()
+        warmer = self.make_warmer(cache)
+        for prefix in (CacheConfig.CHAT_HISTORY, CacheConfig.SUBJECT_CONTEXT):
+            for _ in range(5):
+                cache.get(prefix, "anything", user_id="u1")
+        
+        release = threading.Event()
+        
+        def slow_subject_context(user_id):
+            release.wait(2)
+            return []
+        
+        for target in warmer.targets:
+            if target.name == "subject_context":
+                target.loader = slow_subject_context
+        
+        results = warmer.warm("u1", time_budget_seconds=0.2)
+        release.set()
+        
+        assert results["timed_out"] == ["subject_context"]
+        assert results["prefixes"][CacheConfig.CHAT_HISTORY]["entries"] == 2
+        assert results["elapsed_ms"] < 1000
+    
+    def test_handler_reads_drive_and_consume_warming(self):
+        """Readers record history under the warmed keys and hit what warming stored"""
+        
+        from src.shared.cache_warming import WarmingConfig
+        cache = make_local_cache()
+        warmer = self.make_warmer(cache)
+        query = warmer.dynamodb.Table.return_value.query
+        
+        for _ in range(WarmingConfig.MIN_READS):
+            warmer.conversation_messages("u1", "c1")
+            warmer.invalidate_conversation("u1", "c1")
+        assert warmer.learned_prefixes("u1") == [CacheConfig.CHAT_HISTORY]
+        
+        results = warmer.warm("u1")
+        queries = query.call_count
+        
+        assert results["prefixes"][CacheConfig.CHAT_HISTORY]["entries"] == 2
+        assert warmer.conversation_messages("u1", "c1")[0]["conversation_id"] == "c1"
+        assert warmer.recent_conversations("u1")[0]["conversation_id"] == "c1"
+        assert query.call_count == queries
+        assert cache.get_stats()["warming"][CacheConfig.CHAT_HISTORY]["used"] == 2
+
+
+
+class TestSemanticResponseCache:
+    """Test embedding-keyed reuse of Bedrock answers"""
+    
+    DOCS = [{"file_id": "f1", "chunk_index": 0, "text": "Photosynthesis converts light"}]
+    
+    @staticmethod
+    def make_embed(vectors):
+        async def embed(text):
+            return vectors[text]
+        return embed
+    
+    @staticmethod
+    def make_invoke(answer, calls):
+        async def invoke():
+            calls.append(answer)
+            return answer
+        return invoke
+    
+    @pytest.mark.asyncio
+    async def test_equivalent_question_hits(self):
+        """A paraphrase above the threshold reuses the stored answer"""
+        
+        from src.shared.semantic_cache import SemanticResponseCache
+        
+        semantic = SemanticResponseCache(make_local_cache(), threshold=0.95)
+        embed = self.make_embed({
+            "what is photosynthesis": [1.0, 0.0, 0.0],
+            "explain photosynthesis": [0.99, 0.05, 0.0],
+            "who discovered gravity": [0.0, 1.0, 0.0]
+        })
+        calls = []
+        
+        answer, status = await semantic.get_or_invoke(
+            "what is photosynthesis", self.DOCS, self.make_invoke("light to sugar", calls), embed, "bio"
+        )
+        assert (answer, status) == ("light to sugar", "miss")
+        
+        answer, status = await semantic.get_or_invoke(
+            "explain photosynthesis", self.DOCS, self.make_invoke("other", calls), embed, "bio"
+        )
+        assert (answer, status) == ("light to sugar", "hit")
+        
+        _, status = await semantic.get_or_invoke(
+            "who discovered gravity", self.DOCS, self.make_invoke("newton", calls), embed, "bio"
+        )
+        assert status == "miss"
+        assert calls == ["light to sugar", "newton"]
+        
+        stats = semantic.get_stats()
+        assert stats["hits"] == 1
+        assert stats["stores"] == 2
+        assert stats["avg_hit_similarity"] > 0.95
+    
+    @pytest.mark.asyncio
+    async def test_scoped_by_subject_and_documents(self):
+        """Same question with other documents or another subject is not reused"""
+        
+        from src.shared.semantic_cache import SemanticResponseCache, context_fingerprint
+        
+        semantic = SemanticResponseCache(make_local_cache(), threshold=0.95)
+        embed = self.make_embed({"q": [0.0, 1.0]})
+        calls = []
+        
+        await semantic.get_or_invoke("q", self.DOCS, self.make_invoke("a1", calls), embed, "bio")
+        _, other_docs = await semantic.get_or_invoke(
+            "q", [{"file_id": "f2", "chunk_index": 0}], self.make_invoke("a2", calls), embed, "bio"
+        )
+        _, other_subject = await semantic.get_or_invoke("q", self.DOCS, self.make_invoke("a3", calls), embed, "chem")
+        
+        assert (other_docs, other_subject) == ("miss", "miss")
+        assert len(calls) == 3
+        assert context_fingerprint(self.DOCS + [{"id": "x"}]) == context_fingerprint([{"id": "x"}] + self.DOCS)
+    
+    @pytest.mark.asyncio
+    async def test_sampled_verification_evicts_false_hit(self):
+        """A verified hit whose fresh answer disagrees is counted and replaced"""
+        
+        from src.shared.semantic_cache import SemanticResponseCache, SemanticCacheConfig
+        
+        semantic = SemanticResponseCache(make_local_cache(), threshold=0.9)
+        embed = self.make_embed({
+            "q": [1.0, 0.0], "q2": [1.0, 0.01],
+            "old answer": [1.0, 0.0], "new answer": [0.0, 1.0]
+        })
+        calls = []
+        
+        await semantic.get_or_invoke("q", self.DOCS, self.make_invoke("old answer", calls), embed)
+        
+        with patch.object(SemanticCacheConfig, "VERIFY_SAMPLE_RATE", 1.0):
+            answer, status = await semantic.get_or_invoke(
+                "q2", self.DOCS, self.make_invoke("new answer", calls), embed
+            )
+        
+        assert (answer, status) == ("new answer", "false_hit")
+        answer, status = await semantic.get_or_invoke("q", self.DOCS, self.make_invoke("unused", calls), embed)
+        assert (answer, status) == ("new answer", "hit")
+        
+        stats = semantic.get_stats()
+        assert stats["false_hits"] == 1
+        assert stats["false_hit_rate_percent"] == 100.0
+    
+    @pytest.mark.asyncio
+    async def test_index_holds_only_ids_and_vectors(self):
+        """Answers live under their own keys; the scope index stays small"""
+        
+        from src.shared.semantic_cache import SemanticResponseCache, context_fingerprint
+        
+        cache = make_local_cache()
+        semantic = SemanticResponseCache(cache, threshold=0.95)
+        embed = self.make_embed({"q1": [1.0, 0.0], "q2": [0.0, 1.0]})
+        
+        await semantic.get_or_invoke("q1", self.DOCS, self.make_invoke("a1" * 500, []), embed, "bio")
+        await semantic.get_or_invoke("q2", self.DOCS, self.make_invoke("a2", []), embed, "bio")
+        
+        scope_key = semantic._scope_key(context_fingerprint(self.DOCS), "bio", "")
+        index = cache.get(CacheConfig.BEDROCK_RESPONSES, scope_key)
+        assert [set(entry) for entry in index["entries"]] == [{"id", "embedding"}] * 2
+        
+        answer = cache.get(CacheConfig.BEDROCK_RESPONSES, f"{scope_key}:{index['entries'][1]['id']}")
+        assert answer["response"] == "a2"
+    
+    def test_concurrent_index_updates_are_not_lost(self):
+        """Read-modify-write updates to one entry are serialized"""
+        
+        cache = make_local_cache()
+        
+        def append(n):
+            def update(current):
+                time.sleep(0.01)  # Widen the read-modify-write window
+                return (current or []) + [n]
+            cache.update(CacheConfig.BEDROCK_RESPONSES, "index", update)
+        
+        threads = [threading.Thread(target=append, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert sorted(cache.get(CacheConfig.BEDROCK_RESPONSES, "index")) == list(range(8))
+    
+    @pytest.mark.asyncio
+    async def test_embedding_failure_bypasses_cache(self):
+        """No embedding means a plain model call"""
+        
+        from src.shared.semantic_cache import SemanticResponseCache
+        
+        semantic = SemanticResponseCache(make_local_cache())
+        
+        async def no_embedding(text):
+            return None
+        
+        answer, status = await semantic.get_or_invoke("q", self.DOCS, self.make_invoke("a", []), no_embedding)
+        
+        assert (answer, status) == ("a", "bypass")
+        assert semantic.get_stats()["lookups"] == 0
+
+    @pytest.mark.asyncio
+    async def test_personalized_answers_are_not_shared(self):
+        """Chat answers are reused only for the same profile and never inside a conversation"""
+        
+        from src.shared.semantic_cache import SemanticResponseCache
+        from src.shared.bedrock_agent_service import AgentResponse, AgentType
+        from src.shared.agent_utils import AgentInvoker
+        
+        invoker = AgentInvoker.__new__(AgentInvoker)
+        invoker.use_langgraph = False
+        invoker.bedrock_service = Mock()
+        invoker.bedrock_service.generate_embedding = self.make_embed({"what is photosynthesis": [1.0, 0.0]})
+        answers = []
+        
+        async def invoke_agent(agent_type, message, context, enable_trace=False):
+            answers.append(context.user_id)
+            return AgentResponse(
+                success=True, content=f"for {context.user_id}", session_id=context.session_id,
+                citations=[], metadata={}, agent_type=AgentType.CHAT
+            )
+        
+        invoker.bedrock_service.invoke_agent = invoke_agent
+        beginner = {'mastery_levels': {'biology': 0.2}, 'difficulty_preference': 'beginner'}
+        advanced = {'mastery_levels': {'biology': 0.9}, 'difficulty_preference': 'advanced'}
+        
+        
+        def ask(user_id, profile, conversation_id=None):
+            return invoker.chat_with_context(user_id, "what is photosynthesis", conversation_id, "bio", self.DOCS, profile)
+        
+        with patch('src.shared.agent_utils.semantic_response_cache', SemanticResponseCache(make_local_cache())):
+            first = await ask("u1", beginner)
+            other_student = await ask("u2", advanced)
+            same_profile = await ask("u3", dict(beginner))
+            in_conversation = await ask("u4", dict(beginner), "conv-4")
+        
+        assert first['metadata']['semantic_cache'] == 'miss'
+        assert other_student['response'] == "for u2"
+        assert (same_profile['response'], same_profile['metadata']['semantic_cache']) == ("for u1", 'hit')
+        assert (in_conversation['response'], in_conversation['metadata']['semantic_cache']) == ("for u4", 'bypass')
+        assert answers == ["u1", "u2", "u4"]
+
+
+
+class TestEmbeddingCache:
+    """Test the content-hash embedding cache"""
+    
+    def test_repeated_text_embedded_once(self):
+        """Whitespace-only differences share one cached embedding"""
+        
+        from src.shared.embedding_cache import EmbeddingCache
+        
+        embeddings = EmbeddingCache(make_local_cache())
+        embed = Mock(return_value=[0.25, -0.5, 1.0])
+        
+        first = embeddings.get_or_embed("titan", "Cell  biology\n", embed)
+        second = embeddings.get_or_embed("titan", "Cell biology", embed)
+        
+        assert first == second == [0.25, -0.5, 1.0]
+        embed.assert_called_once()
+        
+        stats = embeddings.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["hit_rate_percent"] == 50.0
+        
+        # Different model, different key
+        embeddings.get_or_embed("cohere", "Cell biology", embed)
+        assert embed.call_count == 2
+    
+    def test_failed_embedding_not_cached(self):
+        """None results are returned but retried next time"""
+        
+        from src.shared.embedding_cache import EmbeddingCache
+        
+        embeddings = EmbeddingCache(make_local_cache())
+        embed = Mock(side_effect=[None, [1.0]])
+        
+        assert embeddings.get_or_embed("titan", "text", embed) is None
+        assert embeddings.get_or_embed("titan", "text", embed) == [1.0]
+    
+    def test_embed_many_batches_and_dedupes(self):
+        """One lookup for the batch; duplicates and known text skip the model"""
+        
+        from src.shared.embedding_cache import EmbeddingCache
+        
+        cache = make_local_cache()
+        embeddings = EmbeddingCache(cache)
+        embeddings.get_or_embed("titan", "known", lambda text: [1.0, 0.0])
+        embed = Mock(side_effect=lambda text: [float(len(text)), 0.5])
+        
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            vectors = embeddings.embed_many("titan", ["known", "new", "new"], embed)
+        
+        assert vectors == [[1.0, 0.0], [3.0, 0.5], [3.0, 0.5]]
+        embed.assert_called_once_with("new")
+        get_many.assert_called_once()
+        assert embeddings.embed_many("titan", ["new"], embed) == [[3.0, 0.5]]
+    
+    def test_packed_vectors_are_compact(self):
+        """float16 packing is a fraction of a JSON list and close to the input"""
+        
+        import json
+        from src.shared.embedding_cache import pack_vector, unpack_vector
+        
+        vector = [i / 1536 - 0.5 for i in range(1536)]
+        
+        packed16 = pack_vector(vector, "float16")
+        packed32 = pack_vector(vector, "float32")
+        
+        assert len(packed16) < len(packed32) < len(json.dumps(vector)) / 3
+        assert max(abs(a - b) for a, b in zip(unpack_vector(packed16), vector)) < 1e-3
+        assert max(abs(a - b) for a, b in zip(unpack_vector(packed32), vector)) < 1e-6
+    
+    @pytest.mark.asyncio
+    async def test_async_get_or_embed(self):
+        """Async callers share the same entries"""
+        
+        from src.shared.embedding_cache import EmbeddingCache
+        
+        embeddings = EmbeddingCache(make_local_cache())
+        calls = []
+        
+        async def embed(text):
+            calls.append(text)
+            return [0.5, 0.5]
+        
+        assert await embeddings.aget_or_embed("titan", "q", embed) == [0.5, 0.5]
+        assert await embeddings.aget_or_embed("titan", "q", embed) == [0.5, 0.5]
+        assert embeddings.get_or_embed("titan", "q", Mock()) == [0.5, 0.5]
+        assert calls == ["q"]
@@ -0,0 +1,129 @@
+"""
+Task Scheduler Tests
+Tests for bounded, prioritized, per-user fair task admission
+"""
+
+import asyncio
+import pytest
+
+from src.shared.task_scheduler import FairTaskScheduler, TaskQueueFullError
+
+
+class TestFairTaskScheduler:
+    """Test admission order, limits and statistics"""
+    
+    @staticmethod
+    def _recorder(order, label, gate=None):
+        async def run():
+            order.append(label)
+            if gate is not None:
+                await gate.wait()
+        return run
+    
+    @pytest.mark.asyncio
+    async def test_users_are_interleaved(self):
+        """A user's backlog does not delay another user's first task"""
+        
+        scheduler = FairTaskScheduler(max_concurrent=1)
+        gate = asyncio.Event()
+        order = []
+        
+        scheduler.submit('quiz_generation', 'blocker', self._recorder(order, 'blocker', gate))
+        for i in range(5):
+            scheduler.submit('quiz_generation', 'bulk', self._recorder(order, f'bulk{i}'))
+        scheduler.submit('quiz_generation', 'other', self._recorder(order, 'other'))
+        
+        gate.set()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        
+        assert order.index('other') <= 2
+        assert len(order) == 7
+    
+    @pytest.mark.asyncio
+    async def test_interactive_runs_before_batch(self):
+        """Queued interactive tasks are admitted before queued batch tasks"""
+        
+        scheduler = FairTaskScheduler(max_concurrent=1)
+        gate = asyncio.Event()
+        order = []
+        
+        scheduler.submit('quiz_generation', 'u1', self._recorder(order, 'first', gate))
+        scheduler.submit('file_processing', 'u1', self._recorder(order, 'batch'))
+        scheduler.submit('quiz_generation', 'u2', self._recorder(order, 'interactive'))
+        
+        gate.set()
+        for _ in range(20):
+            await asyncio.sleep(0)
+        
+        assert order == ['first', 'interactive', 'batch']
+    
+    @pytest.mark.asyncio
+    async def test_type_limit_does_not_block_other_types(self):
+        """A task type at its limit is skipped, not waited on"""
+        
+        scheduler = FairTaskScheduler(max_concurrent=5, type_limits={'file_processing': 1})
+        gate = asyncio.Event()
+        order = []
+        
+        scheduler.submit('file_processing', 'u1', self._recorder(order, 'file1', gate))
+        scheduler.submit('file_processing', 'u1', self._recorder(order, 'file2'))
+        scheduler.submit('cache_warming', 'u1', self._recorder(order, 'warm'))
+        await asyncio.sleep(0)
+        
+        assert order == ['file1', 'warm']
+        assert scheduler.get_stats()['running_by_type'] == {'file_processing': 1}
+        
+        gate.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        
+        assert order == ['file1', 'warm', 'file2']
+    
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_with_clear_error(self):
+        """Overflow raises TaskQueueFullError and is counted"""
+        
+        scheduler = FairTaskScheduler(max_concurrent=1, queue_limits={'batch': 2})
+        gate = asyncio.Event()
+        
+        for _ in range(3):  # One running, two queued
+            scheduler.submit('file_processing', 'u1', self._recorder([], 'x', gate))
+        
+        with pytest.raises(TaskQueueFullError) as error:
+            scheduler.submit('file_processing', 'u1', self._recorder([], 'x'))
+        
+        assert error.value.priority == 'batch'
+        assert error.value.queue_depth == 2
+        
+        stats = scheduler.get_stats()['classes']['batch']
+        assert stats['rejected'] == 1
+        assert stats['queue_depth'] == 2
+        assert stats['queue_limit'] == 2
+        
+        # Interactive submissions are unaffected by a full batch queue
+        scheduler.submit('quiz_generation', 'u2', self._recorder([], 'y'))
+        gate.set()
+    
+    @pytest.mark.asyncio
+    async def test_stats_track_wait_and_run_times(self):
+        """Completed and failed tasks are counted with run times"""
+        
+        scheduler = FairTaskScheduler(max_concurrent=2)
+        
+        async def ok():
+            await asyncio.sleep(0.01)
+        
+        async def fail():
+            raise RuntimeError("boom")
+        
+        scheduler.submit('quiz_generation', 'u1', ok)
+        scheduler.submit('quiz_generation', 'u1', fail)
+        await asyncio.sleep(0.05)
+        
+        stats = scheduler.get_stats()['classes']['interactive']
+        assert stats['completed'] == 1
+        assert stats['failed'] == 1
+        assert stats['running'] == 0
+        assert stats['avg_run_seconds'] > 0
+        assert stats['p95_wait_seconds'] >= 0
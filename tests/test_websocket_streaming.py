@@ -0,0 +1,87 @@
+"""
+WebSocket Streaming Tests
+Tests for coalescing streamed workflow tokens into partial_response frames
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from websocket import websocket_handler as handler
+
+
+class TestStreamWorkflowMessage:
+    """Test that token deltas are batched before posting"""
+    
+    def setup_method(self):
+        self.posted = []
+        self.connected = True
+        self.closed = False
+    
+    def post(self, connection_id, request_context, frame):
+        self.posted.append(frame)
+        return self.connected
+    
+    def workflow(self, tokens, pause_after=None, pause=0):
+        async def stream(*args, **kwargs):
+            try:
+                for index, token in enumerate(tokens):
+                    await asyncio.sleep(0.001)
+                    if index == pause_after:
+                        await asyncio.sleep(pause)
+                    yield {'type': 'partial_response', 'content': token}
+                yield {'type': 'final_response', 'response': ''.join(tokens)}
+            finally:
+                self.closed = True
+        return stream
+    
+    async def run(self, stream):
+        with patch.object(handler, 'stream_langgraph_workflow', stream), \
+                patch.object(handler, 'send_message_to_connection', self.post):
+            await handler.stream_workflow_message('conn-1', {}, {}, 'What is entropy?', 'session-1', 'user-1')
+    
+    def partials(self):
+        return [frame['content'] for frame in self.posted if frame['type'] == 'partial_response']
+    
+    @pytest.mark.asyncio
+    async def test_deltas_are_coalesced(self):
+        """First token goes out alone, the rest in a handful of frames"""
+        
+        tokens = [f"t{i} " for i in range(100)]
+        
+        await self.run(self.workflow(tokens))
+        
+        partials = self.partials()
+        assert partials[0] == tokens[0]
+        assert len(partials) < 20
+        assert ''.join(partials) == ''.join(tokens)
+        assert self.posted[-1]['type'] == 'final_response'
+    
+    @pytest.mark.asyncio
+    async def test_buffered_text_flushed_during_a_stall(self):
+        """Text held back is posted after the flush interval even if no token follows"""
+        
+        tokens = ['a', 'b', 'c']
+        
+        with patch.object(handler, 'STREAM_FLUSH_MS', 20):
+            await self.run(self.workflow(tokens, pause_after=2, pause=0.3))
+        
+        assert self.partials() == ['a', 'b', 'c']
+    
+    @pytest.mark.asyncio
+    async def test_disconnect_stops_the_workflow(self):
+        """A failed post ends the stream and closes the workflow"""
+        
+        self.connected = False
+        
+        await self.run(self.workflow([f"t{i} " for i in range(100)]))
+        
+        assert len(self.posted) == 1
+        assert self.closed
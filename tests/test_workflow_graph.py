@@ -0,0 +1,301 @@
+"""
+Workflow Graph Tests
+Tests for compiling, validating and running workflow execution plans
+"""
+
+import time
+import asyncio
+import pytest
+
+from src.shared.workflow_graph import WorkflowGraph, WorkflowGraphError, Deadline, validate_graph
+
+
+def _recorder(name):
+    async def node(state):
+        return {**state, 'visited': state['visited'] + [name]}
+    return node
+
+
+def _chat_like_graph():
+    graph = WorkflowGraph("test")
+    for name in ('detect', 'route', 'summarize', 'answer', 'respond'):
+        graph.add_node(name, _recorder(name))
+    graph.set_entry_point('detect')
+    graph.add_edge('detect', 'route')
+    graph.add_conditional_edges('route', lambda state: state['intent'], {
+        'summarize': 'summarize',
+        'question': 'answer'
+    })
+    graph.add_edge('summarize', 'respond')
+    graph.add_edge('answer', 'respond')
+    graph.add_edge('respond', 'END')
+    return graph
+
+
+class TestWorkflowGraph:
+    """Test build-time validation and plan execution"""
+    
+    @pytest.mark.asyncio
+    async def test_compiled_plan_is_reused_across_requests(self):
+        """One plan serves many invocations, following the routes"""
+        
+        workflow = _chat_like_graph().compile()
+        
+        summarized = await workflow.ainvoke({'intent': 'summarize', 'visited': []})
+        answered = await workflow.ainvoke({'intent': 'question', 'visited': []})
+        unrouted = await workflow.ainvoke({'intent': 'unknown', 'visited': []})
+        
+        assert summarized['visited'] == ['detect', 'route', 'summarize', 'respond']
+        assert answered['visited'] == ['detect', 'route', 'answer', 'respond']
+        assert unrouted['visited'] == ['detect', 'route']
+        assert workflow.successors('route') == ['summarize', 'answer']
+    
+    def test_compiled_plan_is_immutable(self):
+        """Neither the plan nor its step table can be changed after compiling"""
+        
+        workflow = _chat_like_graph().compile()
+        
+        with pytest.raises(AttributeError):
+            workflow.entry_point = 'respond'
+        with pytest.raises(TypeError):
+            workflow._nodes['detect'] = None
+    
+    def test_unreachable_node_is_rejected(self):
+        """Nodes no path reaches fail at build time"""
+        
+        graph = _chat_like_graph()
+        graph.add_node('orphan', _recorder('orphan'))
+        graph.add_edge('orphan', 'respond')
+        
+        with pytest.raises(WorkflowGraphError) as error:
+            graph.compile()
+        assert error.value.nodes == ['orphan']
+    
+    def test_cycle_is_rejected(self):
+        """A path back to an earlier node fails at build time"""
+        
+        graph = _chat_like_graph()
+        graph.edges['respond'] = ['detect']
+        
+        with pytest.raises(WorkflowGraphError) as error:
+            graph.compile()
+        assert error.value.nodes == ['detect', 'route', 'summarize', 'respond', 'detect']
+    
+    def test_unknown_targets_and_entry_point_are_rejected(self):
+        """Dangling edges and a missing entry point fail at build time"""
+        
+        graph = _chat_like_graph()
+        graph.edges['answer'] = ['missing']
+        
+        with pytest.raises(WorkflowGraphError):
+            graph.compile()
+        with pytest.raises(WorkflowGraphError):
+            validate_graph(None, ['a'], {}, {})
+
+
+def _sleeper(name, seconds, writes=()):
+    async def node(state):
+        await asyncio.sleep(seconds)
+        state['tools_used'].append(name)
+        for key in writes:
+            state[key] = f"{name}:{state.get('seed', '')}"
+        return state
+    return node
+
+
+def _fan_out_graph(delays):
+    graph = WorkflowGraph("fan-out")
+    graph.add_node('start', _sleeper('start', 0), reads=['message'], writes=['intent'])
+    graph.add_node('language', _sleeper('language', delays['language'], ['language']), reads=['message'], writes=['language'])
+    graph.add_node('phrases', _sleeper('phrases', delays['phrases'], ['phrases']), reads=['message'], writes=['phrases'])
+    graph.add_node('retrieval', _sleeper('retrieval', delays['retrieval'], ['context']), reads=['message'], writes=['context'])
+    graph.add_node('answer', _sleeper('answer', 0, ['answer']), reads=['context', 'language'], writes=['answer'])
+    graph.add_reducer('tools_used')
+    graph.set_entry_point('start')
+    for node in ('language', 'phrases', 'retrieval'):
+        graph.add_edge('start', node)
+    graph.add_edge('retrieval', 'answer')
+    graph.add_edge('language', 'END')
+    graph.add_edge('phrases', 'END')
+    graph.add_edge('answer', 'END')
+    return graph.compile()
+
+
+class TestParallelWorkflow:
+    """Test fan-out/fan-in execution and deterministic state merges"""
+    
+    @pytest.mark.asyncio
+    async def test_independent_nodes_overlap(self):
+        """Fanned-out nodes run concurrently; timings show the overlap"""
+        
+        workflow = _fan_out_graph({'language': 0.05, 'phrases': 0.05, 'retrieval': 0.05})
+        timings = {}
+        
+        started = time.perf_counter()
+        await workflow.ainvoke({'message': 'hi', 'tools_used': []}, timings=timings)
+        elapsed = time.perf_counter() - started
+        
+        assert workflow.parallel
+        assert elapsed < 0.12
+        assert max(timings[node][0] for node in ('language', 'phrases', 'retrieval')) < 10
+    
+    @pytest.mark.asyncio
+    async def test_merges_do_not_depend_on_completion_order(self):
+        """Reducer keys and writes fold in plan order, whichever node finishes first"""
+        
+        fast_first = _fan_out_graph({'language': 0.0, 'phrases': 0.01, 'retrieval': 0.02})
+        slow_first = _fan_out_graph({'language': 0.02, 'phrases': 0.01, 'retrieval': 0.0})
+        
+        results = [
+            await workflow.ainvoke({'message': 'hi', 'tools_used': ['before'], 'seed': 's'})
+            for workflow in (fast_first, slow_first)
+        ]
+        
+        assert results[0] == results[1]
+        assert results[0]['tools_used'] == ['before', 'start', 'language', 'phrases', 'retrieval', 'answer']
+    
+    @pytest.mark.asyncio
+    async def test_reader_waits_for_unordered_writer(self):
+        """A node reading a key waits for its writer even without an edge between them"""
+        
+        workflow = _fan_out_graph({'language': 0.05, 'phrases': 0.0, 'retrieval': 0.0})
+        timings = {}
+        
+        result = await workflow.ainvoke({'message': 'hi', 'tools_used': []}, timings=timings)
+        
+        assert workflow.dependencies('answer') == ['retrieval', 'language']
+        assert timings['answer'][0] >= timings['language'][1]
+        assert result['answer'] == 'answer:'
+    
+    @pytest.mark.asyncio
+    async def test_join_after_skipped_branch(self):
+        """A join runs once its untaken branches are skipped"""
+        
+        graph = WorkflowGraph("join")
+        graph.add_node('route', _sleeper('route', 0), reads=['intent'], writes=[])
+        graph.add_node('language', _sleeper('language', 0.01, ['language']), reads=[], writes=['language'])
+        graph.add_node('summarize', _sleeper('summarize', 0, ['response']), reads=[], writes=['response'])
+        graph.add_node('answer', _sleeper('answer', 0, ['response']), reads=[], writes=['response'])
+        graph.add_node('respond', _sleeper('respond', 0), reads=['response', 'language'], writes=[])
+        graph.add_reducer('tools_used')
+        graph.set_entry_point('route')
+        graph.add_edge('route', 'language')
+        graph.add_conditional_edges('route', lambda state: state['intent'], {
+            'summarize': 'summarize',
+            'question': 'answer'
+        })
+        for node in ('language', 'summarize', 'answer'):
+            graph.add_edge(node, 'respond')
+        workflow = graph.compile()
+        
+        result = await workflow.ainvoke({'intent': 'question', 'tools_used': []})
+        unrouted = await workflow.ainvoke({'intent': 'unknown', 'tools_used': []})
+        
+        assert result['tools_used'] == ['route', 'language', 'answer', 'respond']
+        assert result['response'] == 'answer:'
+        assert unrouted['tools_used'] == ['route', 'language', 'respond']
+    
+    @pytest.mark.asyncio
+    async def test_node_failure_cancels_running_nodes(self):
+        """An exception propagates and concurrent nodes are cancelled"""
+        
+        cancelled = []
+        
+        async def slow(state):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return state
+        
+        async def broken(state):
+            raise RuntimeError("boom")
+        
+        graph = WorkflowGraph("failing")
+        graph.add_node('start', _sleeper('start', 0), reads=[], writes=[])
+        graph.add_node('slow', slow, reads=[], writes=[])
+        graph.add_node('broken', broken, reads=[], writes=[])
+        graph.set_entry_point('start')
+        graph.add_edge('start', 'slow')
+        graph.add_edge('start', 'broken')
+        
+        with pytest.raises(RuntimeError):
+            await graph.compile().ainvoke({'tools_used': []})
+        assert cancelled == [True]
+
+
+def _deadline_graph():
+    graph = WorkflowGraph("deadline")
+    graph.add_node('start', _sleeper('start', 0), reads=['message'], writes=[], expected_ms=1)
+    graph.add_node('sentiment', _sleeper('sentiment', 0, ['sentiment']), reads=['message'], writes=['sentiment'],
+                   optional=True, expected_ms=200)
+    graph.add_node('answer', _sleeper('answer', 0, ['answer']), reads=['message'], writes=['answer'], expected_ms=1000)
+    graph.add_node('respond', _sleeper('respond', 0), reads=['answer', 'sentiment'], writes=[], expected_ms=50)
+    graph.add_reducer('tools_used')
+    graph.set_entry_point('start')
+    graph.add_edge('start', 'sentiment')
+    graph.add_edge('start', 'answer')
+    graph.add_edge('sentiment', 'respond')
+    graph.add_edge('answer', 'respond')
+    return graph.compile()
+
+
+class TestDeadlineShedding:
+    """Test that optional nodes are shed when the remaining budget is too small"""
+    
+    @pytest.mark.asyncio
+    async def test_optional_node_is_shed_and_its_edges_followed(self):
+        """A shed node is recorded, merges nothing, and its join still runs"""
+        
+        shed = []
+        result = await _deadline_graph().ainvoke(
+            {'message': 'hi', 'tools_used': []}, deadline=Deadline(budget_ms=150), shed=shed
+        )
+        
+        assert shed == ['sentiment']
+        assert 'sentiment' not in result
+        assert result['tools_used'] == ['start', 'answer', 'respond']
+    
+    @pytest.mark.asyncio
+    async def test_nothing_is_shed_with_enough_time_or_no_deadline(self):
+        """Optional nodes run when their time plus the required work after them fits"""
+        
+        for deadline in (Deadline(budget_ms=10000), None):
+            shed = []
+            result = await _deadline_graph().ainvoke({'message': 'hi', 'tools_used': []}, deadline=deadline, shed=shed)
+            
+            assert shed == []
+            assert result['sentiment'] == 'sentiment:'
+    
+    @pytest.mark.asyncio
+    async def test_budget_counts_required_work_after_the_node(self):
+        """In a chain, an optional node is shed if it would leave too little for the rest"""
+        
+        graph = WorkflowGraph("chain")
+        graph.add_node('enrich', _sleeper('enrich', 0, ['extra']), optional=True, expected_ms=100)
+        graph.add_node('answer', _sleeper('answer', 0), expected_ms=500)
+        graph.set_entry_point('enrich')
+        graph.add_edge('enrich', 'answer')
+        workflow = graph.compile()
+        
+        shed = []
+        result = await workflow.ainvoke({'tools_used': []}, deadline=Deadline(budget_ms=550), shed=shed)
+        
+        assert not workflow.parallel
+        assert shed == ['enrich']
+        assert result['tools_used'] == ['answer']
+    
+    def test_deadline_from_lambda_context(self):
+        """The budget is what the Lambda has left, less the reserve"""
+        
+        class Context:
+            def get_remaining_time_in_millis(self):
+                return 3000
+        
+        deadline = Deadline.from_lambda_context(Context(), reserve_ms=1000)
+        
+        assert 1900 < deadline.remaining_ms() <= 2000
+        assert deadline.allows(1500)
+        assert not deadline.allows(2500)
+        assert Deadline.from_lambda_context(None) is None
@@ -0,0 +1,155 @@
+"""
+Workflow Metrics Tests
+Tests for per-node latency, AWS call and Bedrock token accounting in workflow runs
+"""
+
+import io
+import os
+import json
+import asyncio
+import pytest
+from unittest.mock import patch
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from src.shared.async_aws import AsyncAWS
+from src.shared.connection_pool import AWSClientRegistry
+from src.shared.workflow_graph import WorkflowGraph
+from src.shared.workflow_metrics import (
+    WorkflowMetrics, WorkflowMetricsConfig, instrument_node, record_stream_chunk, record_message_usage
+)
+
+
+def _bedrock_response(text: str) -> dict:
+    payload = json.dumps({'content': [{'text': text}]}).encode('utf-8')
+    return {
+        'body': StreamingBody(io.BytesIO(payload), len(payload)),
+        'contentType': 'application/json',
+        'ResponseMetadata': {'HTTPHeaders': {
+            'x-amzn-bedrock-input-token-count': '120',
+            'x-amzn-bedrock-output-token-count': '45'
+        }}
+    }
+
+
+class TestWorkflowMetrics:
+    """Test that each node is charged with its own time, calls and tokens"""
+    
+    def setup_method(self):
+        """Registry clients behind a private I/O pool"""
+        
+        self.registry = AWSClientRegistry()
+        self.aws = AsyncAWS(max_workers=4, registry=self.registry)
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_nodes_are_charged_separately(self):
+        """Calls made on I/O threads count towards the node that awaited them"""
+        
+        sqs = self.registry.client('sqs', region_name='us-east-1')
+        bedrock = self.registry.client('bedrock-runtime', region_name='us-east-1')
+        
+        async def lookup(state):
+            await asyncio.gather(*(self.aws.call('sqs', 'list_queues', client=sqs) for _ in range(2)))
+            return state
+        
+        async def generate(state):
+            await self.aws.invoke_model('model', {'prompt': 'hi'}, client=bedrock)
+            return state
+        
+        async def respond(state):
+            return state
+        
+        graph = WorkflowGraph("metrics")
+        graph.add_node('start', respond)
+        graph.add_node('lookup', lookup)
+        graph.add_node('generate', generate)
+        graph.add_node('respond', respond)
+        graph.set_entry_point('start')
+        graph.add_edge('start', 'lookup')
+        graph.add_edge('start', 'generate')
+        graph.add_edge('lookup', 'respond')
+        graph.add_edge('generate', 'respond')
+        
+        metrics = WorkflowMetrics("metrics")
+        timings = {}
+        with Stubber(sqs) as sqs_stub, Stubber(bedrock) as bedrock_stub:
+            sqs_stub.add_response('list_queues', {'QueueUrls': []})
+            sqs_stub.add_response('list_queues', {'QueueUrls': []})
+            bedrock_stub.add_response('invoke_model', _bedrock_response("Hello"))
+            await graph.compile().ainvoke({}, timings=timings, metrics=metrics)
+        
+        summary = metrics.summary()
+        assert summary['aws_calls'] == 3
+        assert summary['nodes']['lookup'] == {
+            'ms': summary['nodes']['lookup']['ms'], 'aws_calls': 2, 'calls': {'sqs.ListQueues': 2}
+        }
+        assert summary['nodes']['generate']['calls'] == {'bedrock-runtime.InvokeModel': 1}
+        assert (summary['input_tokens'], summary['output_tokens']) == (120, 45)
+        assert summary['nodes']['respond'] == {'ms': summary['nodes']['respond']['ms'], 'aws_calls': 0}
+        assert set(timings) == {'start', 'lookup', 'generate', 'respond'}
+    
+    @pytest.mark.asyncio
+    async def test_streamed_and_langchain_token_usage(self):
+        """Invocation metrics on the last streamed chunk and LangChain usage metadata are counted"""
+        
+        class Reply:
+            usage_metadata = {'input_tokens': 30, 'output_tokens': 7}
+        
+        async def node(state):
+            record_stream_chunk({'type': 'content_block_delta'})
+            record_stream_chunk({'amazon-bedrock-invocationMetrics': {'inputTokenCount': 200, 'outputTokenCount': 80}})
+            record_message_usage(Reply())
+            return state
+        
+        metrics = WorkflowMetrics("tokens")
+        await metrics.run_node('generate', node, {})
+        
+        assert metrics.summary()['nodes']['generate']['input_tokens'] == 230
+        assert metrics.summary()['nodes']['generate']['output_tokens'] == 87
+        
+        # Outside a node nothing is charged
+        record_stream_chunk({'amazon-bedrock-invocationMetrics': {'inputTokenCount': 1, 'outputTokenCount': 1}})
+        assert metrics.summary()['input_tokens'] == 230
+    
+    @pytest.mark.asyncio
+    async def test_instrumented_nodes_report_to_the_active_run(self):
+        """Wrapped node functions are measured only inside an activated run"""
+        
+        async def slow(state):
+            await asyncio.sleep(0.02)
+            return state
+        
+        node = instrument_node('slow', slow)
+        await node({})
+        metrics = WorkflowMetrics("agent")
+        with metrics.activate():
+            await node({})
+        
+        assert list(metrics.nodes) == ['slow']
+        assert metrics.summary()['slowest_node'] == 'slow'
+        assert metrics.nodes['slow']['ms'] >= 15
+    
+    @pytest.mark.asyncio
+    async def test_runs_emit_one_record_per_node(self):
+        """Each run writes embedded-metric-format lines with the workflow and node as dimensions"""
+        
+        lines = []
+        metrics = WorkflowMetrics("chat")
+        
+        async def node(state):
+            return state
+        
+        await metrics.run_node('intent_detection', node, {})
+        with patch.object(WorkflowMetricsConfig, 'EMIT', True):
+            metrics.emit(lines.append)
+        with patch.object(WorkflowMetricsConfig, 'EMIT', False):
+            metrics.emit(lines.append)
+        
+        assert len(lines) == 1
+        record = json.loads(lines[0])
+        directive = record['_aws']['CloudWatchMetrics'][0]
+        assert directive['Dimensions'] == [['Workflow', 'Node']]
+        assert {metric['Name'] for metric in directive['Metrics']} == {'DurationMs', 'AwsCalls', 'InputTokens', 'OutputTokens'}
+        assert (record['Workflow'], record['Node'], record['AwsCalls']) == ('chat', 'intent_detection', 0)